@@ -11,56 +11,123 @@ from routes.tokens import tokens_bp
 from routes.events import events_bp
 from routes.wallet import wallet_bp
 from routes.vault import vault_bp
+from routes.jobs import jobs_bp
+from routes.trading import trading_bp
+from routes.governance import governance_bp
+from routes.search import search_bp
+from routes.admin import admin_bp
 #from routes.test import test_bp  # Add this line
+from middleware.deadline import init_request_deadlines
+from utils.serialization import init_serialization
+from middleware.compression import init_compression, get_compression_stats
+from utils.instrumentation import init_instrumentation, instrument_supabase
+from utils.request_tracer import init_request_tracing
+from utils.profiler import init_request_profiling
+from utils.resilience import get_breaker_states, CircuitOpenError, DeadlineExceeded
+from utils.rate_limit import get_limiter_states
+from utils.lifecycle import is_draining, in_flight_counts
 
 load_dotenv()
 
-app = Flask(__name__)
-CORS(app)
-
-# Supabase configuration
-url: str = os.environ.get("SUPABASE_URL")
-key: str = os.environ.get("SUPABASE_ANON_KEY")
-supabase: Client = create_client(url, key)
-
-# Make supabase available globally
-app.config['SUPABASE'] = supabase
-app.config['SECRET_KEY'] = os.environ.get("SECRET_KEY", "dev-secret-key")
-
-# Register blueprints
-app.register_blueprint(auth_bp, url_prefix='/api/auth')
-app.register_blueprint(assets_bp, url_prefix='/api')  # Add this line
-app.register_blueprint(tokens_bp, url_prefix='/api')
-app.register_blueprint(events_bp, url_prefix='/api')
-app.register_blueprint(wallet_bp, url_prefix='/api')
-app.register_blueprint(vault_bp, url_prefix='/api')
-#app.register_blueprint(test_bp, url_prefix='/api')  # Add this line
-
-@app.route('/api/health', methods=['GET'])
-def health_check():
-    return jsonify({
-        "status": "healthy", 
-        "message": "VaultHive Tokenization API is running",
-        "version": "1.0.0",
-        "endpoints": {
-            "auth": "/api/auth/*",
-            "assets": "/api/assets/*",
-            "tokens": "/api/tokens/*",
-            "events": "/api/events/*",
-            "wallets": "/api/wallets/*",  # Add this
-            "test": "/api/test/*"  # Add this
-        }
-    })
-
-@app.errorhandler(404)
-def not_found(error):
-    return jsonify({"success": False, "error": "Endpoint not found"}), 404
-
-@app.errorhandler(500)
-def internal_error(error):
-    return jsonify({"success": False, "error": "Internal server error"}), 500
+def create_supabase_client() -> Client:
+    url: str = os.environ.get("SUPABASE_URL")
+    key: str = os.environ.get("SUPABASE_ANON_KEY")
+    return instrument_supabase(create_client(url, key))
+
+def create_app() -> Flask:
+    """Build the Flask app; used by wsgi.py under gunicorn and by the dev server"""
+    app = Flask(__name__)
+    CORS(app)
+    # First, so request timings include every other hook
+    init_instrumentation(app)
+    init_request_tracing(app)
+    init_request_profiling(app)
+    init_serialization(app)
+    init_compression(app)
+
+    # Make supabase available globally
+    app.config['SUPABASE'] = create_supabase_client()
+    app.config['SECRET_KEY'] = os.environ.get("SECRET_KEY", "dev-secret-key")
+
+    # Per-request time budget shared by all upstream calls
+    init_request_deadlines(app)
+
+    # Register blueprints
+    app.register_blueprint(auth_bp, url_prefix='/api/auth')
+    app.register_blueprint(assets_bp, url_prefix='/api')  # Add this line
+    app.register_blueprint(tokens_bp, url_prefix='/api')
+    app.register_blueprint(events_bp, url_prefix='/api')
+    app.register_blueprint(wallet_bp, url_prefix='/api')
+    app.register_blueprint(vault_bp, url_prefix='/api')
+    app.register_blueprint(jobs_bp, url_prefix='/api')
+    app.register_blueprint(trading_bp, url_prefix='/api')
+    app.register_blueprint(governance_bp, url_prefix='/api')
+    app.register_blueprint(search_bp, url_prefix='/api')
+    app.register_blueprint(admin_bp, url_prefix='/api')
+    #app.register_blueprint(test_bp, url_prefix='/api')  # Add this line
+
+    @app.route('/api/health', methods=['GET'])
+    def health_check():
+        return jsonify({
+            "status": "draining" if is_draining() else "healthy",
+            "message": "VaultHive Tokenization API is running",
+            "version": "1.0.0",
+            "endpoints": {
+                "auth": "/api/auth/*",
+                "assets": "/api/assets/*",
+                "tokens": "/api/tokens/*",
+                "events": "/api/events/*",
+                "wallets": "/api/wallets/*",  # Add this
+                "jobs": "/api/jobs/*",
+                "trading": "/api/trading/*",
+                "governance": "/api/governance/*",
+                "search": "/api/search",
+                "admin": "/api/admin/*",
+                "metrics": "/metrics",
+                "test": "/api/test/*"  # Add this
+            },
+            "circuits": get_breaker_states(),
+            "rate_limits": get_limiter_states(),
+            "compression": get_compression_stats()
+        })
+
+    @app.route('/api/health/live', methods=['GET'])
+    def liveness_check():
+        # The process is up and serving; restart only if this stops answering
+        return jsonify({"status": "alive", "pid": os.getpid()})
+
+    @app.route('/api/health/ready', methods=['GET'])
+    def readiness_check():
+        # Take this worker out of rotation while it drains in-flight mints
+        ready = not is_draining()
+        return jsonify({
+            "status": "ready" if ready else "draining",
+            "pid": os.getpid(),
+            "in_flight": in_flight_counts(),
+            "circuits": get_breaker_states()
+        }), 200 if ready else 503
+
+    @app.errorhandler(404)
+    def not_found(error):
+        return jsonify({"success": False, "error": "Endpoint not found"}), 404
+
+    @app.errorhandler(CircuitOpenError)
+    def circuit_open(error):
+        return jsonify({"success": False, "error": str(error)}), 503
+
+    @app.errorhandler(DeadlineExceeded)
+    def deadline_exceeded(error):
+        return jsonify({"success": False, "error": str(error)}), 504
+
+    @app.errorhandler(500)
+    def internal_error(error):
+        return jsonify({"success": False, "error": "Internal server error"}), 500
+
+    return app
 
 if __name__ == '__main__':
+    # Development server only; production runs gunicorn -c gunicorn.conf.py wsgi:app
+    app = create_app()
     print("🚀 Starting VaultHive API...")
     print("📍 Health check: http://localhost:5000/api/health")
     print("🔐 Auth endpoints: http://localhost:5000/api/auth/*")
@@ -69,4 +136,4 @@ if __name__ == '__main__':
     print("🎉 Event endpoints: http://localhost:5000/api/events/*")
     print("💰 Wallet endpoints: http://localhost:5000/api/wallets/*")  # Add this
     print("🧪 Test endpoints: http://localhost:5000/api/test/*")  # Add this
-    app.run(debug=True, port=5000)
\ No newline at end of file
+    app.run(debug=os.environ.get("FLASK_DEBUG", "True").lower() == "true", port=5000)
@@ -0,0 +1,631 @@
+"""In-memory stand-in for Supabase (PostgREST + GoTrue auth), for offline benchmarks.
+
+Tables live in process memory and are served in the PostgREST dialect the
+supabase client speaks: column filters (eq, neq, gt, gte, lt, lte, in, is,
+like, ilike, cs, not., or=), order, limit/offset and Range, exact counts,
+single-object responses, embedded resources, insert/upsert/update/delete,
+and Python ports of the SQL functions the app calls through rpc(). Bearer
+tokens of the form ``bench-<user id>`` authenticate as that user.
+
+Latency and errors can be injected so a run models a remote database:
+
+    python -m benchmarks.fake_supabase --port 54321 --latency-ms 3 --error-rate 0.01
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from werkzeug.serving import WSGIRequestHandler, make_server
+from werkzeug.wrappers import Request, Response
+
+# A syntactically valid key for create_client(); the fake never checks it
+BENCH_SUPABASE_KEY = 'eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoiYW5vbiJ9.bench'
+BENCH_TOKEN_PREFIX = 'bench-'
+
+# Tables keyed on something other than id (the on_conflict default for upserts)
+PRIMARY_KEYS = {
+    'share_inventory': ('token_id',),
+    'vault_balances': ('user_id',),
+    'portfolio_summaries': ('user_id',),
+    'portfolio_positions': ('user_id', 'asset_id'),
+    'transaction_confirmations': ('signature',),
+}
+# BIGSERIAL ids; every other table gets a UUID
+SERIAL_TABLES = ('vault_ledger_entries', 'vault_ledger_checkpoints')
+# Identity columns the database fills on insert
+IDENTITY_COLUMNS = {'asset_transactions': 'log_seq'}
+# Embeds whose foreign key isn't <target>_id (PostgREST reads these from the schema)
+FOREIGN_KEYS = {
+    ('assets', 'users'): 'owner_id',
+    ('tokens', 'users'): 'owner_id',
+}
+QUERY_KEYWORDS = ('select', 'order', 'limit', 'offset', 'on_conflict', 'columns', 'or', 'and')
+
+class PostgrestError(Exception):
+    def __init__(self, status: int, code: str, message: str, details: str = None):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+        self.details = details
+
+    def body(self) -> Dict[str, Any]:
+        return {'code': self.code, 'message': str(self), 'details': self.details, 'hint': None}
+
+def _singular(name: str) -> str:
+    return name[:-1] if name.endswith('s') else name
+
+def _split_top_level(text: str) -> List[str]:
+    """Split on commas outside parentheses and double quotes"""
+    parts, depth, quoted, current = [], 0, False, []
+    for char in text:
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char == '(':
+            depth += 1
+        elif not quoted and char == ')':
+            depth -= 1
+        elif not quoted and char == ',' and depth == 0:
+            parts.append(''.join(current))
+            current = []
+            continue
+        current.append(char)
+    if current:
+        parts.append(''.join(current))
+    return [part.strip() for part in parts if part.strip()]
+
+def _parse_select(select: str) -> Tuple[Optional[List[Tuple[str, str]]], List[Dict[str, Any]]]:
+    """Columns as (alias, column), or None for *, and the embedded resources"""
+    columns: Optional[List[Tuple[str, str]]] = []
+    embeds = []
+    for item in _split_top_level(select or '*'):
+        if '(' in item:
+            head, sub = item.split('(', 1)
+            alias, _, target = head.rpartition(':')
+            target, _, hint = target.partition('!')
+            embeds.append({
+                'alias': alias or target, 'table': target, 'hint': hint,
+                'inner': hint == 'inner', 'select': sub[:-1]
+            })
+        elif item == '*':
+            columns = None
+        elif columns is not None:
+            alias, _, column = item.rpartition(':')
+            column = column.split('::')[0]
+            columns.append((alias or column, column))
+    return columns, embeds
+
+def _coerce(stored: Any, raw: str) -> Any:
+    if isinstance(stored, bool):
+        return raw.lower() == 'true'
+    if isinstance(stored, (int, float)):
+        try:
+            return float(raw)
+        except ValueError:
+            return raw
+    return raw
+
+def _like(pattern: str, ignore_case: bool) -> re.Pattern:
+    regex = ''.join('.*' if c in '*%' else '.' if c == '_' else re.escape(c) for c in pattern)
+    return re.compile(f'^{regex}$', re.IGNORECASE | re.DOTALL if ignore_case else re.DOTALL)
+
+def _matches(stored: Any, op: str, raw: str) -> bool:
+    if op == 'is':
+        raw = raw.lower()
+        if raw == 'null':
+            return stored is None
+        return stored is (raw == 'true') if raw in ('true', 'false') else False
+    if stored is None:
+        return False
+    if op == 'in':
+        values = [value.strip('"') for value in _split_top_level(raw.strip('()'))]
+        return any(stored == _coerce(stored, value) for value in values)
+    if op in ('like', 'ilike'):
+        return bool(_like(raw, op == 'ilike').match(str(stored)))
+    if op == 'cs':
+        wanted = json.loads(raw) if raw.startswith('[') else _split_top_level(raw.strip('{}'))
+        return isinstance(stored, list) and all(value in stored for value in wanted)
+    value = _coerce(stored, raw)
+    try:
+        if op == 'eq':
+            return stored == value
+        if op == 'neq':
+            return stored != value
+        if op == 'gt':
+            return stored > value
+        if op == 'gte':
+            return stored >= value
+        if op == 'lt':
+            return stored < value
+        if op == 'lte':
+            return stored <= value
+    except TypeError:
+        return False
+    raise PostgrestError(400, 'PGRST100', f'"{op}" is not a supported operator')
+
+def _parse_condition(column: str, expression: str) -> Tuple[str, str, str, bool]:
+    negate = expression.startswith('not.')
+    if negate:
+        expression = expression[4:]
+    op, _, value = expression.partition('.')
+    return column, op, value, negate
+
+def _parse_logic(expression: str) -> List[Tuple[str, str, str, bool]]:
+    """or=(a.eq.1,b.gt.2) into conditions"""
+    conditions = []
+    for part in _split_top_level(expression.strip('()')):
+        column, _, rest = part.partition('.')
+        conditions.append(_parse_condition(column, rest))
+    return conditions
+
+def _test(row: Dict[str, Any], condition: Tuple[str, str, str, bool]) -> bool:
+    column, op, value, negate = condition
+    return _matches(row.get(column), op, value) != negate
+
+def _sort_key(value: Any):
+    # NULLs sort last ascending (and so first descending), as in Postgres
+    if value is None:
+        return (1, 0, '')
+    if isinstance(value, bool):
+        return (0, 0, int(value))
+    if isinstance(value, (int, float)):
+        return (0, 0, value)
+    return (0, 1, str(value))
+
+class FakeDatabase:
+    """Tables as lists of rows, indexed on their primary key for embeds and point lookups"""
+
+    def __init__(self):
+        self.tables: Dict[str, List[Dict[str, Any]]] = {}
+        self._ids: Dict[str, Dict[Any, Dict[str, Any]]] = {}
+        self._serials: Dict[str, int] = {}
+        self.lock = threading.RLock()
+        self.functions: Dict[str, Callable[..., Any]] = dict(RPC_FUNCTIONS)
+
+    def table(self, name: str) -> List[Dict[str, Any]]:
+        if name not in self.tables:
+            self.tables[name] = []
+            self._ids[name] = {}
+        return self.tables[name]
+
+    def load(self, name: str, rows: List[Dict[str, Any]]):
+        """Seed rows, filling ids and created_at the way inserts do"""
+        with self.lock:
+            for row in rows:
+                self._add(name, dict(row))
+
+    def get(self, name: str, key: Any) -> Optional[Dict[str, Any]]:
+        """Row by primary key (single-column keys only)"""
+        self.table(name)
+        return self._ids[name].get(key)
+
+    @staticmethod
+    def _index_column(name: str) -> Optional[str]:
+        key = PRIMARY_KEYS.get(name, ('id',))
+        return key[0] if len(key) == 1 else None
+
+    def _add(self, name: str, row: Dict[str, Any]) -> Dict[str, Any]:
+        rows = self.table(name)
+        if 'id' not in row and PRIMARY_KEYS.get(name, ('id',)) == ('id',):
+            if name in SERIAL_TABLES:
+                self._serials[name] = self._serials.get(name, 0) + 1
+                row['id'] = self._serials[name]
+            else:
+                row['id'] = str(uuid.uuid4())
+        elif name in SERIAL_TABLES and isinstance(row.get('id'), int):
+            self._serials[name] = max(self._serials.get(name, 0), row['id'])
+        row.setdefault('created_at', datetime.now().isoformat())
+        if name in IDENTITY_COLUMNS:
+            column = IDENTITY_COLUMNS[name]
+            key = f"{name}.{column}"
+            self._serials[key] = self._serials.get(key, 0) + 1
+            row[column] = self._serials[key]
+        rows.append(row)
+        column = self._index_column(name)
+        if column in row:
+            self._ids[name][row[column]] = row
+        return row
+
+    def _remove(self, name: str, doomed: List[Dict[str, Any]]):
+        doomed_ids = {id(row) for row in doomed}
+        self.tables[name] = [row for row in self.table(name) if id(row) not in doomed_ids]
+        column = self._index_column(name)
+        for row in doomed:
+            self._ids[name].pop(row.get(column), None)
+
+    def _find(self, name: str, conditions: List, any_of: List) -> List[Dict[str, Any]]:
+        # Point lookups by primary key skip the scan
+        for column, op, value, negate in conditions:
+            if column == self._index_column(name) and op == 'eq' and not negate:
+                row = self.get(name, value)
+                if row is None and value.isdigit():
+                    row = self.get(name, int(value))
+                candidates = [row] if row is not None else []
+                break
+        else:
+            candidates = self.table(name)
+        return [row for row in candidates
+                if all(_test(row, c) for c in conditions) and (not any_of or any(_test(row, c) for c in any_of))]
+
+    def _embed(self, row: Dict[str, Any], source: str, embed: Dict[str, Any]):
+        target = embed['table']
+        fk = embed['hint'] if embed['hint'] in row else FOREIGN_KEYS.get((source, target))
+        if fk is None:
+            singular = _singular(target)
+            fk = next((c for c in row if c == f'{singular}_id' or c.endswith(f'_{singular}_id')), None)
+        if fk is not None:
+            referenced = self.get(target, row.get(fk))
+            return self._project(referenced, target, embed['select']) if referenced else None
+        # One-to-many: rows of the target that point back at this row
+        back = FOREIGN_KEYS.get((target, source)) or f'{_singular(source)}_id'
+        return [self._project(child, target, embed['select'])
+                for child in self.table(target) if child.get(back) == row.get('id')]
+
+    def _project(self, row: Dict[str, Any], name: str, select: str) -> Dict[str, Any]:
+        columns, embeds = _parse_select(select)
+        projected = dict(row) if columns is None else {alias: row.get(column) for alias, column in columns}
+        for embed in embeds:
+            projected[embed['alias']] = self._embed(row, name, embed)
+        return projected
+
+    def select(self, name: str, params: List[Tuple[str, str]], offset: int = 0,
+               limit: Optional[int] = None) -> Tuple[List[Dict[str, Any]], int, int]:
+        """Matching rows (projected), the total before paging and the offset used"""
+        conditions, any_of = self._conditions(params)
+        values = dict(params)
+        _, embeds = _parse_select(values.get('select', '*'))
+        with self.lock:
+            rows = self._find(name, conditions, any_of)
+            for ordering in reversed(values.get('order', '').split(',') if values.get('order') else []):
+                column, *modifiers = ordering.split('.')
+                descending = 'desc' in modifiers
+                rows = sorted(rows, key=lambda row: _sort_key(row.get(column)), reverse=descending)
+            if any(embed['inner'] for embed in embeds):
+                rows = [row for row in rows if all(
+                    self._embed(row, name, embed) for embed in embeds if embed['inner'])]
+            total = len(rows)
+            offset = int(values.get('offset', offset))
+            if 'limit' in values:
+                limit = min(int(values['limit']), limit) if limit is not None else int(values['limit'])
+            page = rows[offset:offset + limit if limit is not None else None]
+            return [self._project(row, name, values.get('select', '*')) for row in page], total, offset
+
+    def insert(self, name: str, body: Any, upsert: bool = False, ignore_duplicates: bool = False,
+               on_conflict: str = None) -> List[Dict[str, Any]]:
+        rows = body if isinstance(body, list) else [body]
+        key = tuple(on_conflict.split(',')) if on_conflict else PRIMARY_KEYS.get(name, ('id',))
+        written = []
+        with self.lock:
+            if key == (self._index_column(name),):
+                existing = {(value,): row for value, row in self._ids.get(name, {}).items()}
+            else:
+                existing = {tuple(row.get(column) for column in key): row for row in self.table(name)}
+            for row in rows:
+                identity = tuple(row.get(column) for column in key)
+                current = existing.get(identity) if None not in identity else None
+                if current is not None:
+                    if ignore_duplicates:
+                        continue
+                    if not upsert:
+                        raise PostgrestError(409, '23505', f'duplicate key value violates unique constraint "{name}_pkey"',
+                                             f"Key ({', '.join(key)})=({', '.join(map(str, identity))}) already exists.")
+                    current.update(row)
+                    written.append(dict(current))
+                else:
+                    added = self._add(name, dict(row))
+                    existing[tuple(added.get(column) for column in key)] = added
+                    written.append(dict(added))
+        return written
+
+    def update(self, name: str, params: List[Tuple[str, str]], values: Dict[str, Any]) -> List[Dict[str, Any]]:
+        conditions, any_of = self._conditions(params)
+        with self.lock:
+            rows = self._find(name, conditions, any_of)
+            for row in rows:
+                row.update(values)
+            return [dict(row) for row in rows]
+
+    def delete(self, name: str, params: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        conditions, any_of = self._conditions(params)
+        with self.lock:
+            rows = self._find(name, conditions, any_of)
+            self._remove(name, rows)
+            return rows
+
+    def call(self, fn: str, params: Dict[str, Any]) -> Any:
+        function = self.functions.get(fn)
+        if function is None:
+            raise PostgrestError(404, 'PGRST202', f"Could not find the function public.{fn} in the schema cache")
+        with self.lock:
+            return function(self, **params)
+
+    @staticmethod
+    def _conditions(params: List[Tuple[str, str]]):
+        conditions, any_of = [], []
+        for key, value in params:
+            if key == 'or':
+                any_of.extend(_parse_logic(value))
+            elif key == 'and':
+                conditions.extend(_parse_logic(value))
+            elif key not in QUERY_KEYWORDS and '.' not in key:
+                # Filters on embedded columns (assets.owner_id=...) aren't supported
+                conditions.append(_parse_condition(key, value))
+        return conditions, any_of
+
+# Python ports of the SQL functions in migrations/, same arguments and results
+
+def _inventory_row(db: FakeDatabase, token_id: str) -> Optional[Dict[str, Any]]:
+    row = db.get('share_inventory', token_id)
+    if row is None:
+        token = db.get('tokens', token_id)
+        if token is None:
+            return None
+        # inventory_seed(): the whole supply is available until sold
+        supply = token.get('total_supply') or 0
+        row = db._add('share_inventory', {
+            'token_id': token_id, 'total_shares': supply, 'available_shares': supply,
+            'reserved_shares': 0, 'sold_shares': 0
+        })
+    return row
+
+def inventory_reserve_batch(db: FakeDatabase, p_token_id: str, p_requests: List[Dict[str, Any]],
+                            p_ttl_seconds: int = 300) -> Dict[str, Any]:
+    row = _inventory_row(db, p_token_id)
+    if row is None:
+        return {'available': None, 'reservations': [], 'missing': True}
+    expires_at = (datetime.now() + timedelta(seconds=p_ttl_seconds)).isoformat()
+    reservations = []
+    for index, request in enumerate(p_requests):
+        shares = int(request['shares'])
+        if 0 < shares <= row['available_shares']:
+            reservation = db._add('share_reservations', {
+                'token_id': p_token_id, 'buyer_ref': request.get('buyer_ref'), 'shares': shares,
+                'status': 'held', 'expires_at': expires_at
+            })
+            row['available_shares'] -= shares
+            row['reserved_shares'] += shares
+            reservations.append({'index': index, 'id': reservation['id'], 'expires_at': expires_at})
+    return {'available': row['available_shares'], 'reservations': reservations}
+
+def _finish_reservation(db: FakeDatabase, reservation_id: str, status: str) -> bool:
+    reservation = db.get('share_reservations', reservation_id)
+    if reservation is None or reservation['status'] != 'held':
+        return False
+    if status == 'confirmed' and reservation['expires_at'] <= datetime.now().isoformat():
+        return False
+    row = _inventory_row(db, reservation['token_id'])
+    row['reserved_shares'] -= reservation['shares']
+    if status == 'confirmed':
+        row['sold_shares'] += reservation['shares']
+    else:
+        row['available_shares'] += reservation['shares']
+    reservation['status'] = status
+    return True
+
+def inventory_confirm(db: FakeDatabase, p_reservation_id: str) -> bool:
+    return _finish_reservation(db, p_reservation_id, 'confirmed')
+
+def inventory_confirm_late(db: FakeDatabase, p_reservation_id: str) -> Optional[int]:
+    reservation = db.get('share_reservations', p_reservation_id)
+    if reservation is None or reservation['status'] not in ('held', 'expired'):
+        return None
+    row = _inventory_row(db, reservation['token_id'])
+    if reservation['status'] == 'held':
+        taken = reservation['shares']
+        row['reserved_shares'] -= taken
+    else:
+        taken = min(row['available_shares'], reservation['shares'])
+        row['available_shares'] -= taken
+    row['sold_shares'] += taken
+    reservation['status'] = 'confirmed'
+    return reservation['shares'] - taken
+
+def inventory_release(db: FakeDatabase, p_reservation_id: str) -> bool:
+    return _finish_reservation(db, p_reservation_id, 'released')
+
+def inventory_expire_reservations(db: FakeDatabase, p_batch_size: int = 500) -> int:
+    now = datetime.now().isoformat()
+    expired = [r for r in db.table('share_reservations') if r['status'] == 'held' and r['expires_at'] <= now]
+    for reservation in expired[:p_batch_size]:
+        _finish_reservation(db, reservation['id'], 'expired')
+    return len(expired[:p_batch_size])
+
+def vault_ledger_append(db: FakeDatabase, p_user_id: str, p_amount: float, p_entry_type: str,
+                        p_reference_id: str = None, p_idempotency_key: str = None) -> List[Dict[str, Any]]:
+    balance = db.get('vault_balances', p_user_id)
+    if balance is None:
+        balance = db._add('vault_balances', {'user_id': p_user_id, 'balance': 0, 'total_earned': 0})
+
+    if p_idempotency_key is not None:
+        duplicate = next((e for e in db.table('vault_ledger_entries') if e.get('idempotency_key') == p_idempotency_key), None)
+        if duplicate is not None:
+            return [{'entry_id': duplicate['id'], 'balance': balance['balance'],
+                     'total_earned': balance['total_earned'], 'duplicate': True}]
+
+    new_balance = (balance['balance'] or 0) + p_amount
+    if new_balance < 0:
+        raise PostgrestError(400, 'P0001', 'Insufficient VAULT balance')
+    entry = db._add('vault_ledger_entries', {
+        'user_id': p_user_id, 'amount': p_amount, 'entry_type': p_entry_type, 'reference_id': p_reference_id,
+        'idempotency_key': p_idempotency_key, 'balance_after': new_balance
+    })
+    balance.update({
+        'balance': new_balance, 'total_earned': (balance['total_earned'] or 0) + max(p_amount, 0),
+        'last_entry_id': entry['id'], 'updated_at': datetime.now().isoformat()
+    })
+    return [{'entry_id': entry['id'], 'balance': new_balance, 'total_earned': balance['total_earned'], 'duplicate': False}]
+
+def claim_mint_jobs(db: FakeDatabase, batch_size: int = 10, worker_id: str = None,
+                    lock_timeout_seconds: int = 300) -> List[Dict[str, Any]]:
+    now = datetime.now()
+    stale = (now - timedelta(seconds=lock_timeout_seconds)).isoformat()
+    now = now.isoformat()
+    claimed = [job for job in db.table('mint_jobs')
+               if (job['status'] == 'queued' and job.get('run_after', now) <= now)
+               or (job['status'] in ('running', 'minted') and (job.get('locked_at') or now) < stale)][:batch_size]
+    for job in claimed:
+        job.update({'status': 'running', 'locked_by': worker_id, 'locked_at': now,
+                    'attempts': job.get('attempts', 0) + 1})
+    return [dict(job) for job in claimed]
+
+SIGNATURE_COLUMNS = (('tokens', 'creation_tx'), ('tokens', 'mint_tx'), ('asset_transactions', 'asset_mint_tx'),
+                     ('asset_transactions', 'vault_reward_tx'), ('property_purchases', 'mint_tx'))
+SIGNATURE_PATTERN = re.compile(r'^[1-9A-HJ-NP-Za-km-z]{64,88}$')
+
+def untracked_signatures(db: FakeDatabase, batch_size: int = 1000) -> List[Dict[str, Any]]:
+    tracked = {row['signature'] for row in db.table('transaction_confirmations')}
+    untracked = []
+    for table, column in SIGNATURE_COLUMNS:
+        for row in db.table(table):
+            signature = row.get(column)
+            if signature and SIGNATURE_PATTERN.match(signature) and signature not in tracked:
+                untracked.append({'signature': signature, 'source_table': table,
+                                  'source_id': row['id'], 'source_column': column})
+                if len(untracked) == batch_size:
+                    return untracked
+    return untracked
+
+RPC_FUNCTIONS = {
+    'inventory_reserve_batch': inventory_reserve_batch,
+    'inventory_confirm': inventory_confirm,
+    'inventory_confirm_late': inventory_confirm_late,
+    'inventory_release': inventory_release,
+    'inventory_expire_reservations': inventory_expire_reservations,
+    'vault_ledger_append': vault_ledger_append,
+    'claim_mint_jobs': claim_mint_jobs,
+    'untracked_signatures': untracked_signatures,
+}
+
+class QuietRequestHandler(WSGIRequestHandler):
+    """No access log line per request; the benchmark makes thousands"""
+
+    def log_request(self, *args, **kwargs):
+        pass
+
+class FakeSupabaseServer:
+    """Serves a FakeDatabase at /rest/v1 and /auth/v1 on a background thread"""
+
+    def __init__(self, db: FakeDatabase = None, host: str = '127.0.0.1', port: int = 0,
+                 latency_ms: float = 0.0, jitter_ms: float = 0.0, error_rate: float = 0.0, seed: int = None):
+        self.db = db or FakeDatabase()
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.requests = 0
+        self._random = random.Random(seed)
+        self._server = make_server(host, port, self._wsgi, threaded=True, request_handler=QuietRequestHandler)
+        self.url = f"http://{host}:{self._server.server_port}"
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> 'FakeSupabaseServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, name='fake-supabase', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+
+    def _wsgi(self, environ, start_response):
+        request = Request(environ)
+        self.requests += 1
+        delay = self.latency_ms + (self._random.uniform(0, self.jitter_ms) if self.jitter_ms else 0)
+        if delay:
+            time.sleep(delay / 1000)
+        if self.error_rate and self._random.random() < self.error_rate:
+            response = self._json({'code': 'PGRST000', 'message': 'injected failure', 'details': None, 'hint': None}, 503)
+        else:
+            try:
+                response = self._route(request)
+            except PostgrestError as e:
+                response = self._json(e.body(), e.status)
+        return response(environ, start_response)
+
+    @staticmethod
+    def _json(body: Any, status: int = 200, headers: Dict[str, str] = None) -> Response:
+        return Response(json.dumps(body, default=str), status=status, headers=headers,
+                        content_type='application/json; charset=utf-8')
+
+    def _route(self, request: Request) -> Response:
+        path = request.path
+        if path.startswith('/auth/v1/user'):
+            return self._auth_user(request)
+        if path.startswith('/rest/v1/rpc/'):
+            return self._json(self.db.call(path[len('/rest/v1/rpc/'):], request.get_json(silent=True) or {}))
+        if path.startswith('/rest/v1/'):
+            return self._table(request, path[len('/rest/v1/'):])
+        return self._json({'message': 'not found'}, 404)
+
+    def _auth_user(self, request: Request) -> Response:
+        token = request.headers.get('Authorization', '').replace('Bearer ', '', 1)
+        user = self.db.get('users', token[len(BENCH_TOKEN_PREFIX):]) if token.startswith(BENCH_TOKEN_PREFIX) else None
+        if user is None:
+            return self._json({'code': 401, 'msg': 'invalid JWT'}, 401)
+        return self._json({
+            'id': user['id'], 'aud': 'authenticated', 'role': 'authenticated', 'email': user.get('email'),
+            'app_metadata': {'provider': 'email'}, 'user_metadata': {}, 'identities': [],
+            'created_at': user.get('created_at'), 'updated_at': user.get('created_at')
+        })
+
+    def _table(self, request: Request, name: str) -> Response:
+        params = list(request.args.items(multi=True))
+        prefer = request.headers.get('Prefer', '')
+        returning = 'return=minimal' not in prefer
+
+        if request.method in ('GET', 'HEAD'):
+            offset, limit = 0, None
+            if request.headers.get('Range'):
+                start, _, end = request.headers['Range'].partition('-')
+                offset = int(start)
+                limit = int(end) - offset + 1 if end else None
+            rows, total, offset = self.db.select(name, params, offset, limit)
+            headers = {}
+            if 'count=' in prefer:
+                headers['Content-Range'] = f"{offset}-{offset + len(rows) - 1}/{total}" if rows else f"*/{total}"
+            if 'vnd.pgrst.object' in request.headers.get('Accept', ''):
+                if len(rows) != 1:
+                    raise PostgrestError(406, 'PGRST116', 'JSON object requested, multiple (or no) rows returned',
+                                         f"Results contain {len(rows)} rows, application/vnd.pgrst.object+json requires 1 row")
+                return self._json(rows[0], 200, headers)
+            return self._json([] if request.method == 'HEAD' else rows, 200, headers)
+
+        if request.method == 'POST':
+            rows = self.db.insert(
+                name, request.get_json(), upsert='resolution=merge-duplicates' in prefer,
+                ignore_duplicates='resolution=ignore-duplicates' in prefer,
+                on_conflict=request.args.get('on_conflict')
+            )
+            return self._json(rows if returning else [], 201)
+        if request.method == 'PATCH':
+            return self._json(self.db.update(name, params, request.get_json() or {}) if returning else [], 200)
+        if request.method == 'DELETE':
+            return self._json(self.db.delete(name, params) if returning else [], 200)
+        return self._json({'message': f'{request.method} not supported'}, 405)
+
+def main():
+    parser = argparse.ArgumentParser(description="In-memory Supabase stand-in for offline benchmarks")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=54321)
+    parser.add_argument('--latency-ms', type=float, default=0.0, help="Added to every request")
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help="Extra uniform random latency")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of requests answered with a 503")
+    parser.add_argument('--seed-data', action='store_true', help="Load the benchmark data set (benchmarks.scenarios)")
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--assets', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    db = FakeDatabase()
+    if args.seed_data:
+        from benchmarks.scenarios import seed_database
+        seed_database(db, users=args.users, assets=args.assets, seed=args.seed)
+    server = FakeSupabaseServer(db, args.host, args.port, args.latency_ms, args.jitter_ms, args.error_rate, args.seed)
+    print(f"🧪 Fake Supabase on {server.url} ({sum(len(rows) for rows in db.tables.values())} rows)")
+    server._server.serve_forever()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+"""Share inventory contention benchmark.
+
+Many buyers hit one token at once, against an in-memory store that
+simulates the database round trip and row lock. Compares the old
+read-check-write update, direct per-buyer reservations and the per-token
+admission queue, and reports throughput, latency percentiles and oversell.
+
+    python -m benchmarks.inventory_contention --buyers 200 --purchases 5000 --supply 3000
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from services.inventory_service import InventoryService, InMemoryInventoryStore, InsufficientShares
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * pct / 100), len(ordered) - 1)]
+
+class NaiveInventory:
+    """The pre-reservation flow: read available_shares, check in Python, write back"""
+
+    def __init__(self, supply: int, latency: float):
+        self.available = supply
+        self.sold = 0
+        self.latency = latency
+        self._lock = threading.Lock()
+
+    def buy(self, shares: int) -> bool:
+        time.sleep(self.latency)
+        available = self.available  # SELECT available_shares
+        if shares > available:
+            return False
+        time.sleep(self.latency)  # payment + mint happen between read and write
+        with self._lock:
+            self.available = available - shares  # UPDATE ... SET available_shares = <stale value>
+            self.sold += shares
+        return True
+
+def run_naive(args):
+    inventory = NaiveInventory(args.supply, args.latency_ms / 1000)
+    latencies = []
+    lock = threading.Lock()
+
+    def purchase(_):
+        started = time.perf_counter()
+        inventory.buy(args.shares_per_buy)
+        with lock:
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.buyers) as pool:
+        list(pool.map(purchase, range(args.purchases)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        'mode': 'naive',
+        'elapsed_s': round(elapsed, 3),
+        'purchases_per_s': round(args.purchases / elapsed, 1),
+        'sold': inventory.sold,
+        'oversold': max(inventory.sold - args.supply, 0),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+        'db_calls': args.purchases * 2
+    }
+
+def run_reservations(args, use_admission_queue: bool):
+    store = InMemoryInventoryStore(latency=args.latency_ms / 1000)
+    service = InventoryService(store=store, use_admission_queue=use_admission_queue)
+    token_id = str(uuid.uuid4())
+    service.ensure_inventory(token_id, args.supply)
+
+    latencies = []
+    outcomes = {'confirmed': 0, 'released': 0, 'rejected': 0}
+    lock = threading.Lock()
+    rng = random.Random(args.seed)
+
+    def purchase(_):
+        started = time.perf_counter()
+        try:
+            reservation = service.reserve(token_id, args.shares_per_buy, 'buyer')
+        except InsufficientShares:
+            outcome = 'rejected'
+        else:
+            with lock:
+                payment_failed = rng.random() < args.payment_failure_rate
+            if payment_failed:
+                service.release(reservation)
+                outcome = 'released'
+            else:
+                service.confirm(reservation)
+                outcome = 'confirmed'
+        with lock:
+            latencies.append(time.perf_counter() - started)
+            outcomes[outcome] += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.buyers) as pool:
+        list(pool.map(purchase, range(args.purchases)))
+    elapsed = time.perf_counter() - started
+
+    row = store.get_inventory(token_id)
+    consistent = row['available_shares'] + row['reserved_shares'] + row['sold_shares'] == row['total_shares']
+
+    return {
+        'mode': 'queued' if use_admission_queue else 'direct',
+        'elapsed_s': round(elapsed, 3),
+        'purchases_per_s': round(args.purchases / elapsed, 1),
+        'sold': row['sold_shares'],
+        'oversold': max(row['sold_shares'] - args.supply, 0),
+        'consistent': consistent,
+        **outcomes,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+        'reserve_calls': store.calls
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Share inventory contention benchmark")
+    parser.add_argument('--mode', choices=['naive', 'direct', 'queued', 'all'], default='all')
+    parser.add_argument('--buyers', type=int, default=200, help="Concurrent buyer threads")
+    parser.add_argument('--purchases', type=int, default=5000)
+    parser.add_argument('--supply', type=int, default=3000)
+    parser.add_argument('--shares-per-buy', type=int, default=1)
+    parser.add_argument('--latency-ms', type=float, default=2.0, help="Simulated database round trip")
+    parser.add_argument('--payment-failure-rate', type=float, default=0.05)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', action='store_true', help="Print results as JSON")
+    args = parser.parse_args()
+
+    modes = ['naive', 'direct', 'queued'] if args.mode == 'all' else [args.mode]
+    results = []
+    for mode in modes:
+        if mode == 'naive':
+            results.append(run_naive(args))
+        else:
+            results.append(run_reservations(args, use_admission_queue=(mode == 'queued')))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    for result in results:
+        print(f"{result['mode']:>7}: {result['purchases_per_s']:>8} purchases/s | "
+              f"p50 {result['p50_ms']}ms p95 {result['p95_ms']}ms p99 {result['p99_ms']}ms | "
+              f"sold {result['sold']} oversold {result['oversold']}")
+
+if __name__ == '__main__':
+    main()
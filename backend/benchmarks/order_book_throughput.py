@@ -0,0 +1,130 @@
+"""Order book matching throughput benchmark.
+
+Feeds a random order flow (limit orders around a drifting mid price, a
+share of market orders, cancels and replaces) straight into one OrderBook
+and reports orders per second, per-order matching latency and fill counts.
+No database is involved: this is the in-process matching cost only.
+
+    python -m benchmarks.order_book_throughput --orders 200000
+"""
+import argparse
+import json
+import random
+import time
+
+from services.order_book import OrderBook, Order, OrderRejected, SIDE_BUY, SIDE_SELL, ORDER_LIMIT, ORDER_MARKET
+
+from benchmarks.inventory_contention import percentile
+
+def generate_flow(args):
+    """Pre-built list of actions so generation isn't timed"""
+    rng = random.Random(args.seed)
+    wallets = [f"wallet_{i}" for i in range(args.wallets)]
+    mid = args.mid_price
+    flow = []
+    for _ in range(args.orders):
+        mid = max(mid + rng.choice((-1, 0, 0, 1)), args.spread * 2)
+        roll = rng.random()
+        if roll < args.cancel_rate:
+            flow.append(('cancel', None))
+        elif roll < args.cancel_rate + args.replace_rate:
+            flow.append(('replace', rng.randint(-args.spread, args.spread)))
+        else:
+            side = rng.choice((SIDE_BUY, SIDE_SELL))
+            market = rng.random() < args.market_rate
+            offset = rng.randint(-args.spread, args.spread)
+            price = None if market else (mid - offset if side == SIDE_BUY else mid + offset)
+            flow.append(('order', (side, ORDER_MARKET if market else ORDER_LIMIT, rng.randint(1, args.max_quantity),
+                                   rng.choice(wallets), price)))
+    return flow
+
+def run(args):
+    book = OrderBook('benchmark')
+    flow = generate_flow(args)
+    rng = random.Random(args.seed + 1)
+    resting = []
+    latencies = []
+    fills = 0
+    shares = 0
+    counts = {'order': 0, 'cancel': 0, 'replace': 0, 'rejected': 0}
+
+    started = time.perf_counter()
+    for action, payload in flow:
+        t0 = time.perf_counter()
+        if action == 'order':
+            order = Order(*payload[:4], price=payload[4])
+            result = book.submit(order)
+            if order.remaining and order.order_type == ORDER_LIMIT:
+                resting.append(order.id)
+        elif not resting:
+            continue
+        else:
+            index = rng.randrange(len(resting))
+            order_id = resting[index]
+            resting[index] = resting[-1]
+            resting.pop()
+            if action == 'cancel':
+                book.cancel(order_id)
+                result = []
+            else:
+                current = book.get_order(order_id)
+                if current is None:
+                    continue
+                try:
+                    replaced = book.replace(order_id, price=max(current.price + payload, 1))
+                except OrderRejected:
+                    counts['rejected'] += 1
+                    continue
+                result = replaced['fills']
+                if replaced['order'].remaining:
+                    resting.append(replaced['order'].id)
+        latencies.append(time.perf_counter() - t0)
+        counts[action] += 1
+        fills += len(result)
+        shares += sum(fill['quantity'] for fill in result)
+    elapsed = time.perf_counter() - started
+
+    return {
+        'actions': len(latencies),
+        **counts,
+        'elapsed_s': round(elapsed, 3),
+        'actions_per_s': round(len(latencies) / elapsed, 1),
+        'fills': fills,
+        'shares_traded': shares,
+        'open_orders': len(book.open_orders()),
+        'p50_us': round(percentile(latencies, 50) * 1e6, 2),
+        'p99_us': round(percentile(latencies, 99) * 1e6, 2),
+        'p999_us': round(percentile(latencies, 99.9) * 1e6, 2),
+        'max_us': round(max(latencies) * 1e6, 2),
+        'bid_levels': len(book._keys[SIDE_BUY]),
+        'ask_levels': len(book._keys[SIDE_SELL])
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Order book matching throughput benchmark")
+    parser.add_argument('--orders', type=int, default=200000, help="Actions to replay (orders, cancels, replaces)")
+    parser.add_argument('--wallets', type=int, default=500)
+    parser.add_argument('--mid-price', type=int, default=10000, help="Starting mid price in ticks")
+    parser.add_argument('--spread', type=int, default=50, help="Max distance from mid in ticks")
+    parser.add_argument('--max-quantity', type=int, default=100)
+    parser.add_argument('--market-rate', type=float, default=0.1)
+    parser.add_argument('--cancel-rate', type=float, default=0.2)
+    parser.add_argument('--replace-rate', type=float, default=0.05)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', action='store_true', help="Print results as JSON")
+    args = parser.parse_args()
+
+    result = run(args)
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+
+    print(f"{result['actions_per_s']} actions/s over {result['actions']} actions "
+          f"({result['order']} orders, {result['cancel']} cancels, {result['replace']} replaces)")
+    print(f"latency p50 {result['p50_us']}us p99 {result['p99_us']}us p99.9 {result['p999_us']}us "
+          f"max {result['max_us']}us")
+    print(f"{result['fills']} fills, {result['shares_traded']} shares traded, {result['open_orders']} orders resting "
+          f"on {result['bid_levels']} bid / {result['ask_levels']} ask levels")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,308 @@
+"""End-to-end API benchmark against local stand-ins for Supabase and the chains.
+
+Starts the in-memory Supabase (benchmarks.fake_supabase) and the stub
+Solana/Monad JSON-RPC node (benchmarks.stub_rpc), seeds the data set, builds
+the app in this process and drives each scenario from a thread pool. Reports
+throughput, p50/p95/p99 latency, errors and per-request dependency calls
+(from the Server-Timing header) per scenario. Nothing leaves the machine.
+
+    python -m benchmarks.run --requests 300 --concurrency 8 --output bench/HEAD.json
+    python -m benchmarks.run --scenarios marketplace,portfolio --db-latency-ms 3 --rpc-latency-ms 40
+    python -m benchmarks.run --compare bench/main.json --fail-on-regression 15
+
+With --target the requests go to a running server instead (the docker
+compose "bench" profile starts one wired to the stand-ins); the data set is
+regenerated from --seed/--users/--assets to pick ids, so they must match the
+stand-in's.
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import re
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from benchmarks.fake_supabase import BENCH_SUPABASE_KEY, FakeDatabase, FakeSupabaseServer
+from benchmarks.scenarios import SCENARIOS, BenchData, seed_database, seeded_mints
+from benchmarks.stub_rpc import StubRpcServer
+
+SERVER_TIMING_ENTRY = re.compile(r'(\w+);dur=([\d.]+)(?:;desc="(\d+) calls")?')
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * pct / 100), len(ordered) - 1)]
+
+def git_commit() -> Tuple[Optional[str], bool]:
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL, text=True).strip()
+        dirty = bool(subprocess.check_output(['git', 'status', '--porcelain', '--untracked-files=no'],
+                                             stderr=subprocess.DEVNULL, text=True).strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return None, False
+
+def parse_server_timing(header: str) -> Dict[str, Tuple[int, float]]:
+    """{'supabase': (calls, ms), ...}; 'app' is the handler's own total"""
+    return {kind: (int(calls or 0), float(ms)) for kind, ms, calls in SERVER_TIMING_ENTRY.findall(header or '')}
+
+class InProcessClient:
+    """Requests through Flask test clients, one per thread"""
+
+    def __init__(self, app):
+        self.app = app
+        self._local = threading.local()
+
+    def __call__(self, method: str, path: str, json: Any = None, headers: Dict[str, str] = None):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        response = client.open(path, method=method, json=json, headers=headers)
+        return response.status_code, dict(response.headers), response.get_json(silent=True)
+
+class HttpClient:
+    """Requests to a running server over one keep-alive connection per thread"""
+
+    def __init__(self, base_url: str, timeout: float = 30):
+        parsed = urlparse(base_url)
+        self.host, self.port = parsed.hostname, parsed.port or 80
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def __call__(self, method: str, path: str, json: Any = None, headers: Dict[str, str] = None):
+        body = None if json is None else _dumps(json)
+        headers = dict(headers or {})
+        if body is not None:
+            headers['Content-Type'] = 'application/json'
+        for attempt in (1, 2):
+            connection = getattr(self._local, 'connection', None)
+            if connection is None:
+                connection = self._local.connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            try:
+                connection.request(method, path, body=body, headers=headers)
+                response = connection.getresponse()
+                payload = response.read()
+                break
+            except (http.client.HTTPException, ConnectionError):
+                # Server closed the idle connection; reconnect once
+                connection.close()
+                self._local.connection = None
+                if attempt == 2:
+                    raise
+        try:
+            parsed = _loads(payload) if payload else None
+        except ValueError:
+            parsed = None
+        return response.status, dict(response.getheaders()), parsed
+
+# The clients take the body as json=, like Flask's test client, which shadows the module there
+def _dumps(value: Any) -> str:
+    return json.dumps(value)
+
+def _loads(payload: bytes) -> Any:
+    return json.loads(payload)
+
+def run_scenario(name: str, client, data: BenchData, requests: int, concurrency: int, warmup: int,
+                 seed: int) -> Dict[str, Any]:
+    scenario = SCENARIOS[name]
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    dependencies: Dict[str, List[float]] = {}
+    failures = {'count': 0, 'sample': None}
+    lock = threading.Lock()
+
+    def operation(index: int, record: bool = True):
+        made = []
+
+        def call(method: str, path: str, json: Any = None, headers: Dict[str, str] = None):
+            status, response_headers, body = client(method, path, json=json, headers=headers)
+            made.append((status, response_headers.get('Server-Timing'), body))
+            return status, response_headers, body
+
+        rng = random.Random(f'{seed}:{name}:{index}')
+        started = time.perf_counter()
+        error = None
+        try:
+            scenario(call, data, rng)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        elapsed = time.perf_counter() - started
+        if not record:
+            return
+
+        failed = error or next((body for status, _, body in made if status >= 400), None)
+        with lock:
+            latencies.append(elapsed)
+            for status, timing, _ in made:
+                statuses[str(status)] = statuses.get(str(status), 0) + 1
+                for kind, (calls, ms) in parse_server_timing(timing).items():
+                    totals = dependencies.setdefault(kind, [0, 0.0])
+                    totals[0] += calls
+                    totals[1] += ms
+            if failed:
+                failures['count'] += 1
+                failures['sample'] = failures['sample'] or (error or json.dumps(failed, default=str)[:300])
+
+    for index in range(warmup):
+        operation(-1 - index, record=False)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(operation, range(requests)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        'operations': requests,
+        'http_requests': sum(statuses.values()),
+        'errors': failures['count'],
+        'error_sample': failures['sample'],
+        'statuses': statuses,
+        'elapsed_s': round(elapsed, 3),
+        'throughput_ops': round(requests / elapsed, 2),
+        'mean_ms': round(sum(latencies) / len(latencies) * 1000, 2) if latencies else None,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2) if latencies else None,
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2) if latencies else None,
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2) if latencies else None,
+        # Per operation, summed over its requests
+        'dependencies': {
+            kind: {'calls': round(calls / requests, 2), 'ms': round(ms / requests, 2)}
+            for kind, (calls, ms) in sorted(dependencies.items()) if kind != 'app'
+        }
+    }
+
+def start_stand_ins(args) -> Tuple[BenchData, str, str]:
+    """Seeded fake Supabase and stub RPC node on local ports; returns the data set and their URLs"""
+    db = FakeDatabase()
+    data = seed_database(db, users=args.users, assets=args.assets, seed=args.seed)
+    supabase = FakeSupabaseServer(db, latency_ms=args.db_latency_ms, jitter_ms=args.db_jitter_ms,
+                                  error_rate=args.db_error_rate, seed=args.seed).start()
+    rpc = StubRpcServer(latency_ms=args.rpc_latency_ms, jitter_ms=args.rpc_jitter_ms, error_rate=args.rpc_error_rate,
+                        http_error_rate=args.rpc_http_error_rate, token_mints=seeded_mints(args.seed, args.assets),
+                        seed=args.seed).start()
+    print(f"🧪 Fake Supabase on {supabase.url}, stub RPC on {rpc.url} "
+          f"({sum(len(rows) for rows in db.tables.values())} rows seeded)")
+    return data, supabase.url, rpc.url
+
+def build_app(supabase_url: str, rpc_url: str):
+    """Create the app with every upstream pointed at the stand-ins (before anything reads the env)"""
+    os.environ.update({
+        'SUPABASE_URL': supabase_url,
+        'SUPABASE_ANON_KEY': BENCH_SUPABASE_KEY,
+        'SOLANA_RPC_URLS': rpc_url,
+        'MONAD_TESTNET_RPC_URL': rpc_url,
+        'COINGECKO_PRICE_URL': f"{rpc_url}/api/v3/simple/price?ids=solana&vs_currencies=usd",
+    })
+    from app import create_app
+    return create_app()
+
+def print_results(results: Dict[str, Any]):
+    for name, result in results['scenarios'].items():
+        deps = ' '.join(f"{kind} {dep['calls']}x/{dep['ms']}ms" for kind, dep in result['dependencies'].items())
+        print(f"{name:>20}: {result['throughput_ops']:>8} ops/s | p50 {result['p50_ms']}ms "
+              f"p95 {result['p95_ms']}ms p99 {result['p99_ms']}ms | errors {result['errors']}/{result['operations']}"
+              f"{' | ' + deps if deps else ''}")
+        if result['error_sample']:
+            print(f"{'':>20}  first error: {result['error_sample']}")
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], threshold_pct: float) -> List[str]:
+    """Print the change against a baseline run; returns the scenarios that regressed past threshold_pct"""
+    print(f"\nvs {(baseline.get('commit') or 'baseline')[:12]} ({baseline.get('created_at')}):")
+    regressions = []
+    for name, result in results['scenarios'].items():
+        before = baseline.get('scenarios', {}).get(name)
+        if not before:
+            print(f"{name:>20}: no baseline")
+            continue
+        changes = {}
+        for field in ('throughput_ops', 'p50_ms', 'p95_ms', 'p99_ms'):
+            if before.get(field) and result.get(field) is not None:
+                changes[field] = (result[field] - before[field]) / before[field] * 100
+        # Lower throughput or higher latency is worse
+        worst = max([-changes.get('throughput_ops', 0)] + [changes[f] for f in ('p50_ms', 'p95_ms') if f in changes])
+        regressed = worst > threshold_pct
+        if regressed:
+            regressions.append(name)
+        print(f"{name:>20}: " + ' '.join(f"{field.replace('_ms', '').replace('_ops', '')} {change:+.1f}%"
+                                         for field, change in changes.items()) + (' ⚠️ regression' if regressed else ''))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end API benchmark against local Supabase/RPC stand-ins")
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help=f"Comma-separated: {', '.join(SCENARIOS)}")
+    parser.add_argument('--requests', type=int, default=200, help="Operations per scenario")
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--warmup', type=int, default=10, help="Unrecorded operations before each scenario")
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--assets', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--db-latency-ms', type=float, default=2.0, help="Added to every Supabase request")
+    parser.add_argument('--db-jitter-ms', type=float, default=1.0)
+    parser.add_argument('--db-error-rate', type=float, default=0.0)
+    parser.add_argument('--rpc-latency-ms', type=float, default=30.0, help="Added to every JSON-RPC request")
+    parser.add_argument('--rpc-jitter-ms', type=float, default=20.0)
+    parser.add_argument('--rpc-error-rate', type=float, default=0.0, help="Fraction of calls answered with a JSON-RPC error")
+    parser.add_argument('--rpc-http-error-rate', type=float, default=0.0)
+    parser.add_argument('--target', help="Base URL of a running server to benchmark instead of an in-process app")
+    parser.add_argument('--output', help="Write results as JSON to this file")
+    parser.add_argument('--compare', help="Baseline results JSON to compare against")
+    parser.add_argument('--fail-on-regression', type=float, metavar='PCT',
+                        help="Exit 1 if any scenario's throughput or p50/p95 is this much worse than --compare")
+    parser.add_argument('--json', action='store_true', help="Print results as JSON")
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(unknown)}")
+
+    if args.target:
+        data = seed_database(FakeDatabase(), users=args.users, assets=args.assets, seed=args.seed)
+        client = HttpClient(args.target)
+    else:
+        data, supabase_url, rpc_url = start_stand_ins(args)
+        client = InProcessClient(build_app(supabase_url, rpc_url))
+
+    commit, dirty = git_commit()
+    results = {
+        'commit': commit,
+        'dirty': dirty,
+        'created_at': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'target': args.target or 'in-process',
+        'config': {key: value for key, value in vars(args).items()
+                   if key not in ('output', 'compare', 'fail_on_regression', 'json', 'target')},
+        'scenarios': {}
+    }
+    for name in names:
+        print(f"▶️ {name} ({args.requests} operations, concurrency {args.concurrency})", file=sys.stderr)
+        results['scenarios'][name] = run_scenario(name, client, data, args.requests, args.concurrency,
+                                                  args.warmup, args.seed)
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_results(results)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.fail_on_regression or 10.0)
+        if regressions and args.fail_on_regression is not None:
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
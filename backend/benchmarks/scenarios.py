@@ -0,0 +1,194 @@
+"""Benchmark data set and scenarios for benchmarks.run.
+
+seed_database() fills a FakeDatabase with users and wallets, assets and their
+share tokens, a purchase history with matching ownership, portfolio and VAULT
+rows, and an event with a swag token. Each scenario is one user-level
+operation against the API: one or more HTTP requests through ``call``.
+"""
+import random
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from benchmarks.fake_supabase import BENCH_TOKEN_PREFIX, FakeDatabase
+from benchmarks.stub_rpc import fake_pubkey
+
+CATEGORIES = ('real_estate', 'art', 'collectibles', 'vehicles', 'watches', 'wine', 'jewelry', 'miscellaneous')
+SHARES_PER_TOKEN = (100, 1000, 10000)
+SWAG_RECIPIENTS = 25
+
+# call(method, path, json=None, headers=None) -> (status, headers, body)
+Call = Callable[..., Tuple[int, Dict[str, str], Any]]
+
+class BenchData:
+    """Ids the scenarios pick from"""
+
+    def __init__(self):
+        self.users: List[Dict[str, Any]] = []
+        self.tokens: List[Dict[str, Any]] = []
+        self.event_id: Optional[str] = None
+        self.swag_token_id: Optional[str] = None
+
+def seeded_mints(seed: int, assets: int) -> List[str]:
+    """Mint addresses of the seeded asset tokens (the stub RPC node hands these out)"""
+    return [fake_pubkey(f'mint:{seed}:{index}') for index in range(assets)]
+
+def seed_database(db: FakeDatabase, users: int = 200, assets: int = 500, purchases_per_user: int = 10,
+                  seed: int = 42) -> BenchData:
+    rng = random.Random(seed)
+    now = datetime.now()
+    data = BenchData()
+
+    def uid() -> str:
+        return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+    def ago(days: float) -> str:
+        return (now - timedelta(days=days)).isoformat()
+
+    user_rows, wallet_rows = [], []
+    for index in range(users):
+        user = {'id': uid(), 'username': f'bench{index}', 'display_name': f'Bench User {index}',
+                'email': f'bench{index}@example.com', 'created_at': ago(rng.uniform(30, 400))}
+        wallet = {'id': uid(), 'user_id': user['id'], 'wallet_address': fake_pubkey(f'wallet:{seed}:{index}'),
+                  'wallet_type': 'solana', 'is_primary': True, 'created_at': user['created_at']}
+        user_rows.append(user)
+        wallet_rows.append(wallet)
+        data.users.append({'id': user['id'], 'wallet_address': wallet['wallet_address'], 'wallet_id': wallet['id']})
+    db.load('users', user_rows)
+    db.load('user_wallets', wallet_rows)
+
+    asset_rows, token_rows = [], []
+    for index, mint_address in enumerate(seeded_mints(seed, assets)):
+        owner = rng.choice(user_rows)
+        category = rng.choice(CATEGORIES)
+        asset = {'id': uid(), 'owner_id': owner['id'], 'name': f'{category.replace("_", " ").title()} #{index}',
+                 'description': f'Benchmark {category} asset {index}', 'category': category,
+                 'valuation': round(rng.lognormvariate(11, 1.2), 2), 'image_url': None,
+                 'created_at': ago(rng.uniform(1, 365))}
+        token = {'id': uid(), 'asset_id': asset['id'], 'owner_id': owner['id'], 'mint_address': mint_address,
+                 'symbol': asset['name'][:4].upper(), 'token_type': 'nft', 'total_supply': rng.choice(SHARES_PER_TOKEN),
+                 'decimals': 0, 'is_fractionalized': True, 'is_platform_token': False,
+                 'is_blockchain_token': True, 'created_at': asset['created_at']}
+        asset_rows.append(asset)
+        token_rows.append(token)
+        data.tokens.append({'id': token['id'], 'asset_id': asset['id'],
+                            'share_price_usd': asset['valuation'] / token['total_supply']})
+    db.load('assets', asset_rows)
+    db.load('tokens', token_rows)
+    db.load('tokens', [{'id': uid(), 'asset_id': None, 'mint_address': fake_pubkey(f'vault:{seed}'), 'symbol': 'VAULT',
+                        'token_type': 'platform', 'total_supply': 10 ** 9, 'decimals': 6, 'is_platform_token': True}])
+
+    # Purchase history, and the rows the app maintains from it
+    transactions, positions, summaries, balances, sold = [], {}, [], [], {}
+    assets_by_id = {asset['id']: asset for asset in asset_rows}
+    for user, wallet in zip(user_rows, wallet_rows):
+        invested = 0.0
+        for _ in range(rng.randint(0, purchases_per_user * 2)):
+            token = rng.choice(token_rows)
+            asset = assets_by_id[token['asset_id']]
+            shares = rng.randint(1, 5)
+            price = asset['valuation'] / token['total_supply']
+            transactions.append({
+                'id': uid(), 'transaction_type': 'purchase', 'status': 'completed', 'asset_id': asset['id'],
+                'token_id': token['id'], 'asset_name': asset['name'], 'asset_category': asset['category'],
+                'buyer_user_id': user['id'], 'buyer_wallet_id': wallet['id'],
+                'buyer_wallet_address': wallet['wallet_address'], 'seller_user_id': None,
+                'shares_amount': shares, 'share_price_usd': price, 'total_cost_usd': price * shares,
+                'purchase_percentage': shares / token['total_supply'] * 100, 'payment_method': 'sol',
+                'transaction_date': ago(rng.uniform(0, 300))
+            })
+            position = positions.setdefault((user['id'], asset['id']), {
+                'user_id': user['id'], 'asset_id': asset['id'], 'token_id': token['id'], 'shares': 0,
+                'cost_basis_usd': 0.0, 'invested_usd': 0.0, 'purchases_count': 0
+            })
+            position['shares'] += shares
+            position['cost_basis_usd'] += price * shares
+            position['invested_usd'] += price * shares
+            position['purchases_count'] += 1
+            sold[token['id']] = sold.get(token['id'], 0) + shares
+            invested += price * shares
+        owned = [p for (owner_id, _), p in positions.items() if owner_id == user['id']]
+        summaries.append({
+            'user_id': user['id'], 'total_invested_usd': invested, 'total_proceeds_usd': 0, 'cost_basis_usd': invested,
+            'realized_pnl_usd': 0, 'total_shares': sum(p['shares'] for p in owned), 'assets_owned': len(owned),
+            'purchases_count': sum(p['purchases_count'] for p in owned), 'sales_count': 0
+        })
+        earned = round(sum(p['shares'] for p in owned) * rng.uniform(0.5, 2), 6)
+        balances.append({'user_id': user['id'], 'balance': earned, 'total_earned': earned, 'last_entry_id': None})
+    db.load('asset_transactions', transactions)
+    db.load('portfolio_positions', list(positions.values()))
+    supply = {token['id']: token['total_supply'] for token in token_rows}
+    db.load('asset_ownership', [{
+        'user_id': p['user_id'], 'asset_id': p['asset_id'], 'token_id': p['token_id'], 'shares_owned': p['shares'],
+        'ownership_percentage': p['shares'] / supply[p['token_id']] * 100
+    } for p in positions.values()])
+    db.load('portfolio_summaries', summaries)
+    db.load('vault_balances', balances)
+    db.load('share_inventory', [{
+        'token_id': token['id'], 'total_shares': token['total_supply'],
+        'available_shares': max(token['total_supply'] - sold.get(token['id'], 0), 0),
+        'reserved_shares': 0, 'sold_shares': min(sold.get(token['id'], 0), token['total_supply'])
+    } for token in token_rows])
+
+    event = {'id': uid(), 'name': 'Benchmark Meetup', 'description': 'Swag distribution benchmark',
+             'event_date': ago(-7), 'created_by': user_rows[0]['id']}
+    swag_token = {'id': uid(), 'asset_id': None, 'mint_address': fake_pubkey(f'swag:{seed}'), 'symbol': 'SWAG',
+                  'token_type': 'nft', 'total_supply': 10 ** 6, 'decimals': 0, 'is_platform_token': False}
+    db.load('events', [event])
+    db.load('tokens', [swag_token])
+    data.event_id = event['id']
+    data.swag_token_id = swag_token['id']
+    return data
+
+def _auth(user: Dict[str, Any]) -> Dict[str, str]:
+    return {'Authorization': f'Bearer {BENCH_TOKEN_PREFIX}{user["id"]}'}
+
+def marketplace(call: Call, data: BenchData, rng: random.Random):
+    call('GET', f'/api/marketplace?wallet_address={rng.choice(data.users)["wallet_address"]}')
+
+def marketplace_listings(call: Call, data: BenchData, rng: random.Random):
+    category = rng.choice(CATEGORIES)
+    call('GET', f'/api/marketplace/listings?category={category}&min_valuation=10000&sort=valuation'
+                f'&limit=24&wallet_address={rng.choice(data.users)["wallet_address"]}')
+
+def portfolio(call: Call, data: BenchData, rng: random.Random):
+    user = rng.choice(data.users)
+    call('GET', f'/api/wallets/{user["wallet_address"]}/portfolio')
+    call('GET', f'/api/analytics/user-portfolio/{user["id"]}')
+
+def buy_asset(call: Call, data: BenchData, rng: random.Random):
+    user = rng.choice(data.users)
+    token = rng.choice(data.tokens)
+    call('POST', '/api/wallets/buy-asset', json={
+        'wallet_address': user['wallet_address'], 'token_id': token['id'], 'shares_to_buy': 1,
+        'payment_method': 'sol', 'payment_amount': round(token['share_price_usd'] / 150, 9) or 0.000001
+    }, headers=_auth(user))
+
+def tokenize(call: Call, data: BenchData, rng: random.Random):
+    user = rng.choice(data.users)
+    status, _, body = call('POST', '/api/assets', json={
+        'name': f'Bench Asset {rng.getrandbits(32):08x}', 'owner_id': user['id'], 'category': rng.choice(CATEGORIES),
+        'valuation': round(rng.uniform(1000, 500000), 2), 'description': 'Created by the tokenize benchmark'
+    }, headers=_auth(user))
+    if status < 400:
+        call('POST', f'/api/assets/{body["data"]["id"]}/tokenize',
+             json={'wallet_address': user['wallet_address']}, headers=_auth(user))
+
+def swag_distribution(call: Call, data: BenchData, rng: random.Random):
+    recipients = rng.sample(data.users, min(SWAG_RECIPIENTS, len(data.users)))
+    call('POST', f'/api/events/{data.event_id}/distribute-swag', json={
+        'token_id': data.swag_token_id, 'recipient_ids': [user['id'] for user in recipients]
+    }, headers=_auth(data.users[0]))
+
+def balances(call: Call, data: BenchData, rng: random.Random):
+    call('GET', f'/api/wallets/{rng.choice(data.users)["wallet_address"]}/balances')
+
+SCENARIOS: Dict[str, Callable[[Call, BenchData, random.Random], None]] = {
+    'marketplace': marketplace,
+    'marketplace_listings': marketplace_listings,
+    'portfolio': portfolio,
+    'buy_asset': buy_asset,
+    'tokenize': tokenize,
+    'swag_distribution': swag_distribution,
+    'balances': balances,
+}
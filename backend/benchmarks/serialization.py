@@ -0,0 +1,136 @@
+"""API payload serialization benchmark.
+
+Builds marketplace and transaction-history payloads shaped like the real
+responses and times Flask's stdlib JSON provider against FastJSONProvider
+(orjson) and MessagePack, end to end through jsonify in a request context.
+Also compares token rows kept as PostgREST dicts with slotted Token rows,
+for both encode time and memory.
+
+    python -m benchmarks.serialization --rows 2000 --repeat 50
+"""
+import argparse
+import json
+import time
+import tracemalloc
+import uuid
+from datetime import datetime
+
+from flask import Flask, jsonify
+from flask.json.provider import DefaultJSONProvider
+
+from models.token import Token
+from utils.serialization import FastJSONProvider, orjson, msgpack
+
+def marketplace_rows(count):
+    return [{
+        'token_id': str(uuid.uuid4()),
+        'asset_id': str(uuid.uuid4()),
+        'asset_name': f"Asset {i}",
+        'asset_description': "A tokenized real-world asset with a reasonably long description " * 2,
+        'asset_category': 'real_estate',
+        'asset_image': f"https://cdn.example.com/assets/{i}.jpg",
+        'asset_valuation': 250000.0 + i,
+        'token_symbol': 'AST',
+        'total_shares': 10000,
+        'share_price_usd': 25.0,
+        'share_price_sol': 0.1667,
+        'min_investment_usd': 25.0,
+        'min_investment_sol': 0.1667,
+        'user_ownership': i % 7,
+        'ownership_percentage': round((i % 7) / 100, 4),
+        'can_afford_sol': True,
+        'vault_reward_estimate': 0.01
+    } for i in range(count)]
+
+def token_rows(count):
+    return [{
+        'id': str(uuid.uuid4()),
+        'name': f"Asset {i} Token",
+        'description': "Fractional ownership token " * 3,
+        'image_url': f"https://cdn.example.com/tokens/{i}.png",
+        'token_type': 'fractional',
+        'total_supply': 10000,
+        'price': 25.0,
+        'creator_id': str(uuid.uuid4()),
+        'mint_address': 'So11111111111111111111111111111111111111112',
+        'metadata_uri': f"https://cdn.example.com/metadata/{i}.json",
+        'created_at': datetime.now().isoformat(),
+        'is_fractional': True,
+        'status': 'active'
+    } for i in range(count)]
+
+def history_rows(count):
+    return [{
+        'id': str(uuid.uuid4()),
+        'transaction_type': 'purchase',
+        'asset_id': str(uuid.uuid4()),
+        'token_id': str(uuid.uuid4()),
+        'asset_name': f"Asset {i}",
+        'buyer_wallet_address': '7xKXtg2CW87d97TXJSDpbD5jBkheTqA83TZRuJosgAsU',
+        'shares_amount': 10,
+        'share_price_usd': 25.0,
+        'total_cost_usd': 250.0,
+        'payment_tx': f"sol_payment_{i:08d}",
+        'asset_mint_tx': '5' * 88,
+        'transaction_date': datetime.now().isoformat(),
+        'status': 'completed',
+        'assets': {'name': f"Asset {i}", 'category': 'real_estate'},
+        'tokens': {'mint_address': 'So11111111111111111111111111111111111111112'}
+    } for i in range(count)]
+
+def time_jsonify(app, payload, repeat, headers=None):
+    with app.test_request_context(headers=headers or {}):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            response = jsonify({"success": True, "data": payload, "count": len(payload)})
+        elapsed = time.perf_counter() - started
+    return elapsed / repeat * 1000, len(response.get_data())
+
+def memory_of(build):
+    tracemalloc.start()
+    rows = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current, rows
+
+def main():
+    parser = argparse.ArgumentParser(description="API payload serialization benchmark")
+    parser.add_argument('--rows', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--json', action='store_true', help="Print results as JSON")
+    args = parser.parse_args()
+
+    stdlib_app = Flask('stdlib')
+    stdlib_app.json = DefaultJSONProvider(stdlib_app)
+    fast_app = Flask('fast')
+    fast_app.json = FastJSONProvider(fast_app)
+
+    raw_tokens = token_rows(args.rows)
+    payloads = {'marketplace': marketplace_rows(args.rows), 'history': history_rows(args.rows),
+                'tokens (dicts)': raw_tokens, 'tokens (slotted)': Token.from_rows(raw_tokens)}
+
+    results = []
+    for name, payload in payloads.items():
+        for label, app, headers in [('stdlib json', stdlib_app, None),
+                                    ('orjson' if orjson else 'fast (stdlib fallback)', fast_app, None),
+                                    ('msgpack', fast_app, {'Accept': 'application/msgpack'} if msgpack else None)]:
+            if label == 'msgpack' and msgpack is None:
+                continue
+            ms, size = time_jsonify(app, payload, args.repeat, headers)
+            results.append({'payload': name, 'encoder': label, 'ms_per_response': round(ms, 3), 'bytes': size})
+
+    dict_bytes, _ = memory_of(lambda: token_rows(args.rows))
+    slot_bytes, _ = memory_of(lambda: Token.from_rows(token_rows(args.rows)))
+    memory = {'rows': args.rows, 'dict_rows_bytes': dict_bytes, 'slotted_rows_bytes': slot_bytes}
+
+    if args.json:
+        print(json.dumps({'serialization': results, 'memory': memory}, indent=2))
+        return
+
+    for result in results:
+        print(f"{result['payload']:>22} | {result['encoder']:>22}: {result['ms_per_response']:>8} ms "
+              f"({result['bytes']} bytes)")
+    print(f"{args.rows} token rows: {dict_bytes / 1024:.0f} KiB as dicts, {slot_bytes / 1024:.0f} KiB as Token")
+
+if __name__ == '__main__':
+    main()
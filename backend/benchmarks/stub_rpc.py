@@ -0,0 +1,313 @@
+"""Stub Solana / Monad JSON-RPC node (and CoinGecko price feed), for offline benchmarks.
+
+Answers the JSON-RPC methods the app calls with well-formed, deterministic
+results, so SolanaService, MonadService and the SOL price lookup run their
+real code paths without a network. Latency, jitter, JSON-RPC errors and
+HTTP failures can be injected globally or per method:
+
+    python -m benchmarks.stub_rpc --port 8899 --latency-ms 40 --error-rate 0.02 \\
+        --method-latency getTokenAccountsByOwner=150
+"""
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from werkzeug.serving import make_server
+from werkzeug.wrappers import Request, Response
+
+from benchmarks.fake_supabase import QuietRequestHandler
+
+BASE58_ALPHABET = '123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz'
+LAMPORTS_PER_SOL = 1_000_000_000
+DEFAULT_CHAIN_ID = 41454
+
+def b58encode(data: bytes) -> str:
+    number = int.from_bytes(data, 'big')
+    encoded = ''
+    while number:
+        number, remainder = divmod(number, 58)
+        encoded = BASE58_ALPHABET[remainder] + encoded
+    return '1' * (len(data) - len(data.lstrip(b'\0'))) + encoded
+
+def fake_pubkey(seed: str) -> str:
+    """A valid-looking 32-byte Solana address, stable for a given seed"""
+    return b58encode(hashlib.sha256(seed.encode()).digest())
+
+def _digest(*parts: Any) -> bytes:
+    return hashlib.sha256(json.dumps(parts, default=str, sort_keys=True).encode()).digest()
+
+class StubRpcServer:
+    """JSON-RPC over HTTP for both chains: Solana methods by name, EVM methods by eth_/net_ prefix"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency_ms: float = 0.0, jitter_ms: float = 0.0,
+                 error_rate: float = 0.0, http_error_rate: float = 0.0, method_latency_ms: Dict[str, float] = None,
+                 chain_id: int = DEFAULT_CHAIN_ID, token_mints: List[str] = None, sol_price_usd: float = 150.0,
+                 seed: int = None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.http_error_rate = http_error_rate
+        self.method_latency_ms = method_latency_ms or {}
+        self.chain_id = chain_id
+        # Mints handed out by getTokenAccountsByOwner (the seeded tokens, usually)
+        self.token_mints = token_mints or []
+        self.sol_price_usd = sol_price_usd
+        self.calls: Dict[str, int] = {}
+        self._random = random.Random(seed)
+        self._started = time.time()
+        self._lock = threading.Lock()
+        self._methods: Dict[str, Callable[[list], Any]] = {
+            name[len('_rpc_'):]: getattr(self, name) for name in dir(self) if name.startswith('_rpc_')
+        }
+        self._server = make_server(host, port, self._wsgi, threaded=True, request_handler=QuietRequestHandler)
+        self.url = f"http://{host}:{self._server.server_port}"
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> 'StubRpcServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, name='stub-rpc', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+
+    # Chain state, advancing with wall time like a live node
+
+    @property
+    def slot(self) -> int:
+        return 250_000_000 + int((time.time() - self._started) / 0.4)
+
+    @property
+    def block_number(self) -> int:
+        return 5_000_000 + int(time.time() - self._started)
+
+    def _context(self) -> Dict[str, Any]:
+        return {'slot': self.slot, 'apiVersion': '1.18.0'}
+
+    def _wsgi(self, environ, start_response):
+        request = Request(environ)
+        if request.path.endswith('/simple/price'):
+            response = self._price(request)
+        else:
+            try:
+                payload = json.loads(request.get_data() or b'null')
+            except ValueError:
+                payload = None
+            batch = payload if isinstance(payload, list) else [payload]
+            delay = max((self.method_latency_ms.get(call.get('method'), self.latency_ms)
+                         for call in batch if isinstance(call, dict)), default=self.latency_ms)
+            if self.jitter_ms:
+                delay += self._random.uniform(0, self.jitter_ms)
+            if delay:
+                time.sleep(delay / 1000)
+            if self.http_error_rate and self._random.random() < self.http_error_rate:
+                response = Response('upstream unavailable', status=503)
+            else:
+                results = [self._dispatch(call) for call in batch]
+                body = results if isinstance(payload, list) else results[0]
+                response = Response(json.dumps(body), content_type='application/json')
+        return response(environ, start_response)
+
+    def _price(self, request: Request) -> Response:
+        ids = (request.args.get('ids') or 'solana').split(',')
+        currency = request.args.get('vs_currencies') or 'usd'
+        return Response(json.dumps({coin: {currency: self.sol_price_usd} for coin in ids}),
+                        content_type='application/json')
+
+    def _dispatch(self, call: Any) -> Dict[str, Any]:
+        if not isinstance(call, dict) or 'method' not in call:
+            return {'jsonrpc': '2.0', 'id': None, 'error': {'code': -32600, 'message': 'Invalid request'}}
+        method, call_id = call['method'], call.get('id')
+        with self._lock:
+            self.calls[method] = self.calls.get(method, 0) + 1
+        if self.error_rate and self._random.random() < self.error_rate:
+            return {'jsonrpc': '2.0', 'id': call_id, 'error': {'code': -32005, 'message': 'Node is behind (injected)'}}
+        handler = self._methods.get(method)
+        if handler is None:
+            return {'jsonrpc': '2.0', 'id': call_id, 'error': {'code': -32601, 'message': f'Method not found: {method}'}}
+        return {'jsonrpc': '2.0', 'id': call_id, 'result': handler(call.get('params') or [])}
+
+    # Solana
+
+    def _rpc_getHealth(self, params):
+        return 'ok'
+
+    def _rpc_getVersion(self, params):
+        return {'solana-core': '1.18.0', 'feature-set': 4215500110}
+
+    def _rpc_getSlot(self, params):
+        return self.slot
+
+    def _rpc_getBlockHeight(self, params):
+        return self.slot - 20_000_000
+
+    def _rpc_getBalance(self, params):
+        # 0.5-10.5 SOL, stable per address
+        lamports = LAMPORTS_PER_SOL // 2 + int.from_bytes(_digest(params[0])[:4], 'big') % (10 * LAMPORTS_PER_SOL)
+        return {'context': self._context(), 'value': lamports}
+
+    def _rpc_getLatestBlockhash(self, params):
+        return {'context': self._context(), 'value': {
+            'blockhash': b58encode(_digest('blockhash', self.slot // 150)), 'lastValidBlockHeight': self.slot + 150
+        }}
+
+    def _rpc_getRecentBlockhash(self, params):
+        return {'context': self._context(), 'value': {
+            'blockhash': b58encode(_digest('blockhash', self.slot // 150)),
+            'feeCalculator': {'lamportsPerSignature': 5000}
+        }}
+
+    def _rpc_getFeeForMessage(self, params):
+        return {'context': self._context(), 'value': 5000}
+
+    def _rpc_getMinimumBalanceForRentExemption(self, params):
+        return 1_461_600
+
+    def _rpc_getAccountInfo(self, params):
+        return {'context': self._context(), 'value': None}
+
+    def _rpc_getTokenAccountsByOwner(self, params):
+        owner = params[0]
+        digest = _digest('accounts', owner)
+        held = [self.token_mints[byte % len(self.token_mints)] for byte in digest[:digest[0] % 6]] if self.token_mints else []
+        accounts = []
+        for mint in dict.fromkeys(held):
+            amount = 1 + int.from_bytes(_digest(owner, mint)[:2], 'big') % 20
+            accounts.append({
+                'pubkey': b58encode(_digest('ata', owner, mint)),
+                'account': {
+                    'lamports': 2_039_280, 'owner': 'TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA', 'executable': False,
+                    'rentEpoch': 0, 'space': 165,
+                    'data': {'program': 'spl-token', 'space': 165, 'parsed': {'type': 'account', 'info': {
+                        'isNative': False, 'mint': mint, 'owner': owner, 'state': 'initialized',
+                        'tokenAmount': {'amount': str(amount), 'decimals': 0, 'uiAmount': float(amount),
+                                        'uiAmountString': str(amount)}
+                    }}}
+                }
+            })
+        return {'context': self._context(), 'value': accounts}
+
+    def _rpc_getTokenAccountBalance(self, params):
+        amount = 1 + int.from_bytes(_digest('balance', params[0])[:2], 'big') % 1000
+        return {'context': self._context(), 'value': {
+            'amount': str(amount), 'decimals': 0, 'uiAmount': float(amount), 'uiAmountString': str(amount)
+        }}
+
+    def _rpc_getTokenSupply(self, params):
+        return {'context': self._context(), 'value': {
+            'amount': '100', 'decimals': 0, 'uiAmount': 100.0, 'uiAmountString': '100'
+        }}
+
+    def _rpc_sendTransaction(self, params):
+        return b58encode(_digest('tx', params[0]) + _digest('tx2', params[0]))
+
+    def _rpc_requestAirdrop(self, params):
+        return b58encode(_digest('airdrop', params, time.time()) * 2)
+
+    def _rpc_getSignatureStatuses(self, params):
+        return {'context': self._context(), 'value': [
+            {'slot': self.slot - 1, 'confirmations': None, 'err': None, 'status': {'Ok': None},
+             'confirmationStatus': 'finalized'}
+            for _ in params[0]
+        ]}
+
+    def _rpc_getTransaction(self, params):
+        return {'slot': self.slot - 1, 'blockTime': int(time.time()), 'meta': {'err': None, 'fee': 5000},
+                'transaction': {'signatures': [params[0]]}}
+
+    # EVM (Monad)
+
+    def _rpc_eth_chainId(self, params):
+        return hex(self.chain_id)
+
+    def _rpc_net_version(self, params):
+        return str(self.chain_id)
+
+    def _rpc_eth_blockNumber(self, params):
+        return hex(self.block_number)
+
+    def _rpc_eth_getBalance(self, params):
+        return hex(10 ** 18 + int.from_bytes(_digest(params[0])[:6], 'big'))
+
+    def _rpc_eth_gasPrice(self, params):
+        return hex(50 * 10 ** 9)
+
+    def _rpc_eth_maxPriorityFeePerGas(self, params):
+        return hex(2 * 10 ** 9)
+
+    def _rpc_eth_estimateGas(self, params):
+        return hex(120_000)
+
+    def _rpc_eth_getTransactionCount(self, params):
+        return hex(0)
+
+    def _rpc_eth_getCode(self, params):
+        return '0x'
+
+    def _rpc_eth_call(self, params):
+        return '0x' + '00' * 32
+
+    def _rpc_eth_sendRawTransaction(self, params):
+        return '0x' + _digest('raw', params[0]).hex()
+
+    def _rpc_eth_getTransactionReceipt(self, params):
+        block = self.block_number - 1
+        return {
+            'transactionHash': params[0], 'transactionIndex': '0x0', 'blockNumber': hex(block),
+            'blockHash': '0x' + _digest('block', block).hex(), 'from': '0x' + '11' * 20, 'to': '0x' + '22' * 20,
+            'cumulativeGasUsed': hex(21_000), 'gasUsed': hex(21_000), 'effectiveGasPrice': hex(50 * 10 ** 9),
+            'contractAddress': None, 'logs': [], 'logsBloom': '0x' + '00' * 256, 'status': '0x1', 'type': '0x2'
+        }
+
+    def _rpc_eth_getBlockByNumber(self, params):
+        number = self.block_number if params[0] in ('latest', 'pending') else int(params[0], 16)
+        return {
+            'number': hex(number), 'hash': '0x' + _digest('block', number).hex(),
+            'parentHash': '0x' + _digest('block', number - 1).hex(), 'timestamp': hex(int(time.time())),
+            'gasLimit': hex(30_000_000), 'gasUsed': hex(0), 'baseFeePerGas': hex(50 * 10 ** 9),
+            'miner': '0x' + '00' * 20, 'difficulty': '0x0', 'totalDifficulty': '0x0', 'extraData': '0x',
+            'size': hex(1000), 'nonce': '0x0000000000000000', 'transactions': [], 'uncles': []
+        }
+
+    def _rpc_eth_feeHistory(self, params):
+        blocks = int(params[0], 16) if isinstance(params[0], str) else int(params[0])
+        return {
+            'oldestBlock': hex(self.block_number - blocks), 'baseFeePerGas': [hex(50 * 10 ** 9)] * (blocks + 1),
+            'gasUsedRatio': [0.5] * blocks, 'reward': [[hex(2 * 10 ** 9)] * len(params[2] if len(params) > 2 else [])] * blocks
+        }
+
+def _method_latency(values: List[str]) -> Dict[str, float]:
+    latency = {}
+    for value in values or []:
+        method, _, ms = value.partition('=')
+        latency[method] = float(ms)
+    return latency
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub Solana/Monad JSON-RPC node for offline benchmarks")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8899)
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--jitter-ms', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of calls answered with a JSON-RPC error")
+    parser.add_argument('--http-error-rate', type=float, default=0.0, help="Fraction of requests answered with a 503")
+    parser.add_argument('--method-latency', action='append', metavar='METHOD=MS',
+                        help="Override latency for one method (repeatable)")
+    parser.add_argument('--chain-id', type=int, default=DEFAULT_CHAIN_ID)
+    parser.add_argument('--assets', type=int, default=500, help="Seeded assets whose mints wallets hold")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    from benchmarks.scenarios import seeded_mints
+    token_mints = seeded_mints(args.seed, args.assets)
+    server = StubRpcServer(args.host, args.port, args.latency_ms, args.jitter_ms, args.error_rate, args.http_error_rate,
+                           _method_latency(args.method_latency), args.chain_id, token_mints, seed=args.seed)
+    print(f"🧪 Stub JSON-RPC node on {server.url} (chain id {args.chain_id})")
+    server._server.serve_forever()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+import multiprocessing
+import os
+import signal
+
+# gunicorn -c gunicorn.conf.py wsgi:app
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+
+# sync: one request per process. gthread: a thread pool per process, good
+# for our mostly I/O-bound handlers. gevent: greenlets, for many slow
+# upstream calls (requires the gevent package).
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+workers = int(os.getenv('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv('GUNICORN_THREADS', 4)) if worker_class == 'gthread' else 1
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', 200))
+
+if worker_class == 'gevent':
+    # Patch before the app is preloaded so requests/httpx sockets are cooperative
+    from gevent import monkey
+    monkey.patch_all()
+
+# Import the app (and its Solana/web3 dependencies) once in the master
+preload_app = True
+
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 60))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+
+# Recycle workers periodically to cap slow memory growth
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 200))
+
+# Workers write metrics to files here; /metrics sums them (see utils/instrumentation.py)
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/vaulthive-metrics')
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')
+
+def on_starting(server):
+    # Every worker would hold its own order books and match the same tokens
+    if os.getenv('TRADING_ENGINE_ENABLED', 'false').lower() == 'true' and server.cfg.workers > 1:
+        raise RuntimeError("TRADING_ENGINE_ENABLED needs GUNICORN_WORKERS=1")
+
+    # Counters from a previous run would otherwise be summed into this one
+    metrics_dir = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    os.makedirs(metrics_dir, exist_ok=True)
+    for name in os.listdir(metrics_dir):
+        if name.endswith('.db'):
+            os.remove(os.path.join(metrics_dir, name))
+
+def post_fork(server, worker):
+    # Connection pools must not be shared across processes
+    from utils.lifecycle import reset_after_fork
+    from app import create_supabase_client
+    import wsgi
+
+    reset_after_fork()
+    wsgi.app.config['SUPABASE'] = create_supabase_client()
+
+    if os.getenv('CAP_TABLE_WARM', 'true').lower() == 'true':
+        # Replay the transaction log in the background so the first
+        # ownership read doesn't pay for it
+        import threading
+        from services.cap_table import get_cap_table_index
+
+        index = get_cap_table_index(wsgi.app.config['SUPABASE'])
+        threading.Thread(target=index.ensure_fresh, name='cap-table-warm', daemon=True).start()
+
+    if os.getenv('LEADERBOARD_WARM', 'true').lower() == 'true':
+        import threading
+        from services.leaderboard import get_leaderboard_index
+
+        index = get_leaderboard_index(wsgi.app.config['SUPABASE'])
+        threading.Thread(target=index.ensure_fresh, name='leaderboard-warm', daemon=True).start()
+
+    if os.getenv('SEARCH_WARM', 'true').lower() == 'true':
+        import threading
+        from services.search_index import get_search_index
+
+        index = get_search_index(wsgi.app.config['SUPABASE'])
+        threading.Thread(target=index.ensure_fresh, name='search-warm', daemon=True).start()
+
+    if os.getenv('MARKETPLACE_WARM', 'true').lower() == 'true':
+        import threading
+        from services.marketplace_index import get_marketplace_index
+
+        index = get_marketplace_index(wsgi.app.config['SUPABASE'])
+        threading.Thread(target=index.ensure_fresh, name='marketplace-warm', daemon=True).start()
+
+def post_worker_init(worker):
+    # Fail readiness as soon as SIGTERM arrives, then let gunicorn stop as usual
+    from utils.lifecycle import begin_drain
+
+    previous = signal.getsignal(signal.SIGTERM)
+
+    def drain_then_exit(signum, frame):
+        begin_drain()
+        if callable(previous):
+            previous(signum, frame)
+
+    signal.signal(signal.SIGTERM, drain_then_exit)
+
+def worker_exit(server, worker):
+    # The worker has stopped accepting requests; let running mints finish
+    from utils.lifecycle import begin_drain, wait_for_drain, in_flight_counts
+
+    begin_drain()
+    if not wait_for_drain(graceful_timeout):
+        server.log.warning(f"Worker {worker.pid} exiting with mints still in flight: {in_flight_counts()}")
+
+    # Persist open orders and unsettled trades before the books go away
+    from services.trading_service import save_all_snapshots, TRADING_ENGINE_ENABLED
+    import wsgi
+
+    if TRADING_ENGINE_ENABLED:
+        save_all_snapshots(wsgi.app.config['SUPABASE'])
+
+def child_exit(server, worker):
+    # Drop the dead worker's live gauges (in-flight requests); its counters stay summed
+    from utils.instrumentation import METRICS_ENABLED
+
+    if METRICS_ENABLED:
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
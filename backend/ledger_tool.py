@@ -0,0 +1,61 @@
+import argparse
+import json
+import os
+import sys
+from supabase import create_client
+from dotenv import load_dotenv
+
+from services.vault_ledger_service import VaultLedgerService
+
+load_dotenv()
+
+def main():
+    parser = argparse.ArgumentParser(description="VaultHive VAULT ledger maintenance")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    verify = subparsers.add_parser('verify', help="Check materialized balances against the ledger")
+    verify.add_argument('--user', help="Only this user id (default: every account)")
+    verify.add_argument('--full', action='store_true', help="Replay from the first entry instead of the latest checkpoint")
+
+    replay = subparsers.add_parser('replay', help="Recompute one user's balance from the ledger")
+    replay.add_argument('--user', required=True)
+    replay.add_argument('--full', action='store_true')
+
+    rebuild = subparsers.add_parser('rebuild', help="Overwrite a materialized balance with the ledger total")
+    rebuild.add_argument('--user', required=True)
+
+    subparsers.add_parser('checkpoint', help="Snapshot every balance that moved since its last checkpoint")
+
+    args = parser.parse_args()
+
+    supabase = create_client(os.environ.get("SUPABASE_URL"), os.environ.get("SUPABASE_ANON_KEY"))
+    ledger = VaultLedgerService(supabase)
+
+    if args.command == 'checkpoint':
+        ledger.create_checkpoint()
+        return 0
+
+    if args.command == 'replay':
+        print(json.dumps(ledger.replay(args.user, from_checkpoint=not args.full), indent=2, default=str))
+        return 0
+
+    if args.command == 'rebuild':
+        print(json.dumps(ledger.rebuild_balance(args.user), indent=2, default=str))
+        return 0
+
+    user_ids = [args.user] if args.user else ledger.list_accounts()
+    checked = 0
+    mismatched = 0
+    for user_id in user_ids:
+        result = ledger.verify(user_id, from_checkpoint=not args.full)
+        checked += 1
+        if not result['ok']:
+            mismatched += 1
+            print(f"❌ {user_id}: stored {result['stored']['balance']} / replayed {result['replayed']['balance']}"
+                  f" (broken entries: {result['replayed']['broken_entries']})")
+
+    print(f"{'✅' if not mismatched else '⚠️'} Verified {checked} accounts, {mismatched} mismatched")
+    return 1 if mismatched else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
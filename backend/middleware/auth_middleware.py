@@ -1,7 +1,17 @@
+import hmac
+import os
 from functools import wraps
 from flask import request, jsonify, current_app
 from services.auth_service import AuthService
 
+# Operator endpoints (profiles, slow operations) are off unless this is set
+ADMIN_TOKEN = os.getenv('ADMIN_TOKEN')
+
+def is_admin_request() -> bool:
+    """The request carries the operator token in X-Admin-Token"""
+    supplied = request.headers.get('X-Admin-Token')
+    return bool(ADMIN_TOKEN and supplied) and hmac.compare_digest(supplied, ADMIN_TOKEN)
+
 def require_auth(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
@@ -18,4 +28,25 @@ def require_auth(f):
         except Exception as e:
             return jsonify({'error': 'Invalid token'}), 401
     
+    return decorated_function
+
+def owns_wallet(wallet_address: str) -> bool:
+    """The wallet is registered to request.current_user (call under require_auth)"""
+    user = getattr(request, 'current_user', None)
+    if not user or not wallet_address:
+        return False
+    result = current_app.config['SUPABASE'].table('user_wallets').select('id').eq(
+        'user_id', user['id']
+    ).eq('wallet_address', wallet_address).limit(1).execute()
+    return bool(result.data)
+
+def require_admin(f):
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not ADMIN_TOKEN:
+            return jsonify({'error': 'Admin endpoints are disabled (set ADMIN_TOKEN)'}), 404
+        if not is_admin_request():
+            return jsonify({'error': 'Admin token required'}), 403
+        return f(*args, **kwargs)
+    
     return decorated_function
\ No newline at end of file
@@ -0,0 +1,212 @@
+import hashlib
+import os
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+from flask import request, current_app
+from utils.instrumentation import record_cache
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this are sent as-is; compression wouldn't pay for itself
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', 1024))
+COMPRESSION_GZIP_LEVEL = int(os.getenv('COMPRESSION_GZIP_LEVEL', 6))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv('COMPRESSION_BROTLI_QUALITY', 5))
+# Compressed GET bodies kept for reuse when the same body is served again
+COMPRESSION_CACHE_BYTES = int(os.getenv('COMPRESSION_CACHE_BYTES', 32 * 1024 * 1024))
+
+COMPRESSIBLE_MIMETYPES = ('application/json', 'application/msgpack', 'application/javascript', 'text/')
+
+_stats = {'compressed': 0, 'streamed': 0, 'bytes_in': 0, 'bytes_out': 0, 'cache_hits': 0, 'skipped_small': 0}
+_stats_lock = threading.Lock()
+
+def compress(enabled: bool = True, gzip_level: int = None, brotli_quality: int = None, min_size: int = None,
+             cache: bool = True):
+    """Per-route compression settings, e.g. @compress(brotli_quality=9) above a view"""
+    def decorator(view):
+        view._compression = {
+            'enabled': enabled,
+            'gzip_level': gzip_level,
+            'brotli_quality': brotli_quality,
+            'min_size': min_size,
+            'cache': cache
+        }
+        return view
+    return decorator
+
+class CompressedBodyCache:
+    """LRU of compressed bodies keyed by (body hash, encoding, level), bounded in bytes.
+
+    Keying on the uncompressed body means a hit only ever returns the
+    compression of exactly the bytes the view just produced, so it's safe
+    for per-user responses too; it saves the compression, not the view.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple) -> Optional[bytes]:
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+        record_cache('compressed_body', body is not None)
+        return body
+
+    def put(self, key: Tuple, body: bytes):
+        if len(body) > self.max_bytes // 4:
+            return
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = body
+            self._size += len(body)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self._size}
+
+_cache = CompressedBodyCache(COMPRESSION_CACHE_BYTES)
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """br if the client takes it and brotli is installed, else gzip, else None"""
+    offered = {}
+    for part in accept_encoding.split(','):
+        pieces = part.strip().split(';')
+        coding = pieces[0].strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in pieces[1:]:
+            name, _, value = param.strip().partition('=')
+            if name.strip() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        offered[coding] = quality
+
+    wildcard = offered.get('*', 0.0)
+    candidates = (['br'] if brotli is not None else []) + ['gzip']
+    best, best_quality = None, 0.0
+    for coding in candidates:
+        quality = offered.get(coding, wildcard)
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+def _compress_bytes(body: bytes, encoding: str, level: int) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(body, quality=level)
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return compressor.compress(body) + compressor.flush()
+
+def _compress_stream(chunks, encoding: str, level: int):
+    """Compress a generator response chunk by chunk, flushing so clients see each piece"""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=level)
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode()
+            data = compressor.process(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode()
+            data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            if data:
+                yield data
+        yield compressor.flush()
+
+def _route_settings() -> Dict[str, Any]:
+    view = current_app.view_functions.get(request.endpoint) if request.endpoint else None
+    return getattr(view, '_compression', None) or {}
+
+def _compressible(response) -> bool:
+    if response.status_code < 200 or response.status_code in (204, 206, 304):
+        return False
+    if response.direct_passthrough or 'Content-Encoding' in response.headers:
+        return False
+    if 'no-transform' in (response.headers.get('Cache-Control') or ''):
+        return False
+    mimetype = response.mimetype or ''
+    return any(mimetype.startswith(prefix) for prefix in COMPRESSIBLE_MIMETYPES)
+
+def get_compression_stats() -> Dict[str, Any]:
+    with _stats_lock:
+        stats = dict(_stats)
+    stats['ratio'] = round(stats['bytes_out'] / stats['bytes_in'], 4) if stats['bytes_in'] else None
+    stats['cache'] = _cache.stats()
+    stats['brotli'] = brotli is not None
+    return stats
+
+def init_compression(app):
+    """gzip/brotli response compression negotiated from Accept-Encoding"""
+
+    @app.after_request
+    def compress_response(response):
+        if request.method == 'HEAD' or not _compressible(response):
+            return response
+
+        settings = _route_settings()
+        if not settings.get('enabled', True):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        encoding = choose_encoding(request.headers.get('Accept-Encoding', ''))
+        if encoding is None:
+            return response
+
+        if encoding == 'br':
+            level = settings.get('brotli_quality') or COMPRESSION_BROTLI_QUALITY
+        else:
+            level = settings.get('gzip_level') or COMPRESSION_GZIP_LEVEL
+
+        if response.is_streamed:
+            response.response = _compress_stream(response.response, encoding, level)
+            response.headers['Content-Encoding'] = encoding
+            response.headers.pop('Content-Length', None)
+            with _stats_lock:
+                _stats['streamed'] += 1
+            return response
+
+        body = response.get_data()
+        if len(body) < (settings.get('min_size') or COMPRESSION_MIN_SIZE):
+            with _stats_lock:
+                _stats['skipped_small'] += 1
+            return response
+
+        use_cache = request.method == 'GET' and settings.get('cache', True)
+        key = (hashlib.blake2b(body, digest_size=16).digest(), encoding, level) if use_cache else None
+        compressed = _cache.get(key) if key else None
+        hit = compressed is not None
+        if not hit:
+            compressed = _compress_bytes(body, encoding, level)
+            if key:
+                _cache.put(key, compressed)
+
+        if len(compressed) >= len(body):
+            return response
+
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = encoding
+        with _stats_lock:
+            _stats['compressed'] += 1
+            _stats['cache_hits'] += hit
+            _stats['bytes_in'] += len(body)
+            _stats['bytes_out'] += len(compressed)
+        return response
@@ -0,0 +1,26 @@
+from flask import request, g
+from utils.resilience import start_deadline, end_deadline, DEFAULT_REQUEST_DEADLINE_MS
+
+def init_request_deadlines(app):
+    """Give every request a time budget that upstream calls draw down.
+
+    Clients may ask for a tighter budget with X-Request-Timeout-Ms; it is
+    never extended past REQUEST_DEADLINE_MS.
+    """
+    @app.before_request
+    def start_request_deadline():
+        budget_ms = DEFAULT_REQUEST_DEADLINE_MS
+        requested_ms = request.headers.get('X-Request-Timeout-Ms', type=int)
+        if requested_ms and requested_ms > 0:
+            budget_ms = min(requested_ms, budget_ms)
+        g.deadline_token = start_deadline(budget_ms / 1000)
+
+    @app.teardown_request
+    def end_request_deadline(error=None):
+        token = g.pop('deadline_token', None)
+        if token is not None:
+            try:
+                end_deadline(token)
+            except ValueError:
+                # Token created in a different context (e.g. copied into a thread)
+                pass
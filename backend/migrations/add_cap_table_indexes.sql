@@ -0,0 +1,9 @@
+-- Cap tables are rebuilt from asset_transactions and catch up by log_seq,
+-- an insert-order sequence the database assigns (transaction_date is set by
+-- the writer; a settled trade keeps the time it matched)
+ALTER TABLE asset_transactions ADD COLUMN IF NOT EXISTS log_seq BIGINT GENERATED ALWAYS AS IDENTITY;
+
+-- Create indexes for better performance
+CREATE UNIQUE INDEX IF NOT EXISTS idx_asset_transactions_log_seq ON asset_transactions(log_seq);
+CREATE INDEX IF NOT EXISTS idx_asset_transactions_transaction_date ON asset_transactions(transaction_date);
+CREATE INDEX IF NOT EXISTS idx_asset_transactions_token_id ON asset_transactions(token_id);
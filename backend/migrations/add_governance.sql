@@ -0,0 +1,121 @@
+-- Token-holder governance: proposals, voting power snapshots and running tallies
+
+CREATE TABLE IF NOT EXISTS proposals (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    token_id UUID NOT NULL,
+    title TEXT NOT NULL,
+    description TEXT,
+    created_by UUID REFERENCES users(id),
+    -- 'draft' while voting power is being snapshotted
+    status VARCHAR(20) NOT NULL DEFAULT 'draft' CHECK (status IN ('draft', 'open', 'closed', 'cancelled')),
+    -- Percent of snapshotted power that must vote (abstain counts)
+    quorum_pct NUMERIC(5, 2) NOT NULL DEFAULT 20,
+    -- Percent of yes + no power that must be yes
+    threshold_pct NUMERIC(5, 2) NOT NULL DEFAULT 50,
+    ends_at TIMESTAMP NOT NULL,
+    -- Filled in from the cap table when the proposal is created
+    snapshot_holders INTEGER NOT NULL DEFAULT 0,
+    snapshot_total_power BIGINT NOT NULL DEFAULT 0,
+    -- Running tallies, moved by governance_cast_vote
+    yes_power BIGINT NOT NULL DEFAULT 0,
+    no_power BIGINT NOT NULL DEFAULT 0,
+    abstain_power BIGINT NOT NULL DEFAULT 0,
+    voters_count INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT NOW(),
+    closed_at TIMESTAMP
+);
+
+-- Voting power per holder, fixed when the proposal was created
+CREATE TABLE IF NOT EXISTS proposal_voting_power (
+    proposal_id UUID NOT NULL REFERENCES proposals(id) ON DELETE CASCADE,
+    wallet_address TEXT NOT NULL,
+    user_id UUID,
+    voting_power BIGINT NOT NULL CHECK (voting_power > 0),
+    PRIMARY KEY (proposal_id, wallet_address)
+);
+
+-- One vote per holder per proposal; changing a vote updates the row
+CREATE TABLE IF NOT EXISTS votes (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    proposal_id UUID NOT NULL REFERENCES proposals(id) ON DELETE CASCADE,
+    token_id UUID NOT NULL,
+    voter_id UUID,
+    wallet_address TEXT NOT NULL,
+    vote_choice VARCHAR(10) NOT NULL CHECK (vote_choice IN ('yes', 'no', 'abstain')),
+    voting_power BIGINT NOT NULL,
+    created_at TIMESTAMP DEFAULT NOW(),
+    updated_at TIMESTAMP DEFAULT NOW(),
+    UNIQUE (proposal_id, wallet_address)
+);
+
+-- Record or change a vote and move the proposal's tallies by the difference.
+-- The proposal row is locked, so concurrent votes apply one after another;
+-- reads never have to count the votes table.
+CREATE OR REPLACE FUNCTION governance_cast_vote(
+    p_proposal_id UUID,
+    p_wallet_address TEXT,
+    p_choice TEXT
+)
+RETURNS TABLE (vote_id UUID, voting_power BIGINT, previous_choice TEXT, yes_power BIGINT, no_power BIGINT,
+               abstain_power BIGINT, voters_count INTEGER) AS $$
+#variable_conflict use_column
+DECLARE
+    v_proposal proposals%ROWTYPE;
+    v_power BIGINT;
+    v_user_id UUID;
+    v_previous TEXT;
+    v_vote_id UUID;
+BEGIN
+    IF p_choice NOT IN ('yes', 'no', 'abstain') THEN
+        RAISE EXCEPTION 'Invalid vote choice: %', p_choice;
+    END IF;
+
+    SELECT * INTO v_proposal FROM proposals WHERE id = p_proposal_id FOR UPDATE;
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Proposal not found';
+    END IF;
+    IF v_proposal.status <> 'open' OR v_proposal.ends_at <= NOW() THEN
+        RAISE EXCEPTION 'Voting has ended';
+    END IF;
+
+    SELECT p.voting_power, p.user_id INTO v_power, v_user_id
+    FROM proposal_voting_power p
+    WHERE p.proposal_id = p_proposal_id AND p.wallet_address = p_wallet_address;
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Wallet held no shares when the proposal was created';
+    END IF;
+
+    SELECT v.id, v.vote_choice INTO v_vote_id, v_previous
+    FROM votes v
+    WHERE v.proposal_id = p_proposal_id AND v.wallet_address = p_wallet_address;
+
+    IF v_vote_id IS NULL THEN
+        INSERT INTO votes (proposal_id, token_id, voter_id, wallet_address, vote_choice, voting_power)
+        VALUES (p_proposal_id, v_proposal.token_id, v_user_id, p_wallet_address, p_choice, v_power)
+        RETURNING id INTO v_vote_id;
+    ELSIF v_previous <> p_choice THEN
+        UPDATE votes SET vote_choice = p_choice, updated_at = NOW() WHERE id = v_vote_id;
+    END IF;
+
+    IF v_previous IS DISTINCT FROM p_choice THEN
+        UPDATE proposals SET
+            yes_power = yes_power + (CASE WHEN p_choice = 'yes' THEN v_power ELSE 0 END)
+                                  - (CASE WHEN v_previous = 'yes' THEN v_power ELSE 0 END),
+            no_power = no_power + (CASE WHEN p_choice = 'no' THEN v_power ELSE 0 END)
+                                - (CASE WHEN v_previous = 'no' THEN v_power ELSE 0 END),
+            abstain_power = abstain_power + (CASE WHEN p_choice = 'abstain' THEN v_power ELSE 0 END)
+                                          - (CASE WHEN v_previous = 'abstain' THEN v_power ELSE 0 END),
+            voters_count = voters_count + (CASE WHEN v_previous IS NULL THEN 1 ELSE 0 END)
+        WHERE id = p_proposal_id;
+    END IF;
+
+    RETURN QUERY
+    SELECT v_vote_id, v_power, v_previous, p.yes_power, p.no_power, p.abstain_power, p.voters_count
+    FROM proposals p WHERE p.id = p_proposal_id;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Create indexes for better performance
+CREATE INDEX IF NOT EXISTS idx_proposals_token_id ON proposals(token_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_votes_proposal_power ON votes(proposal_id, voting_power DESC, wallet_address);
+CREATE INDEX IF NOT EXISTS idx_votes_proposal_choice ON votes(proposal_id, vote_choice, voting_power DESC);
@@ -0,0 +1,45 @@
+-- Create mint_jobs table to queue blockchain mints outside the HTTP request
+CREATE TABLE IF NOT EXISTS mint_jobs (
+    id UUID PRIMARY KEY,
+    job_type VARCHAR(50) NOT NULL,
+    payload JSONB NOT NULL DEFAULT '{}',
+    targets JSONB NOT NULL DEFAULT '[]',
+    status VARCHAR(20) NOT NULL DEFAULT 'queued',  -- queued, running, minted, completed, dead_letter
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 5,
+    run_after TIMESTAMP NOT NULL DEFAULT NOW(),
+    locked_by VARCHAR(100),
+    locked_at TIMESTAMP,
+    result JSONB,
+    last_error TEXT,
+    created_at TIMESTAMP DEFAULT NOW(),
+    updated_at TIMESTAMP DEFAULT NOW()
+);
+
+-- Claim a batch of due jobs for one worker. SKIP LOCKED lets several workers
+-- poll concurrently without handing out the same job twice; jobs stuck in
+-- 'running' or 'minted' past the lock timeout (crashed worker) are picked up
+-- again. The worker checks result for a recorded signature or an unfinished
+-- send before minting, so a reclaimed job is never minted twice.
+CREATE OR REPLACE FUNCTION claim_mint_jobs(batch_size INTEGER, worker_id TEXT, lock_timeout_seconds INTEGER DEFAULT 300)
+RETURNS SETOF mint_jobs AS $$
+    UPDATE mint_jobs
+    SET status = 'running',
+        locked_by = worker_id,
+        locked_at = NOW(),
+        attempts = attempts + 1,
+        updated_at = NOW()
+    WHERE id IN (
+        SELECT id FROM mint_jobs
+        WHERE (status = 'queued' AND run_after <= NOW())
+           OR (status IN ('running', 'minted') AND locked_at < NOW() - make_interval(secs => lock_timeout_seconds))
+        ORDER BY run_after
+        LIMIT batch_size
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING *;
+$$ LANGUAGE sql;
+
+-- Create indexes for better performance
+CREATE INDEX IF NOT EXISTS idx_mint_jobs_status_run_after ON mint_jobs(status, run_after);
+CREATE INDEX IF NOT EXISTS idx_mint_jobs_locked_at ON mint_jobs(locked_at) WHERE status IN ('running', 'minted');
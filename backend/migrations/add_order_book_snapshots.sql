@@ -0,0 +1,15 @@
+-- Secondary market: latest order book snapshot per token
+-- Trades themselves settle into asset_transactions with transaction_type = 'trade'
+
+CREATE TABLE IF NOT EXISTS order_book_snapshots (
+    token_id UUID PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0,
+    snapshot JSONB NOT NULL,
+    -- Trades matched but not yet written to asset_transactions
+    pending_settlement JSONB NOT NULL DEFAULT '[]'::JSONB,
+    updated_at TIMESTAMP DEFAULT NOW()
+);
+
+-- Create indexes for better performance
+CREATE INDEX IF NOT EXISTS idx_asset_transactions_trades ON asset_transactions(token_id, transaction_date DESC) WHERE transaction_type = 'trade';
+CREATE INDEX IF NOT EXISTS idx_asset_transactions_seller ON asset_transactions(seller_user_id) WHERE seller_user_id IS NOT NULL;
@@ -0,0 +1,222 @@
+-- Per-user portfolio totals kept current as asset_transactions are written
+-- (replaces re-aggregating user_portfolio_summary on every read)
+
+-- One row per user and asset the user has ever held
+CREATE TABLE IF NOT EXISTS portfolio_positions (
+    user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    asset_id UUID NOT NULL,
+    token_id UUID,
+    asset_name TEXT,
+    asset_category TEXT,
+    shares BIGINT NOT NULL DEFAULT 0,
+    -- Average cost of the shares still held; sales take out their share of it
+    cost_basis_usd NUMERIC(20, 6) NOT NULL DEFAULT 0,
+    invested_usd NUMERIC(20, 6) NOT NULL DEFAULT 0,
+    proceeds_usd NUMERIC(20, 6) NOT NULL DEFAULT 0,
+    realized_pnl_usd NUMERIC(20, 6) NOT NULL DEFAULT 0,
+    purchases_count INTEGER NOT NULL DEFAULT 0,
+    sales_count INTEGER NOT NULL DEFAULT 0,
+    first_acquired_at TIMESTAMP,
+    last_activity_at TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT NOW(),
+    PRIMARY KEY (user_id, asset_id)
+);
+
+-- Totals over a user's positions
+CREATE TABLE IF NOT EXISTS portfolio_summaries (
+    user_id UUID PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    total_invested_usd NUMERIC(20, 6) NOT NULL DEFAULT 0,
+    total_proceeds_usd NUMERIC(20, 6) NOT NULL DEFAULT 0,
+    cost_basis_usd NUMERIC(20, 6) NOT NULL DEFAULT 0,
+    realized_pnl_usd NUMERIC(20, 6) NOT NULL DEFAULT 0,
+    total_shares BIGINT NOT NULL DEFAULT 0,
+    assets_owned INTEGER NOT NULL DEFAULT 0,
+    purchases_count INTEGER NOT NULL DEFAULT 0,
+    sales_count INTEGER NOT NULL DEFAULT 0,
+    last_activity_at TIMESTAMP,
+    rebuilt_at TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT NOW()
+);
+
+-- Move one user's position and totals by a single acquisition (p_shares > 0)
+-- or sale (p_shares < 0) worth p_usd. The summary row is locked first, so
+-- concurrent writes for a user apply one after another. Sales are capped at
+-- the shares held and remove cost basis at the position's average cost.
+CREATE OR REPLACE FUNCTION portfolio_apply(
+    p_user_id UUID,
+    p_asset_id UUID,
+    p_token_id UUID,
+    p_asset_name TEXT,
+    p_asset_category TEXT,
+    p_shares BIGINT,
+    p_usd NUMERIC,
+    p_at TIMESTAMP
+)
+RETURNS VOID AS $$
+DECLARE
+    v_shares BIGINT;
+    v_basis NUMERIC;
+    v_sold BIGINT;
+    v_removed NUMERIC := 0;
+BEGIN
+    INSERT INTO portfolio_summaries (user_id) VALUES (p_user_id) ON CONFLICT (user_id) DO NOTHING;
+    PERFORM 1 FROM portfolio_summaries s WHERE s.user_id = p_user_id FOR UPDATE;
+
+    INSERT INTO portfolio_positions (user_id, asset_id, token_id, asset_name, asset_category)
+    VALUES (p_user_id, p_asset_id, p_token_id, p_asset_name, p_asset_category)
+    ON CONFLICT (user_id, asset_id) DO NOTHING;
+
+    SELECT p.shares, p.cost_basis_usd INTO v_shares, v_basis
+    FROM portfolio_positions p
+    WHERE p.user_id = p_user_id AND p.asset_id = p_asset_id;
+
+    IF p_shares > 0 THEN
+        UPDATE portfolio_positions
+        SET shares = shares + p_shares,
+            cost_basis_usd = cost_basis_usd + p_usd,
+            invested_usd = invested_usd + p_usd,
+            purchases_count = purchases_count + 1,
+            token_id = COALESCE(token_id, p_token_id),
+            asset_name = COALESCE(p_asset_name, asset_name),
+            asset_category = COALESCE(p_asset_category, asset_category),
+            first_acquired_at = COALESCE(first_acquired_at, p_at),
+            last_activity_at = GREATEST(last_activity_at, p_at),
+            updated_at = NOW()
+        WHERE user_id = p_user_id AND asset_id = p_asset_id;
+
+        UPDATE portfolio_summaries
+        SET total_invested_usd = total_invested_usd + p_usd,
+            cost_basis_usd = cost_basis_usd + p_usd,
+            total_shares = total_shares + p_shares,
+            assets_owned = assets_owned + CASE WHEN v_shares = 0 THEN 1 ELSE 0 END,
+            purchases_count = purchases_count + 1,
+            last_activity_at = GREATEST(last_activity_at, p_at),
+            updated_at = NOW()
+        WHERE user_id = p_user_id;
+    ELSE
+        v_sold := LEAST(-p_shares, v_shares);
+        IF v_shares > 0 THEN
+            v_removed := ROUND(v_basis * v_sold / v_shares, 6);
+        END IF;
+
+        UPDATE portfolio_positions
+        SET shares = shares - v_sold,
+            cost_basis_usd = cost_basis_usd - v_removed,
+            proceeds_usd = proceeds_usd + p_usd,
+            realized_pnl_usd = realized_pnl_usd + p_usd - v_removed,
+            sales_count = sales_count + 1,
+            last_activity_at = GREATEST(last_activity_at, p_at),
+            updated_at = NOW()
+        WHERE user_id = p_user_id AND asset_id = p_asset_id;
+
+        UPDATE portfolio_summaries
+        SET total_proceeds_usd = total_proceeds_usd + p_usd,
+            cost_basis_usd = cost_basis_usd - v_removed,
+            realized_pnl_usd = realized_pnl_usd + p_usd - v_removed,
+            total_shares = total_shares - v_sold,
+            assets_owned = assets_owned - CASE WHEN v_shares > 0 AND v_sold = v_shares THEN 1 ELSE 0 END,
+            sales_count = sales_count + 1,
+            last_activity_at = GREATEST(last_activity_at, p_at),
+            updated_at = NOW()
+        WHERE user_id = p_user_id;
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Apply one share-moving transaction to the seller (if any) and the buyer.
+-- Users are locked in id order so two trades between the same pair of
+-- users in opposite directions can't deadlock.
+CREATE OR REPLACE FUNCTION portfolio_apply_transaction(t asset_transactions, p_only_user UUID DEFAULT NULL)
+RETURNS VOID AS $$
+DECLARE
+    v_shares BIGINT := COALESCE(t.shares_amount, 0);
+    v_usd NUMERIC := COALESCE(t.total_cost_usd, 0);
+    v_at TIMESTAMP := COALESCE(t.transaction_date, NOW());
+    v_seller UUID := t.seller_user_id;
+    v_buyer UUID := t.buyer_user_id;
+BEGIN
+    IF t.transaction_type NOT IN ('purchase', 'transfer', 'trade')
+       OR t.status NOT IN ('pending', 'completed')
+       OR t.asset_id IS NULL OR v_shares <= 0 THEN
+        RETURN;
+    END IF;
+
+    IF p_only_user IS NOT NULL THEN
+        v_seller := CASE WHEN v_seller = p_only_user THEN v_seller END;
+        v_buyer := CASE WHEN v_buyer = p_only_user THEN v_buyer END;
+    END IF;
+
+    IF v_seller IS NOT NULL AND (v_buyer IS NULL OR v_seller < v_buyer) THEN
+        PERFORM portfolio_apply(v_seller, t.asset_id, t.token_id, t.asset_name, t.asset_category, -v_shares, v_usd, v_at);
+        v_seller := NULL;
+    END IF;
+    IF v_buyer IS NOT NULL THEN
+        PERFORM portfolio_apply(v_buyer, t.asset_id, t.token_id, t.asset_name, t.asset_category, v_shares, v_usd, v_at);
+    END IF;
+    IF v_seller IS NOT NULL THEN
+        PERFORM portfolio_apply(v_seller, t.asset_id, t.token_id, t.asset_name, t.asset_category, -v_shares, v_usd, v_at);
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION portfolio_on_transaction_insert()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM portfolio_apply_transaction(NEW);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Fires once per inserted row; upserts that hit an existing id (trade
+-- settlement retries) don't insert and so aren't counted twice
+DROP TRIGGER IF EXISTS asset_transactions_portfolio ON asset_transactions;
+CREATE TRIGGER asset_transactions_portfolio
+    AFTER INSERT ON asset_transactions
+    FOR EACH ROW EXECUTE FUNCTION portfolio_on_transaction_insert();
+
+-- Recompute one user's positions and totals from their full history (repair tool)
+CREATE OR REPLACE FUNCTION portfolio_rebuild_user(p_user_id UUID)
+RETURNS SETOF portfolio_summaries AS $$
+DECLARE
+    t asset_transactions;
+BEGIN
+    INSERT INTO portfolio_summaries (user_id) VALUES (p_user_id) ON CONFLICT (user_id) DO NOTHING;
+    PERFORM 1 FROM portfolio_summaries s WHERE s.user_id = p_user_id FOR UPDATE;
+
+    DELETE FROM portfolio_positions WHERE user_id = p_user_id;
+    UPDATE portfolio_summaries
+    SET total_invested_usd = 0, total_proceeds_usd = 0, cost_basis_usd = 0, realized_pnl_usd = 0,
+        total_shares = 0, assets_owned = 0, purchases_count = 0, sales_count = 0, last_activity_at = NULL
+    WHERE user_id = p_user_id;
+
+    FOR t IN
+        SELECT * FROM asset_transactions
+        WHERE buyer_user_id = p_user_id OR seller_user_id = p_user_id
+        ORDER BY transaction_date, id
+    LOOP
+        PERFORM portfolio_apply_transaction(t, p_user_id);
+    END LOOP;
+
+    UPDATE portfolio_summaries SET rebuilt_at = NOW(), updated_at = NOW() WHERE user_id = p_user_id;
+    RETURN QUERY SELECT * FROM portfolio_summaries WHERE user_id = p_user_id;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Backfill every user with history
+DO $$
+DECLARE
+    r RECORD;
+BEGIN
+    FOR r IN
+        SELECT buyer_user_id AS user_id FROM asset_transactions WHERE buyer_user_id IS NOT NULL
+        UNION
+        SELECT seller_user_id FROM asset_transactions WHERE seller_user_id IS NOT NULL
+    LOOP
+        PERFORM portfolio_rebuild_user(r.user_id);
+    END LOOP;
+END $$;
+
+-- Create indexes for better performance
+CREATE INDEX IF NOT EXISTS idx_portfolio_positions_user_id ON portfolio_positions(user_id, cost_basis_usd DESC);
+CREATE INDEX IF NOT EXISTS idx_asset_transactions_buyer_user_id ON asset_transactions(buyer_user_id, transaction_date);
+CREATE INDEX IF NOT EXISTS idx_asset_transactions_seller_user_id ON asset_transactions(seller_user_id, transaction_date);
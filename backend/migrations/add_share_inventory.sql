@@ -0,0 +1,236 @@
+-- Share inventory with atomic reservations (replaces read-check-write on available_shares)
+
+-- One row per token; available + reserved + sold = total_shares at all times
+CREATE TABLE IF NOT EXISTS share_inventory (
+    token_id UUID PRIMARY KEY,
+    total_shares BIGINT NOT NULL,
+    available_shares BIGINT NOT NULL CHECK (available_shares >= 0),
+    reserved_shares BIGINT NOT NULL DEFAULT 0 CHECK (reserved_shares >= 0),
+    sold_shares BIGINT NOT NULL DEFAULT 0 CHECK (sold_shares >= 0),
+    updated_at TIMESTAMP DEFAULT NOW()
+);
+
+-- Shares held for a buyer while payment and minting run
+CREATE TABLE IF NOT EXISTS share_reservations (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    token_id UUID NOT NULL REFERENCES share_inventory(token_id) ON DELETE CASCADE,
+    buyer_ref TEXT,
+    shares BIGINT NOT NULL CHECK (shares > 0),
+    status VARCHAR(20) NOT NULL DEFAULT 'held' CHECK (status IN ('held', 'confirmed', 'released', 'expired')),
+    expires_at TIMESTAMP NOT NULL,
+    created_at TIMESTAMP DEFAULT NOW(),
+    updated_at TIMESTAMP DEFAULT NOW()
+);
+
+-- Create the inventory row for a token from its current supply
+CREATE OR REPLACE FUNCTION inventory_seed(p_token_id UUID)
+RETURNS VOID AS $$
+BEGIN
+    INSERT INTO share_inventory (token_id, total_shares, available_shares, sold_shares)
+    SELECT pt.id, pt.total_supply, pt.available_shares, pt.total_supply - pt.available_shares
+    FROM property_tokens pt
+    WHERE pt.id = p_token_id
+    ON CONFLICT (token_id) DO NOTHING;
+
+    INSERT INTO share_inventory (token_id, total_shares, available_shares, sold_shares)
+    SELECT t.id, t.total_supply, GREATEST(t.total_supply - COALESCE(s.sold, 0), 0), LEAST(COALESCE(s.sold, 0), t.total_supply)
+    FROM tokens t
+    LEFT JOIN (
+        SELECT token_id, SUM(shares_amount) AS sold
+        FROM asset_transactions
+        WHERE token_id = p_token_id AND transaction_type = 'purchase' AND status IN ('pending', 'completed')
+        GROUP BY token_id
+    ) s ON s.token_id = t.id
+    WHERE t.id = p_token_id AND t.total_supply IS NOT NULL
+    ON CONFLICT (token_id) DO NOTHING;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Reserve shares for a batch of buyers with one lock on the inventory row.
+-- p_requests is [{"shares": n, "buyer_ref": "..."}, ...]; requests are
+-- granted in order while stock lasts, and ones that don't fit are skipped.
+-- Returns {"available": n, "reservations": [{"index", "id", "expires_at"}]}.
+CREATE OR REPLACE FUNCTION inventory_reserve_batch(
+    p_token_id UUID,
+    p_requests JSONB,
+    p_ttl_seconds INTEGER DEFAULT 300
+)
+RETURNS JSONB AS $$
+DECLARE
+    v_available BIGINT;
+    v_granted BIGINT := 0;
+    v_request JSONB;
+    v_index INTEGER := 0;
+    v_shares BIGINT;
+    v_reservation_id UUID;
+    v_expires_at TIMESTAMP := NOW() + make_interval(secs => p_ttl_seconds);
+    v_reservations JSONB := '[]'::JSONB;
+BEGIN
+    SELECT available_shares INTO v_available FROM share_inventory WHERE token_id = p_token_id FOR UPDATE;
+
+    IF NOT FOUND THEN
+        PERFORM inventory_seed(p_token_id);
+        SELECT available_shares INTO v_available FROM share_inventory WHERE token_id = p_token_id FOR UPDATE;
+        IF NOT FOUND THEN
+            RETURN jsonb_build_object('available', NULL, 'reservations', v_reservations, 'missing', TRUE);
+        END IF;
+    END IF;
+
+    FOR v_request IN SELECT * FROM jsonb_array_elements(p_requests)
+    LOOP
+        v_shares := (v_request->>'shares')::BIGINT;
+        IF v_shares > 0 AND v_shares <= v_available - v_granted THEN
+            INSERT INTO share_reservations (token_id, buyer_ref, shares, expires_at)
+            VALUES (p_token_id, v_request->>'buyer_ref', v_shares, v_expires_at)
+            RETURNING id INTO v_reservation_id;
+
+            v_granted := v_granted + v_shares;
+            v_reservations := v_reservations || jsonb_build_object(
+                'index', v_index, 'id', v_reservation_id, 'expires_at', v_expires_at
+            );
+        END IF;
+        v_index := v_index + 1;
+    END LOOP;
+
+    IF v_granted > 0 THEN
+        UPDATE share_inventory
+        SET available_shares = available_shares - v_granted,
+            reserved_shares = reserved_shares + v_granted,
+            updated_at = NOW()
+        WHERE token_id = p_token_id;
+    END IF;
+
+    RETURN jsonb_build_object('available', v_available - v_granted, 'reservations', v_reservations);
+END;
+$$ LANGUAGE plpgsql;
+
+-- Turn a held reservation into a sale; false if it already expired or was released
+CREATE OR REPLACE FUNCTION inventory_confirm(p_reservation_id UUID)
+RETURNS BOOLEAN AS $$
+DECLARE
+    v_token_id UUID;
+    v_shares BIGINT;
+BEGIN
+    UPDATE share_reservations
+    SET status = 'confirmed', updated_at = NOW()
+    WHERE id = p_reservation_id AND status = 'held' AND expires_at > NOW()
+    RETURNING token_id, shares INTO v_token_id, v_shares;
+
+    IF NOT FOUND THEN
+        RETURN FALSE;
+    END IF;
+
+    UPDATE share_inventory
+    SET reserved_shares = reserved_shares - v_shares,
+        sold_shares = sold_shares + v_shares,
+        updated_at = NOW()
+    WHERE token_id = v_token_id;
+
+    -- Keep the listing's display column in step (conditional, never read-modify-write)
+    UPDATE property_tokens
+    SET available_shares = available_shares - v_shares
+    WHERE id = v_token_id AND available_shares >= v_shares;
+
+    RETURN TRUE;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Record a sale whose reservation lapsed before confirm (the shares were
+-- already minted). Takes what it can from available stock and returns the
+-- shares that couldn't be covered (0 when fully accounted for), or NULL if
+-- the reservation was confirmed or released already.
+CREATE OR REPLACE FUNCTION inventory_confirm_late(p_reservation_id UUID)
+RETURNS BIGINT AS $$
+DECLARE
+    v_reservation share_reservations%ROWTYPE;
+    v_taken BIGINT;
+BEGIN
+    SELECT * INTO v_reservation FROM share_reservations WHERE id = p_reservation_id FOR UPDATE;
+    IF NOT FOUND OR v_reservation.status NOT IN ('held', 'expired') THEN
+        RETURN NULL;
+    END IF;
+
+    IF v_reservation.status = 'held' THEN
+        -- Past expires_at but not swept yet: the shares are still reserved
+        v_taken := v_reservation.shares;
+        UPDATE share_inventory
+        SET reserved_shares = reserved_shares - v_taken,
+            sold_shares = sold_shares + v_taken,
+            updated_at = NOW()
+        WHERE token_id = v_reservation.token_id;
+    ELSE
+        SELECT LEAST(available_shares, v_reservation.shares) INTO v_taken
+        FROM share_inventory WHERE token_id = v_reservation.token_id FOR UPDATE;
+        UPDATE share_inventory
+        SET available_shares = available_shares - v_taken,
+            sold_shares = sold_shares + v_taken,
+            updated_at = NOW()
+        WHERE token_id = v_reservation.token_id;
+    END IF;
+
+    UPDATE share_reservations SET status = 'confirmed', updated_at = NOW() WHERE id = p_reservation_id;
+
+    UPDATE property_tokens
+    SET available_shares = available_shares - v_taken
+    WHERE id = v_reservation.token_id AND available_shares >= v_taken;
+
+    RETURN v_reservation.shares - v_taken;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Put a held reservation's shares back on sale
+CREATE OR REPLACE FUNCTION inventory_release(p_reservation_id UUID, p_status TEXT DEFAULT 'released')
+RETURNS BOOLEAN AS $$
+DECLARE
+    v_token_id UUID;
+    v_shares BIGINT;
+BEGIN
+    UPDATE share_reservations
+    SET status = p_status, updated_at = NOW()
+    WHERE id = p_reservation_id AND status = 'held'
+    RETURNING token_id, shares INTO v_token_id, v_shares;
+
+    IF NOT FOUND THEN
+        RETURN FALSE;
+    END IF;
+
+    UPDATE share_inventory
+    SET available_shares = available_shares + v_shares,
+        reserved_shares = reserved_shares - v_shares,
+        updated_at = NOW()
+    WHERE token_id = v_token_id;
+
+    RETURN TRUE;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Release reservations whose buyers never finished paying
+CREATE OR REPLACE FUNCTION inventory_expire_reservations(p_batch_size INTEGER DEFAULT 500)
+RETURNS INTEGER AS $$
+DECLARE
+    v_id UUID;
+    v_count INTEGER := 0;
+BEGIN
+    FOR v_id IN
+        SELECT id FROM share_reservations
+        WHERE status = 'held' AND expires_at <= NOW()
+        ORDER BY expires_at
+        LIMIT p_batch_size
+        FOR UPDATE SKIP LOCKED
+    LOOP
+        IF inventory_release(v_id, 'expired') THEN
+            v_count := v_count + 1;
+        END IF;
+    END LOOP;
+
+    RETURN v_count;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Seed inventory for every existing token
+SELECT inventory_seed(id) FROM property_tokens;
+SELECT inventory_seed(id) FROM tokens;
+
+-- Create indexes for better performance
+CREATE INDEX IF NOT EXISTS idx_share_reservations_token_id ON share_reservations(token_id);
+CREATE INDEX IF NOT EXISTS idx_share_reservations_held ON share_reservations(expires_at) WHERE status = 'held';
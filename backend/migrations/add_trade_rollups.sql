@@ -0,0 +1,129 @@
+-- Per-asset trading buckets at 1m/1h/1d, kept current as asset_transactions are written
+-- (replaces aggregating asset_trading_activity over raw rows at query time)
+
+CREATE TABLE IF NOT EXISTS asset_trade_buckets (
+    asset_id UUID NOT NULL,
+    resolution VARCHAR(2) NOT NULL CHECK (resolution IN ('1m', '1h', '1d')),
+    bucket_start TIMESTAMP NOT NULL,
+    volume_usd NUMERIC(20, 6) NOT NULL DEFAULT 0,
+    shares BIGINT NOT NULL DEFAULT 0,
+    trades INTEGER NOT NULL DEFAULT 0,
+    vwap_usd NUMERIC(20, 6) GENERATED ALWAYS AS (CASE WHEN shares > 0 THEN volume_usd / shares END) STORED,
+    open_price NUMERIC(20, 6),
+    high_price NUMERIC(20, 6),
+    low_price NUMERIC(20, 6),
+    close_price NUMERIC(20, 6),
+    -- When the open and close trades happened, so out-of-order merges pick the right ones
+    open_at TIMESTAMP,
+    close_at TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT NOW(),
+    PRIMARY KEY (asset_id, resolution, bucket_start)
+);
+
+-- Fold one trade into its 1m, 1h and 1d buckets. Each bucket row is
+-- updated in place by the upsert, so concurrent trades for an asset
+-- add up instead of overwriting each other.
+CREATE OR REPLACE FUNCTION trade_rollup_apply(
+    p_asset_id UUID,
+    p_at TIMESTAMP,
+    p_price NUMERIC,
+    p_shares BIGINT,
+    p_volume_usd NUMERIC
+)
+RETURNS VOID AS $$
+BEGIN
+    INSERT INTO asset_trade_buckets AS b (
+        asset_id, resolution, bucket_start, volume_usd, shares, trades,
+        open_price, high_price, low_price, close_price, open_at, close_at
+    )
+    SELECT p_asset_id, r.resolution, date_trunc(r.unit, p_at), p_volume_usd, p_shares, 1,
+           p_price, p_price, p_price, p_price, p_at, p_at
+    FROM (VALUES ('1m', 'minute'), ('1h', 'hour'), ('1d', 'day')) AS r(resolution, unit)
+    ON CONFLICT (asset_id, resolution, bucket_start) DO UPDATE
+    SET volume_usd = b.volume_usd + EXCLUDED.volume_usd,
+        shares = b.shares + EXCLUDED.shares,
+        trades = b.trades + EXCLUDED.trades,
+        high_price = GREATEST(b.high_price, EXCLUDED.high_price),
+        low_price = LEAST(b.low_price, EXCLUDED.low_price),
+        open_price = CASE WHEN b.open_at IS NULL OR EXCLUDED.open_at < b.open_at THEN EXCLUDED.open_price ELSE b.open_price END,
+        open_at = LEAST(b.open_at, EXCLUDED.open_at),
+        close_price = CASE WHEN b.close_at IS NULL OR EXCLUDED.close_at >= b.close_at THEN EXCLUDED.close_price ELSE b.close_price END,
+        close_at = GREATEST(b.close_at, EXCLUDED.close_at),
+        updated_at = NOW();
+END;
+$$ LANGUAGE plpgsql;
+
+-- Priced share sales only: primary purchases and secondary-market trades
+CREATE OR REPLACE FUNCTION trade_rollup_on_transaction_insert()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_price NUMERIC;
+BEGIN
+    IF NEW.transaction_type IN ('purchase', 'trade')
+       AND NEW.status IN ('pending', 'completed')
+       AND NEW.asset_id IS NOT NULL
+       AND COALESCE(NEW.shares_amount, 0) > 0 THEN
+        v_price := COALESCE(NEW.share_price_usd, NEW.total_cost_usd / NEW.shares_amount);
+        IF v_price IS NOT NULL THEN
+            PERFORM trade_rollup_apply(
+                NEW.asset_id, COALESCE(NEW.transaction_date, NOW()), v_price, NEW.shares_amount,
+                COALESCE(NEW.total_cost_usd, v_price * NEW.shares_amount)
+            );
+        END IF;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS asset_transactions_trade_rollup ON asset_transactions;
+CREATE TRIGGER asset_transactions_trade_rollup
+    AFTER INSERT ON asset_transactions
+    FOR EACH ROW EXECUTE FUNCTION trade_rollup_on_transaction_insert();
+
+-- Recompute every bucket from p_since onwards (optionally for one asset).
+-- The table lock makes trades inserted meanwhile wait, then apply on top
+-- of the recomputed buckets, so none are lost or counted twice. Used for
+-- the still-open day after a backfill; older history is backfilled in
+-- batches by rollup_tool.py.
+CREATE OR REPLACE FUNCTION trade_rollup_rebuild_since(p_since TIMESTAMP, p_asset_id UUID DEFAULT NULL)
+RETURNS INTEGER AS $$
+DECLARE
+    v_count INTEGER;
+BEGIN
+    LOCK TABLE asset_trade_buckets IN EXCLUSIVE MODE;
+
+    DELETE FROM asset_trade_buckets
+    WHERE bucket_start >= date_trunc('day', p_since)
+      AND (p_asset_id IS NULL OR asset_id = p_asset_id);
+
+    INSERT INTO asset_trade_buckets (
+        asset_id, resolution, bucket_start, volume_usd, shares, trades,
+        open_price, high_price, low_price, close_price, open_at, close_at
+    )
+    SELECT t.asset_id, r.resolution, date_trunc(r.unit, t.at),
+           SUM(t.volume_usd), SUM(t.shares), COUNT(*),
+           (ARRAY_AGG(t.price ORDER BY t.at, t.id))[1], MAX(t.price), MIN(t.price),
+           (ARRAY_AGG(t.price ORDER BY t.at DESC, t.id DESC))[1], MIN(t.at), MAX(t.at)
+    FROM (
+        SELECT id, asset_id, transaction_date AS at, shares_amount AS shares,
+               COALESCE(share_price_usd, total_cost_usd / shares_amount) AS price,
+               COALESCE(total_cost_usd, share_price_usd * shares_amount) AS volume_usd
+        FROM asset_transactions
+        WHERE transaction_type IN ('purchase', 'trade')
+          AND status IN ('pending', 'completed')
+          AND asset_id IS NOT NULL
+          AND shares_amount > 0
+          AND transaction_date >= date_trunc('day', p_since)
+          AND (p_asset_id IS NULL OR asset_id = p_asset_id)
+    ) t
+    CROSS JOIN (VALUES ('1m', 'minute'), ('1h', 'hour'), ('1d', 'day')) AS r(resolution, unit)
+    WHERE t.price IS NOT NULL
+    GROUP BY t.asset_id, r.resolution, date_trunc(r.unit, t.at);
+
+    GET DIAGNOSTICS v_count = ROW_COUNT;
+    RETURN v_count;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Create indexes for better performance
+CREATE INDEX IF NOT EXISTS idx_asset_transactions_asset_id_date ON asset_transactions(asset_id, transaction_date);
@@ -0,0 +1,40 @@
+-- Create transaction_confirmations table to track on-chain confirmation of stored signatures
+CREATE TABLE IF NOT EXISTS transaction_confirmations (
+    signature VARCHAR(100) PRIMARY KEY,
+    source_table VARCHAR(50) NOT NULL,
+    source_id UUID NOT NULL,
+    source_column VARCHAR(50) NOT NULL,
+    confirmation_status VARCHAR(20) NOT NULL DEFAULT 'pending',  -- pending, processed, confirmed, finalized, failed, not_found
+    slot BIGINT,
+    err TEXT,
+    check_count INTEGER NOT NULL DEFAULT 0,
+    last_checked_at TIMESTAMP,
+    created_at TIMESTAMP DEFAULT NOW(),
+    updated_at TIMESTAMP DEFAULT NOW()
+);
+
+-- Create indexes for better performance
+CREATE INDEX IF NOT EXISTS idx_transaction_confirmations_status ON transaction_confirmations(confirmation_status);
+CREATE INDEX IF NOT EXISTS idx_transaction_confirmations_source ON transaction_confirmations(source_table, source_id);
+
+-- Signatures written outside a mint job (which tracks its own) that have no
+-- transaction_confirmations row yet; the columns match ConfirmationTracker.SOURCES
+CREATE OR REPLACE FUNCTION untracked_signatures(batch_size INTEGER DEFAULT 1000)
+RETURNS TABLE (signature TEXT, source_table TEXT, source_id UUID, source_column TEXT) AS $$
+    SELECT s.signature, s.source_table, s.source_id, s.source_column
+    FROM (
+        SELECT creation_tx::TEXT, 'tokens'::TEXT, id, 'creation_tx'::TEXT FROM tokens WHERE creation_tx IS NOT NULL
+        UNION ALL
+        SELECT mint_tx::TEXT, 'tokens'::TEXT, id, 'mint_tx'::TEXT FROM tokens WHERE mint_tx IS NOT NULL
+        UNION ALL
+        SELECT asset_mint_tx::TEXT, 'asset_transactions'::TEXT, id, 'asset_mint_tx'::TEXT FROM asset_transactions WHERE asset_mint_tx IS NOT NULL
+        UNION ALL
+        SELECT vault_reward_tx::TEXT, 'asset_transactions'::TEXT, id, 'vault_reward_tx'::TEXT FROM asset_transactions WHERE vault_reward_tx IS NOT NULL
+        UNION ALL
+        SELECT mint_tx::TEXT, 'property_purchases'::TEXT, id, 'mint_tx'::TEXT FROM property_purchases WHERE mint_tx IS NOT NULL
+    ) AS s (signature, source_table, source_id, source_column)
+    -- Mock and malformed signatures are never tracked; leave them out so they don't fill every batch
+    WHERE s.signature ~ '^[1-9A-HJ-NP-Za-km-z]{64,88}$'
+      AND NOT EXISTS (SELECT 1 FROM transaction_confirmations c WHERE c.signature = s.signature)
+    LIMIT batch_size;
+$$ LANGUAGE sql STABLE;
@@ -0,0 +1,179 @@
+-- Append-only VAULT ledger; vault_balances becomes a materialized view of it
+
+-- Rewards are fractional (purchase rewards are a percentage of 100 VAULT)
+ALTER TABLE vault_balances ALTER COLUMN balance TYPE NUMERIC(20, 6);
+ALTER TABLE vault_balances ALTER COLUMN id SET DEFAULT gen_random_uuid();
+ALTER TABLE vault_balances ADD COLUMN IF NOT EXISTS total_earned NUMERIC(20, 6) DEFAULT 0;
+ALTER TABLE vault_balances ADD COLUMN IF NOT EXISTS last_entry_id BIGINT;
+
+-- One row per credit or debit; never updated or deleted
+CREATE TABLE IF NOT EXISTS vault_ledger_entries (
+    id BIGSERIAL PRIMARY KEY,
+    user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    amount NUMERIC(20, 6) NOT NULL,
+    entry_type VARCHAR(50) NOT NULL,
+    reference_id TEXT,
+    idempotency_key TEXT UNIQUE,
+    balance_after NUMERIC(20, 6) NOT NULL,
+    created_at TIMESTAMP DEFAULT NOW(),
+    CHECK (amount <> 0)
+);
+
+-- Periodic snapshot of each balance, so verification only replays entries after it
+CREATE TABLE IF NOT EXISTS vault_ledger_checkpoints (
+    id BIGSERIAL PRIMARY KEY,
+    user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    last_entry_id BIGINT NOT NULL,
+    balance NUMERIC(20, 6) NOT NULL,
+    total_earned NUMERIC(20, 6) NOT NULL,
+    created_at TIMESTAMP DEFAULT NOW()
+);
+
+CREATE OR REPLACE FUNCTION vault_ledger_reject_changes()
+RETURNS TRIGGER AS $$
+BEGIN
+    RAISE EXCEPTION 'vault_ledger_entries is append-only';
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS vault_ledger_entries_append_only ON vault_ledger_entries;
+CREATE TRIGGER vault_ledger_entries_append_only
+    BEFORE UPDATE OR DELETE ON vault_ledger_entries
+    FOR EACH ROW EXECUTE FUNCTION vault_ledger_reject_changes();
+
+-- Append an entry and move the balance in one transaction. The balance row
+-- is locked first, so concurrent appends for a user apply one after another
+-- instead of overwriting each other. A repeated idempotency_key returns the
+-- original entry without moving the balance again.
+CREATE OR REPLACE FUNCTION vault_ledger_append(
+    p_user_id UUID,
+    p_amount NUMERIC,
+    p_entry_type TEXT,
+    p_reference_id TEXT DEFAULT NULL,
+    p_idempotency_key TEXT DEFAULT NULL
+)
+RETURNS TABLE (entry_id BIGINT, balance NUMERIC, total_earned NUMERIC, duplicate BOOLEAN) AS $$
+#variable_conflict use_column
+DECLARE
+    v_balance NUMERIC;
+    v_total_earned NUMERIC;
+    v_entry_id BIGINT;
+BEGIN
+    INSERT INTO vault_balances (user_id, balance, total_earned)
+    VALUES (p_user_id, 0, 0)
+    ON CONFLICT (user_id) DO NOTHING;
+
+    SELECT b.balance, b.total_earned INTO v_balance, v_total_earned
+    FROM vault_balances b
+    WHERE b.user_id = p_user_id
+    FOR UPDATE;
+
+    IF p_idempotency_key IS NOT NULL THEN
+        SELECT e.id INTO v_entry_id FROM vault_ledger_entries e WHERE e.idempotency_key = p_idempotency_key;
+        IF FOUND THEN
+            RETURN QUERY SELECT v_entry_id, v_balance, v_total_earned, TRUE;
+            RETURN;
+        END IF;
+    END IF;
+
+    v_balance := COALESCE(v_balance, 0) + p_amount;
+    v_total_earned := COALESCE(v_total_earned, 0) + GREATEST(p_amount, 0);
+
+    IF v_balance < 0 THEN
+        RAISE EXCEPTION 'Insufficient VAULT balance';
+    END IF;
+
+    INSERT INTO vault_ledger_entries (user_id, amount, entry_type, reference_id, idempotency_key, balance_after)
+    VALUES (p_user_id, p_amount, p_entry_type, p_reference_id, p_idempotency_key, v_balance)
+    RETURNING id INTO v_entry_id;
+
+    UPDATE vault_balances
+    SET balance = v_balance,
+        total_earned = v_total_earned,
+        last_entry_id = v_entry_id,
+        updated_at = NOW()
+    WHERE user_id = p_user_id;
+
+    RETURN QUERY SELECT v_entry_id, v_balance, v_total_earned, FALSE;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Snapshot every balance that moved since its last checkpoint
+CREATE OR REPLACE FUNCTION vault_ledger_checkpoint()
+RETURNS INTEGER AS $$
+DECLARE
+    v_count INTEGER;
+BEGIN
+    INSERT INTO vault_ledger_checkpoints (user_id, last_entry_id, balance, total_earned)
+    SELECT b.user_id, b.last_entry_id, b.balance, b.total_earned
+    FROM vault_balances b
+    WHERE b.last_entry_id IS NOT NULL
+      AND b.last_entry_id > COALESCE(
+          (SELECT MAX(c.last_entry_id) FROM vault_ledger_checkpoints c WHERE c.user_id = b.user_id), 0
+      );
+
+    GET DIAGNOSTICS v_count = ROW_COUNT;
+    RETURN v_count;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Recompute one materialized balance from the full ledger (repair tool)
+CREATE OR REPLACE FUNCTION vault_ledger_rebuild_balance(p_user_id UUID)
+RETURNS TABLE (balance NUMERIC, total_earned NUMERIC, last_entry_id BIGINT) AS $$
+#variable_conflict use_column
+DECLARE
+    v_balance NUMERIC;
+    v_total_earned NUMERIC;
+    v_last_entry_id BIGINT;
+BEGIN
+    PERFORM 1 FROM vault_balances b WHERE b.user_id = p_user_id FOR UPDATE;
+
+    SELECT COALESCE(SUM(e.amount), 0), COALESCE(SUM(GREATEST(e.amount, 0)), 0), MAX(e.id)
+    INTO v_balance, v_total_earned, v_last_entry_id
+    FROM vault_ledger_entries e
+    WHERE e.user_id = p_user_id;
+
+    INSERT INTO vault_balances (user_id, balance, total_earned, last_entry_id, updated_at)
+    VALUES (p_user_id, v_balance, v_total_earned, v_last_entry_id, NOW())
+    ON CONFLICT (user_id) DO UPDATE
+    SET balance = EXCLUDED.balance,
+        total_earned = EXCLUDED.total_earned,
+        last_entry_id = EXCLUDED.last_entry_id,
+        updated_at = NOW();
+
+    RETURN QUERY SELECT v_balance, v_total_earned, v_last_entry_id;
+END;
+$$ LANGUAGE plpgsql;
+
+-- The services record rewards as vault_amount/reward_type, which
+-- add_vault_rewards.sql never created; older rows use amount/reason. Make
+-- sure both exist so the backfill below can read either.
+ALTER TABLE vault_rewards ADD COLUMN IF NOT EXISTS vault_amount NUMERIC(20, 6);
+ALTER TABLE vault_rewards ADD COLUMN IF NOT EXISTS reward_type VARCHAR(50);
+ALTER TABLE vault_rewards ADD COLUMN IF NOT EXISTS amount NUMERIC(20, 6);
+ALTER TABLE vault_rewards ADD COLUMN IF NOT EXISTS reason VARCHAR(100);
+ALTER TABLE vault_rewards ALTER COLUMN amount DROP NOT NULL;
+ALTER TABLE vault_rewards ALTER COLUMN reason DROP NOT NULL;
+
+-- Backfill: balances only ever counted award_vault_coins, while rewards
+-- history has every grant. Reset balances that predate the ledger and
+-- replay each existing reward into it, oldest first.
+DO $$
+DECLARE
+    r RECORD;
+BEGIN
+    UPDATE vault_balances SET balance = 0, total_earned = 0 WHERE last_entry_id IS NULL;
+
+    FOR r IN
+        SELECT id, user_id, COALESCE(vault_amount, amount) AS amount, COALESCE(reward_type, reason) AS entry_type
+        FROM vault_rewards
+        WHERE user_id IS NOT NULL AND COALESCE(vault_amount, amount, 0) <> 0
+        ORDER BY created_at, id
+    LOOP
+        PERFORM vault_ledger_append(r.user_id, r.amount, r.entry_type, r.id::TEXT, 'vault_rewards:' || r.id);
+    END LOOP;
+END $$;
+
+-- Create indexes for better performance
+CREATE INDEX IF NOT EXISTS idx_vault_ledger_entries_user_id ON vault_ledger_entries(user_id, id);
+CREATE INDEX IF NOT EXISTS idx_vault_ledger_checkpoints_user_id ON vault_ledger_checkpoints(user_id, last_entry_id DESC);
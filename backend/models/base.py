@@ -0,0 +1,38 @@
+from dataclasses import fields
+from datetime import datetime
+from typing import List, Dict, Any, Tuple
+
+def to_iso(value: Any) -> Any:
+    """ISO string for datetimes; PostgREST already returns them as strings"""
+    return value.isoformat() if isinstance(value, datetime) else value
+
+class RowModel:
+    """Mixin for slotted row dataclasses built straight from PostgREST rows.
+
+    from_row picks the model's columns out of the response dict and ignores
+    the rest (joins, columns the model doesn't carry). Instances serialize
+    directly with the app's JSON provider; to_dict is there for callers that
+    need a plain dict.
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def _field_names(cls) -> Tuple[str, ...]:
+        names = cls.__dict__.get('_row_fields')
+        if names is None:
+            names = tuple(field.name for field in fields(cls))
+            type.__setattr__(cls, '_row_fields', names)
+        return names
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]):
+        return cls(**{name: row[name] for name in cls._field_names() if name in row})
+
+    @classmethod
+    def from_rows(cls, rows: List[Dict[str, Any]]) -> List[Any]:
+        names = cls._field_names()
+        return [cls(**{name: row[name] for name in names if name in row}) for row in rows]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: to_iso(getattr(self, name)) for name in self._field_names()}
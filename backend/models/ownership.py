@@ -2,8 +2,10 @@ from dataclasses import dataclass
 from typing import Optional, Dict, Any
 from datetime import datetime
 
-@dataclass
-class Ownership:
+from models.base import RowModel, to_iso
+
+@dataclass(slots=True)
+class Ownership(RowModel):
     id: Optional[str] = None
     token_id: str = ""
     owner_id: str = ""
@@ -17,16 +19,37 @@ class Ownership:
             'token_id': self.token_id,
             'owner_id': self.owner_id,
             'percentage': self.percentage,
-            'acquired_at': self.acquired_at.isoformat() if self.acquired_at else None,
+            'acquired_at': to_iso(self.acquired_at),
             'acquisition_price': self.acquisition_price
         }
 
-@dataclass
-class Vote:
+@dataclass(slots=True)
+class Vote(RowModel):
     id: Optional[str] = None
     token_id: str = ""
     proposal_id: str = ""
     voter_id: str = ""
+    wallet_address: str = ""
     vote_choice: str = ""  # yes, no, abstain
     voting_power: float = 0.0
-    created_at: Optional[datetime] = None
\ No newline at end of file
+    created_at: Optional[datetime] = None
+
+@dataclass(slots=True)
+class Proposal(RowModel):
+    id: Optional[str] = None
+    token_id: str = ""
+    title: str = ""
+    description: str = ""
+    created_by: Optional[str] = None
+    status: str = "draft"  # draft, open, closed, cancelled
+    quorum_pct: float = 20.0
+    threshold_pct: float = 50.0
+    ends_at: Optional[datetime] = None
+    snapshot_holders: int = 0
+    snapshot_total_power: int = 0
+    yes_power: int = 0
+    no_power: int = 0
+    abstain_power: int = 0
+    voters_count: int = 0
+    created_at: Optional[datetime] = None
+    closed_at: Optional[datetime] = None
\ No newline at end of file
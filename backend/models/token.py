@@ -2,8 +2,10 @@ from dataclasses import dataclass
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 
-@dataclass
-class Token:
+from models.base import RowModel, to_iso
+
+@dataclass(slots=True)
+class Token(RowModel):
     id: Optional[str] = None
     name: str = ""
     description: str = ""
@@ -30,7 +32,7 @@ class Token:
             'creator_id': self.creator_id,
             'mint_address': self.mint_address,
             'metadata_uri': self.metadata_uri,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'created_at': to_iso(self.created_at),
             'is_fractional': self.is_fractional,
             'status': self.status
         }
\ No newline at end of file
@@ -2,8 +2,10 @@ from dataclasses import dataclass
 from typing import Optional, Dict, Any
 from datetime import datetime
 
-@dataclass
-class User:
+from models.base import RowModel, to_iso
+
+@dataclass(slots=True)
+class User(RowModel):
     id: Optional[str] = None
     email: str = ""
     username: str = ""
@@ -21,6 +23,6 @@ class User:
             'wallet_address': self.wallet_address,
             'profile_image': self.profile_image,
             'bio': self.bio,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'created_at': to_iso(self.created_at),
             'is_verified': self.is_verified
         }
\ No newline at end of file
@@ -0,0 +1,56 @@
+import argparse
+import json
+import os
+import sys
+from supabase import create_client
+from dotenv import load_dotenv
+
+from services.portfolio_service import PortfolioService
+
+load_dotenv()
+
+def main():
+    parser = argparse.ArgumentParser(description="VaultHive portfolio summary maintenance")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    verify = subparsers.add_parser('verify', help="Check stored portfolio totals against transaction history")
+    verify.add_argument('--user', help="Only this user id (default: every account)")
+    verify.add_argument('--repair', action='store_true', help="Rebuild accounts that drifted")
+
+    replay = subparsers.add_parser('replay', help="Recompute one user's portfolio from their history")
+    replay.add_argument('--user', required=True)
+
+    rebuild = subparsers.add_parser('rebuild', help="Overwrite a user's stored portfolio with a recompute")
+    rebuild.add_argument('--user', required=True)
+
+    args = parser.parse_args()
+
+    supabase = create_client(os.environ.get("SUPABASE_URL"), os.environ.get("SUPABASE_ANON_KEY"))
+    portfolio = PortfolioService(supabase)
+
+    if args.command == 'replay':
+        print(json.dumps(portfolio.replay(args.user), indent=2, default=str))
+        return 0
+
+    if args.command == 'rebuild':
+        print(json.dumps(portfolio.rebuild(args.user), indent=2, default=str))
+        return 0
+
+    user_ids = [args.user] if args.user else portfolio.list_accounts()
+    checked = 0
+    drifted = 0
+    for user_id in user_ids:
+        result = portfolio.verify(user_id)
+        checked += 1
+        if not result['ok']:
+            drifted += 1
+            print(f"❌ {user_id}: {json.dumps(result['drift'], default=str)}")
+            if args.repair:
+                portfolio.rebuild(user_id)
+
+    print(f"{'✅' if not drifted else '⚠️'} Verified {checked} portfolios, {drifted} drifted"
+          f"{' (rebuilt)' if drifted and args.repair else ''}")
+    return 1 if drifted and not args.repair else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
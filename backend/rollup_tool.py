@@ -0,0 +1,33 @@
+import argparse
+import json
+import os
+import sys
+from datetime import datetime
+from supabase import create_client
+from dotenv import load_dotenv
+
+from services.trade_rollups import TradeRollupService
+
+load_dotenv()
+
+def main():
+    parser = argparse.ArgumentParser(description="VaultHive trading rollup maintenance")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    backfill = subparsers.add_parser('backfill', help="Rebuild trade buckets from asset_transactions")
+    backfill.add_argument('--asset', help="Only this asset id (default: every asset)")
+    backfill.add_argument('--until', help="Days before this date are batch-aggregated, later ones recomputed in SQL "
+                                          "(default: today)")
+
+    args = parser.parse_args()
+
+    supabase = create_client(os.environ.get("SUPABASE_URL"), os.environ.get("SUPABASE_ANON_KEY"))
+    rollups = TradeRollupService(supabase)
+
+    if args.command == 'backfill':
+        until = datetime.fromisoformat(args.until) if args.until else None
+        print(json.dumps(rollups.backfill(args.asset, until), indent=2, default=str))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,43 @@
+from flask import Blueprint, request, jsonify, send_file
+from middleware.auth_middleware import require_admin
+from utils.profiler import list_profiles, get_profile
+from utils.slow_log import get_slow_operations, reset_slow_operations, slow_log_settings
+
+admin_bp = Blueprint('admin', __name__)
+
+@admin_bp.route('/admin/profiles', methods=['GET'])
+@require_admin
+def get_profiles():
+    try:
+        limit = min(int(request.args.get('limit', 50)), 500)
+        return jsonify({"success": True, "data": list_profiles(limit)}), 200
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
+@admin_bp.route('/admin/profiles/<profile_id>', methods=['GET'])
+@require_admin
+def download_profile(profile_id):
+    profile = get_profile(profile_id)
+    if not profile:
+        return jsonify({"success": False, "error": "Profile not found"}), 404
+    return send_file(profile['path'], as_attachment=True, download_name=profile['artifact'])
+
+@admin_bp.route('/admin/slow-operations', methods=['GET'])
+@require_admin
+def get_slow_operation_log():
+    try:
+        operations = get_slow_operations(
+            sort=request.args.get('sort', 'total'),
+            limit=min(int(request.args.get('limit', 50)), 500),
+            kind=request.args.get('kind'),
+            include_fast=request.args.get('all', 'false').lower() == 'true'
+        )
+        return jsonify({"success": True, "data": operations, "settings": slow_log_settings()}), 200
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
+@admin_bp.route('/admin/slow-operations', methods=['DELETE'])
+@require_admin
+def clear_slow_operation_log():
+    reset_slow_operations()
+    return jsonify({"success": True}), 200
@@ -127,12 +127,15 @@ def tokenize_asset(asset_id):
             'decimals': 0  # No decimal places, whole tokens only
         }
         
-        token = token_service.create_token(token_data)
+        if data.get('initial_owner_wallet'):
+            token_data['initial_owner_wallet'] = data['initial_owner_wallet']
+        
+        token = token_service.create_token(token_data, defer_mint=True)
         
         # Award 100 VAULT coins to user
-        vault_reward = token_service.award_vault_coins(asset['owner_id'], 100)
+        vault_reward = token_service.award_vault_coins(asset['owner_id'], 100, reference_id=asset_id)
         
-        return jsonify({
+        response = {
             "success": True,
             "message": f"Asset tokenized into 100 tokens! Each token = 1% ownership. You earned 100 VAULT coins!",
             "data": token,
@@ -142,6 +145,14 @@ def tokenize_asset(asset_id):
                 "per_token_percentage": 1.0,
                 "example": "Buy 5 tokens = 5% ownership"
             }
-        }), 201
+        }
+        
+        # Initial NFT mint runs in the background worker
+        if token.get('mint_job_id'):
+            response["job_id"] = token['mint_job_id']
+            response["status_url"] = f"/api/jobs/{token['mint_job_id']}"
+            return jsonify(response), 202
+        
+        return jsonify(response), 201
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 400
\ No newline at end of file
@@ -0,0 +1,102 @@
+from flask import Blueprint, request, jsonify, current_app
+from middleware.auth_middleware import require_auth, owns_wallet, is_admin_request
+from services.governance_service import GovernanceService
+
+governance_bp = Blueprint('governance', __name__)
+
+@governance_bp.route('/governance/proposals', methods=['POST'])
+@require_auth
+def create_proposal():
+    try:
+        data = request.get_json() or {}
+        for field in ['token_id', 'title']:
+            if not data.get(field):
+                return jsonify({"success": False, "error": f"{field} is required"}), 400
+        
+        data['created_by'] = request.current_user['id']
+        
+        governance_service = GovernanceService(current_app.config['SUPABASE'])
+        proposal = governance_service.create_proposal(data)
+        
+        return jsonify({"success": True, "data": proposal}), 201
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
+# Proposal with its running tallies and quorum/threshold result
+@governance_bp.route('/governance/proposals/<proposal_id>', methods=['GET'])
+def get_proposal(proposal_id):
+    try:
+        governance_service = GovernanceService(current_app.config['SUPABASE'])
+        proposal = governance_service.get_proposal(proposal_id)
+        
+        if not proposal:
+            return jsonify({"success": False, "error": "Proposal not found"}), 404
+        
+        return jsonify({"success": True, "data": proposal}), 200
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
+@governance_bp.route('/governance/tokens/<token_id>/proposals', methods=['GET'])
+def get_token_proposals(token_id):
+    try:
+        limit = min(request.args.get('limit', 20, type=int), 100)
+        offset = max(request.args.get('offset', 0, type=int), 0)
+        governance_service = GovernanceService(current_app.config['SUPABASE'])
+        proposals = governance_service.get_token_proposals(token_id, limit, offset)
+        
+        return jsonify({"success": True, "data": proposals, "count": len(proposals)}), 200
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
+@governance_bp.route('/governance/proposals/<proposal_id>/votes', methods=['POST'])
+@require_auth
+def cast_vote(proposal_id):
+    try:
+        data = request.get_json() or {}
+        for field in ['wallet_address', 'vote_choice']:
+            if not data.get(field):
+                return jsonify({"success": False, "error": f"{field} is required"}), 400
+        if not owns_wallet(data['wallet_address']):
+            return jsonify({"success": False, "error": "wallet_address is not one of your wallets"}), 403
+        
+        governance_service = GovernanceService(current_app.config['SUPABASE'])
+        vote = governance_service.cast_vote(proposal_id, data['wallet_address'], data['vote_choice'])
+        
+        return jsonify({"success": True, "data": vote}), 200
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
+# Voters by power, largest first; follow next_cursor for the next page
+@governance_bp.route('/governance/proposals/<proposal_id>/votes', methods=['GET'])
+def get_voters(proposal_id):
+    try:
+        limit = min(request.args.get('limit', 50, type=int), 500)
+        governance_service = GovernanceService(current_app.config['SUPABASE'])
+        page = governance_service.get_voters(
+            proposal_id,
+            limit=limit,
+            choice=request.args.get('choice'),
+            after_power=request.args.get('after_power', type=int),
+            after_wallet=request.args.get('after_wallet')
+        )
+        
+        return jsonify({"success": True, "data": page}), 200
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
+@governance_bp.route('/governance/proposals/<proposal_id>/close', methods=['POST'])
+@require_auth
+def close_proposal(proposal_id):
+    try:
+        governance_service = GovernanceService(current_app.config['SUPABASE'])
+        proposal = governance_service.get_proposal(proposal_id)
+        if not proposal:
+            return jsonify({"success": False, "error": "Proposal not found"}), 404
+        if proposal.get('created_by') != request.current_user['id'] and not is_admin_request():
+            return jsonify({"success": False, "error": "Only the proposal's creator can close it"}), 403
+        
+        proposal = governance_service.close_proposal(proposal_id)
+        
+        return jsonify({"success": True, "data": proposal}), 200
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 400
@@ -0,0 +1,68 @@
+from flask import Blueprint, request, jsonify, current_app
+from middleware.auth_middleware import require_admin
+from services.job_service import JobService
+from services.mint_worker import resolve_signature, SIGNATURE_PENDING
+from services.token_service import TokenService
+
+jobs_bp = Blueprint('jobs', __name__)
+
+@jobs_bp.route('/jobs/<job_id>', methods=['GET'])
+def get_job_status(job_id):
+    try:
+        job_service = JobService(current_app.config['SUPABASE'])
+        job = job_service.get_job(job_id)
+
+        if not job:
+            return jsonify({"success": False, "error": "Job not found"}), 404
+
+        return jsonify({
+            "success": True,
+            "data": JobService.format_job_status(job)
+        }), 200
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
+@jobs_bp.route('/jobs/dead-letter', methods=['GET'])
+@require_admin
+def get_dead_letter_jobs():
+    try:
+        limit = request.args.get('limit', 50, type=int)
+        job_service = JobService(current_app.config['SUPABASE'])
+        jobs = job_service.get_dead_letter_jobs(limit)
+
+        return jsonify({
+            "success": True,
+            "data": jobs,
+            "count": len(jobs)
+        }), 200
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
+@jobs_bp.route('/jobs/<job_id>/retry', methods=['POST'])
+@require_admin
+def retry_job(job_id):
+    try:
+        job_service = JobService(current_app.config['SUPABASE'])
+        job = job_service.get_job(job_id)
+        if not job or job['status'] != 'dead_letter':
+            return jsonify({"success": False, "error": "Dead-lettered job not found"}), 404
+
+        # Requeueing while the recorded mint may still land risks a second mint
+        solana = TokenService(current_app.config['SUPABASE']).solana
+        if resolve_signature(solana, job) == SIGNATURE_PENDING:
+            return jsonify({
+                "success": False,
+                "error": f"Mint {job['result']['transaction_signature']} is not resolved on chain yet; try again later"
+            }), 409
+
+        job = job_service.requeue_job(job_id)
+        if not job:
+            return jsonify({"success": False, "error": "Dead-lettered job not found"}), 404
+
+        return jsonify({
+            "success": True,
+            "message": "Job requeued",
+            "data": JobService.format_job_status(job)
+        }), 202
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 400
@@ -0,0 +1,23 @@
+from flask import Blueprint, request, jsonify, current_app
+from services.search_index import get_search_index
+
+search_bp = Blueprint('search', __name__)
+
+# Ranked search over assets, tokens and events; type narrows to one of them
+@search_bp.route('/search', methods=['GET'])
+def search():
+    try:
+        query = request.args.get('q', '').strip()
+        if not query:
+            return jsonify({"success": False, "error": "q is required"}), 400
+        
+        doc_type = request.args.get('type')
+        limit = min(request.args.get('limit', 20, type=int), 100)
+        offset = max(request.args.get('offset', 0, type=int), 0)
+        
+        index = get_search_index(current_app.config['SUPABASE'])
+        results = index.search(query, doc_type=doc_type, limit=limit, offset=offset)
+        
+        return jsonify({"success": True, "data": {**results, "limit": limit, "offset": offset}}), 200
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 400
@@ -1,5 +1,8 @@
 from flask import Blueprint, request, jsonify, current_app
 from services.token_service import TokenService
+from services.confirmation_tracker import get_confirmation_tracker
+from services.inventory_service import InventoryService
+from services.cap_table import get_cap_table_index
 from middleware.validation import validate_json
 
 tokens_bp = Blueprint('tokens', __name__)
@@ -18,6 +21,107 @@ def get_blockchain_status():
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 400
 
+# Share inventory for a token (available / reserved / sold)
+@tokens_bp.route('/tokens/<token_id>/inventory', methods=['GET'])
+def get_token_inventory(token_id):
+    try:
+        inventory = InventoryService(current_app.config['SUPABASE']).get_inventory(token_id)
+        
+        if not inventory:
+            return jsonify({"success": False, "error": "No inventory for token"}), 404
+        
+        return jsonify({"success": True, "data": inventory}), 200
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
+# Cap table summary: holder count, concentration and the largest holders
+@tokens_bp.route('/tokens/<token_id>/cap-table', methods=['GET'])
+def get_token_cap_table(token_id):
+    try:
+        top = min(request.args.get('top', 10, type=int), 100)
+        cap_table = get_cap_table_index(current_app.config['SUPABASE']).get(token_id)
+        
+        return jsonify({
+            "success": True,
+            "data": {
+                **cap_table.metrics(),
+                "top_holders": cap_table.top(top)
+            }
+        }), 200
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
+# Holders of a token, largest first
+@tokens_bp.route('/tokens/<token_id>/holders', methods=['GET'])
+def get_token_holders(token_id):
+    try:
+        limit = min(request.args.get('limit', 50, type=int), 500)
+        offset = max(request.args.get('offset', 0, type=int), 0)
+        cap_table = get_cap_table_index(current_app.config['SUPABASE']).get(token_id)
+        holders = cap_table.holders(limit=limit, offset=offset)
+        
+        return jsonify({
+            "success": True,
+            "data": {
+                "holders": holders,
+                "pagination": {
+                    "limit": limit,
+                    "offset": offset,
+                    "total": cap_table.metrics()['holders']
+                }
+            }
+        }), 200
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
+# One wallet's position in a token
+@tokens_bp.route('/tokens/<token_id>/holders/<wallet_address>', methods=['GET'])
+def get_token_holder(token_id, wallet_address):
+    try:
+        holder = get_cap_table_index(current_app.config['SUPABASE']).get(token_id).holder(wallet_address)
+        
+        if not holder:
+            return jsonify({"success": False, "error": "Wallet holds no shares of this token"}), 404
+        
+        return jsonify({"success": True, "data": holder}), 200
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
+# Transaction confirmation status
+@tokens_bp.route('/signatures/<signature>/status', methods=['GET'])
+def get_signature_status(signature):
+    try:
+        tracker = get_confirmation_tracker(current_app.config['SUPABASE'])
+        status = tracker.get_status(signature)
+        
+        if status:
+            return jsonify({
+                "success": True,
+                "data": {
+                    "signature": signature,
+                    "confirmation_status": status['confirmation_status'],
+                    "confirmed": status['confirmation_status'] in ('confirmed', 'finalized'),
+                    "slot": status.get('slot'),
+                    "err": status.get('err'),
+                    "last_checked_at": status.get('last_checked_at'),
+                    "tracked": True
+                }
+            }), 200
+        
+        # Not tracked yet - ask the cluster directly
+        token_service = TokenService(current_app.config['SUPABASE'])
+        if not token_service.solana:
+            return jsonify({"success": False, "error": "Signature not tracked"}), 404
+        
+        live_status = token_service.solana.get_transaction_status(signature)
+        
+        return jsonify({
+            "success": True,
+            "data": {"signature": signature, **live_status, "tracked": False}
+        }), 200
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
 @tokens_bp.route('/tokens', methods=['POST'])
 @validate_json(['asset_id'])  # Remove mint_address - blockchain will generate it
 def create_token():
@@ -29,16 +133,24 @@ def create_token():
         
         data = request.get_json()
         token_service = TokenService(current_app.config['SUPABASE'])
-        token = token_service.create_token(data)
+        token = token_service.create_token(data, defer_mint=True)
         
         message = "Real SPL token created on Solana blockchain!" if token.get('is_blockchain_token') else "Token created in database"
         
-        return jsonify({
+        response = {
             "success": True,
             "message": message,
             "data": token,
             "explorer_url": f"https://explorer.solana.com/address/{token['mint_address']}?cluster=devnet" if token.get('is_blockchain_token') else None
-        }), 201
+        }
+        
+        # Initial NFT mint runs in the background worker
+        if token.get('mint_job_id'):
+            response["job_id"] = token['mint_job_id']
+            response["status_url"] = f"/api/jobs/{token['mint_job_id']}"
+            return jsonify(response), 202
+        
+        return jsonify(response), 201
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 400
 
@@ -123,7 +235,7 @@ def mint_fractional_tokens(token_id):
         data = request.get_json()
         token_service = TokenService(current_app.config['SUPABASE'])
         
-        mint_tx = token_service.mint_fractional_tokens(
+        job = token_service.queue_fractional_mint(
             token_id,
             data['recipient_wallet'],
             data['amount']
@@ -131,10 +243,10 @@ def mint_fractional_tokens(token_id):
         
         return jsonify({
             "success": True,
-            "message": f"Minted {data['amount']} fractional tokens on blockchain",
-            "transaction_signature": mint_tx,
-            "explorer_url": f"https://explorer.solana.com/tx/{mint_tx}?cluster=devnet"
-        }), 200
+            "message": f"Mint of {data['amount']} fractional tokens queued",
+            "job_id": job['id'],
+            "status_url": f"/api/jobs/{job['id']}"
+        }), 202
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 400
 
@@ -0,0 +1,106 @@
+from flask import Blueprint, request, jsonify, current_app
+from middleware.auth_middleware import require_auth, owns_wallet
+from services.trading_service import TradingService, TRADING_ENGINE_ENABLED
+
+trading_bp = Blueprint('trading', __name__)
+
+WALLET_NOT_OWNED = "wallet_address is not one of your wallets"
+
+@trading_bp.before_request
+def require_matching_process():
+    # Books live in one process; other API workers must not build their own
+    if not TRADING_ENGINE_ENABLED:
+        return jsonify({"success": False, "error": "Trading is served by the matching service"}), 503
+
+# Place a limit or market order
+@trading_bp.route('/trading/<token_id>/orders', methods=['POST'])
+@require_auth
+def place_order(token_id):
+    try:
+        data = request.get_json() or {}
+        for field in ['wallet_address', 'side', 'quantity']:
+            if data.get(field) is None:
+                return jsonify({"success": False, "error": f"{field} is required"}), 400
+        if data.get('order_type', 'limit') == 'limit' and data.get('price_usd') is None:
+            return jsonify({"success": False, "error": "price_usd is required for limit orders"}), 400
+        if not owns_wallet(data['wallet_address']):
+            return jsonify({"success": False, "error": WALLET_NOT_OWNED}), 403
+        
+        trading_service = TradingService(current_app.config['SUPABASE'])
+        result = trading_service.place_order({**data, 'token_id': token_id})
+        
+        return jsonify({"success": True, "data": result}), 201
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
+# Cancel/replace: new price and/or remaining quantity
+@trading_bp.route('/trading/<token_id>/orders/<order_id>', methods=['PUT'])
+@require_auth
+def replace_order(token_id, order_id):
+    try:
+        data = request.get_json() or {}
+        if not data.get('wallet_address'):
+            return jsonify({"success": False, "error": "wallet_address is required"}), 400
+        if not owns_wallet(data['wallet_address']):
+            return jsonify({"success": False, "error": WALLET_NOT_OWNED}), 403
+        
+        trading_service = TradingService(current_app.config['SUPABASE'])
+        result = trading_service.replace_order(
+            token_id, order_id, data['wallet_address'],
+            price_usd=data.get('price_usd'),
+            quantity=data.get('quantity')
+        )
+        
+        return jsonify({"success": True, "data": result}), 200
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
+@trading_bp.route('/trading/<token_id>/orders/<order_id>', methods=['DELETE'])
+@require_auth
+def cancel_order(token_id, order_id):
+    try:
+        wallet_address = request.args.get('wallet_address')
+        if not wallet_address:
+            return jsonify({"success": False, "error": "wallet_address is required"}), 400
+        if not owns_wallet(wallet_address):
+            return jsonify({"success": False, "error": WALLET_NOT_OWNED}), 403
+        
+        trading_service = TradingService(current_app.config['SUPABASE'])
+        order = trading_service.cancel_order(token_id, order_id, wallet_address)
+        
+        return jsonify({"success": True, "data": order}), 200
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
+# Open orders, optionally for one wallet
+@trading_bp.route('/trading/<token_id>/orders', methods=['GET'])
+def get_open_orders(token_id):
+    try:
+        trading_service = TradingService(current_app.config['SUPABASE'])
+        orders = trading_service.get_open_orders(token_id, request.args.get('wallet_address'))
+        
+        return jsonify({"success": True, "data": orders, "count": len(orders)}), 200
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
+# Aggregated depth per price level
+@trading_bp.route('/trading/<token_id>/book', methods=['GET'])
+def get_order_book(token_id):
+    try:
+        levels = min(request.args.get('levels', 10, type=int), 100)
+        trading_service = TradingService(current_app.config['SUPABASE'])
+        
+        return jsonify({"success": True, "data": trading_service.get_depth(token_id, levels)}), 200
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
+@trading_bp.route('/trading/<token_id>/trades', methods=['GET'])
+def get_trades(token_id):
+    try:
+        limit = min(request.args.get('limit', 50, type=int), 200)
+        trading_service = TradingService(current_app.config['SUPABASE'])
+        trades = trading_service.get_trades(token_id, limit)
+        
+        return jsonify({"success": True, "data": trades, "count": len(trades)}), 200
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 400
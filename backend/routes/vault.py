@@ -1,5 +1,7 @@
 from flask import Blueprint, request, jsonify, current_app
 from services.token_service import TokenService
+from services.vault_ledger_service import VaultLedgerService
+from services.leaderboard import get_leaderboard_index
 
 vault_bp = Blueprint('vault', __name__)
 
@@ -11,20 +13,16 @@ def get_vault_balance(user_id):
         if not auth_header:
             return jsonify({"success": False, "error": "Authorization required"}), 401
         
-        # Get balance from vault_balances table
-        supabase = current_app.config['SUPABASE']
-        result = supabase.table('vault_balances').select('*').eq('user_id', user_id).execute()
-        
-        if result.data:
-            balance = result.data[0]['balance']
-        else:
-            balance = 0
+        # Materialized balance row maintained by the ledger
+        ledger = VaultLedgerService(current_app.config['SUPABASE'])
+        balance = ledger.get_balance(user_id)
         
         return jsonify({
             "success": True,
             "data": {
                 "user_id": user_id,
-                "balance": balance
+                "balance": balance['balance'],
+                "total_earned": balance['total_earned']
             }
         }), 200
     except Exception as e:
@@ -50,3 +48,58 @@ def get_vault_rewards(user_id):
         }), 200
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 400
+
+@vault_bp.route('/vault/ledger/<user_id>', methods=['GET'])
+def get_vault_ledger(user_id):
+    try:
+        # Check auth
+        auth_header = request.headers.get('Authorization')
+        if not auth_header:
+            return jsonify({"success": False, "error": "Authorization required"}), 401
+        
+        limit = min(request.args.get('limit', 50, type=int), 200)
+        before_id = request.args.get('before_id', type=int)
+        
+        ledger = VaultLedgerService(current_app.config['SUPABASE'])
+        entries = ledger.get_entries(user_id, limit=limit, before_id=before_id)
+        
+        return jsonify({
+            "success": True,
+            "data": entries,
+            "count": len(entries),
+            "next_before_id": entries[-1]['id'] if len(entries) == limit else None
+        }), 200
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
+@vault_bp.route('/vault/leaderboard', methods=['GET'])
+def get_vault_leaderboard():
+    try:
+        window = request.args.get('window', 'all')
+        limit = min(request.args.get('limit', 10, type=int), 100)
+        offset = request.args.get('offset', 0, type=int)
+        
+        # Ranked in memory from the ledger; no scan of vault_rewards
+        leaderboard = get_leaderboard_index(current_app.config['SUPABASE'])
+        
+        return jsonify({
+            "success": True,
+            "data": leaderboard.top(window, limit=limit, offset=offset)
+        }), 200
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
+@vault_bp.route('/vault/leaderboard/<user_id>', methods=['GET'])
+def get_vault_leaderboard_position(user_id):
+    try:
+        window = request.args.get('window', 'all')
+        neighbors = min(request.args.get('neighbors', 0, type=int), 25)
+        
+        leaderboard = get_leaderboard_index(current_app.config['SUPABASE'])
+        
+        return jsonify({
+            "success": True,
+            "data": leaderboard.position(user_id, window, neighbors=neighbors)
+        }), 200
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 400
@@ -2,6 +2,11 @@ from flask import Blueprint, request, jsonify, current_app
 from services.wallet_service import WalletService
 from services.token_service import TokenService
 from middleware.auth_middleware import require_auth
+from middleware.compression import compress
+from services.monad_service import get_web3
+from services.vault_ledger_service import VaultLedgerService
+from services.portfolio_service import PortfolioService
+from services.trade_rollups import TradeRollupService
 
 wallet_bp = Blueprint('wallet', __name__)
 
@@ -98,18 +103,21 @@ def buy_asset_with_wallet():
                 }), 400
         
         wallet_service = get_wallet_service()
-        result = wallet_service.buy_asset_with_complete_tracking(data)
+        result = wallet_service.buy_asset_with_complete_tracking(data, defer_mints=True)
         
         return jsonify({
             "success": True,
-            "message": f"Purchase successful! {result['asset']['shares_purchased']} shares acquired",
-            "data": result
-        }), 200
+            "message": f"Purchase accepted! {result['asset']['shares_purchased']} shares are being minted",
+            "data": result,
+            "job_id": result['jobs']['asset_mint_job_id'],
+            "status_url": f"/api/jobs/{result['jobs']['asset_mint_job_id']}"
+        }), 202
         
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
 @wallet_bp.route('/marketplace', methods=['GET'])
+@compress(gzip_level=9, brotli_quality=9)  # same body for most visitors, so the compressed copy is reused
 def get_marketplace():
     """Get marketplace with user-specific data"""
     try:
@@ -128,6 +136,47 @@ def get_marketplace():
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
+# Faceted marketplace: filter by category, valuation, share price, reward and
+# listing age, sorted and paged server-side, with counts for every facet
+@wallet_bp.route('/marketplace/listings', methods=['GET'])
+def get_marketplace_listings():
+    try:
+        wallet_address = request.args.get('wallet_address')
+        categories = [c for c in request.args.get('category', '').split(',') if c]
+        ranges = {
+            name: (request.args.get(f'min_{name}', type=float), request.args.get(f'max_{name}', type=float))
+            for name in ('valuation', 'share_price', 'reward')
+        }
+        limit = min(request.args.get('limit', 50, type=int), 200)
+        offset = max(request.args.get('offset', 0, type=int), 0)
+        
+        wallet_service = get_wallet_service()
+        result = wallet_service.search_marketplace(
+            wallet_address,
+            categories=categories,
+            ranges=ranges,
+            min_age_days=request.args.get('min_age_days', type=float),
+            max_age_days=request.args.get('max_age_days', type=float),
+            sort=request.args.get('sort', 'listed_at'),
+            descending=request.args.get('order', 'desc') != 'asc',
+            limit=limit,
+            offset=offset
+        )
+        
+        return jsonify({
+            "success": True,
+            "data": result['listings'],
+            "count": len(result['listings']),
+            "total": result['total'],
+            "facets": result['facets'],
+            "limit": limit,
+            "offset": offset,
+            "wallet_connected": wallet_address is not None
+        }), 200
+        
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
 # NEW ROUTES for enhanced functionality
 
 @wallet_bp.route('/users/<user_id>/profile', methods=['GET'])
@@ -210,13 +259,16 @@ def get_vault_rewards(wallet_address):
             }), 404
         
         user_id = wallet_result.data[0]['user_id']
+        limit = min(request.args.get('limit', 50, type=int), 200)
+        offset = request.args.get('offset', 0, type=int)
         
-        # Get rewards
+        # Get one page of rewards; totals come from the ledger, not a scan
         rewards_result = supabase.table('vault_rewards').select(
             '*, assets(name), tokens(symbol)'
-        ).eq('user_id', user_id).order('created_at', desc=True).execute()
+        ).eq('user_id', user_id).order('created_at', desc=True).range(offset, offset + limit - 1).execute()
         
-        total_earned = sum(reward['vault_amount'] for reward in rewards_result.data)
+        ledger = VaultLedgerService(supabase)
+        total_earned = ledger.get_balance(user_id)['total_earned']
         
         # Get current VAULT balance
         token_service = TokenService(current_app.config['SUPABASE'])
@@ -228,6 +280,8 @@ def get_vault_rewards(wallet_address):
                 "current_balance": vault_balance,
                 "total_earned": total_earned,
                 "rewards_count": len(rewards_result.data),
+                "limit": limit,
+                "offset": offset,
                 "rewards": rewards_result.data
             }
         }), 200
@@ -298,20 +352,35 @@ def add_wallet_to_user(user_id):
 def get_user_analytics(user_id):
     """Get user portfolio analytics"""
     try:
-        supabase = current_app.config['SUPABASE']
+        portfolio_service = PortfolioService(current_app.config['SUPABASE'])
         
-        # Use the portfolio summary view
-        portfolio_result = supabase.table('user_portfolio_summary').select('*').eq('user_id', user_id).execute()
+        # Totals are maintained as transactions are written, so this is one row
+        summary = portfolio_service.get_summary(user_id)
+        summary['top_positions'] = portfolio_service.get_positions(user_id, limit=5)
         
-        if not portfolio_result.data:
-            return jsonify({
-                "success": False,
-                "error": "User not found"
-            }), 404
+        return jsonify({
+            "success": True,
+            "data": summary
+        }), 200
+        
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@wallet_bp.route('/analytics/user-portfolio/<user_id>/positions', methods=['GET'])
+def get_user_positions(user_id):
+    """Get a user's positions with cost basis, largest first"""
+    try:
+        limit = min(request.args.get('limit', 50, type=int), 200)
+        offset = request.args.get('offset', 0, type=int)
+        include_closed = request.args.get('include_closed', 'false').lower() == 'true'
+        
+        portfolio_service = PortfolioService(current_app.config['SUPABASE'])
+        positions = portfolio_service.get_positions(user_id, limit, offset, include_closed)
         
         return jsonify({
             "success": True,
-            "data": portfolio_result.data[0]
+            "data": positions,
+            "count": len(positions)
         }), 200
         
     except Exception as e:
@@ -321,25 +390,40 @@ def get_user_analytics(user_id):
 def get_asset_analytics(asset_id):
     """Get asset trading analytics"""
     try:
-        supabase = current_app.config['SUPABASE']
-        
-        # Use the trading activity view
-        activity_result = supabase.table('asset_trading_activity').select('*').eq('asset_id', asset_id).execute()
+        rollups = TradeRollupService(current_app.config['SUPABASE'])
         
-        if not activity_result.data:
-            return jsonify({
-                "success": False,
-                "error": "Asset not found"
-            }), 404
+        # Read from the precomputed hourly/daily buckets
+        activity = rollups.get_activity(asset_id)
         
         return jsonify({
             "success": True,
-            "data": activity_result.data[0]
+            "data": activity
         }), 200
         
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
+@wallet_bp.route('/analytics/asset-activity/<asset_id>/buckets', methods=['GET'])
+def get_asset_buckets(asset_id):
+    """Get volume, VWAP and OHLC per time bucket for charts"""
+    try:
+        resolution = request.args.get('resolution', '1h')
+        start = request.args.get('start')
+        end = request.args.get('end')
+        limit = request.args.get('limit', 500, type=int)
+        
+        rollups = TradeRollupService(current_app.config['SUPABASE'])
+        buckets = rollups.get_buckets(asset_id, resolution, start, end, limit)
+        
+        return jsonify({
+            "success": True,
+            "data": buckets,
+            "count": len(buckets)
+        }), 200
+        
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
 @wallet_bp.route('/wallets/balance', methods=['GET'])
 def get_wallet_balance():
     """Get real wallet balance from Monad network"""
@@ -355,11 +439,9 @@ def get_wallet_balance():
             
         # Try to get real balance from Monad network
         try:
-            from web3 import Web3
-            
-            # Monad testnet RPC
+            # Monad testnet RPC (shared keep-alive connection pool)
             rpc_url = "https://testnet-rpc.monad.xyz"
-            w3 = Web3(Web3.HTTPProvider(rpc_url))
+            w3 = get_web3(rpc_url)
             
             print(f"🌐 Connected to Monad RPC: {w3.is_connected()}")
             
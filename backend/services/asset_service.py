@@ -3,6 +3,9 @@ from typing import List, Dict, Any
 import uuid
 from datetime import datetime
 
+from services.search_index import get_search_index, DOC_ASSET
+from services.marketplace_index import get_marketplace_index
+
 class AssetService:
     def __init__(self, supabase: Client):
         self.supabase = supabase
@@ -21,7 +24,9 @@ class AssetService:
             }
             
             result = self.supabase.table('assets').insert(asset_data).execute()
-            return result.data[0] if result.data else None
+            asset = result.data[0] if result.data else None
+            get_search_index(self.supabase).index_document(DOC_ASSET, asset)
+            return asset
         except Exception as e:
             raise Exception(f"Create asset error: {str(e)}")
     
@@ -49,6 +54,9 @@ class AssetService:
     def update_asset(self, asset_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
         try:
             result = self.supabase.table('assets').update(data).eq('id', asset_id).execute()
-            return result.data[0] if result.data else None
+            asset = result.data[0] if result.data else None
+            get_search_index(self.supabase).index_document(DOC_ASSET, asset)
+            get_marketplace_index(self.supabase).refresh(asset_id=asset_id)
+            return asset
         except Exception as e:
             raise Exception(f"Update asset error: {str(e)}")
\ No newline at end of file
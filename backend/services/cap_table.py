@@ -0,0 +1,366 @@
+import os
+import threading
+import time
+from array import array
+from typing import List, Dict, Any, Optional
+
+# Reads catch up with the transaction log at most this often
+CAP_TABLE_SYNC_SECONDS = float(os.getenv('CAP_TABLE_SYNC_SECONDS', 2.0))
+# Catch-up follows asset_transactions.log_seq, which the database assigns at
+# insert (transaction_date is client-supplied: trades keep their fill time).
+# Concurrent inserts can commit a little out of log_seq order, so each
+# catch-up re-reads this many sequence values behind the newest applied
+CAP_TABLE_LOOKBACK_ROWS = int(os.getenv('CAP_TABLE_LOOKBACK_ROWS', 500))
+
+# asset_transactions rows that move shares between holders
+SHARE_EVENT_TYPES = ('purchase', 'transfer', 'trade')
+COUNTED_STATUSES = ('pending', 'completed')
+
+class CapTable:
+    """One token's holders kept as parallel arrays.
+
+    Wallet i's balance is _shares[i] and _slot maps wallet -> i; a holder
+    that sells out is swapped with the last slot, so every update is O(1).
+    The outstanding total and the sum of squared holdings are kept as
+    running values for O(1) concentration metrics. The holder ranking is
+    sorted once after a change and reused by every page and top-N read.
+    """
+
+    def __init__(self, token_id: str, total_supply: int = None):
+        self.token_id = token_id
+        self.total_supply = total_supply
+        self.version = 0
+        self._wallets: List[str] = []
+        self._user_ids: List[Optional[str]] = []
+        self._shares = array('q')
+        self._slot: Dict[str, int] = {}
+        self._outstanding = 0
+        self._sum_squares = 0
+        self._ranking: Optional[array] = None
+        self._lock = threading.Lock()
+
+    def _adjust(self, wallet: str, delta: int, user_id: str = None):
+        slot = self._slot.get(wallet)
+        if slot is None:
+            if delta <= 0:
+                print(f"⚠️ Cap table {self.token_id}: {wallet} sold {-delta} shares it doesn't hold")
+                return
+            self._slot[wallet] = len(self._wallets)
+            self._wallets.append(wallet)
+            self._user_ids.append(user_id)
+            self._shares.append(delta)
+            self._outstanding += delta
+            self._sum_squares += delta * delta
+            return
+
+        old = self._shares[slot]
+        new = old + delta
+        if new < 0:
+            print(f"⚠️ Cap table {self.token_id}: {wallet} sold {-delta} shares but holds {old}")
+            new = 0
+        self._outstanding += new - old
+        self._sum_squares += new * new - old * old
+
+        if new:
+            self._shares[slot] = new
+            if user_id:
+                self._user_ids[slot] = user_id
+            return
+
+        # Swap the last holder into the freed slot
+        last = len(self._wallets) - 1
+        if slot != last:
+            self._wallets[slot] = self._wallets[last]
+            self._user_ids[slot] = self._user_ids[last]
+            self._shares[slot] = self._shares[last]
+            self._slot[self._wallets[slot]] = slot
+        self._wallets.pop()
+        self._user_ids.pop()
+        self._shares.pop()
+        del self._slot[wallet]
+
+    def apply(self, buyer_wallet: str, shares: int, seller_wallet: str = None, buyer_user_id: str = None):
+        """Move shares to buyer_wallet, from seller_wallet or from unissued supply"""
+        if shares <= 0:
+            return
+        with self._lock:
+            if seller_wallet:
+                self._adjust(seller_wallet, -shares)
+            self._adjust(buyer_wallet, shares, buyer_user_id)
+            self._ranking = None
+            self.version += 1
+
+    def _denominator(self) -> int:
+        return self.total_supply or self._outstanding
+
+    def _row(self, slot: int, rank: int = None) -> Dict[str, Any]:
+        shares = self._shares[slot]
+        denominator = self._denominator()
+        row = {
+            'wallet_address': self._wallets[slot],
+            'user_id': self._user_ids[slot],
+            'shares': shares,
+            'percentage': round(shares / denominator * 100, 6) if denominator else 0.0
+        }
+        if rank is not None:
+            row['rank'] = rank
+        return row
+
+    def _ranked(self) -> array:
+        if self._ranking is None:
+            shares, wallets = self._shares, self._wallets
+            self._ranking = array('l', sorted(range(len(shares)), key=lambda i: (-shares[i], wallets[i])))
+        return self._ranking
+
+    def holder(self, wallet: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            slot = self._slot.get(wallet)
+            return self._row(slot) if slot is not None else None
+
+    def holders(self, limit: int = 50, offset: int = 0) -> List[Dict[str, Any]]:
+        """Holders by size, largest first"""
+        with self._lock:
+            ranking = self._ranked()
+            return [self._row(slot, rank) for rank, slot in
+                    enumerate(ranking[offset:offset + limit], start=offset + 1)]
+
+    def positions(self) -> List[Dict[str, Any]]:
+        """Every holder's shares at one instant, unordered"""
+        with self._lock:
+            return [{'wallet_address': wallet, 'user_id': user_id, 'shares': shares}
+                    for wallet, user_id, shares in zip(self._wallets, self._user_ids, self._shares)]
+
+    def top(self, n: int = 10) -> List[Dict[str, Any]]:
+        return self.holders(limit=n)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Holder count and ownership concentration.
+
+        hhi is the Herfindahl-Hirschman index over held shares (0-10000);
+        effective_holders is its inverse, the number of equal holders that
+        would give the same concentration.
+        """
+        with self._lock:
+            outstanding = self._outstanding
+            ranking = self._ranked()
+            top10 = sum(self._shares[slot] for slot in ranking[:10])
+            largest = self._shares[ranking[0]] if ranking else 0
+            denominator = self._denominator()
+            return {
+                'token_id': self.token_id,
+                'holders': len(self._wallets),
+                'outstanding_shares': outstanding,
+                'total_supply': self.total_supply,
+                'issued_percentage': round(outstanding / self.total_supply * 100, 6) if self.total_supply else None,
+                'hhi': round(self._sum_squares / (outstanding * outstanding) * 10000, 2) if outstanding else 0.0,
+                'effective_holders': round(outstanding * outstanding / self._sum_squares, 2) if self._sum_squares else 0.0,
+                'largest_holder_percentage': round(largest / denominator * 100, 6) if denominator else 0.0,
+                'top10_percentage': round(top10 / denominator * 100, 6) if denominator else 0.0,
+                'version': self.version
+            }
+
+class CapTableIndex:
+    """Per-token cap tables built from asset_transactions.
+
+    The first read replays the whole log; after that, reads catch up with
+    rows written by other workers at most every CAP_TABLE_SYNC_SECONDS, and
+    purchases made by this process are applied immediately via record().
+    """
+
+    PAGE_SIZE = 1000
+
+    def __init__(self, supabase):
+        self.supabase = supabase
+        self._tables: Dict[str, CapTable] = {}
+        self._tables_lock = threading.Lock()
+        self._build_lock = threading.RLock()
+        self._sync_lock = threading.Lock()
+        self._built = False
+        self._last_sync = 0.0
+        # Transaction ids applied inside the lookback window, with their log_seq
+        # (None until a row this process recorded comes back from the log)
+        self._applied: Dict[str, Optional[int]] = {}
+        self._watermark: Optional[int] = None
+        self.stats = {'rebuilds': 0, 'syncs': 0, 'events_applied': 0, 'last_rebuild_ms': None}
+
+    def _table(self, token_id: str, total_supply: int = None) -> CapTable:
+        with self._tables_lock:
+            table = self._tables.get(token_id)
+            if table is None:
+                table = self._tables[token_id] = CapTable(token_id, total_supply)
+            elif total_supply and not table.total_supply:
+                table.total_supply = total_supply
+            return table
+
+    def _apply_row(self, row: Dict[str, Any]) -> bool:
+        transaction_id = row['id']
+        seq = row.get('log_seq')
+        if seq is not None and (self._watermark is None or seq > self._watermark):
+            self._watermark = seq
+        if transaction_id in self._applied:
+            if self._applied[transaction_id] is None:
+                self._applied[transaction_id] = seq
+            return False
+        self._applied[transaction_id] = seq
+
+        if (row.get('transaction_type') not in SHARE_EVENT_TYPES or row.get('status') not in COUNTED_STATUSES
+                or not row.get('token_id') or not row.get('buyer_wallet_address')):
+            return False
+
+        self._table(row['token_id']).apply(
+            row['buyer_wallet_address'],
+            int(row.get('shares_amount') or 0),
+            seller_wallet=row.get('seller_wallet_address'),
+            buyer_user_id=row.get('buyer_user_id')
+        )
+        self.stats['events_applied'] += 1
+        return True
+
+    def _log_pages(self, after: int = None):
+        columns = ('id, token_id, transaction_type, status, shares_amount, buyer_wallet_address, '
+                   'buyer_user_id, seller_wallet_address, log_seq')
+        offset = 0
+        while True:
+            query = self.supabase.table('asset_transactions').select(columns)
+            if after is not None:
+                query = query.gt('log_seq', after)
+            result = query.order('log_seq').range(offset, offset + self.PAGE_SIZE - 1).execute()
+
+            yield result.data
+            if len(result.data) < self.PAGE_SIZE:
+                return
+            offset += self.PAGE_SIZE
+
+    def _load_supplies(self, token_ids: List[str] = None):
+        if token_ids is not None and not token_ids:
+            return
+        offset = 0
+        while True:
+            query = self.supabase.table('tokens').select('id, total_supply')
+            if token_ids is not None:
+                query = query.in_('id', token_ids)
+            result = query.order('id').range(offset, offset + self.PAGE_SIZE - 1).execute()
+
+            for row in result.data:
+                if row.get('total_supply'):
+                    self._table(row['id'], int(row['total_supply']))
+            if token_ids is not None or len(result.data) < self.PAGE_SIZE:
+                return
+            offset += self.PAGE_SIZE
+
+    def _prune_applied(self):
+        cutoff = self._lookback_start()
+        if cutoff is None:
+            return
+        for transaction_id in [tid for tid, seq in self._applied.items() if seq is not None and seq <= cutoff]:
+            del self._applied[transaction_id]
+
+    def _lookback_start(self) -> Optional[int]:
+        if self._watermark is None:
+            return None
+        return self._watermark - CAP_TABLE_LOOKBACK_ROWS
+
+    def rebuild(self):
+        """Replay the whole transaction log into fresh cap tables"""
+        with self._build_lock:
+            started = time.perf_counter()
+            with self._sync_lock:
+                with self._tables_lock:
+                    self._tables = {}
+                self._applied = {}
+                self._watermark = None
+
+                rows = 0
+                for page in self._log_pages():
+                    for row in page:
+                        self._apply_row(row)
+                    rows += len(page)
+                self._load_supplies()
+                self._prune_applied()
+
+                self._built = True
+                self._last_sync = time.monotonic()
+
+            elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+            self.stats['rebuilds'] += 1
+            self.stats['last_rebuild_ms'] = elapsed_ms
+            print(f"📒 Cap tables rebuilt from {rows} transactions ({len(self._tables)} tokens, {elapsed_ms}ms)")
+
+    def sync(self) -> int:
+        """Apply log rows written since the last sync (by any worker)"""
+        if not self._sync_lock.acquire(blocking=False):
+            return 0  # another thread is already catching up; serve what we have
+        try:
+            known = set(self._tables)
+            applied = 0
+            for page in self._log_pages(self._lookback_start()):
+                for row in page:
+                    if self._apply_row(row):
+                        applied += 1
+            self._load_supplies([token_id for token_id in self._tables if token_id not in known])
+            self._prune_applied()
+            self._last_sync = time.monotonic()
+            self.stats['syncs'] += 1
+            return applied
+        finally:
+            self._sync_lock.release()
+
+    def ensure_fresh(self):
+        """Build on first use, then catch up if the last sync is stale"""
+        if not self._built:
+            with self._build_lock:
+                if not self._built:
+                    self.rebuild()
+            return
+
+        if time.monotonic() - self._last_sync >= CAP_TABLE_SYNC_SECONDS:
+            try:
+                self.sync()
+            except Exception as e:
+                print(f"⚠️ Cap table sync failed, serving last known state: {e}")
+
+    def record(self, transaction: Dict[str, Any]):
+        """Apply an asset_transactions row this process just wrote"""
+        if not self._built:
+            return  # the first build will read it from the log
+        with self._sync_lock:
+            # Other workers' rows below its log_seq may not be read yet, so it
+            # mustn't move the watermark; sync fills in the seq when it comes by
+            self._apply_row({**transaction, 'log_seq': None})
+
+    def get(self, token_id: str) -> CapTable:
+        self.ensure_fresh()
+        with self._tables_lock:
+            table = self._tables.get(token_id)
+        return table if table is not None else CapTable(token_id)
+
+    def holder_tokens(self, wallet_address: str) -> List[Dict[str, Any]]:
+        """Every token a wallet holds, with its position in each"""
+        self.ensure_fresh()
+        with self._tables_lock:
+            tables = list(self._tables.values())
+        positions = []
+        for table in tables:
+            row = table.holder(wallet_address)
+            if row:
+                row['token_id'] = table.token_id
+                positions.append(row)
+        return positions
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._tables_lock:
+            tokens = len(self._tables)
+            holders = sum(len(table._wallets) for table in self._tables.values())
+        return {**self.stats, 'built': self._built, 'tokens': tokens, 'holder_positions': holders,
+                'watermark': self._watermark}
+
+_index: Optional[CapTableIndex] = None
+_index_lock = threading.Lock()
+
+def get_cap_table_index(supabase) -> CapTableIndex:
+    """Process-wide cap table index"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = CapTableIndex(supabase)
+        return _index
@@ -0,0 +1,217 @@
+import threading
+from typing import List, Dict, Any, Optional
+from datetime import datetime
+
+from utils.validators import is_valid_transaction_signature
+from utils.instrumentation import record_cache
+
+class ConfirmationTracker:
+    """Follows stored Solana signatures until they finalize, in batched RPC calls"""
+
+    # (table, column) pairs that hold transaction signatures we issued; the
+    # untracked_signatures() SQL function reads the same columns
+    SOURCES = [
+        ('tokens', 'creation_tx'),
+        ('tokens', 'mint_tx'),
+        ('asset_transactions', 'asset_mint_tx'),
+        ('asset_transactions', 'vault_reward_tx'),
+        ('property_purchases', 'mint_tx')
+    ]
+
+    FINAL_STATUSES = ('finalized', 'failed', 'not_found')
+    PENDING_STATUSES = ('pending', 'processed', 'confirmed')
+
+    # Signatures the cluster still doesn't know after this many checks were dropped
+    MAX_NOT_FOUND_CHECKS = 20
+    PAGE_SIZE = 1000
+
+    def __init__(self, supabase, solana=None):
+        self.supabase = supabase
+        self.solana = solana
+        self._statuses: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._polling = False
+
+    def track(self, signature: str, source_table: str, source_id: str, source_column: str) -> bool:
+        """Register a freshly stored signature for confirmation tracking"""
+        if not is_valid_transaction_signature(signature):
+            return False
+
+        try:
+            self.supabase.table('transaction_confirmations').upsert({
+                'signature': signature,
+                'source_table': source_table,
+                'source_id': source_id,
+                'source_column': source_column,
+                'confirmation_status': 'pending',
+                'created_at': datetime.now().isoformat(),
+                'updated_at': datetime.now().isoformat()
+            }, ignore_duplicates=True).execute()
+            return True
+        except Exception as e:
+            print(f"⚠️ Could not track signature {signature}: {e}")
+            return False
+
+    def discover(self) -> int:
+        """Register stored signatures that were never tracked (written outside a mint job)"""
+        try:
+            discovered = 0
+
+            while True:
+                # Only rows with no transaction_confirmations entry come back, so
+                # each batch registered drops out of the next one
+                result = self.supabase.rpc('untracked_signatures', {'batch_size': self.PAGE_SIZE}).execute()
+
+                rows = [
+                    {
+                        **row,
+                        'confirmation_status': 'pending',
+                        'created_at': datetime.now().isoformat(),
+                        'updated_at': datetime.now().isoformat()
+                    }
+                    for row in result.data or []
+                    if is_valid_transaction_signature(row['signature'])
+                ]
+
+                if rows:
+                    self.supabase.table('transaction_confirmations').upsert(
+                        rows, ignore_duplicates=True
+                    ).execute()
+                    discovered += len(rows)
+
+                if not rows or len(result.data) < self.PAGE_SIZE:
+                    break
+
+            if discovered:
+                print(f"🔎 Discovered {discovered} signatures to track")
+            return discovered
+        except Exception as e:
+            raise Exception(f"Discover signatures error: {str(e)}")
+
+    def _load_pending(self) -> List[Dict[str, Any]]:
+        pending = []
+        start = 0
+        while True:
+            result = self.supabase.table('transaction_confirmations').select('*').in_(
+                'confirmation_status', list(self.PENDING_STATUSES)
+            ).range(start, start + self.PAGE_SIZE - 1).execute()
+
+            pending.extend(result.data)
+            if len(result.data) < self.PAGE_SIZE:
+                return pending
+            start += self.PAGE_SIZE
+
+    def _apply_status(self, row: Dict[str, Any], status: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        check_count = row.get('check_count', 0) + 1
+
+        if status is None:
+            confirmation_status = 'not_found' if check_count >= self.MAX_NOT_FOUND_CHECKS else 'pending'
+            slot, err = row.get('slot'), None
+        elif status['err']:
+            confirmation_status, slot, err = 'failed', status['slot'], status['err']
+        else:
+            confirmation_status, slot, err = status['confirmation_status'] or 'processed', status['slot'], None
+
+        return {
+            **row,
+            'confirmation_status': confirmation_status,
+            'slot': slot,
+            'err': err,
+            'check_count': check_count,
+            'last_checked_at': datetime.now().isoformat(),
+            'updated_at': datetime.now().isoformat()
+        }
+
+    def poll(self) -> Dict[str, int]:
+        """Check every pending signature, 256 per getSignatureStatuses call"""
+        if not self.solana:
+            raise Exception("Solana service not available")
+
+        try:
+            pending = self._load_pending()
+            batch_size = self.solana.MAX_SIGNATURE_BATCH
+            counts = {'checked': 0, 'rpc_calls': 0, 'finalized': 0, 'failed': 0}
+
+            for i in range(0, len(pending), batch_size):
+                batch = pending[i:i + batch_size]
+                statuses = self.solana.get_signature_statuses([row['signature'] for row in batch])
+                counts['rpc_calls'] += 1
+
+                updated = [self._apply_status(row, status) for row, status in zip(batch, statuses)]
+                self.supabase.table('transaction_confirmations').upsert(updated).execute()
+
+                with self._lock:
+                    for row in updated:
+                        self._statuses[row['signature']] = row
+
+                counts['checked'] += len(updated)
+                counts['finalized'] += sum(1 for row in updated if row['confirmation_status'] == 'finalized')
+                counts['failed'] += sum(1 for row in updated if row['confirmation_status'] == 'failed')
+
+            if counts['checked']:
+                print(f"📡 Checked {counts['checked']} signatures in {counts['rpc_calls']} RPC calls "
+                      f"({counts['finalized']} finalized, {counts['failed']} failed)")
+            return counts
+        except Exception as e:
+            raise Exception(f"Poll signature statuses error: {str(e)}")
+
+    def get_status(self, signature: str) -> Optional[Dict[str, Any]]:
+        """Current confirmation state, from memory when it can't be stale"""
+        cached = self._statuses.get(signature)
+        fresh = bool(cached) and (self._polling or cached['confirmation_status'] in self.FINAL_STATUSES)
+        record_cache('confirmation_status', fresh)
+        if fresh:
+            return cached
+
+        try:
+            result = self.supabase.table('transaction_confirmations').select('*').eq('signature', signature).execute()
+        except Exception as e:
+            print(f"⚠️ Confirmation lookup failed: {e}")
+            return cached
+
+        if not result.data:
+            return None
+
+        row = result.data[0]
+        with self._lock:
+            self._statuses[signature] = row
+        return row
+
+    def get_summary(self) -> Dict[str, int]:
+        """Count of in-memory signatures per confirmation status"""
+        summary: Dict[str, int] = {}
+        with self._lock:
+            for row in self._statuses.values():
+                summary[row['confirmation_status']] = summary.get(row['confirmation_status'], 0) + 1
+        return summary
+
+    def run_forever(self, stop_event: threading.Event, interval: float = 10.0, discover_every: int = 30):
+        """Poll until stop_event is set; pick up untracked signatures every discover_every polls"""
+        self._polling = True
+        polls = 0
+        print(f"📡 Confirmation tracker started (every {interval}s)")
+
+        while not stop_event.is_set():
+            try:
+                if polls % discover_every == 0:
+                    self.discover()
+                self.poll()
+            except Exception as e:
+                print(f"⚠️ Confirmation tracker cycle failed: {e}")
+            polls += 1
+            stop_event.wait(interval)
+
+        self._polling = False
+
+_tracker: Optional[ConfirmationTracker] = None
+_tracker_lock = threading.Lock()
+
+def get_confirmation_tracker(supabase, solana=None) -> ConfirmationTracker:
+    """Process-wide tracker so the in-memory statuses are shared"""
+    global _tracker
+    with _tracker_lock:
+        if _tracker is None:
+            _tracker = ConfirmationTracker(supabase, solana)
+        elif solana is not None and _tracker.solana is None:
+            _tracker.solana = solana
+        return _tracker
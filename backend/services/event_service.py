@@ -3,6 +3,8 @@ from typing import List, Dict, Any
 import uuid
 from datetime import datetime
 
+from services.search_index import get_search_index, DOC_EVENT
+
 class EventService:
     def __init__(self, supabase: Client):
         self.supabase = supabase
@@ -19,7 +21,9 @@ class EventService:
             }
             
             result = self.supabase.table('events').insert(event_data).execute()
-            return result.data[0] if result.data else None
+            event = result.data[0] if result.data else None
+            get_search_index(self.supabase).index_document(DOC_EVENT, event)
+            return event
         except Exception as e:
             raise Exception(f"Create event error: {str(e)}")
     
@@ -0,0 +1,210 @@
+from supabase import Client
+from typing import List, Dict, Any, Optional
+from datetime import datetime, timedelta
+
+from services.cap_table import get_cap_table_index
+
+VOTE_CHOICES = ('yes', 'no', 'abstain')
+
+class GovernanceService:
+    """Token-holder proposals with weighted votes.
+
+    Voting power is each holder's shares, copied from the cap table when a
+    proposal is created. Votes go through governance_cast_vote, which moves
+    the proposal's yes/no/abstain tallies by the vote's power, so reading a
+    result is a single-row lookup however many holders voted.
+    """
+
+    SNAPSHOT_BATCH_SIZE = 1000
+    DEFAULT_VOTING_DAYS = 7
+
+    def __init__(self, supabase: Client):
+        self.supabase = supabase
+        self.cap_tables = get_cap_table_index(supabase)
+
+    def create_proposal(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Create a proposal and snapshot every holder's voting power"""
+        proposal = None
+        try:
+            quorum_pct = float(data.get('quorum_pct', 20))
+            threshold_pct = float(data.get('threshold_pct', 50))
+            if not 0 < quorum_pct <= 100 or not 0 < threshold_pct <= 100:
+                raise Exception("quorum_pct and threshold_pct must be between 0 and 100")
+
+            ends_at = data.get('ends_at') or (
+                datetime.now() + timedelta(days=int(data.get('voting_days', self.DEFAULT_VOTING_DAYS)))
+            ).isoformat()
+
+            result = self.supabase.table('proposals').insert({
+                'token_id': data['token_id'],
+                'title': data['title'],
+                'description': data.get('description', ''),
+                'created_by': data.get('created_by'),
+                'status': 'draft',
+                'quorum_pct': quorum_pct,
+                'threshold_pct': threshold_pct,
+                'ends_at': ends_at,
+                'created_at': datetime.now().isoformat()
+            }).execute()
+            if not result.data:
+                raise Exception("Failed to store proposal")
+            proposal = result.data[0]
+
+            positions = self.cap_tables.get(data['token_id']).positions()
+            if not positions:
+                raise Exception("Token has no holders to vote")
+
+            rows = [{
+                'proposal_id': proposal['id'],
+                'wallet_address': position['wallet_address'],
+                'user_id': position['user_id'],
+                'voting_power': position['shares']
+            } for position in positions]
+            for i in range(0, len(rows), self.SNAPSHOT_BATCH_SIZE):
+                self.supabase.table('proposal_voting_power').insert(rows[i:i + self.SNAPSHOT_BATCH_SIZE]).execute()
+
+            result = self.supabase.table('proposals').update({
+                'status': 'open',
+                'snapshot_holders': len(rows),
+                'snapshot_total_power': sum(row['voting_power'] for row in rows)
+            }).eq('id', proposal['id']).execute()
+
+            print(f"🗳️ Proposal {proposal['id']} opened with {len(rows)} eligible holders")
+            return self.format_proposal(result.data[0])
+        except Exception as e:
+            if proposal:
+                # Drop the half-built snapshot; votes can't reach a draft anyway
+                self.supabase.table('proposals').delete().eq('id', proposal['id']).execute()
+            raise Exception(f"Create proposal error: {str(e)}")
+
+    def cast_vote(self, proposal_id: str, wallet_address: str, choice: str) -> Dict[str, Any]:
+        """Record or change a holder's vote; returns the updated tallies"""
+        try:
+            if choice not in VOTE_CHOICES:
+                raise Exception(f"vote_choice must be one of {', '.join(VOTE_CHOICES)}")
+
+            result = self.supabase.rpc('governance_cast_vote', {
+                'p_proposal_id': proposal_id,
+                'p_wallet_address': wallet_address,
+                'p_choice': choice
+            }).execute()
+            if not result.data:
+                raise Exception("Vote was not recorded")
+
+            row = result.data[0]
+            return {
+                'vote_id': row['vote_id'],
+                'vote_choice': choice,
+                'voting_power': row['voting_power'],
+                'previous_choice': row['previous_choice'],
+                'tallies': {
+                    'yes': row['yes_power'],
+                    'no': row['no_power'],
+                    'abstain': row['abstain_power'],
+                    'voters': row['voters_count']
+                }
+            }
+        except Exception as e:
+            raise Exception(f"Cast vote error: {str(e)}")
+
+    def get_proposal(self, proposal_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            result = self.supabase.table('proposals').select('*').eq('id', proposal_id).execute()
+            return self.format_proposal(result.data[0]) if result.data else None
+        except Exception as e:
+            raise Exception(f"Get proposal error: {str(e)}")
+
+    def get_token_proposals(self, token_id: str, limit: int = 20, offset: int = 0) -> List[Dict[str, Any]]:
+        try:
+            result = self.supabase.table('proposals').select('*').eq('token_id', token_id).order(
+                'created_at', desc=True
+            ).range(offset, offset + limit - 1).execute()
+            return [self.format_proposal(row) for row in result.data]
+        except Exception as e:
+            raise Exception(f"Get token proposals error: {str(e)}")
+
+    def get_voters(self, proposal_id: str, limit: int = 50, choice: str = None,
+                   after_power: int = None, after_wallet: str = None) -> Dict[str, Any]:
+        """Votes by power, largest first; pass the last row's power and wallet to get the next page"""
+        try:
+            query = self.supabase.table('votes').select(
+                'wallet_address, voter_id, vote_choice, voting_power, updated_at'
+            ).eq('proposal_id', proposal_id)
+            if choice:
+                query = query.eq('vote_choice', choice)
+            if after_power is not None and after_wallet is not None:
+                query = query.or_(
+                    f"voting_power.lt.{int(after_power)},"
+                    f"and(voting_power.eq.{int(after_power)},wallet_address.gt.{after_wallet})"
+                )
+            result = query.order('voting_power', desc=True).order('wallet_address').limit(limit).execute()
+
+            votes = result.data
+            last = votes[-1] if len(votes) == limit else None
+            return {
+                'votes': votes,
+                'next_cursor': {'after_power': last['voting_power'], 'after_wallet': last['wallet_address']} if last else None
+            }
+        except Exception as e:
+            raise Exception(f"Get voters error: {str(e)}")
+
+    def close_proposal(self, proposal_id: str) -> Dict[str, Any]:
+        """Stop voting and freeze the outcome"""
+        try:
+            result = self.supabase.table('proposals').update({
+                'status': 'closed',
+                'closed_at': datetime.now().isoformat()
+            }).eq('id', proposal_id).eq('status', 'open').execute()
+            if not result.data:
+                raise Exception("Proposal is not open")
+            return self.format_proposal(result.data[0])
+        except Exception as e:
+            raise Exception(f"Close proposal error: {str(e)}")
+
+    @staticmethod
+    def evaluate(proposal: Dict[str, Any]) -> Dict[str, Any]:
+        """Quorum and threshold from the running tallies, in O(1).
+
+        Quorum counts every vote cast (abstain included) against the
+        snapshotted power; the threshold is the yes share of yes + no.
+        Holders can change their vote until the proposal ends, so outcome
+        stays 'pending' until then, however lopsided the tallies are.
+        """
+        total = int(proposal.get('snapshot_total_power') or 0)
+        yes = int(proposal.get('yes_power') or 0)
+        no = int(proposal.get('no_power') or 0)
+        abstain = int(proposal.get('abstain_power') or 0)
+        quorum_pct = float(proposal['quorum_pct'])
+        threshold_pct = float(proposal['threshold_pct'])
+
+        cast = yes + no + abstain
+        outstanding = max(total - cast, 0)
+        turnout_pct = cast / total * 100 if total else 0.0
+        approval_pct = yes / (yes + no) * 100 if yes + no else 0.0
+        quorum_met = turnout_pct >= quorum_pct
+        passes = quorum_met and yes + no > 0 and approval_pct >= threshold_pct
+
+        # A draft is still snapshotting voting power; it hasn't ended
+        ended = proposal.get('status') in ('closed', 'cancelled') or bool(
+            proposal.get('ends_at') and proposal['ends_at'] <= datetime.now().isoformat()
+        )
+        if ended:
+            outcome = 'passed' if passes else 'rejected'
+        else:
+            outcome = 'pending'
+
+        return {
+            'yes_power': yes,
+            'no_power': no,
+            'abstain_power': abstain,
+            'outstanding_power': outstanding,
+            'turnout_pct': round(turnout_pct, 4),
+            'approval_pct': round(approval_pct, 4),
+            'quorum_met': quorum_met,
+            'threshold_met': yes + no > 0 and approval_pct >= threshold_pct,
+            'outcome': outcome
+        }
+
+    @classmethod
+    def format_proposal(cls, proposal: Dict[str, Any]) -> Dict[str, Any]:
+        return {**proposal, 'result': cls.evaluate(proposal)}
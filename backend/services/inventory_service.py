@@ -0,0 +1,390 @@
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional, Tuple
+from supabase import Client
+
+RESERVATION_TTL_SECONDS = int(os.getenv('SHARE_RESERVATION_TTL', 300))
+ADMISSION_MAX_BATCH = int(os.getenv('INVENTORY_MAX_BATCH', 64))
+ADMISSION_MAX_WAITING = int(os.getenv('INVENTORY_MAX_WAITING', 2000))
+# How long a known sold-out token is answered from memory before asking the DB again
+SOLD_OUT_RECHECK_SECONDS = float(os.getenv('INVENTORY_SOLD_OUT_RECHECK', 1.0))
+
+class InsufficientShares(Exception):
+    """Raised when a token doesn't have enough unreserved shares"""
+
+class InventoryBusy(Exception):
+    """Raised when a token's admission queue is full"""
+
+class SupabaseInventoryStore:
+    """Inventory kept in share_inventory / share_reservations via SQL functions"""
+
+    def __init__(self, supabase: Client):
+        self.supabase = supabase
+
+    def reserve_batch(self, token_id: str, requests: List[Tuple[int, str]], ttl_seconds: int) -> Dict[str, Any]:
+        result = self.supabase.rpc('inventory_reserve_batch', {
+            'p_token_id': token_id,
+            'p_requests': [{'shares': shares, 'buyer_ref': buyer_ref} for shares, buyer_ref in requests],
+            'p_ttl_seconds': ttl_seconds
+        }).execute()
+        return result.data
+
+    def confirm(self, reservation_id: str) -> bool:
+        return bool(self.supabase.rpc('inventory_confirm', {'p_reservation_id': reservation_id}).execute().data)
+
+    def confirm_late(self, reservation_id: str) -> Optional[int]:
+        result = self.supabase.rpc('inventory_confirm_late', {'p_reservation_id': reservation_id}).execute()
+        return result.data if isinstance(result.data, int) else None
+
+    def release(self, reservation_id: str) -> bool:
+        return bool(self.supabase.rpc('inventory_release', {'p_reservation_id': reservation_id}).execute().data)
+
+    def expire_reservations(self, batch_size: int = 500) -> int:
+        result = self.supabase.rpc('inventory_expire_reservations', {'p_batch_size': batch_size}).execute()
+        return result.data if isinstance(result.data, int) else 0
+
+    def get_inventory(self, token_id: str) -> Optional[Dict[str, Any]]:
+        result = self.supabase.table('share_inventory').select('*').eq('token_id', token_id).execute()
+        return result.data[0] if result.data else None
+
+    def ensure(self, token_id: str, total_shares: int, available_shares: int = None):
+        self.supabase.table('share_inventory').upsert({
+            'token_id': token_id,
+            'total_shares': total_shares,
+            'available_shares': total_shares if available_shares is None else available_shares,
+            'sold_shares': 0 if available_shares is None else total_shares - available_shares
+        }, on_conflict='token_id', ignore_duplicates=True).execute()
+
+class InMemoryInventoryStore:
+    """Same semantics as the SQL functions, held in process memory.
+
+    Used by the contention benchmark; latency simulates the database round
+    trip, half of it spent holding the token's row lock.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.inventory: Dict[str, Dict[str, int]] = {}
+        self.reservations: Dict[str, Dict[str, Any]] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._guard = threading.Lock()
+        self.calls = 0
+
+    def _lock(self, token_id: str) -> threading.Lock:
+        with self._guard:
+            if token_id not in self._locks:
+                self._locks[token_id] = threading.Lock()
+            return self._locks[token_id]
+
+    def _round_trip(self):
+        if self.latency:
+            time.sleep(self.latency / 2)
+
+    def ensure(self, token_id: str, total_shares: int, available_shares: int = None):
+        with self._lock(token_id):
+            if token_id not in self.inventory:
+                available = total_shares if available_shares is None else available_shares
+                self.inventory[token_id] = {
+                    'total_shares': total_shares,
+                    'available_shares': available,
+                    'reserved_shares': 0,
+                    'sold_shares': total_shares - available
+                }
+
+    def reserve_batch(self, token_id: str, requests: List[Tuple[int, str]], ttl_seconds: int) -> Dict[str, Any]:
+        self._round_trip()
+        with self._lock(token_id):
+            self.calls += 1
+            self._round_trip()
+            row = self.inventory.get(token_id)
+            if row is None:
+                return {'available': None, 'reservations': [], 'missing': True}
+
+            expires_at = (datetime.now() + timedelta(seconds=ttl_seconds)).isoformat()
+            granted = []
+            for index, (shares, buyer_ref) in enumerate(requests):
+                if 0 < shares <= row['available_shares']:
+                    reservation_id = str(uuid.uuid4())
+                    row['available_shares'] -= shares
+                    row['reserved_shares'] += shares
+                    self.reservations[reservation_id] = {
+                        'token_id': token_id, 'shares': shares, 'buyer_ref': buyer_ref,
+                        'status': 'held', 'expires_at': time.time() + ttl_seconds
+                    }
+                    granted.append({'index': index, 'id': reservation_id, 'expires_at': expires_at})
+            return {'available': row['available_shares'], 'reservations': granted}
+
+    def _finish(self, reservation_id: str, status: str) -> bool:
+        reservation = self.reservations.get(reservation_id)
+        if reservation is None:
+            return False
+        self._round_trip()
+        with self._lock(reservation['token_id']):
+            self._round_trip()
+            if reservation['status'] != 'held':
+                return False
+            if status == 'confirmed' and reservation['expires_at'] <= time.time():
+                return False
+            row = self.inventory[reservation['token_id']]
+            row['reserved_shares'] -= reservation['shares']
+            if status == 'confirmed':
+                row['sold_shares'] += reservation['shares']
+            else:
+                row['available_shares'] += reservation['shares']
+            reservation['status'] = status
+            return True
+
+    def confirm(self, reservation_id: str) -> bool:
+        return self._finish(reservation_id, 'confirmed')
+
+    def confirm_late(self, reservation_id: str) -> Optional[int]:
+        reservation = self.reservations.get(reservation_id)
+        if reservation is None:
+            return None
+        with self._lock(reservation['token_id']):
+            if reservation['status'] not in ('held', 'expired'):
+                return None
+            row = self.inventory[reservation['token_id']]
+            if reservation['status'] == 'held':
+                taken = reservation['shares']
+                row['reserved_shares'] -= taken
+            else:
+                taken = min(row['available_shares'], reservation['shares'])
+                row['available_shares'] -= taken
+            row['sold_shares'] += taken
+            reservation['status'] = 'confirmed'
+            return reservation['shares'] - taken
+
+    def release(self, reservation_id: str) -> bool:
+        return self._finish(reservation_id, 'released')
+
+    def expire_reservations(self, batch_size: int = 500) -> int:
+        now = time.time()
+        expired = [rid for rid, r in list(self.reservations.items())
+                   if r['status'] == 'held' and r['expires_at'] <= now][:batch_size]
+        return sum(1 for rid in expired if self._finish(rid, 'expired'))
+
+    def get_inventory(self, token_id: str) -> Optional[Dict[str, Any]]:
+        row = self.inventory.get(token_id)
+        return {'token_id': token_id, **row} if row else None
+
+class _PendingReservation:
+    __slots__ = ('shares', 'buyer_ref', 'event', 'done', 'lead', 'result', 'error')
+
+    def __init__(self, shares: int, buyer_ref: str):
+        self.shares = shares
+        self.buyer_ref = buyer_ref
+        self.event = threading.Event()
+        self.done = False
+        self.lead = False
+        self.result = None
+        self.error = None
+
+class AdmissionQueue:
+    """Per-token queue that combines concurrent reservations into batches.
+
+    Instead of every buyer taking the inventory row lock in turn, whichever
+    request arrives while no batch is running becomes the leader and sends
+    everything waiting as one inventory_reserve_batch call; the next waiting
+    request leads the following batch. A token known to be sold out is
+    answered from memory for SOLD_OUT_RECHECK_SECONDS.
+    """
+
+    def __init__(self, store, token_id: str, max_batch: int = ADMISSION_MAX_BATCH,
+                 max_waiting: int = ADMISSION_MAX_WAITING):
+        self.store = store
+        self.token_id = token_id
+        self.max_batch = max_batch
+        self.max_waiting = max_waiting
+        self._pending = deque()
+        self._flushing = False
+        self._lock = threading.Lock()
+        self.known_available: Optional[int] = None
+        self.known_at = 0.0
+        self.batches = 0
+
+    def _sold_out_for(self, shares: int) -> bool:
+        return (self.known_available is not None and shares > self.known_available and
+                time.monotonic() - self.known_at < SOLD_OUT_RECHECK_SECONDS)
+
+    def reserve(self, shares: int, buyer_ref: str, ttl_seconds: int) -> Optional[Dict[str, Any]]:
+        """Reservation dict, or None if there weren't enough shares"""
+        request = _PendingReservation(shares, buyer_ref)
+
+        with self._lock:
+            if self._sold_out_for(shares):
+                return None
+            if len(self._pending) >= self.max_waiting:
+                raise InventoryBusy(f"Too many buyers waiting for token {self.token_id}")
+            self._pending.append(request)
+            if not self._flushing:
+                self._flushing = True
+                request.lead = True
+
+        while not request.done:
+            if request.lead:
+                request.lead = False
+                self._run_batch(ttl_seconds)
+            else:
+                request.event.wait()
+                request.event.clear()
+
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def _run_batch(self, ttl_seconds: int):
+        with self._lock:
+            batch = [self._pending.popleft() for _ in range(min(self.max_batch, len(self._pending)))]
+
+        try:
+            outcome = self.store.reserve_batch(
+                self.token_id, [(r.shares, r.buyer_ref) for r in batch], ttl_seconds
+            )
+            if outcome.get('missing'):
+                raise Exception(f"No inventory for token {self.token_id}")
+
+            granted = {entry['index']: entry for entry in outcome['reservations']}
+            for index, request in enumerate(batch):
+                entry = granted.get(index)
+                request.result = {
+                    'id': entry['id'], 'token_id': self.token_id, 'shares': request.shares,
+                    'expires_at': entry['expires_at']
+                } if entry else None
+
+            with self._lock:
+                self.known_available = outcome['available']
+                self.known_at = time.monotonic()
+                self.batches += 1
+        except Exception as e:
+            for request in batch:
+                request.error = e
+
+        for request in batch:
+            request.done = True
+            request.event.set()
+
+        # Hand leadership to the next waiter, or stop flushing
+        with self._lock:
+            if self._pending:
+                self._pending[0].lead = True
+                self._pending[0].event.set()
+            else:
+                self._flushing = False
+
+    def note_released(self, shares: int):
+        """Shares came back on sale; forget a cached sold-out answer"""
+        with self._lock:
+            if self.known_available is not None:
+                self.known_available += shares
+
+_queues: Dict[str, AdmissionQueue] = {}
+_queues_lock = threading.Lock()
+
+def get_admission_queue(store, token_id: str) -> AdmissionQueue:
+    """Process-wide admission queue per token"""
+    with _queues_lock:
+        if token_id not in _queues:
+            _queues[token_id] = AdmissionQueue(store, token_id)
+        return _queues[token_id]
+
+class InventoryService:
+    """Share inventory with time-bounded reservations.
+
+    Buyers reserve shares first (an atomic conditional decrement), then pay
+    and mint; the reservation is confirmed on success and released on any
+    failure, or expires after SHARE_RESERVATION_TTL seconds if the process
+    dies in between.
+    """
+
+    def __init__(self, supabase: Client = None, store=None, use_admission_queue: bool = True):
+        self.store = store or SupabaseInventoryStore(supabase)
+        self.use_admission_queue = use_admission_queue
+
+    def reserve(self, token_id: str, shares: int, buyer_ref: str = None,
+                ttl_seconds: int = RESERVATION_TTL_SECONDS) -> Dict[str, Any]:
+        if shares <= 0:
+            raise Exception("Shares to reserve must be positive")
+
+        if self.use_admission_queue:
+            reservation = get_admission_queue(self.store, token_id).reserve(shares, buyer_ref, ttl_seconds)
+        else:
+            outcome = self.store.reserve_batch(token_id, [(shares, buyer_ref)], ttl_seconds)
+            if outcome.get('missing'):
+                raise Exception(f"No inventory for token {token_id}")
+            entry = outcome['reservations'][0] if outcome['reservations'] else None
+            reservation = {
+                'id': entry['id'], 'token_id': token_id, 'shares': shares, 'expires_at': entry['expires_at']
+            } if entry else None
+
+        if reservation is None:
+            raise InsufficientShares(f"Not enough shares available for token {token_id}")
+        return reservation
+
+    def confirm(self, reservation: Dict[str, Any]):
+        """Mark the reserved shares sold. Called once the sale has happened
+        (shares minted, purchase recorded), so a reservation that lapsed in
+        the meantime is taken from stock again and reported, not raised."""
+        if self.store.confirm(reservation['id']):
+            return
+        try:
+            shortfall = self.store.confirm_late(reservation['id'])
+        except Exception as e:
+            print(f"🚨 Reservation {reservation['id']} lapsed before confirm and could not be recorded "
+                  f"({reservation['shares']} shares of token {reservation['token_id']}): {e}")
+            return
+        if shortfall is None:
+            print(f"🚨 Reservation {reservation['id']} was released before confirm; "
+                  f"{reservation['shares']} shares of token {reservation['token_id']} sold without inventory")
+        elif shortfall:
+            print(f"🚨 Reservation {reservation['id']} lapsed before confirm; token {reservation['token_id']} "
+                  f"is oversold by {shortfall} shares")
+        else:
+            print(f"⚠️ Reservation {reservation['id']} lapsed before confirm; shares taken from stock again")
+
+    def release(self, reservation: Dict[str, Any]) -> bool:
+        released = self.store.release(reservation['id'])
+        if released and self.use_admission_queue:
+            get_admission_queue(self.store, reservation['token_id']).note_released(reservation['shares'])
+        return released
+
+    @contextmanager
+    def hold(self, token_id: str, shares: int, buyer_ref: str = None):
+        """Reserve for the duration of the block: confirmed on success, released on error"""
+        reservation = self.reserve(token_id, shares, buyer_ref)
+        try:
+            yield reservation
+        except BaseException:
+            try:
+                self.release(reservation)
+            except Exception as e:
+                print(f"⚠️ Could not release reservation {reservation['id']} (it will expire): {e}")
+            raise
+        self.confirm(reservation)
+
+    def expire_reservations(self, batch_size: int = 500) -> int:
+        try:
+            count = self.store.expire_reservations(batch_size)
+            if count:
+                print(f"⌛ Released {count} expired share reservations")
+            return count
+        except Exception as e:
+            raise Exception(f"Expire reservations error: {str(e)}")
+
+    def get_inventory(self, token_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            return self.store.get_inventory(token_id)
+        except Exception as e:
+            raise Exception(f"Get inventory error: {str(e)}")
+
+    def ensure_inventory(self, token_id: str, total_shares: int, available_shares: int = None):
+        """Create the inventory row for a new token (no-op if it exists)"""
+        try:
+            self.store.ensure(token_id, total_shares, available_shares)
+        except Exception as e:
+            raise Exception(f"Ensure inventory error: {str(e)}")
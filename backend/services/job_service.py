@@ -0,0 +1,227 @@
+from supabase import Client
+from typing import List, Dict, Any, Optional
+import uuid
+from datetime import datetime, timedelta
+from services.confirmation_tracker import get_confirmation_tracker
+
+# Job types understood by the mint worker (services/mint_worker.py)
+JOB_MINT_FRACTIONAL = 'mint_fractional_tokens'
+JOB_MINT_VAULT_REWARD = 'mint_vault_reward'
+JOB_MINT_NFT = 'mint_nft'
+
+JOB_TYPES = (JOB_MINT_FRACTIONAL, JOB_MINT_VAULT_REWARD, JOB_MINT_NFT)
+
+class JobService:
+    """Persistent mint job queue backed by the mint_jobs table"""
+
+    DEFAULT_MAX_ATTEMPTS = 5
+    BASE_BACKOFF_SECONDS = 5
+    MAX_BACKOFF_SECONDS = 600
+
+    def __init__(self, supabase: Client):
+        self.supabase = supabase
+
+    def new_job(self, job_type: str, payload: Dict[str, Any], targets: List[Dict[str, Any]] = None,
+                max_attempts: int = None) -> Dict[str, Any]:
+        """Build a mint job row without storing it (see enqueue_many).
+
+        Each target is ``{'table', 'id', 'column', 'values'}``: once the job
+        succeeds, the transaction signature is written to ``column`` of that
+        row together with any extra ``values``.
+        """
+        if job_type not in JOB_TYPES:
+            raise Exception(f"Unknown job type: {job_type}")
+
+        return {
+            'id': str(uuid.uuid4()),
+            'job_type': job_type,
+            'payload': payload,
+            'targets': targets or [],
+            'status': 'queued',
+            'attempts': 0,
+            'max_attempts': max_attempts or self.DEFAULT_MAX_ATTEMPTS,
+            'run_after': datetime.now().isoformat(),
+            'created_at': datetime.now().isoformat(),
+            'updated_at': datetime.now().isoformat()
+        }
+
+    def enqueue(self, job_type: str, payload: Dict[str, Any], targets: List[Dict[str, Any]] = None,
+                max_attempts: int = None) -> Dict[str, Any]:
+        """Queue a mint job"""
+        try:
+            return self.enqueue_many([self.new_job(job_type, payload, targets, max_attempts)])[0]
+        except Exception as e:
+            raise Exception(f"Enqueue job error: {str(e)}")
+
+    def enqueue_many(self, jobs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Queue jobs built by new_job in one insert: all of them are stored or none"""
+        try:
+            result = self.supabase.table('mint_jobs').insert(jobs).execute()
+
+            if not result.data or len(result.data) != len(jobs):
+                raise Exception("Failed to store jobs")
+
+            for job in result.data:
+                print(f"📥 Queued {job['job_type']} job: {job['id']}")
+            return result.data
+        except Exception as e:
+            raise Exception(f"Enqueue jobs error: {str(e)}")
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            result = self.supabase.table('mint_jobs').select('*').eq('id', job_id).execute()
+            return result.data[0] if result.data else None
+        except Exception as e:
+            raise Exception(f"Get job error: {str(e)}")
+
+    def claim_jobs(self, worker_id: str, batch_size: int = 10, lock_timeout_seconds: int = 300) -> List[Dict[str, Any]]:
+        """Atomically claim up to batch_size due jobs for this worker"""
+        try:
+            result = self.supabase.rpc('claim_mint_jobs', {
+                'batch_size': batch_size,
+                'worker_id': worker_id,
+                'lock_timeout_seconds': lock_timeout_seconds
+            }).execute()
+            return result.data or []
+        except Exception as e:
+            raise Exception(f"Claim jobs error: {str(e)}")
+
+    def mark_sending(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        """Note that this attempt is about to broadcast, so a crash mid-send isn't retried blindly"""
+        try:
+            job['result'] = {'send_started_at': datetime.now().isoformat(), 'sent_by': job.get('locked_by')}
+            self.supabase.table('mint_jobs').update({
+                'result': job['result'],
+                'updated_at': datetime.now().isoformat()
+            }).eq('id', job['id']).execute()
+            return job
+        except Exception as e:
+            raise Exception(f"Mark job sending error: {str(e)}")
+
+    def record_signature(self, job: Dict[str, Any], tx_signature: str) -> Dict[str, Any]:
+        """Store the mint signature on the job before anything else is written.
+
+        From here on the job is 'minted': a retry or reclaim checks this
+        signature on chain instead of minting again.
+        """
+        try:
+            job['result'] = {'transaction_signature': tx_signature, 'minted_at': datetime.now().isoformat()}
+            job['status'] = 'minted'
+            self.supabase.table('mint_jobs').update({
+                'status': 'minted',
+                'result': job['result'],
+                'updated_at': datetime.now().isoformat()
+            }).eq('id', job['id']).execute()
+            return job
+        except Exception as e:
+            raise Exception(f"Record job signature error: {str(e)}")
+
+    def complete_job(self, job: Dict[str, Any], tx_signature: str) -> Dict[str, Any]:
+        """Write the mint signature (already on the job, see record_signature) to the targets and mark it completed"""
+        try:
+            tracker = get_confirmation_tracker(self.supabase)
+            for target in job.get('targets') or []:
+                update_data = {target['column']: tx_signature, **(target.get('values') or {})}
+                self.supabase.table(target['table']).update(update_data).eq('id', target['id']).execute()
+                tracker.track(tx_signature, target['table'], target['id'], target['column'])
+
+            result = self.supabase.table('mint_jobs').update({
+                'status': 'completed',
+                'result': {**(job.get('result') or {}), 'transaction_signature': tx_signature},
+                'last_error': None,
+                'locked_by': None,
+                'updated_at': datetime.now().isoformat()
+            }).eq('id', job['id']).execute()
+
+            return result.data[0] if result.data else None
+        except Exception as e:
+            raise Exception(f"Complete job error: {str(e)}")
+
+    def fail_job(self, job: Dict[str, Any], error: str, outcome_unknown: bool = False) -> Dict[str, Any]:
+        """Schedule a retry with exponential backoff, or dead-letter the job.
+
+        A job whose signature is recorded keeps it, so the retry re-checks
+        the chain. outcome_unknown (a send that may have been broadcast
+        without us learning its signature) dead-letters the job for a
+        manual check rather than risk minting twice.
+        """
+        try:
+            attempts = job.get('attempts', 0)
+            max_attempts = job.get('max_attempts') or self.DEFAULT_MAX_ATTEMPTS
+            signature = (job.get('result') or {}).get('transaction_signature')
+
+            update_data = {
+                'last_error': error,
+                'locked_by': None,
+                'updated_at': datetime.now().isoformat()
+            }
+            # Keep the signature (or the unfinished send marker) for the next look;
+            # anything else failed before a broadcast
+            update_data['result'] = job.get('result') if signature or outcome_unknown else None
+
+            if outcome_unknown:
+                update_data['status'] = 'dead_letter'
+                print(f"☠️ Job {job['id']} moved to dead letter, mint may have been sent - check the chain "
+                      f"before requeueing: {error}")
+            elif attempts >= max_attempts:
+                update_data['status'] = 'dead_letter'
+                print(f"☠️ Job {job['id']} moved to dead letter after {attempts} attempts: {error}")
+            else:
+                delay = self.get_backoff_seconds(attempts)
+                update_data['status'] = 'queued'
+                update_data['run_after'] = (datetime.now() + timedelta(seconds=delay)).isoformat()
+                print(f"🔁 Job {job['id']} failed (attempt {attempts}/{max_attempts}), retrying in {delay}s: {error}")
+
+            result = self.supabase.table('mint_jobs').update(update_data).eq('id', job['id']).execute()
+            return result.data[0] if result.data else None
+        except Exception as e:
+            raise Exception(f"Fail job error: {str(e)}")
+
+    def get_backoff_seconds(self, attempts: int) -> int:
+        """Exponential backoff: 5s, 10s, 20s, ... capped at MAX_BACKOFF_SECONDS"""
+        return min(self.BASE_BACKOFF_SECONDS * (2 ** max(attempts - 1, 0)), self.MAX_BACKOFF_SECONDS)
+
+    def get_dead_letter_jobs(self, limit: int = 50) -> List[Dict[str, Any]]:
+        try:
+            result = self.supabase.table('mint_jobs').select('*').eq(
+                'status', 'dead_letter'
+            ).order('updated_at', desc=True).limit(limit).execute()
+            return result.data
+        except Exception as e:
+            raise Exception(f"Get dead letter jobs error: {str(e)}")
+
+    def requeue_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Give a dead-lettered job a fresh set of attempts.
+
+        An unfinished send marker is dropped: requeueing is the operator's
+        word that the earlier attempt did not mint. A recorded signature is
+        kept and re-checked.
+        """
+        try:
+            previous = ((self.get_job(job_id) or {}).get('result')) or {}
+            result = self.supabase.table('mint_jobs').update({
+                'status': 'queued',
+                'attempts': 0,
+                'result': previous if previous.get('transaction_signature') else None,
+                'run_after': datetime.now().isoformat(),
+                'updated_at': datetime.now().isoformat()
+            }).eq('id', job_id).eq('status', 'dead_letter').execute()
+            return result.data[0] if result.data else None
+        except Exception as e:
+            raise Exception(f"Requeue job error: {str(e)}")
+
+    @staticmethod
+    def format_job_status(job: Dict[str, Any]) -> Dict[str, Any]:
+        """Public view of a job for status polling"""
+        return {
+            'job_id': job['id'],
+            'job_type': job['job_type'],
+            'status': job['status'],
+            'attempts': job.get('attempts', 0),
+            'max_attempts': job.get('max_attempts'),
+            'next_attempt_at': job.get('run_after') if job['status'] == 'queued' else None,
+            'transaction_signature': (job.get('result') or {}).get('transaction_signature'),
+            'last_error': job.get('last_error'),
+            'created_at': job.get('created_at'),
+            'updated_at': job.get('updated_at')
+        }
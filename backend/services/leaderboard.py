@@ -0,0 +1,395 @@
+import os
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional, Tuple
+
+# Reads catch up with the ledger at most this often
+LEADERBOARD_SYNC_SECONDS = float(os.getenv('LEADERBOARD_SYNC_SECONDS', 5.0))
+# Ledger ids are handed out before their transaction commits, so a lower id
+# can become visible after a higher one; each catch-up re-reads this many
+# ids behind the newest one applied
+LEADERBOARD_LOOKBACK_IDS = int(os.getenv('LEADERBOARD_LOOKBACK_IDS', 1000))
+
+WINDOW_ALL = 'all'
+WINDOW_WEEK = 'week'
+WINDOW_MONTH = 'month'
+WINDOWS = (WINDOW_ALL, WINDOW_WEEK, WINDOW_MONTH)
+
+class _Node:
+    __slots__ = ('key', 'forward', 'span')
+
+    def __init__(self, key: Optional[Tuple[float, str]], level: int):
+        self.key = key
+        self.forward: List[Optional['_Node']] = [None] * level
+        self.span = [0] * level
+
+class RankedSet:
+    """Members ordered by score, highest first, with O(log n) updates and rank lookups.
+
+    An indexable skiplist: every forward link records how many nodes it
+    jumps, so finding a member's rank or the node at an offset walks
+    O(log n) links instead of counting. Keys are (-score, member), which
+    orders equal scores by member and keeps ranks stable.
+    """
+
+    MAX_LEVEL = 32
+    P = 0.25
+
+    def __init__(self):
+        self._head = _Node(None, self.MAX_LEVEL)
+        self._level = 1
+        self._length = 0
+        self._scores: Dict[str, float] = {}
+
+    def __len__(self) -> int:
+        return self._length
+
+    def _random_level(self) -> int:
+        level = 1
+        while level < self.MAX_LEVEL and random.random() < self.P:
+            level += 1
+        return level
+
+    def _insert(self, key: Tuple[float, str]):
+        update = [self._head] * self.MAX_LEVEL
+        rank = [0] * self.MAX_LEVEL
+        node = self._head
+        for i in range(self._level - 1, -1, -1):
+            rank[i] = 0 if i == self._level - 1 else rank[i + 1]
+            while node.forward[i] is not None and node.forward[i].key < key:
+                rank[i] += node.span[i]
+                node = node.forward[i]
+            update[i] = node
+
+        level = self._random_level()
+        if level > self._level:
+            for i in range(self._level, level):
+                rank[i] = 0
+                update[i] = self._head
+                self._head.span[i] = self._length
+            self._level = level
+
+        new = _Node(key, level)
+        for i in range(level):
+            new.forward[i] = update[i].forward[i]
+            update[i].forward[i] = new
+            new.span[i] = update[i].span[i] - (rank[0] - rank[i])
+            update[i].span[i] = rank[0] - rank[i] + 1
+        for i in range(level, self._level):
+            update[i].span[i] += 1
+        self._length += 1
+
+    def _delete(self, key: Tuple[float, str]):
+        update = [self._head] * self.MAX_LEVEL
+        node = self._head
+        for i in range(self._level - 1, -1, -1):
+            while node.forward[i] is not None and node.forward[i].key < key:
+                node = node.forward[i]
+            update[i] = node
+
+        target = node.forward[0]
+        for i in range(self._level):
+            if update[i].forward[i] is target:
+                update[i].span[i] += target.span[i] - 1
+                update[i].forward[i] = target.forward[i]
+            else:
+                update[i].span[i] -= 1
+        while self._level > 1 and self._head.forward[self._level - 1] is None:
+            self._level -= 1
+        self._length -= 1
+
+    def set(self, member: str, score: float):
+        previous = self._scores.get(member)
+        if previous == score:
+            return
+        if previous is not None:
+            self._delete((-previous, member))
+        self._scores[member] = score
+        self._insert((-score, member))
+
+    def increment(self, member: str, amount: float) -> float:
+        score = self._scores.get(member, 0.0) + amount
+        self.set(member, score)
+        return score
+
+    def score(self, member: str) -> Optional[float]:
+        return self._scores.get(member)
+
+    def rank(self, member: str) -> Optional[int]:
+        """1-based position of member, highest score first"""
+        score = self._scores.get(member)
+        if score is None:
+            return None
+        key = (-score, member)
+        node = self._head
+        traversed = 0
+        for i in range(self._level - 1, -1, -1):
+            while node.forward[i] is not None and node.forward[i].key <= key:
+                traversed += node.span[i]
+                node = node.forward[i]
+            if node.key == key:
+                return traversed
+        return None
+
+    def range(self, offset: int = 0, limit: int = 10) -> List[Tuple[str, float]]:
+        """(member, score) pairs from 0-based offset, highest first"""
+        if offset >= self._length or limit <= 0:
+            return []
+        node = self._head
+        traversed = 0
+        for i in range(self._level - 1, -1, -1):
+            while node.forward[i] is not None and traversed + node.span[i] <= offset + 1:
+                traversed += node.span[i]
+                node = node.forward[i]
+            if traversed == offset + 1:
+                break
+
+        entries = []
+        while node is not None and len(entries) < limit:
+            entries.append((node.key[1], -node.key[0]))
+            node = node.forward[0]
+        return entries
+
+def period_key(window: str, at: datetime) -> Optional[str]:
+    """The week (its Monday) or month an instant falls in; None for all-time"""
+    if window == WINDOW_WEEK:
+        return (at - timedelta(days=at.weekday())).date().isoformat()
+    if window == WINDOW_MONTH:
+        return at.strftime('%Y-%m')
+    return None
+
+def _period_start(window: str, at: datetime) -> datetime:
+    day = at.replace(hour=0, minute=0, second=0, microsecond=0)
+    if window == WINDOW_WEEK:
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+def _parse_time(value: Optional[str]) -> datetime:
+    if not value:
+        return datetime.now()
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).replace(tzinfo=None)
+    except ValueError:
+        return datetime.now()
+
+class LeaderboardIndex:
+    """VAULT earned per user, all-time and for the current week and month.
+
+    Built from the ledger: all-time scores start from each user's
+    total_earned in vault_balances, and the windowed boards from credits
+    since the start of the current month (or week, if earlier). After that,
+    reads catch up with new ledger entries at most every
+    LEADERBOARD_SYNC_SECONDS, and credits made by this process are applied
+    immediately via record().
+    """
+
+    PAGE_SIZE = 1000
+
+    def __init__(self, supabase):
+        self.supabase = supabase
+        self._lock = threading.RLock()
+        self._sync_lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._boards: Dict[str, RankedSet] = {}
+        self._periods: Dict[str, Optional[str]] = {}
+        # Per user, the last ledger entry already counted in its vault_balances total
+        self._seeded_through: Dict[str, int] = {}
+        self._applied: set = set()
+        self._watermark = 0
+        self._built = False
+        self._last_sync = 0.0
+        self.stats = {'rebuilds': 0, 'syncs': 0, 'entries_applied': 0, 'last_rebuild_ms': None}
+
+    def _board(self, window: str, now: datetime = None) -> RankedSet:
+        """The board for the window's current period, starting a new one when the period rolls over"""
+        period = period_key(window, now or datetime.now())
+        if window not in self._boards or self._periods.get(window) != period:
+            self._boards[window] = RankedSet()
+            self._periods[window] = period
+        return self._boards[window]
+
+    def _apply(self, entry_id: int, user_id: str, amount: float, at: datetime) -> bool:
+        if entry_id in self._applied or amount <= 0:
+            return False
+        self._applied.add(entry_id)
+        self._watermark = max(self._watermark, entry_id)
+
+        now = datetime.now()
+        if entry_id > self._seeded_through.get(user_id, 0):
+            self._board(WINDOW_ALL, now).increment(user_id, amount)
+        for window in (WINDOW_WEEK, WINDOW_MONTH):
+            if period_key(window, at) == period_key(window, now):
+                self._board(window, now).increment(user_id, amount)
+        self.stats['entries_applied'] += 1
+        return True
+
+    def _entry_pages(self, after_id: int = None, since: str = None):
+        offset = 0
+        while True:
+            query = self.supabase.table('vault_ledger_entries').select('id, user_id, amount, created_at').gt('amount', 0)
+            if after_id is not None:
+                query = query.gt('id', after_id)
+            if since:
+                query = query.gte('created_at', since)
+            result = query.order('id').range(offset, offset + self.PAGE_SIZE - 1).execute()
+
+            yield result.data
+            if len(result.data) < self.PAGE_SIZE:
+                return
+            offset += self.PAGE_SIZE
+
+    def _apply_page(self, page: List[Dict[str, Any]]) -> int:
+        applied = 0
+        with self._lock:
+            for entry in page:
+                if self._apply(entry['id'], entry['user_id'], float(entry['amount']), _parse_time(entry.get('created_at'))):
+                    applied += 1
+        return applied
+
+    def rebuild(self):
+        """Reload every board from vault_balances and this period's ledger entries"""
+        with self._sync_lock:
+            started = time.perf_counter()
+            now = datetime.now()
+            with self._lock:
+                self._boards = {}
+                self._periods = {}
+                self._seeded_through = {}
+                self._applied = set()
+                self._watermark = 0
+
+            users = 0
+            offset = 0
+            while True:
+                result = self.supabase.table('vault_balances').select(
+                    'user_id, total_earned, last_entry_id'
+                ).order('user_id').range(offset, offset + self.PAGE_SIZE - 1).execute()
+                with self._lock:
+                    board = self._board(WINDOW_ALL, now)
+                    for row in result.data:
+                        earned = float(row.get('total_earned') or 0)
+                        if earned > 0:
+                            board.set(row['user_id'], earned)
+                        if row.get('last_entry_id'):
+                            self._seeded_through[row['user_id']] = row['last_entry_id']
+                            self._watermark = max(self._watermark, row['last_entry_id'])
+                users += len(result.data)
+                if len(result.data) < self.PAGE_SIZE:
+                    break
+                offset += self.PAGE_SIZE
+
+            since = min(_period_start(WINDOW_WEEK, now), _period_start(WINDOW_MONTH, now)).isoformat()
+            entries = 0
+            for page in self._entry_pages(since=since):
+                self._apply_page(page)
+                entries += len(page)
+
+            with self._lock:
+                self._prune_applied()
+                self._built = True
+                self._last_sync = time.monotonic()
+
+            elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+            self.stats['rebuilds'] += 1
+            self.stats['last_rebuild_ms'] = elapsed_ms
+            print(f"🏆 Leaderboards rebuilt from {users} balances and {entries} entries ({elapsed_ms}ms)")
+
+    def sync(self) -> int:
+        """Apply ledger credits written since the last sync (by any worker)"""
+        if not self._sync_lock.acquire(blocking=False):
+            return 0  # another thread is already catching up; serve what we have
+        try:
+            applied = 0
+            for page in self._entry_pages(after_id=max(self._watermark - LEADERBOARD_LOOKBACK_IDS, 0)):
+                applied += self._apply_page(page)
+            with self._lock:
+                self._prune_applied()
+            self._last_sync = time.monotonic()
+            self.stats['syncs'] += 1
+            return applied
+        finally:
+            self._sync_lock.release()
+
+    def _prune_applied(self):
+        floor = self._watermark - LEADERBOARD_LOOKBACK_IDS
+        self._applied = {entry_id for entry_id in self._applied if entry_id > floor}
+
+    def ensure_fresh(self):
+        """Build on first use, then catch up if the last sync is stale"""
+        if not self._built:
+            with self._build_lock:
+                if not self._built:
+                    self.rebuild()
+            return
+
+        if time.monotonic() - self._last_sync >= LEADERBOARD_SYNC_SECONDS:
+            try:
+                self.sync()
+            except Exception as e:
+                print(f"⚠️ Leaderboard sync failed, serving last known state: {e}")
+
+    def record(self, entry_id: int, user_id: str, amount: float):
+        """Apply a ledger credit this process just wrote"""
+        if not self._built:
+            return  # the first build will read it from the ledger
+        with self._lock:
+            self._apply(entry_id, user_id, amount, datetime.now())
+
+    def top(self, window: str = WINDOW_ALL, limit: int = 10, offset: int = 0) -> Dict[str, Any]:
+        if window not in WINDOWS:
+            raise Exception(f"window must be one of {', '.join(WINDOWS)}")
+        self.ensure_fresh()
+        with self._lock:
+            board = self._board(window)
+            entries = board.range(offset, limit)
+            return {
+                'window': window,
+                'period': self._periods.get(window),
+                'total_users': len(board),
+                'entries': [
+                    {'rank': offset + i + 1, 'user_id': user_id, 'vault_earned': round(score, 6)}
+                    for i, (user_id, score) in enumerate(entries)
+                ]
+            }
+
+    def position(self, user_id: str, window: str = WINDOW_ALL, neighbors: int = 0) -> Dict[str, Any]:
+        """A user's rank and score, with up to `neighbors` users either side"""
+        if window not in WINDOWS:
+            raise Exception(f"window must be one of {', '.join(WINDOWS)}")
+        self.ensure_fresh()
+        with self._lock:
+            board = self._board(window)
+            rank = board.rank(user_id)
+            result = {
+                'window': window,
+                'period': self._periods.get(window),
+                'user_id': user_id,
+                'rank': rank,
+                'vault_earned': round(board.score(user_id), 6) if rank else 0.0,
+                'total_users': len(board)
+            }
+            if rank and neighbors:
+                start = max(rank - 1 - neighbors, 0)
+                result['neighbors'] = [
+                    {'rank': start + i + 1, 'user_id': member, 'vault_earned': round(score, 6)}
+                    for i, (member, score) in enumerate(board.range(start, rank - start + neighbors))
+                ]
+            return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            boards = {window: len(board) for window, board in self._boards.items()}
+        return {**self.stats, 'built': self._built, 'boards': boards, 'watermark': self._watermark}
+
+_index: Optional[LeaderboardIndex] = None
+_index_lock = threading.Lock()
+
+def get_leaderboard_index(supabase) -> LeaderboardIndex:
+    """Process-wide leaderboard index"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = LeaderboardIndex(supabase)
+        return _index
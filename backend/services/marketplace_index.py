@@ -0,0 +1,337 @@
+import os
+import threading
+import time
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Listings written by other workers show up after at most this long
+MARKETPLACE_REBUILD_SECONDS = float(os.getenv('MARKETPLACE_REBUILD_SECONDS', 120))
+
+LISTING_COLUMNS = '*, assets(id, name, description, category, valuation, image_url)'
+
+# Range facets: request name -> (listing field, bucket edges reported in facet counts)
+RANGE_FACETS = {
+    'valuation': ('asset_valuation', (10_000, 100_000, 1_000_000, 10_000_000)),
+    'share_price': ('share_price_usd', (1, 10, 100, 1_000)),
+    'reward': ('vault_reward_estimate', (0.01, 0.1, 1, 10))
+}
+# Listing age buckets, in days
+AGE_EDGES_DAYS = (1, 7, 30, 90)
+
+# Sort keys -> listing field
+SORT_FIELDS = {
+    'listed_at': 'listed_at',
+    'valuation': 'asset_valuation',
+    'share_price': 'share_price_usd',
+    'reward': 'vault_reward_estimate',
+    'name': 'asset_name'
+}
+
+def build_listing(token: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Wallet-independent marketplace fields for a token joined with its asset"""
+    asset = token.get('assets')
+    if not asset:
+        return None
+    total_supply = token.get('total_supply') or 0
+    share_price_usd = asset['valuation'] / total_supply if total_supply > 0 else 0
+    return {
+        'token_id': token['id'],
+        'asset_id': asset['id'],
+        'asset_name': asset['name'],
+        'asset_description': asset['description'],
+        'asset_category': asset['category'],
+        'asset_image': asset.get('image_url'),
+        'asset_valuation': asset['valuation'],
+        'token_symbol': token.get('symbol', 'AST'),
+        'total_shares': total_supply,
+        'share_price_usd': round(share_price_usd, 2),
+        'min_investment_usd': round(share_price_usd, 2),
+        'vault_reward_estimate': round((1 / total_supply) * 100, 4) if total_supply > 0 else 0,  # VAULT reward for buying 1 share
+        'listed_at': token.get('created_at')
+    }
+
+def _epoch(value: Any) -> float:
+    if not value:
+        return float('nan')
+    try:
+        return datetime.fromisoformat(str(value).replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        return float('nan')
+
+class _Snapshot:
+    """Column arrays over a fixed set of listings; immutable once built.
+
+    Each numeric field is kept with its ascending sort order, so a range
+    filter is two binary searches plus a slice of that order, and a sorted
+    page is the order filtered by the result mask.
+    """
+
+    def __init__(self, listings: List[Dict[str, Any]]):
+        self.listings = listings
+        self.size = len(listings)
+
+        categories = sorted({listing['asset_category'] or '' for listing in listings})
+        self.categories = categories
+        codes = {category: i for i, category in enumerate(categories)}
+        self.category_codes = np.fromiter((codes[listing['asset_category'] or ''] for listing in listings),
+                                          dtype=np.int32, count=self.size)
+
+        # Ties break on token id so pages are stable
+        token_ids = np.array([listing['token_id'] for listing in listings], dtype=str) if listings \
+            else np.array([], dtype=str)
+        self.values: Dict[str, 'np.ndarray'] = {}
+        self.orders: Dict[str, 'np.ndarray'] = {}
+        self.sorted_values: Dict[str, 'np.ndarray'] = {}
+        # Listings with a value per field; the rest (NaN) sort after them
+        self.present: Dict[str, int] = {}
+        for field in ('asset_valuation', 'share_price_usd', 'vault_reward_estimate', 'listed_at'):
+            if field == 'listed_at':
+                values = np.array([_epoch(listing['listed_at']) for listing in listings], dtype=np.float64)
+            else:
+                values = np.array([float(listing[field]) if listing[field] is not None else np.nan
+                                   for listing in listings], dtype=np.float64)
+            order = np.lexsort((token_ids, values))
+            self.values[field] = values
+            self.orders[field] = order
+            self.sorted_values[field] = values[order]
+            self.present[field] = int(np.count_nonzero(~np.isnan(values)))
+
+        names = np.array([(listing['asset_name'] or '').lower() for listing in listings], dtype=str) if listings \
+            else np.array([], dtype=str)
+        self.orders['asset_name'] = np.lexsort((token_ids, names))
+
+    def range_mask(self, field: str, low: Optional[float], high: Optional[float]) -> 'np.ndarray':
+        """Listings with low <= value <= high; missing values never match"""
+        sorted_values = self.sorted_values[field]
+        start = 0 if low is None else int(np.searchsorted(sorted_values, low, side='left'))
+        # NaNs sort last, so an open upper bound stops before them
+        end = int(np.searchsorted(sorted_values, np.inf if high is None else high, side='right'))
+        mask = np.zeros(self.size, dtype=bool)
+        mask[self.orders[field][start:end]] = True
+        return mask
+
+    def category_mask(self, categories: List[str]) -> 'np.ndarray':
+        codes = [self.categories.index(category) for category in categories if category in self.categories]
+        return np.isin(self.category_codes, codes)
+
+class MarketplaceIndex:
+    """Faceted, sorted views over marketplace listings, kept per worker.
+
+    Listings are loaded from tokens joined with assets on first use and
+    again every MARKETPLACE_REBUILD_SECONDS; tokens and assets written by
+    this process are refreshed immediately. Queries run against column
+    arrays, so filtering, facet counts and a sorted page over tens of
+    thousands of listings take a few milliseconds.
+    """
+
+    PAGE_SIZE = 1000
+
+    def __init__(self, supabase):
+        self.supabase = supabase
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._listings: Dict[str, Dict[str, Any]] = {}
+        self._snapshot: Optional[_Snapshot] = None
+        self._built = False
+        self._built_at = 0.0
+        self._rebuilding = False
+        # Listings refreshed while a rebuild is reading the tables, replayed onto its result
+        self._written_during_rebuild: Optional[List[Tuple[str, Optional[Dict[str, Any]]]]] = None
+        self.stats = {'rebuilds': 0, 'last_rebuild_ms': None, 'queries': 0, 'updates': 0}
+
+    def _load(self, asset_id: str = None, token_id: str = None):
+        offset = 0
+        while True:
+            query = self.supabase.table('tokens').select(LISTING_COLUMNS).neq('asset_id', None)  # Exclude platform tokens
+            if asset_id:
+                query = query.eq('asset_id', asset_id)
+            if token_id:
+                query = query.eq('id', token_id)
+            result = query.order('id').range(offset, offset + self.PAGE_SIZE - 1).execute()
+            yield result.data
+            if len(result.data) < self.PAGE_SIZE:
+                return
+            offset += self.PAGE_SIZE
+
+    def _apply(self, token_id: str, listing: Optional[Dict[str, Any]]):
+        if listing is None:
+            self._listings.pop(token_id, None)
+        else:
+            self._listings[token_id] = listing
+        self._snapshot = None
+
+    def refresh(self, asset_id: str = None, token_id: str = None):
+        """Re-read the listings for an asset or token written by this process"""
+        if not self._built or not (asset_id or token_id):
+            return  # the next build will read it from the table
+        try:
+            rows = [row for page in self._load(asset_id=asset_id, token_id=token_id) for row in page]
+        except Exception as e:
+            print(f"⚠️ Marketplace index refresh failed, next rebuild will catch up: {e}")
+            return
+
+        with self._lock:
+            for row in rows:
+                listing = build_listing(row)
+                self._apply(row['id'], listing)
+                if self._written_during_rebuild is not None:
+                    self._written_during_rebuild.append((row['id'], listing))
+            self.stats['updates'] += 1
+
+    def rebuild(self):
+        """Load every listing, then swap them in"""
+        started = time.perf_counter()
+        with self._lock:
+            self._written_during_rebuild = []
+        listings = {}
+        for page in self._load():
+            for row in page:
+                listing = build_listing(row)
+                if listing:
+                    listings[row['id']] = listing
+
+        with self._lock:
+            self._listings = listings
+            for token_id, listing in self._written_during_rebuild:
+                self._apply(token_id, listing)
+            self._written_during_rebuild = None
+            self._snapshot = None
+            self._built = True
+            self._built_at = time.monotonic()
+
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+        self.stats['rebuilds'] += 1
+        self.stats['last_rebuild_ms'] = elapsed_ms
+        print(f"🛒 Marketplace index rebuilt: {len(listings)} listings ({elapsed_ms}ms)")
+
+    def _rebuild_in_background(self):
+        try:
+            self.rebuild()
+        except Exception as e:
+            print(f"⚠️ Marketplace index rebuild failed, serving last known state: {e}")
+        finally:
+            self._rebuilding = False
+
+    def ensure_fresh(self):
+        """Build on first use; later rebuilds run in the background while the old listings serve"""
+        if not self._built:
+            with self._build_lock:
+                if not self._built:
+                    self.rebuild()
+            return
+
+        if time.monotonic() - self._built_at >= MARKETPLACE_REBUILD_SECONDS and not self._rebuilding:
+            with self._build_lock:
+                if self._rebuilding:
+                    return
+                self._rebuilding = True
+            threading.Thread(target=self._rebuild_in_background, name='marketplace-rebuild', daemon=True).start()
+
+    def _current(self) -> _Snapshot:
+        with self._lock:
+            if self._snapshot is None:
+                self._snapshot = _Snapshot(sorted(self._listings.values(), key=lambda listing: listing['token_id']))
+            return self._snapshot
+
+    @staticmethod
+    def _buckets(values: 'np.ndarray', edges) -> List[Dict[str, Any]]:
+        # Counting below each edge beats binning every value
+        below = [0, *(int(np.count_nonzero(values < edge)) for edge in edges),
+                 int(np.count_nonzero(~np.isnan(values)))]
+        counts = [below[i + 1] - below[i] for i in range(len(edges) + 1)]
+        bounds = [None, *edges, None]
+        return [{'min': bounds[i], 'max': bounds[i + 1], 'count': int(count)} for i, count in enumerate(counts)]
+
+    def query(self, categories: List[str] = None, ranges: Dict[str, Tuple[Optional[float], Optional[float]]] = None,
+              min_age_days: float = None, max_age_days: float = None, sort: str = 'listed_at',
+              descending: bool = True, limit: int = 50, offset: int = 0) -> Dict[str, Any]:
+        """One sorted page of the listings matching every facet, with counts per facet.
+
+        Each facet's counts apply every other facet's filter but not its
+        own, so selecting a category still shows how many listings the
+        other categories would add.
+        """
+        if np is None:
+            raise Exception("numpy is required for marketplace filtering")
+        if sort not in SORT_FIELDS:
+            raise Exception(f"sort must be one of {', '.join(SORT_FIELDS)}")
+        for name in ranges or {}:
+            if name not in RANGE_FACETS:
+                raise Exception(f"Unknown range facet {name}")
+
+        self.ensure_fresh()
+        snapshot = self._current()
+        self.stats['queries'] += 1
+        everything = np.ones(snapshot.size, dtype=bool)
+        now = time.time()
+
+        masks = {}
+        if categories:
+            masks['category'] = snapshot.category_mask(categories)
+        for name, (low, high) in (ranges or {}).items():
+            if low is not None or high is not None:
+                masks[name] = snapshot.range_mask(RANGE_FACETS[name][0], low, high)
+        if min_age_days is not None or max_age_days is not None:
+            masks['age'] = snapshot.range_mask(
+                'listed_at',
+                None if max_age_days is None else now - max_age_days * 86400,
+                None if min_age_days is None else now - min_age_days * 86400
+            )
+
+        def combined(skip: str = None) -> 'np.ndarray':
+            mask = everything
+            for name, facet_mask in masks.items():
+                if name != skip:
+                    mask = mask & facet_mask
+            return mask
+
+        matched = combined()
+        field = SORT_FIELDS[sort]
+        order = snapshot.orders[field]
+        if descending:
+            # Missing values stay last either way
+            present = snapshot.present.get(field, snapshot.size)
+            order = np.concatenate((order[:present][::-1], order[present:]))
+        selected = order[matched[order]]
+        page = [snapshot.listings[i] for i in selected[offset:offset + limit]]
+
+        facets = {}
+        category_counts = np.bincount(snapshot.category_codes[combined('category')], minlength=len(snapshot.categories))
+        facets['category'] = sorted(
+            ({'value': category, 'count': int(count)} for category, count in zip(snapshot.categories, category_counts)
+             if count or category in (categories or [])),
+            key=lambda facet: (-facet['count'], facet['value'])
+        )
+        for name, (field, edges) in RANGE_FACETS.items():
+            values = snapshot.values[field][combined(name)]
+            present = values[~np.isnan(values)]
+            facets[name] = {
+                'min': float(present.min()) if present.size else None,
+                'max': float(present.max()) if present.size else None,
+                'buckets': self._buckets(values, edges)
+            }
+        # Age buckets run newest first: listed within 1 day, 1-7 days, ...
+        ages = (now - snapshot.values['listed_at'][combined('age')]) / 86400
+        facets['age_days'] = {'buckets': self._buckets(ages, AGE_EDGES_DAYS)}
+
+        return {'total': int(matched.sum()), 'listings': page, 'facets': facets}
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self.stats, 'built': self._built, 'listings': len(self._listings)}
+
+_index: Optional[MarketplaceIndex] = None
+_index_lock = threading.Lock()
+
+def get_marketplace_index(supabase) -> MarketplaceIndex:
+    """Process-wide marketplace index"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = MarketplaceIndex(supabase)
+        return _index
@@ -0,0 +1,179 @@
+import os
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Any, Callable, Optional
+
+from services.job_service import JobService, JOB_MINT_FRACTIONAL, JOB_MINT_VAULT_REWARD, JOB_MINT_NFT
+from utils.resilience import DeadlineExceeded
+
+# A signature the cluster still doesn't know this long after sending was
+# dropped (its blockhash has expired), so minting again is safe
+MINT_SIGNATURE_EXPIRY_SECONDS = int(os.getenv('MINT_SIGNATURE_EXPIRY_SECONDS', 150))
+
+class MintStillPending(Exception):
+    """The previous attempt's transaction is not visible yet; check again later"""
+
+class MintOutcomeUnknown(Exception):
+    """A send may have reached the cluster but we never learned its signature"""
+
+SIGNATURE_LANDED = 'landed'
+SIGNATURE_FAILED = 'failed'
+SIGNATURE_DROPPED = 'dropped'
+SIGNATURE_PENDING = 'pending'
+
+def resolve_signature(solana, job: Dict[str, Any]) -> Optional[str]:
+    """What became of the mint signature recorded on a job (None if there isn't one)"""
+    result = job.get('result') or {}
+    signature = result.get('transaction_signature')
+    if not signature:
+        return None
+    if solana is None or signature.startswith('mock_'):
+        # Blockchain disabled: the mock mint "landed" when it was recorded
+        return SIGNATURE_LANDED
+
+    status = solana.get_transaction_status(signature)
+    if status['err']:
+        return SIGNATURE_FAILED
+    if status['confirmation_status'] != 'not_found':
+        return SIGNATURE_LANDED
+
+    minted_at = datetime.fromisoformat(result.get('minted_at') or job.get('updated_at'))
+    if (datetime.now() - minted_at).total_seconds() < MINT_SIGNATURE_EXPIRY_SECONDS:
+        return SIGNATURE_PENDING
+    return SIGNATURE_DROPPED
+
+def _is_send_timeout(error: Exception) -> bool:
+    message = str(error).lower()
+    return isinstance(error, (TimeoutError, DeadlineExceeded)) or 'timed out' in message or 'timeout' in message
+
+class MintWorker:
+    """Polls mint_jobs and runs mints on a thread pool"""
+
+    def __init__(self, supabase, token_service, threads: int = 4, poll_interval: float = 1.0):
+        self.jobs = JobService(supabase)
+        self.token_service = token_service
+        self.threads = threads
+        self.poll_interval = poll_interval
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.lock_timeout_seconds = int(os.getenv('MINT_JOB_LOCK_TIMEOUT', 300))
+
+        self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='mint-worker')
+        self._stop = threading.Event()
+        self._in_flight = threading.Semaphore(threads)
+
+        self.handlers: Dict[str, Callable[[Dict[str, Any]], str]] = {
+            JOB_MINT_FRACTIONAL: self._handle_fractional_mint,
+            JOB_MINT_VAULT_REWARD: self._handle_vault_reward,
+            JOB_MINT_NFT: self._handle_nft_mint
+        }
+
+    def _handle_fractional_mint(self, payload: Dict[str, Any]) -> str:
+        return self.token_service.mint_fractional_tokens(
+            payload['token_id'],
+            payload['recipient_wallet'],
+            payload['amount']
+        )
+
+    def _handle_vault_reward(self, payload: Dict[str, Any]) -> str:
+        return self.token_service.mint_vault_reward(
+            recipient_wallet=payload['recipient_wallet'],
+            amount=payload['amount'],
+            reason=payload['reason'],
+            asset_id=payload.get('asset_id')
+        )
+
+    def _handle_nft_mint(self, payload: Dict[str, Any]) -> str:
+        return self.token_service.mint_nft(payload['mint_address'], payload['recipient_wallet'])
+
+    def _previous_signature(self, job: Dict[str, Any]) -> Optional[str]:
+        """The signature an earlier attempt minted with, if it landed or may still land"""
+        result = job.get('result') or {}
+        signature = result.get('transaction_signature')
+        if not signature:
+            if result.get('send_started_at'):
+                # Reclaimed after the lock timeout: that attempt died mid-send
+                raise MintOutcomeUnknown(f"Attempt by {result.get('sent_by')} started sending at "
+                                         f"{result['send_started_at']} and never finished")
+            return None
+
+        outcome = resolve_signature(self.token_service.solana, job)
+        if outcome == SIGNATURE_LANDED:
+            return signature
+        if outcome == SIGNATURE_PENDING:
+            raise MintStillPending(f"Mint {signature} not visible yet")
+        reason = 'failed on chain' if outcome == SIGNATURE_FAILED else 'was dropped'
+        print(f"↩️ Job {job['id']} previous mint {signature} {reason}, minting again")
+        return None
+
+    def run_job(self, job: Dict[str, Any]):
+        """Run a single claimed job and record the outcome.
+
+        The signature goes on the job row before any target is written, so
+        a failure after the mint never leads to a second mint.
+        """
+        try:
+            handler = self.handlers.get(job['job_type'])
+            if not handler:
+                raise Exception(f"No handler for job type: {job['job_type']}")
+
+            tx_signature = self._previous_signature(job)
+            if tx_signature is None:
+                self.jobs.mark_sending(job)
+                try:
+                    tx_signature = handler(job.get('payload') or {})
+                except Exception as e:
+                    if _is_send_timeout(e):
+                        raise MintOutcomeUnknown(str(e))
+                    raise
+                self.jobs.record_signature(job, tx_signature)
+
+            self.jobs.complete_job(job, tx_signature)
+            print(f"✅ Job {job['id']} ({job['job_type']}) completed - TX: {tx_signature}")
+        except Exception as e:
+            try:
+                self.jobs.fail_job(job, str(e), outcome_unknown=isinstance(e, MintOutcomeUnknown))
+            except Exception as record_error:
+                # The lock timeout hands the job to another worker later
+                print(f"❌ Could not record failure for job {job['id']}: {record_error}")
+        finally:
+            self._in_flight.release()
+
+    def poll_once(self) -> int:
+        """Claim as many jobs as there are free threads and dispatch them"""
+        free = 0
+        while free < self.threads and self._in_flight.acquire(blocking=False):
+            free += 1
+
+        if not free:
+            return 0
+
+        try:
+            claimed = self.jobs.claim_jobs(self.worker_id, free, self.lock_timeout_seconds)
+        except Exception as e:
+            print(f"⚠️ Job poll failed: {e}")
+            claimed = []
+
+        for _ in range(free - len(claimed)):
+            self._in_flight.release()
+
+        for job in claimed:
+            self._executor.submit(self.run_job, job)
+
+        return len(claimed)
+
+    def run_forever(self):
+        print(f"👷 Mint worker {self.worker_id} started with {self.threads} threads")
+
+        while not self._stop.is_set():
+            claimed = self.poll_once()
+            if not claimed:
+                self._stop.wait(self.poll_interval)
+
+        print("🛑 Mint worker draining in-flight jobs...")
+        self._executor.shutdown(wait=True)
+        print("👋 Mint worker stopped")
+
+    def stop(self):
+        self._stop.set()
@@ -4,13 +4,72 @@ import uuid
 from typing import Dict, Any, Optional, List
 from web3 import Web3
 from eth_account import Account
-import requests
+import threading
+import time
 from decimal import Decimal
+from services.nonce_manager import NonceManager, get_nonce_manager
+from utils.http_client import get_session, HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT
+from utils.resilience import get_breaker
+from utils.instrumentation import web3_metrics_middleware, record_cache
 
 print("🔄 Initializing MonadService...")
 
+_web3_instances: Dict[str, Web3] = {}
+_web3_lock = threading.Lock()
+
+def get_web3(rpc_url: str) -> Web3:
+    """Process-wide Web3 per endpoint on top of the pooled HTTP session"""
+    with _web3_lock:
+        if rpc_url not in _web3_instances:
+            provider = Web3.HTTPProvider(
+                rpc_url,
+                session=get_session(rpc_url, 'monad_rpc'),
+                request_kwargs={'timeout': (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)}
+            )
+            w3 = Web3(provider)
+            w3.middleware_onion.add(web3_metrics_middleware, 'metrics')
+            _web3_instances[rpc_url] = w3
+        return _web3_instances[rpc_url]
+
+# Seconds between stuck-transaction/nonce-gap passes for each sender (0 disables)
+NONCE_MAINTENANCE_INTERVAL = float(os.getenv('MONAD_NONCE_MAINTENANCE_INTERVAL', 30))
+# (chain id, sender) -> maintenance thread, one per sender per process
+_maintainers: Dict[tuple, threading.Thread] = {}
+_maintainers_lock = threading.Lock()
+
+# Liveness results are reused briefly so each method doesn't ping the node
+CONNECTION_CHECK_TTL = float(os.getenv('MONAD_CONNECTION_CHECK_TTL', 5))
+_connection_checks: Dict[str, tuple] = {}
+
+CONTRACT_ARTIFACTS_PATH = os.getenv('CONTRACT_ARTIFACTS_PATH', 'artifacts/contracts')
+CONTRACT_ARTIFACTS = {
+    'vault_token_abi': 'VaultToken',
+    'asset_tokenization_abi': 'AssetTokenization',
+    'marketplace_abi': 'Marketplace'
+}
+_abi_cache: Dict[str, Dict[str, Any]] = {}
+_abi_lock = threading.Lock()
+
+def get_contract_abis(artifacts_path: str = CONTRACT_ARTIFACTS_PATH) -> Dict[str, Any]:
+    """Hardhat ABIs, parsed once per process (before fork when gunicorn preloads)"""
+    with _abi_lock:
+        if artifacts_path not in _abi_cache:
+            abis = {}
+            for attr, contract in CONTRACT_ARTIFACTS.items():
+                path = f"{artifacts_path}/{contract}.sol/{contract}.json"
+                if not os.path.exists(path):
+                    continue
+                try:
+                    with open(path, 'r') as f:
+                        abis[attr] = json.load(f)['abi']
+                    print(f"✅ {contract} ABI loaded")
+                except Exception as e:
+                    print(f"⚠️ Could not load {contract} ABI: {e}")
+            _abi_cache[artifacts_path] = abis
+        return _abi_cache[artifacts_path]
+
 class MonadService:
-    def __init__(self, rpc_url: str = None):
+    def __init__(self, rpc_url: str = None, w3: Web3 = None):
         """Initialize Monad service with Web3 connection"""
         self.rpc_url = rpc_url or os.getenv('MONAD_TESTNET_RPC_URL', 'https://testnet.monad.xyz')
         self.chain_id = int(os.getenv('MONAD_CHAIN_ID', 41454))
@@ -19,12 +78,11 @@ class MonadService:
         print(f"🔗 Connecting to Monad RPC: {self.rpc_url}")
         
         try:
-            self.w3 = Web3(Web3.HTTPProvider(self.rpc_url))
+            self.w3 = w3 or get_web3(self.rpc_url)
             
-            # Test connection
-            if self.w3.is_connected():
-                latest_block = self.w3.eth.block_number
-                print(f"✅ Connected to Monad testnet - Latest block: {latest_block}")
+            # Test connection (skipped while the monad_rpc circuit is open)
+            if self._connected():
+                print(f"✅ Connected to Monad testnet")
             else:
                 print("⚠️ Web3 connection failed, using mock mode")
                 self.w3 = None
@@ -33,20 +91,52 @@ class MonadService:
             print(f"⚠️ RPC connection error (using mock mode): {e}")
             self.w3 = None
         
-        # Contract ABIs (will be loaded from compiled contracts)
+        # Shared across instances so concurrent sends get distinct nonces
+        self.nonces = get_nonce_manager(self.w3, self.chain_id) if self.w3 else None
+        
+        # Contract ABIs (loaded from compiled contracts when present)
         self.vault_token_abi = None
         self.asset_tokenization_abi = None
         self.marketplace_abi = None
+        self.load_contract_abis()
         
         # Contract addresses (will be set after deployment)
         self.vault_token_address = os.getenv('VAULT_TOKEN_CONTRACT')
         self.asset_tokenization_address = os.getenv('ASSET_TOKENIZATION_CONTRACT')
         self.marketplace_address = os.getenv('MARKETPLACE_CONTRACT')
     
+    def _connected(self) -> bool:
+        """Whether the node is reachable, answered from the breaker or a recent check"""
+        if not self.w3:
+            return False
+        
+        checked = _connection_checks.get(self.rpc_url)
+        fresh = bool(checked) and time.monotonic() - checked[0] < CONNECTION_CHECK_TTL
+        record_cache('monad_connection_check', fresh)
+        if fresh:
+            return checked[1]
+        
+        breaker = get_breaker('monad_rpc')
+        if not breaker.allow_request():
+            return False
+        
+        try:
+            connected = self.w3.is_connected()
+        except Exception:
+            connected = False
+        
+        if connected:
+            breaker.record_success()
+        else:
+            breaker.record_failure()
+        
+        _connection_checks[self.rpc_url] = (time.monotonic(), connected)
+        return connected
+    
     def get_balance(self, address: str) -> float:
         """Get ETH balance for a wallet address"""
         try:
-            if not self.w3 or not self.w3.is_connected():
+            if not self._connected():
                 return 2.0  # Mock balance for development
             
             # Validate address
@@ -72,7 +162,7 @@ class MonadService:
                 print("⚠️ VAULT token contract not deployed, returning mock balance")
                 return 1000.0
             
-            if not self.w3 or not self.w3.is_connected():
+            if not self._connected():
                 return 1000.0
             
             # Create contract instance
@@ -98,7 +188,7 @@ class MonadService:
     def send_transaction(self, from_address: str, to_address: str, value_eth: float, private_key: str) -> str:
         """Send ETH transaction on Monad network"""
         try:
-            if not self.w3 or not self.w3.is_connected():
+            if not self._connected():
                 mock_tx = f"monad_tx_{str(uuid.uuid4())[:16]}"
                 print(f"🎭 Mock transaction - TX: {mock_tx}")
                 return mock_tx
@@ -106,25 +196,26 @@ class MonadService:
             # Convert ETH to wei
             value_wei = Web3.to_wei(value_eth, 'ether')
             
-            # Get nonce
-            nonce = self.w3.eth.get_transaction_count(Web3.to_checksum_address(from_address))
-            
             # Build transaction
             transaction = {
                 'to': Web3.to_checksum_address(to_address),
                 'value': value_wei,
                 'gas': 21000,  # Standard gas for ETH transfer
                 'gasPrice': self.w3.eth.gas_price,
-                'nonce': nonce,
                 'chainId': self.chain_id
             }
             
-            # Sign transaction
-            signed_txn = self.w3.eth.account.sign_transaction(transaction, private_key)
+            sender = Web3.to_checksum_address(from_address)
+            self._ensure_nonce_maintenance(sender, private_key)
             
-            # Send transaction
-            tx_hash = self.w3.eth.send_raw_transaction(signed_txn.rawTransaction)
-            tx_hash_hex = tx_hash.hex()
+            try:
+                tx_hash_hex = self._send_with_nonce(sender, transaction, private_key)
+            except Exception as send_error:
+                if not NonceManager.is_nonce_error(send_error):
+                    raise
+                # Someone else used this sender - resync once and retry
+                self.nonces.resync(sender)
+                tx_hash_hex = self._send_with_nonce(sender, transaction, private_key)
             
             print(f"✅ Transaction sent - TX: {tx_hash_hex}")
             return tx_hash_hex
@@ -134,6 +225,130 @@ class MonadService:
             # Return mock transaction for development
             return f"mock_tx_{str(uuid.uuid4())[:16]}"
     
+    def _send_with_nonce(self, sender: str, transaction: Dict[str, Any], private_key: str) -> str:
+        """Sign and broadcast with a locally allocated nonce"""
+        nonce = self.nonces.allocate(sender)
+        transaction = {**transaction, 'nonce': nonce}
+        
+        try:
+            signed_txn = self.w3.eth.account.sign_transaction(transaction, private_key)
+        except Exception:
+            # Never left this process, so hand the nonce back out
+            self.nonces.release(sender, nonce)
+            raise
+        
+        try:
+            tx_hash = self.w3.eth.send_raw_transaction(signed_txn.rawTransaction)
+        except Exception as e:
+            if not NonceManager.is_already_known(e):
+                # Possibly in the mempool (e.g. a read timeout), so the nonce
+                # is not reused; if it never arrived the gap filler covers it
+                raise
+            tx_hash = signed_txn.hash
+        
+        tx_hash_hex = tx_hash.hex()
+        self.nonces.mark_sent(sender, nonce, tx_hash_hex, transaction)
+        return tx_hash_hex
+    
+    def fill_nonce_gaps(self, address: str, private_key: str) -> List[str]:
+        """Send 0-value self-transfers into nonce gaps that block later transactions"""
+        try:
+            if not self.w3 or not self.nonces:
+                return []
+            
+            sender = Web3.to_checksum_address(address)
+            filled = []
+            
+            for nonce in self.nonces.find_gaps(sender):
+                self.nonces.take_gap(sender, nonce)
+                transaction = {
+                    'to': sender,
+                    'value': 0,
+                    'gas': 21000,
+                    'gasPrice': self.w3.eth.gas_price,
+                    'nonce': nonce,
+                    'chainId': self.chain_id
+                }
+                signed_txn = self.w3.eth.account.sign_transaction(transaction, private_key)
+                tx_hash_hex = self.w3.eth.send_raw_transaction(signed_txn.rawTransaction).hex()
+                self.nonces.mark_sent(sender, nonce, tx_hash_hex, transaction)
+                filled.append(tx_hash_hex)
+                print(f"🩹 Filled nonce gap {nonce} - TX: {tx_hash_hex}")
+            
+            return filled
+            
+        except Exception as e:
+            print(f"❌ Fill nonce gaps failed: {e}")
+            return []
+    
+    def replace_stuck_transactions(self, address: str, private_key: str, older_than: int = None) -> List[str]:
+        """Re-broadcast long-pending transactions with the same nonce and a higher gas price"""
+        try:
+            if not self.w3 or not self.nonces:
+                return []
+            
+            sender = Web3.to_checksum_address(address)
+            network_gas_price = self.w3.eth.gas_price
+            replaced = []
+            
+            for stuck in self.nonces.get_stuck(sender, older_than):
+                transaction = dict(stuck['transaction'])
+                transaction['gasPrice'] = self.nonces.bumped_gas_price(transaction['gasPrice'], network_gas_price)
+                
+                signed_txn = self.w3.eth.account.sign_transaction(transaction, private_key)
+                try:
+                    tx_hash_hex = self.w3.eth.send_raw_transaction(signed_txn.rawTransaction).hex()
+                except Exception as e:
+                    if 'nonce too low' in str(e).lower():
+                        # Original got mined in the meantime
+                        continue
+                    if not NonceManager.is_already_known(e):
+                        raise
+                    tx_hash_hex = signed_txn.hash.hex()
+                
+                self.nonces.mark_sent(sender, stuck['nonce'], tx_hash_hex, transaction)
+                replaced.append(tx_hash_hex)
+                print(f"⛽ Replaced stuck tx {stuck['tx_hash']} (nonce {stuck['nonce']}) - TX: {tx_hash_hex}")
+            
+            return replaced
+            
+        except Exception as e:
+            print(f"❌ Replace stuck transactions failed: {e}")
+            return []
+    
+    def maintain_nonces(self, address: str, private_key: str) -> Dict[str, List[str]]:
+        """One maintenance pass for a sender: re-price stuck transactions, then fill nonce gaps"""
+        return {
+            'replaced': self.replace_stuck_transactions(address, private_key),
+            'filled': self.fill_nonce_gaps(address, private_key)
+        }
+    
+    def _ensure_nonce_maintenance(self, sender: str, private_key: str):
+        """Start the periodic maintenance pass for a sender in this process, once.
+
+        In-flight transactions are tracked per process, so the pass runs
+        wherever the sends happen.
+        """
+        if NONCE_MAINTENANCE_INTERVAL <= 0 or not self.nonces:
+            return
+        
+        key = (self.chain_id, sender)
+        with _maintainers_lock:
+            if key in _maintainers:
+                return
+            
+            def run():
+                while True:
+                    time.sleep(NONCE_MAINTENANCE_INTERVAL)
+                    try:
+                        self.maintain_nonces(sender, private_key)
+                    except Exception as e:
+                        print(f"⚠️ Nonce maintenance for {sender} failed: {e}")
+            
+            thread = threading.Thread(target=run, name=f'nonce-maintenance-{sender[:10]}', daemon=True)
+            _maintainers[key] = thread
+            thread.start()
+    
     def create_vault_tokens(self, recipient_address: str, amount: int, metadata: Dict[str, Any]) -> Dict[str, Any]:
         """Create VAULT platform tokens as rewards"""
         try:
@@ -215,7 +430,7 @@ class MonadService:
         try:
             print(f"🔄 Transferring {amount} tokens from {from_address} to {to_address}")
             
-            if not self.w3 or not self.w3.is_connected():
+            if not self._connected():
                 mock_tx = f"token_transfer_{str(uuid.uuid4())[:16]}"
                 print(f"🎭 Mock token transfer - TX: {mock_tx}")
                 return mock_tx
@@ -232,7 +447,7 @@ class MonadService:
     def get_gas_price(self) -> int:
         """Get current gas price in wei"""
         try:
-            if not self.w3 or not self.w3.is_connected():
+            if not self._connected():
                 return 2000000000  # 2 gwei default
             
             gas_price = self.w3.eth.gas_price
@@ -245,7 +460,7 @@ class MonadService:
     def estimate_gas(self, transaction: Dict[str, Any]) -> int:
         """Estimate gas for a transaction"""
         try:
-            if not self.w3 or not self.w3.is_connected():
+            if not self._connected():
                 return 100000  # Default estimate
             
             gas_estimate = self.w3.eth.estimate_gas(transaction)
@@ -258,7 +473,7 @@ class MonadService:
     def get_transaction_receipt(self, tx_hash: str) -> Optional[Dict[str, Any]]:
         """Get transaction receipt and status"""
         try:
-            if not self.w3 or not self.w3.is_connected():
+            if not self._connected():
                 return {
                     "status": 1,
                     "blockNumber": 12345,
@@ -273,35 +488,10 @@ class MonadService:
             print(f"❌ Get receipt error: {e}")
             return None
     
-    def load_contract_abis(self, artifacts_path: str = "artifacts/contracts"):
+    def load_contract_abis(self, artifacts_path: str = CONTRACT_ARTIFACTS_PATH):
         """Load compiled contract ABIs from Hardhat artifacts"""
-        try:
-            # Load VAULT token ABI
-            vault_token_path = f"{artifacts_path}/VaultToken.sol/VaultToken.json"
-            if os.path.exists(vault_token_path):
-                with open(vault_token_path, 'r') as f:
-                    vault_artifact = json.load(f)
-                    self.vault_token_abi = vault_artifact['abi']
-                    print("✅ VAULT token ABI loaded")
-            
-            # Load Asset tokenization ABI
-            asset_path = f"{artifacts_path}/AssetTokenization.sol/AssetTokenization.json"
-            if os.path.exists(asset_path):
-                with open(asset_path, 'r') as f:
-                    asset_artifact = json.load(f)
-                    self.asset_tokenization_abi = asset_artifact['abi']
-                    print("✅ Asset tokenization ABI loaded")
-            
-            # Load Marketplace ABI
-            marketplace_path = f"{artifacts_path}/Marketplace.sol/Marketplace.json"
-            if os.path.exists(marketplace_path):
-                with open(marketplace_path, 'r') as f:
-                    marketplace_artifact = json.load(f)
-                    self.marketplace_abi = marketplace_artifact['abi']
-                    print("✅ Marketplace ABI loaded")
-                    
-        except Exception as e:
-            print(f"⚠️ Could not load contract ABIs: {e}")
+        for attr, abi in get_contract_abis(artifacts_path).items():
+            setattr(self, attr, abi)
     
     def validate_address(self, address: str) -> bool:
         """Validate Ethereum address format"""
@@ -316,6 +506,6 @@ class MonadService:
             "network": self.network,
             "chain_id": self.chain_id,
             "rpc_url": self.rpc_url,
-            "connected": self.w3 is not None and self.w3.is_connected() if self.w3 else False,
-            "latest_block": self.w3.eth.block_number if self.w3 and self.w3.is_connected() else "unknown"
+            "connected": self._connected(),
+            "latest_block": self.w3.eth.block_number if self._connected() else "unknown"
         }
@@ -0,0 +1,187 @@
+import os
+import heapq
+import threading
+import time
+from typing import List, Dict, Any, Optional
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+class NonceManager:
+    """Allocates per-sender nonces locally so sends don't serialize on get_transaction_count.
+
+    The next nonce lives in memory, or in Redis when REDIS_URL is set so that
+    several workers can share one sender. It is seeded from the chain on first
+    use and re-seeded whenever a send fails with a nonce error.
+    """
+
+    # A sent transaction still unmined after this long is considered stuck
+    STUCK_AFTER_SECONDS = int(os.getenv('MONAD_STUCK_TX_SECONDS', 60))
+    # Nodes reject same-nonce replacements that bump the gas price by less than 10%
+    GAS_BUMP_PERCENT = 15
+
+    NONCE_ERROR_MARKERS = ('nonce too low', 'nonce too high', 'invalid nonce',
+                           'replacement transaction underpriced')
+    # The node already has this exact transaction: it was sent, not rejected
+    ALREADY_KNOWN_MARKERS = ('already known', 'known transaction')
+
+    def __init__(self, w3, chain_id: int, redis_client=None):
+        self.w3 = w3
+        self.chain_id = chain_id
+        self.redis = redis_client
+
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        self._next: Dict[str, int] = {}
+        # Nonces handed out but never broadcast; reused first so they don't become gaps
+        self._released: Dict[str, List[int]] = {}
+        # nonce -> {'tx_hash', 'transaction', 'sent_at'} for broadcast, unmined transactions
+        self._in_flight: Dict[str, Dict[int, Dict[str, Any]]] = {}
+
+    def _lock(self, address: str) -> threading.Lock:
+        with self._locks_guard:
+            if address not in self._locks:
+                self._locks[address] = threading.Lock()
+            return self._locks[address]
+
+    def _redis_key(self, address: str) -> str:
+        return f"nonce:{self.chain_id}:{address.lower()}"
+
+    def _chain_nonce(self, address: str, block_identifier: str = 'pending') -> int:
+        return self.w3.eth.get_transaction_count(address, block_identifier)
+
+    def allocate(self, address: str) -> int:
+        """Next nonce for address, without a chain round trip after the first call"""
+        with self._lock(address):
+            released = self._released.get(address)
+            if released:
+                return heapq.heappop(released)
+
+            if self.redis is not None:
+                key = self._redis_key(address)
+                if not self.redis.exists(key):
+                    # INCR returns the incremented value, so seed one below
+                    self.redis.set(key, self._chain_nonce(address) - 1, nx=True)
+                return int(self.redis.incr(key))
+
+            if address not in self._next:
+                self._next[address] = self._chain_nonce(address)
+
+            nonce = self._next[address]
+            self._next[address] = nonce + 1
+            return nonce
+
+    def release(self, address: str, nonce: int):
+        """Return a nonce whose transaction was never broadcast"""
+        with self._lock(address):
+            heapq.heappush(self._released.setdefault(address, []), nonce)
+
+    def mark_sent(self, address: str, nonce: int, tx_hash: str, transaction: Dict[str, Any]):
+        with self._lock(address):
+            self._in_flight.setdefault(address, {})[nonce] = {
+                'tx_hash': tx_hash,
+                'transaction': transaction,
+                'sent_at': time.time()
+            }
+
+    def resync(self, address: str) -> int:
+        """Drop local state and re-seed from the chain's pending nonce"""
+        with self._lock(address):
+            chain_nonce = self._chain_nonce(address)
+            self._released.pop(address, None)
+            self._in_flight[address] = {
+                nonce: record for nonce, record in self._in_flight.get(address, {}).items()
+                if nonce >= chain_nonce
+            }
+
+            if self.redis is not None:
+                self.redis.set(self._redis_key(address), chain_nonce - 1)
+            else:
+                self._next[address] = chain_nonce
+
+            print(f"🔄 Resynced nonce for {address}: {chain_nonce}")
+            return chain_nonce
+
+    def prune(self, address: str) -> int:
+        """Forget in-flight transactions the chain has mined; returns the mined nonce"""
+        mined_nonce = self._chain_nonce(address, 'latest')
+        with self._lock(address):
+            in_flight = self._in_flight.get(address, {})
+            for nonce in [n for n in in_flight if n < mined_nonce]:
+                del in_flight[nonce]
+        return mined_nonce
+
+    def find_gaps(self, address: str) -> List[int]:
+        """Nonces below the next allocation that the node has never seen.
+
+        The node's pending nonce stops at the first missing nonce, so anything
+        from there up to our next allocation that isn't in flight is a gap;
+        every transaction after a gap sits in the mempool until it is filled.
+
+        With Redis the allocation counter is shared but in-flight sends are
+        per process, so another worker's pending send would look like a gap
+        and be overwritten; gap filling is off in that mode.
+        """
+        if self.redis is not None:
+            return []
+
+        self.prune(address)
+        pending_nonce = self._chain_nonce(address, 'pending')
+
+        with self._lock(address):
+            next_nonce = self._next.get(address, pending_nonce)
+            in_flight = self._in_flight.get(address, {})
+            return [n for n in range(pending_nonce, next_nonce) if n not in in_flight]
+
+    def take_gap(self, address: str, nonce: int):
+        """Claim a gap nonce for a filler transaction so allocate() won't reuse it"""
+        with self._lock(address):
+            released = self._released.get(address, [])
+            if nonce in released:
+                released.remove(nonce)
+                heapq.heapify(released)
+
+    def get_stuck(self, address: str, older_than: Optional[int] = None) -> List[Dict[str, Any]]:
+        """In-flight transactions that have waited longer than older_than seconds"""
+        self.prune(address)
+        cutoff = time.time() - (older_than if older_than is not None else self.STUCK_AFTER_SECONDS)
+
+        with self._lock(address):
+            return [
+                {'nonce': nonce, **record}
+                for nonce, record in sorted(self._in_flight.get(address, {}).items())
+                if record['sent_at'] < cutoff
+            ]
+
+    def bumped_gas_price(self, gas_price: int, network_gas_price: int) -> int:
+        """Gas price for a same-nonce replacement"""
+        return max(gas_price * (100 + self.GAS_BUMP_PERCENT) // 100, network_gas_price)
+
+    def in_flight_count(self, address: str) -> int:
+        return len(self._in_flight.get(address, {}))
+
+    @classmethod
+    def is_nonce_error(cls, error: Exception) -> bool:
+        message = str(error).lower()
+        return any(marker in message for marker in cls.NONCE_ERROR_MARKERS)
+
+    @classmethod
+    def is_already_known(cls, error: Exception) -> bool:
+        message = str(error).lower()
+        return any(marker in message for marker in cls.ALREADY_KNOWN_MARKERS)
+
+_managers: Dict[int, NonceManager] = {}
+_managers_lock = threading.Lock()
+
+def get_nonce_manager(w3, chain_id: int) -> NonceManager:
+    """Process-wide nonce manager per chain"""
+    with _managers_lock:
+        if chain_id not in _managers:
+            redis_client = None
+            redis_url = os.getenv('REDIS_URL')
+            if redis_url and redis is not None:
+                redis_client = redis.Redis.from_url(redis_url)
+            _managers[chain_id] = NonceManager(w3, chain_id, redis_client)
+        return _managers[chain_id]
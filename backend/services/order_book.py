@@ -0,0 +1,340 @@
+import threading
+import time
+import uuid
+from bisect import insort
+from collections import deque
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+
+SIDE_BUY = 'buy'
+SIDE_SELL = 'sell'
+ORDER_LIMIT = 'limit'
+ORDER_MARKET = 'market'
+
+STATUS_OPEN = 'open'
+STATUS_PARTIAL = 'partially_filled'
+STATUS_FILLED = 'filled'
+STATUS_CANCELLED = 'cancelled'
+
+class OrderRejected(Exception):
+    """Raised when an order can't be accepted by the book"""
+
+class Order:
+    """A resting or incoming order; prices are integer ticks"""
+
+    __slots__ = ('id', 'side', 'order_type', 'price', 'quantity', 'remaining', 'filled', 'wallet_address',
+                 'user_id', 'wallet_id', 'sequence', 'status', 'created_at', 'replaces')
+
+    def __init__(self, side: str, order_type: str, quantity: int, wallet_address: str, price: int = None,
+                 user_id: str = None, wallet_id: str = None, order_id: str = None, replaces: str = None):
+        self.id = order_id or str(uuid.uuid4())
+        self.side = side
+        self.order_type = order_type
+        self.price = price
+        self.quantity = quantity
+        self.remaining = quantity
+        # Counted separately: a cancel zeroes remaining without filling anything
+        self.filled = 0
+        self.wallet_address = wallet_address
+        self.user_id = user_id
+        self.wallet_id = wallet_id
+        self.sequence = 0
+        self.status = STATUS_OPEN
+        self.created_at = datetime.now().isoformat()
+        self.replaces = replaces
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Order':
+        order = cls(data['side'], data['order_type'], data['quantity'], data['wallet_address'], data.get('price'),
+                    data.get('user_id'), data.get('wallet_id'), data['id'], data.get('replaces'))
+        order.remaining = data['remaining']
+        # Snapshots taken before filled was stored only hold resting orders
+        order.filled = data.get('filled', data['quantity'] - data['remaining'])
+        order.sequence = data['sequence']
+        order.status = data['status']
+        order.created_at = data['created_at']
+        return order
+
+class PriceLevel:
+    """FIFO queue of orders at one price; volume counts live shares only"""
+
+    __slots__ = ('orders', 'volume')
+
+    def __init__(self):
+        self.orders = deque()
+        self.volume = 0
+
+class OrderBook:
+    """Price-time priority limit order book for one token.
+
+    Each side keeps a dict of price -> PriceLevel and a sorted list of
+    level keys with the best price last (bid keys are prices, ask keys are
+    negated prices), so the best level is found in O(1) and a new level is
+    inserted with bisect. Cancelled orders are zeroed in place and skipped
+    when they reach the front of their queue.
+
+    The book is not thread-safe by itself; callers hold ``lock`` around
+    every call that reads or changes it.
+    """
+
+    def __init__(self, token_id: str):
+        self.token_id = token_id
+        self.lock = threading.RLock()
+        self.version = 0
+        self._sequence = 0
+        self._trade_sequence = 0
+        self._levels = {SIDE_BUY: {}, SIDE_SELL: {}}
+        self._keys = {SIDE_BUY: [], SIDE_SELL: []}
+        self._orders: Dict[str, Order] = {}
+        # Shares each wallet has resting on the ask side
+        self._open_sells: Dict[str, int] = {}
+
+    @staticmethod
+    def _key(side: str, price: int) -> int:
+        return price if side == SIDE_BUY else -price
+
+    @staticmethod
+    def _opposite(side: str) -> str:
+        return SIDE_SELL if side == SIDE_BUY else SIDE_BUY
+
+    def _crosses(self, order: Order, price: int) -> bool:
+        if order.order_type == ORDER_MARKET:
+            return True
+        return price <= order.price if order.side == SIDE_BUY else price >= order.price
+
+    def _rest(self, order: Order):
+        levels = self._levels[order.side]
+        level = levels.get(order.price)
+        if level is None:
+            level = levels[order.price] = PriceLevel()
+            insort(self._keys[order.side], self._key(order.side, order.price))
+        level.orders.append(order)
+        level.volume += order.remaining
+        self._orders[order.id] = order
+        if order.side == SIDE_SELL:
+            self._open_sells[order.wallet_address] = self._open_sells.get(order.wallet_address, 0) + order.remaining
+
+    def _drop_level(self, side: str, price: int):
+        del self._levels[side][price]
+        keys = self._keys[side]
+        key = self._key(side, price)
+        if keys and keys[-1] == key:
+            keys.pop()
+        else:
+            keys.remove(key)
+
+    def _take_from_resting(self, order: Order, shares: int):
+        """Remove shares from a resting order's live volume"""
+        order.remaining -= shares
+        if order.side == SIDE_SELL:
+            left = self._open_sells[order.wallet_address] - shares
+            if left:
+                self._open_sells[order.wallet_address] = left
+            else:
+                del self._open_sells[order.wallet_address]
+        if not order.remaining:
+            del self._orders[order.id]
+
+    def _fill(self, taker: Order, maker: Order, shares: int) -> Dict[str, Any]:
+        self._trade_sequence += 1
+        buyer, seller = (taker, maker) if taker.side == SIDE_BUY else (maker, taker)
+        return {
+            'trade_id': str(uuid.uuid4()),
+            'token_id': self.token_id,
+            'sequence': self._trade_sequence,
+            'price': maker.price,
+            'quantity': shares,
+            'taker_side': taker.side,
+            'buy_order_id': buyer.id,
+            'sell_order_id': seller.id,
+            'buyer_wallet_address': buyer.wallet_address,
+            'buyer_user_id': buyer.user_id,
+            'buyer_wallet_id': buyer.wallet_id,
+            'seller_wallet_address': seller.wallet_address,
+            'seller_user_id': seller.user_id,
+            'seller_wallet_id': seller.wallet_id,
+            'executed_at': datetime.now().isoformat()
+        }
+
+    def _match(self, taker: Order) -> List[Dict[str, Any]]:
+        fills = []
+        side = self._opposite(taker.side)
+        levels, keys = self._levels[side], self._keys[side]
+
+        while taker.remaining and keys:
+            price = self._key(side, keys[-1])
+            if not self._crosses(taker, price):
+                break
+
+            level = levels[price]
+            queue = level.orders
+            while taker.remaining and queue:
+                maker = queue[0]
+                if not maker.remaining:
+                    queue.popleft()
+                    continue
+                if maker.wallet_address == taker.wallet_address:
+                    # Self-trade prevention: the resting order is cancelled
+                    level.volume -= maker.remaining
+                    maker.status = STATUS_CANCELLED
+                    self._take_from_resting(maker, maker.remaining)
+                    queue.popleft()
+                    continue
+
+                shares = min(taker.remaining, maker.remaining)
+                taker.remaining -= shares
+                taker.filled += shares
+                maker.filled += shares
+                level.volume -= shares
+                self._take_from_resting(maker, shares)
+                maker.status = STATUS_FILLED if not maker.remaining else STATUS_PARTIAL
+                if not maker.remaining:
+                    queue.popleft()
+                fills.append(self._fill(taker, maker, shares))
+
+            if not level.volume:
+                self._drop_level(side, price)
+
+        return fills
+
+    def submit(self, order: Order, sell_limit: int = None) -> List[Dict[str, Any]]:
+        """Match an incoming order and rest any limit remainder; returns the fills.
+
+        sell_limit caps how many shares the order's wallet may have offered
+        in total (resting sells plus this one); market remainders are
+        cancelled.
+        """
+        if order.quantity <= 0:
+            raise OrderRejected("Quantity must be positive")
+        if order.order_type == ORDER_LIMIT and (order.price is None or order.price <= 0):
+            raise OrderRejected("Limit orders need a positive price")
+        if order.side == SIDE_SELL and sell_limit is not None:
+            offered = self._open_sells.get(order.wallet_address, 0)
+            if offered + order.quantity > sell_limit:
+                raise OrderRejected(f"Wallet holds {sell_limit} shares with {offered} already offered")
+
+        self._sequence += 1
+        order.sequence = self._sequence
+        fills = self._match(order)
+
+        if not order.remaining:
+            order.status = STATUS_FILLED
+        elif order.order_type == ORDER_MARKET:
+            order.status = STATUS_CANCELLED
+        else:
+            order.status = STATUS_PARTIAL if fills else STATUS_OPEN
+            self._rest(order)
+
+        self.version += 1
+        return fills
+
+    def cancel(self, order_id: str) -> Optional[Order]:
+        """Pull a resting order; None if it isn't on the book"""
+        order = self._orders.get(order_id)
+        if order is None:
+            return None
+        level = self._levels[order.side][order.price]
+        level.volume -= order.remaining
+        self._take_from_resting(order, order.remaining)
+        order.status = STATUS_CANCELLED
+        if not level.volume:
+            self._drop_level(order.side, order.price)
+        self.version += 1
+        return order
+
+    def replace(self, order_id: str, price: int = None, quantity: int = None,
+                sell_limit: int = None) -> Dict[str, Any]:
+        """Cancel/replace a resting order.
+
+        Shrinking an order at the same price keeps its place in the queue;
+        any other change cancels it and submits a new order, which may
+        match immediately and loses time priority.
+        """
+        order = self._orders.get(order_id)
+        if order is None:
+            raise OrderRejected("Order is not open")
+
+        new_price = order.price if price is None else price
+        new_quantity = order.remaining if quantity is None else quantity
+        if new_quantity <= 0:
+            raise OrderRejected("Quantity must be positive")
+
+        if new_price == order.price and new_quantity <= order.remaining:
+            shrink = order.remaining - new_quantity
+            if shrink:
+                self._levels[order.side][order.price].volume -= shrink
+                self._take_from_resting(order, shrink)
+                order.quantity -= shrink
+                self.version += 1
+            return {'order': order, 'fills': [], 'cancelled': None}
+
+        if order.side == SIDE_SELL and sell_limit is not None:
+            offered = self._open_sells.get(order.wallet_address, 0) - order.remaining
+            if offered + new_quantity > sell_limit:
+                raise OrderRejected(f"Wallet holds {sell_limit} shares with {offered} already offered")
+
+        self.cancel(order_id)
+        replacement = Order(order.side, ORDER_LIMIT, new_quantity, order.wallet_address, new_price,
+                            order.user_id, order.wallet_id, replaces=order.id)
+        fills = self.submit(replacement)
+        return {'order': replacement, 'fills': fills, 'cancelled': order}
+
+    def get_order(self, order_id: str) -> Optional[Order]:
+        return self._orders.get(order_id)
+
+    def open_orders(self, wallet_address: str = None) -> List[Order]:
+        orders = sorted(self._orders.values(), key=lambda order: order.sequence)
+        if wallet_address:
+            orders = [order for order in orders if order.wallet_address == wallet_address]
+        return orders
+
+    def open_sell_quantity(self, wallet_address: str) -> int:
+        return self._open_sells.get(wallet_address, 0)
+
+    def best_bid(self) -> Optional[int]:
+        keys = self._keys[SIDE_BUY]
+        return keys[-1] if keys else None
+
+    def best_ask(self) -> Optional[int]:
+        keys = self._keys[SIDE_SELL]
+        return -keys[-1] if keys else None
+
+    def depth(self, levels: int = 10) -> Dict[str, List[List[int]]]:
+        """Aggregated [price, shares] per level, best first"""
+        result = {}
+        for side in (SIDE_BUY, SIDE_SELL):
+            book = self._levels[side]
+            keys = self._keys[side]
+            prices = [self._key(side, key) for key in reversed(keys[-levels:])] if levels else []
+            result['bids' if side == SIDE_BUY else 'asks'] = [[price, book[price].volume] for price in prices]
+        return result
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Resting orders in priority order, enough to rebuild the book exactly"""
+        orders = []
+        for side in (SIDE_BUY, SIDE_SELL):
+            for key in reversed(self._keys[side]):
+                for order in self._levels[side][self._key(side, key)].orders:
+                    if order.remaining:
+                        orders.append(order.to_dict())
+        return {
+            'token_id': self.token_id,
+            'sequence': self._sequence,
+            'trade_sequence': self._trade_sequence,
+            'version': self.version,
+            'taken_at': time.time(),
+            'orders': orders
+        }
+
+    @classmethod
+    def restore(cls, snapshot: Dict[str, Any]) -> 'OrderBook':
+        book = cls(snapshot['token_id'])
+        for data in snapshot.get('orders', []):
+            book._rest(Order.from_dict(data))
+        book._sequence = snapshot.get('sequence', 0)
+        book._trade_sequence = snapshot.get('trade_sequence', 0)
+        book.version = snapshot.get('version', 0)
+        return book
@@ -0,0 +1,238 @@
+from supabase import Client
+from typing import List, Dict, Any, Optional
+
+from services.vault_ledger_service import VaultLedgerService
+
+# asset_transactions rows that move shares, and the statuses that count
+SHARE_EVENT_TYPES = ('purchase', 'transfer', 'trade')
+COUNTED_STATUSES = ('pending', 'completed')
+
+SUMMARY_USD_FIELDS = ('total_invested_usd', 'total_proceeds_usd', 'cost_basis_usd', 'realized_pnl_usd')
+SUMMARY_COUNT_FIELDS = ('total_shares', 'assets_owned', 'purchases_count', 'sales_count')
+POSITION_USD_FIELDS = ('cost_basis_usd', 'invested_usd', 'proceeds_usd', 'realized_pnl_usd')
+POSITION_COUNT_FIELDS = ('shares', 'purchases_count', 'sales_count')
+
+# Stored totals are NUMERIC(20, 6); replays add floats
+USD_TOLERANCE = 1e-4
+
+class PortfolioService:
+    """Per-user portfolio totals maintained as transactions are written.
+
+    A trigger on asset_transactions calls portfolio_apply for the buyer and
+    seller of every share-moving row, which updates portfolio_positions
+    (one row per user and asset) and portfolio_summaries (one row per user)
+    in the same transaction. Reads are a single-row lookup however long
+    the user's history is; VAULT earned comes from the ledger's balance row.
+    """
+
+    PAGE_SIZE = 1000
+
+    def __init__(self, supabase: Client):
+        self.supabase = supabase
+        self.ledger = VaultLedgerService(supabase)
+
+    @staticmethod
+    def _empty_summary(user_id: str) -> Dict[str, Any]:
+        summary = {'user_id': user_id, 'last_activity_at': None, 'rebuilt_at': None}
+        summary.update({field: 0.0 for field in SUMMARY_USD_FIELDS})
+        summary.update({field: 0 for field in SUMMARY_COUNT_FIELDS})
+        return summary
+
+    @staticmethod
+    def _format_summary(row: Dict[str, Any]) -> Dict[str, Any]:
+        summary = dict(row)
+        for field in SUMMARY_USD_FIELDS:
+            summary[field] = float(row.get(field) or 0)
+        for field in SUMMARY_COUNT_FIELDS:
+            summary[field] = int(row.get(field) or 0)
+        return summary
+
+    @staticmethod
+    def _format_position(row: Dict[str, Any]) -> Dict[str, Any]:
+        position = dict(row)
+        for field in POSITION_USD_FIELDS:
+            position[field] = float(row.get(field) or 0)
+        for field in POSITION_COUNT_FIELDS:
+            position[field] = int(row.get(field) or 0)
+        shares = position['shares']
+        position['average_cost_usd'] = round(position['cost_basis_usd'] / shares, 6) if shares else None
+        return position
+
+    def get_summary(self, user_id: str) -> Dict[str, Any]:
+        """Stored totals plus lifetime VAULT earned"""
+        try:
+            result = self.supabase.table('portfolio_summaries').select('*').eq('user_id', user_id).execute()
+            summary = self._format_summary(result.data[0]) if result.data else self._empty_summary(user_id)
+            summary['total_vault_earned'] = self.ledger.get_balance(user_id)['total_earned']
+            return summary
+        except Exception as e:
+            raise Exception(f"Get portfolio summary error: {str(e)}")
+
+    def get_positions(self, user_id: str, limit: int = 50, offset: int = 0,
+                      include_closed: bool = False) -> List[Dict[str, Any]]:
+        """Positions by open cost basis, largest first"""
+        try:
+            query = self.supabase.table('portfolio_positions').select('*').eq('user_id', user_id)
+            if not include_closed:
+                query = query.gt('shares', 0)
+            result = query.order('cost_basis_usd', desc=True).order('asset_id').range(
+                offset, offset + limit - 1
+            ).execute()
+            return [self._format_position(row) for row in result.data]
+        except Exception as e:
+            raise Exception(f"Get portfolio positions error: {str(e)}")
+
+    def get_position(self, user_id: str, asset_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            result = self.supabase.table('portfolio_positions').select('*').eq(
+                'user_id', user_id
+            ).eq('asset_id', asset_id).execute()
+            return self._format_position(result.data[0]) if result.data else None
+        except Exception as e:
+            raise Exception(f"Get portfolio position error: {str(e)}")
+
+    def _transactions(self, user_id: str):
+        """Every row the user bought or sold in, oldest first, a page at a time"""
+        offset = 0
+        while True:
+            result = self.supabase.table('asset_transactions').select(
+                'id, transaction_type, status, asset_id, token_id, asset_name, shares_amount, total_cost_usd, '
+                'buyer_user_id, seller_user_id, transaction_date'
+            ).or_(f"buyer_user_id.eq.{user_id},seller_user_id.eq.{user_id}").order(
+                'transaction_date'
+            ).order('id').range(offset, offset + self.PAGE_SIZE - 1).execute()
+
+            for row in result.data:
+                yield row
+            if len(result.data) < self.PAGE_SIZE:
+                return
+            offset += self.PAGE_SIZE
+
+    def replay(self, user_id: str) -> Dict[str, Any]:
+        """Recompute a user's positions and totals from their history, the way portfolio_apply does"""
+        try:
+            summary = self._empty_summary(user_id)
+            positions: Dict[str, Dict[str, Any]] = {}
+            replayed = 0
+
+            for row in self._transactions(user_id):
+                shares = int(row.get('shares_amount') or 0)
+                if (row.get('transaction_type') not in SHARE_EVENT_TYPES or row.get('status') not in COUNTED_STATUSES
+                        or not row.get('asset_id') or shares <= 0):
+                    continue
+                usd = float(row.get('total_cost_usd') or 0)
+                at = row.get('transaction_date')
+                position = positions.setdefault(row['asset_id'], {
+                    'asset_id': row['asset_id'], 'token_id': row.get('token_id'), 'asset_name': row.get('asset_name'),
+                    'shares': 0, 'cost_basis_usd': 0.0, 'invested_usd': 0.0, 'proceeds_usd': 0.0,
+                    'realized_pnl_usd': 0.0, 'purchases_count': 0, 'sales_count': 0
+                })
+                replayed += 1
+
+                if row.get('buyer_user_id') == user_id:
+                    summary['assets_owned'] += 1 if position['shares'] == 0 else 0
+                    position['shares'] += shares
+                    position['cost_basis_usd'] += usd
+                    position['invested_usd'] += usd
+                    position['purchases_count'] += 1
+                    summary['total_invested_usd'] += usd
+                    summary['cost_basis_usd'] += usd
+                    summary['total_shares'] += shares
+                    summary['purchases_count'] += 1
+                if row.get('seller_user_id') == user_id:
+                    held = position['shares']
+                    sold = min(shares, held)
+                    removed = round(position['cost_basis_usd'] * sold / held, 6) if held > 0 else 0.0
+                    position['shares'] -= sold
+                    position['cost_basis_usd'] -= removed
+                    position['proceeds_usd'] += usd
+                    position['realized_pnl_usd'] += usd - removed
+                    position['sales_count'] += 1
+                    summary['total_proceeds_usd'] += usd
+                    summary['cost_basis_usd'] -= removed
+                    summary['realized_pnl_usd'] += usd - removed
+                    summary['total_shares'] -= sold
+                    summary['assets_owned'] -= 1 if held > 0 and sold == held else 0
+                    summary['sales_count'] += 1
+                if at and (summary['last_activity_at'] is None or at > summary['last_activity_at']):
+                    summary['last_activity_at'] = at
+
+            return {'summary': summary, 'positions': positions, 'transactions_replayed': replayed}
+        except Exception as e:
+            raise Exception(f"Portfolio replay error: {str(e)}")
+
+    def _stored_positions(self, user_id: str) -> Dict[str, Dict[str, Any]]:
+        positions = {}
+        offset = 0
+        while True:
+            result = self.supabase.table('portfolio_positions').select('*').eq('user_id', user_id).order(
+                'asset_id'
+            ).range(offset, offset + self.PAGE_SIZE - 1).execute()
+            for row in result.data:
+                positions[row['asset_id']] = self._format_position(row)
+            if len(result.data) < self.PAGE_SIZE:
+                return positions
+            offset += self.PAGE_SIZE
+
+    @staticmethod
+    def _diff(stored: Dict[str, Any], replayed: Dict[str, Any], usd_fields, count_fields) -> Dict[str, List]:
+        drift = {}
+        for field in usd_fields:
+            if abs(float(stored.get(field) or 0) - replayed[field]) > USD_TOLERANCE:
+                drift[field] = [stored.get(field), round(replayed[field], 6)]
+        for field in count_fields:
+            if int(stored.get(field) or 0) != replayed[field]:
+                drift[field] = [stored.get(field), replayed[field]]
+        return drift
+
+    def verify(self, user_id: str) -> Dict[str, Any]:
+        """Compare the stored summary and positions with a replay of the history"""
+        result = self.supabase.table('portfolio_summaries').select('*').eq('user_id', user_id).execute()
+        stored = self._format_summary(result.data[0]) if result.data else self._empty_summary(user_id)
+        stored_positions = self._stored_positions(user_id)
+        replayed = self.replay(user_id)
+
+        drift = {}
+        summary_drift = self._diff(stored, replayed['summary'], SUMMARY_USD_FIELDS, SUMMARY_COUNT_FIELDS)
+        if summary_drift:
+            drift['summary'] = summary_drift
+        for asset_id in set(stored_positions) | set(replayed['positions']):
+            position = replayed['positions'].get(asset_id)
+            if position is None:
+                drift[asset_id] = 'stored position has no history'
+                continue
+            position_drift = self._diff(stored_positions.get(asset_id, {}), position,
+                                        POSITION_USD_FIELDS, POSITION_COUNT_FIELDS)
+            if position_drift:
+                drift[asset_id] = position_drift
+
+        return {
+            'ok': not drift,
+            'user_id': user_id,
+            'drift': drift,
+            'transactions_replayed': replayed['transactions_replayed']
+        }
+
+    def rebuild(self, user_id: str) -> Dict[str, Any]:
+        """Overwrite a user's positions and totals with a recompute from their history"""
+        try:
+            result = self.supabase.rpc('portfolio_rebuild_user', {'p_user_id': user_id}).execute()
+            row = result.data[0] if result.data else self._empty_summary(user_id)
+            print(f"🔧 Rebuilt portfolio for {user_id}: {row.get('assets_owned')} assets")
+            return self._format_summary(row)
+        except Exception as e:
+            raise Exception(f"Portfolio rebuild error: {str(e)}")
+
+    def list_accounts(self):
+        """Every user id with a summary row, a page at a time"""
+        offset = 0
+        while True:
+            result = self.supabase.table('portfolio_summaries').select('user_id').order(
+                'user_id'
+            ).range(offset, offset + self.PAGE_SIZE - 1).execute()
+
+            for row in result.data:
+                yield row['user_id']
+            if len(result.data) < self.PAGE_SIZE:
+                return
+            offset += self.PAGE_SIZE
@@ -0,0 +1,252 @@
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import List, Dict, Any, Optional, Callable
+from utils.resilience import DeadlineExceeded, RateLimited, remaining_budget
+from utils.rate_limit import get_limiter
+from utils.instrumentation import observe_rpc
+from utils.request_tracer import traced
+
+class EndpointStats:
+    """Rolling latency and error record for one RPC endpoint"""
+
+    WINDOW = 100
+    EWMA_ALPHA = 0.2
+
+    def __init__(self, url: str):
+        self.url = url
+        self.latencies = deque(maxlen=self.WINDOW)
+        self.outcomes = deque(maxlen=self.WINDOW)  # True = success
+        self.ewma_latency: Optional[float] = None
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+        self.ejections = 0
+        self.lock = threading.Lock()
+
+    def record_success(self, latency: float):
+        with self.lock:
+            self.latencies.append(latency)
+            self.outcomes.append(True)
+            self.consecutive_failures = 0
+            self.ejections = 0
+            if self.ewma_latency is None:
+                self.ewma_latency = latency
+            else:
+                self.ewma_latency = self.EWMA_ALPHA * latency + (1 - self.EWMA_ALPHA) * self.ewma_latency
+
+    def record_failure(self):
+        with self.lock:
+            self.outcomes.append(False)
+            self.consecutive_failures += 1
+
+    @property
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+    def p95(self) -> Optional[float]:
+        with self.lock:
+            if len(self.latencies) < 5:
+                return None
+            ordered = sorted(self.latencies)
+        return ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)]
+
+    def score(self) -> float:
+        """Lower is better; unknown endpoints are tried before known-slow ones"""
+        latency = self.ewma_latency if self.ewma_latency is not None else 0.05
+        return latency * (1 + 4 * self.error_rate)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'url': self.url,
+            'ewma_latency_ms': round(self.ewma_latency * 1000, 2) if self.ewma_latency is not None else None,
+            'p95_latency_ms': round(self.p95() * 1000, 2) if self.p95() is not None else None,
+            'error_rate': round(self.error_rate, 4),
+            'ejected': self.ejected_until > time.time(),
+            'samples': len(self.outcomes)
+        }
+
+class SolanaRpcRouter:
+    """Routes Solana RPC calls to the fastest healthy endpoint.
+
+    Reads go to the best-scoring endpoint and are hedged to the runner-up
+    once they exceed the primary's p95 latency; whichever answers first
+    wins. Endpoints that keep failing are ejected for a cooldown that
+    doubles on every repeat ejection. Each endpoint has its own rate and
+    concurrency limiter; hedges are only sent when the runner-up has a free
+    slot right now.
+    """
+
+    MIN_HEDGE_DELAY = float(os.getenv('SOLANA_HEDGE_MIN_DELAY', 0.1))
+    DEFAULT_HEDGE_DELAY = float(os.getenv('SOLANA_HEDGE_DEFAULT_DELAY', 0.5))
+    EJECT_CONSECUTIVE_FAILURES = 3
+    EJECT_ERROR_RATE = 0.5
+    EJECT_MIN_SAMPLES = 10
+    EJECT_BASE_SECONDS = float(os.getenv('SOLANA_EJECT_SECONDS', 30))
+    EJECT_MAX_SECONDS = 600
+
+    def __init__(self, endpoints: List[str], client_factory: Callable[[str], Any], hedge: bool = True):
+        if not endpoints:
+            raise Exception("At least one Solana RPC endpoint is required")
+
+        self.endpoints = list(endpoints)
+        self.clients = {url: client_factory(url) for url in self.endpoints}
+        self.stats = {url: EndpointStats(url) for url in self.endpoints}
+        self.limiters = {url: get_limiter(f"solana_rpc:{url}", 'solana_rpc') for url in self.endpoints}
+        self.hedge = hedge and len(self.endpoints) > 1
+        self._executor = ThreadPoolExecutor(max_workers=max(4, 4 * len(self.endpoints)),
+                                            thread_name_prefix='solana-rpc')
+
+    @property
+    def primary_client(self):
+        return self.clients[self.ranked_endpoints()[0]]
+
+    def ranked_endpoints(self) -> List[str]:
+        """Healthy endpoints best-first; if all are ejected, the least-bad ones"""
+        now = time.time()
+        healthy = [url for url in self.endpoints if self.stats[url].ejected_until <= now]
+        if not healthy:
+            healthy = sorted(self.endpoints, key=lambda url: self.stats[url].ejected_until)[:1]
+        return sorted(healthy, key=lambda url: self.stats[url].score())
+
+    def _maybe_eject(self, stats: EndpointStats):
+        with stats.lock:
+            too_many_failures = stats.consecutive_failures >= self.EJECT_CONSECUTIVE_FAILURES
+            too_error_prone = (len(stats.outcomes) >= self.EJECT_MIN_SAMPLES and
+                               stats.outcomes.count(False) / len(stats.outcomes) >= self.EJECT_ERROR_RATE)
+            if not (too_many_failures or too_error_prone) or stats.ejected_until > time.time():
+                return
+
+            cooldown = min(self.EJECT_BASE_SECONDS * (2 ** stats.ejections), self.EJECT_MAX_SECONDS)
+            stats.ejected_until = time.time() + cooldown
+            stats.ejections += 1
+            # Come back on probation rather than with the old failure history
+            stats.outcomes.clear()
+            stats.consecutive_failures = 0
+
+        print(f"🚫 Ejected Solana RPC {stats.url} for {cooldown:.0f}s")
+
+    def _invoke(self, url: str, method: str, args, kwargs, acquire_timeout: Optional[float] = None):
+        stats = self.stats[url]
+        timing = {}
+
+        def timed_call(*call_args, **call_kwargs):
+            # Time only the RPC itself, not the wait for a rate limit slot
+            started = time.perf_counter()
+            ok = False
+            try:
+                result = getattr(self.clients[url], method)(*call_args, **call_kwargs)
+                ok = True
+                return result
+            finally:
+                timing['latency'] = time.perf_counter() - started
+                observe_rpc('solana', url, method, timing['latency'], ok)
+
+        try:
+            result = self.limiters[url].call(timed_call, *args, acquire_timeout=acquire_timeout, **kwargs)
+        except RateLimited:
+            # Held back locally - not the endpoint's fault
+            raise
+        except Exception:
+            stats.record_failure()
+            self._maybe_eject(stats)
+            raise
+        stats.record_success(timing['latency'])
+        return result
+
+    def _hedge_delay(self, url: str) -> float:
+        p95 = self.stats[url].p95()
+        if p95 is None:
+            delay = self.DEFAULT_HEDGE_DELAY
+        else:
+            delay = max(p95, self.MIN_HEDGE_DELAY)
+        remaining = remaining_budget()
+        return delay if remaining is None else max(min(delay, remaining), 0)
+
+    def _wait(self, futures, method: str, return_when=FIRST_COMPLETED):
+        """wait() bounded by the request deadline; abandons the calls once it passes"""
+        remaining = remaining_budget()
+        done, pending = wait(futures, timeout=None if remaining is None else max(remaining, 0),
+                             return_when=return_when)
+        if not done:
+            raise DeadlineExceeded(f"Request deadline exceeded waiting for Solana RPC {method}")
+        return done, pending
+
+    def call(self, method: str, *args, **kwargs):
+        """Read call: fastest endpoint, hedged to the runner-up past its p95"""
+        with traced('solana', method):
+            return self._hedged_call(method, args, kwargs)
+
+    def _hedged_call(self, method: str, args, kwargs):
+        ranked = self.ranked_endpoints()
+
+        if not self.hedge or len(ranked) < 2:
+            return self._call_with_failover(ranked, method, args, kwargs)
+
+        primary, backup = ranked[0], ranked[1]
+        first = self._executor.submit(self._invoke, primary, method, args, kwargs)
+        done, _ = wait([first], timeout=self._hedge_delay(primary))
+
+        if done:
+            if first.exception() is None:
+                return first.result()
+            # Failed fast - plain failover, nothing to hedge against
+            return self._call_with_failover(ranked[1:], method, args, kwargs)
+
+        # Slower than the primary's p95: race the runner-up
+        second = self._executor.submit(self._invoke, backup, method, args, kwargs, 0)
+        pending = {first, second}
+        last_error = None
+        while pending:
+            done, pending = self._wait(pending, method)
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                last_error = future.exception()
+
+        if len(ranked) > 2:
+            return self._call_with_failover(ranked[2:], method, args, kwargs)
+        raise last_error
+
+    def call_primary(self, method: str, *args, **kwargs):
+        """Write call: never duplicated, but fails over to the next endpoint"""
+        with traced('solana', method):
+            return self._call_with_failover(self.ranked_endpoints(), method, args, kwargs)
+
+    def _call_with_failover(self, urls: List[str], method: str, args, kwargs):
+        last_error = None
+        for url in urls:
+            try:
+                if remaining_budget() is None:
+                    return self._invoke(url, method, args, kwargs)
+                # Under a deadline, stop waiting when the budget runs out
+                future = self._executor.submit(self._invoke, url, method, args, kwargs)
+                self._wait([future], method)
+                return future.result()
+            except DeadlineExceeded:
+                raise
+            except Exception as e:
+                last_error = e
+                print(f"⚠️ Solana RPC {method} failed on {url}: {e}")
+        raise last_error
+
+    def get_status(self) -> List[Dict[str, Any]]:
+        return [{**self.stats[url].to_dict(), 'rate_limit': self.limiters[url].to_dict()} for url in self.endpoints]
+
+def parse_endpoints(value: Optional[str]) -> List[str]:
+    return [url.strip() for url in (value or '').split(',') if url.strip()]
+
+_routers: Dict[tuple, SolanaRpcRouter] = {}
+_routers_lock = threading.Lock()
+
+def get_solana_router(endpoints: List[str], client_factory: Callable[[str], Any]) -> SolanaRpcRouter:
+    """Process-wide router per endpoint set, so latency history accumulates"""
+    key = tuple(endpoints)
+    with _routers_lock:
+        if key not in _routers:
+            _routers[key] = SolanaRpcRouter(endpoints, client_factory)
+            print(f"🧭 Solana RPC router over {len(endpoints)} endpoint(s)")
+        return _routers[key]
@@ -0,0 +1,342 @@
+import math
+import os
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left, insort
+from typing import List, Dict, Any, Optional, Tuple
+
+# Rows written by other workers show up after at most this long
+SEARCH_REBUILD_SECONDS = float(os.getenv('SEARCH_REBUILD_SECONDS', 300))
+
+DOC_ASSET = 'asset'
+DOC_TOKEN = 'token'
+DOC_EVENT = 'event'
+DOC_TYPES = (DOC_ASSET, DOC_TOKEN, DOC_EVENT)
+
+# Field boosts: a hit in a name counts three times one in a description
+FIELD_WEIGHTS = {'name': 3.0, 'symbol': 3.0, 'category': 2.0, 'description': 1.0}
+
+# What each document type indexes, and what a result shows
+DOC_FIELDS = {
+    DOC_ASSET: ('name', 'description', 'category'),
+    DOC_TOKEN: ('symbol', 'name'),
+    DOC_EVENT: ('name', 'description')
+}
+DOC_DISPLAY = {
+    DOC_ASSET: ('id', 'name', 'category', 'valuation', 'image_url', 'owner_id'),
+    DOC_TOKEN: ('id', 'symbol', 'name', 'asset_id', 'mint_address', 'token_type', 'price_per_share_usd'),
+    DOC_EVENT: ('id', 'name', 'event_date', 'organizer_id')
+}
+# Tables each document type is loaded from
+DOC_SOURCES = (
+    (DOC_ASSET, 'assets', 'id, name, description, category, valuation, image_url, owner_id'),
+    (DOC_TOKEN, 'tokens', '*'),
+    (DOC_TOKEN, 'property_tokens', 'id, symbol, name, asset_id, mint_address, token_type, price_per_share_usd'),
+    (DOC_EVENT, 'events', 'id, name, description, event_date, organizer_id')
+)
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+PREFIX_WEIGHT = 0.8
+FUZZY_WEIGHT = 0.5
+MAX_EXPANSIONS = 50
+MIN_PREFIX_LENGTH = 2
+MIN_FUZZY_LENGTH = 4
+
+_TOKEN_PATTERN = re.compile(r'\w+')
+
+def tokenize(text: Any) -> List[str]:
+    """Lowercased words with accents stripped"""
+    if not text:
+        return []
+    text = unicodedata.normalize('NFKD', str(text).lower())
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return _TOKEN_PATTERN.findall(text)
+
+def _deletes(term: str) -> List[str]:
+    return [term[:i] + term[i + 1:] for i in range(len(term))]
+
+def _within_one_edit(a: str, b: str) -> bool:
+    """True if a and b differ by one insertion, deletion, substitution or adjacent swap"""
+    if a == b:
+        return True
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) == len(b):
+        diffs = [i for i in range(len(a)) if a[i] != b[i]]
+        if len(diffs) == 1:
+            return True
+        return len(diffs) == 2 and diffs[1] == diffs[0] + 1 and a[diffs[0]] == b[diffs[1]] and a[diffs[1]] == b[diffs[0]]
+    shorter, longer = (a, b) if len(a) < len(b) else (b, a)
+    i = 0
+    while i < len(shorter) and shorter[i] == longer[i]:
+        i += 1
+    return shorter[i:] == longer[i + 1:]
+
+class SearchIndex:
+    """In-memory inverted index over assets, tokens and events with BM25 ranking.
+
+    Each document's fields are tokenized into one posting per term holding
+    the boost-weighted term frequency (BM25F-style). The last query word
+    also matches as a prefix (via a sorted vocabulary), and words of four
+    letters or more match terms one typo away (via a symmetric-delete map),
+    both at a discount.
+
+    The index is built from the tables on first use and again every
+    SEARCH_REBUILD_SECONDS to pick up other workers' writes; creates and
+    updates in this process are applied immediately via index_document().
+    """
+
+    PAGE_SIZE = 1000
+
+    def __init__(self, supabase):
+        self.supabase = supabase
+        self._lock = threading.RLock()
+        self._build_lock = threading.Lock()
+        self._reset()
+        self._built = False
+        self._built_at = 0.0
+        self._rebuilding = False
+        # Rows indexed while a rebuild is reading the tables, replayed onto its result
+        self._written_during_rebuild: Optional[List[Tuple[str, Dict[str, Any]]]] = None
+        self.stats = {'rebuilds': 0, 'last_rebuild_ms': None, 'queries': 0, 'updates': 0}
+
+    def _reset(self):
+        self._postings: Dict[str, Dict[str, float]] = {}
+        self._doc_terms: Dict[str, Dict[str, float]] = {}
+        self._doc_length: Dict[str, float] = {}
+        self._docs: Dict[str, Dict[str, Any]] = {}
+        self._total_length = 0.0
+        self._vocab: List[str] = []
+        self._delete_map: Dict[str, set] = {}
+
+    @staticmethod
+    def _key(doc_type: str, doc_id: str) -> str:
+        return f"{doc_type}:{doc_id}"
+
+    def _add_term(self, term: str):
+        insort(self._vocab, term)
+        if len(term) >= MIN_FUZZY_LENGTH - 1:
+            for deleted in _deletes(term):
+                self._delete_map.setdefault(deleted, set()).add(term)
+
+    def _drop_term(self, term: str):
+        index = bisect_left(self._vocab, term)
+        if index < len(self._vocab) and self._vocab[index] == term:
+            del self._vocab[index]
+        if len(term) >= MIN_FUZZY_LENGTH - 1:
+            for deleted in _deletes(term):
+                terms = self._delete_map.get(deleted)
+                if terms:
+                    terms.discard(term)
+                    if not terms:
+                        del self._delete_map[deleted]
+
+    def _remove(self, key: str):
+        terms = self._doc_terms.pop(key, None)
+        if terms is None:
+            return
+        for term in terms:
+            posting = self._postings[term]
+            del posting[key]
+            if not posting:
+                del self._postings[term]
+                self._drop_term(term)
+        self._total_length -= self._doc_length.pop(key)
+        del self._docs[key]
+
+    def _add(self, doc_type: str, row: Dict[str, Any]):
+        key = self._key(doc_type, row['id'])
+        self._remove(key)
+
+        terms: Dict[str, float] = {}
+        length = 0.0
+        for field in DOC_FIELDS[doc_type]:
+            weight = FIELD_WEIGHTS[field]
+            for term in tokenize(row.get(field)):
+                terms[term] = terms.get(term, 0.0) + weight
+                length += weight
+        if not terms:
+            return
+
+        for term, frequency in terms.items():
+            posting = self._postings.get(term)
+            if posting is None:
+                posting = self._postings[term] = {}
+                self._add_term(term)
+            posting[key] = frequency
+        self._doc_terms[key] = terms
+        self._doc_length[key] = length
+        self._total_length += length
+        self._docs[key] = {'type': doc_type, **{field: row.get(field) for field in DOC_DISPLAY[doc_type]}}
+
+    def index_document(self, doc_type: str, row: Optional[Dict[str, Any]]):
+        """Add or replace one asset, token or event row written by this process"""
+        if not row or not row.get('id') or not self._built:
+            return  # the next build will read it from the table
+        with self._lock:
+            self._add(doc_type, row)
+            if self._written_during_rebuild is not None:
+                self._written_during_rebuild.append((doc_type, row))
+            self.stats['updates'] += 1
+
+    def remove_document(self, doc_type: str, doc_id: str):
+        with self._lock:
+            self._remove(self._key(doc_type, doc_id))
+
+    def _load(self, table: str, columns: str):
+        offset = 0
+        while True:
+            result = self.supabase.table(table).select(columns).order('id').range(
+                offset, offset + self.PAGE_SIZE - 1
+            ).execute()
+            yield result.data
+            if len(result.data) < self.PAGE_SIZE:
+                return
+            offset += self.PAGE_SIZE
+
+    def rebuild(self):
+        """Build a fresh index from the tables, then swap it in"""
+        started = time.perf_counter()
+        with self._lock:
+            self._written_during_rebuild = []
+        fresh = SearchIndex(self.supabase)
+        fresh._built = True
+        for doc_type, table, columns in DOC_SOURCES:
+            try:
+                for page in self._load(table, columns):
+                    for row in page:
+                        fresh._add(doc_type, row)
+            except Exception as e:
+                print(f"⚠️ Search index skipped {table}: {e}")
+
+        with self._lock:
+            for doc_type, row in self._written_during_rebuild:
+                fresh._add(doc_type, row)
+            self._written_during_rebuild = None
+            self._postings = fresh._postings
+            self._doc_terms = fresh._doc_terms
+            self._doc_length = fresh._doc_length
+            self._docs = fresh._docs
+            self._total_length = fresh._total_length
+            self._vocab = fresh._vocab
+            self._delete_map = fresh._delete_map
+            self._built = True
+            self._built_at = time.monotonic()
+
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+        self.stats['rebuilds'] += 1
+        self.stats['last_rebuild_ms'] = elapsed_ms
+        print(f"🔎 Search index rebuilt: {len(self._docs)} documents, {len(self._vocab)} terms ({elapsed_ms}ms)")
+
+    def _rebuild_in_background(self):
+        try:
+            self.rebuild()
+        except Exception as e:
+            print(f"⚠️ Search index rebuild failed, serving last known state: {e}")
+        finally:
+            self._rebuilding = False
+
+    def ensure_fresh(self):
+        """Build on first use; later rebuilds run in the background while the old index serves"""
+        if not self._built:
+            with self._build_lock:
+                if not self._built:
+                    self.rebuild()
+            return
+
+        if time.monotonic() - self._built_at >= SEARCH_REBUILD_SECONDS and not self._rebuilding:
+            with self._build_lock:
+                if self._rebuilding:
+                    return
+                self._rebuilding = True
+            threading.Thread(target=self._rebuild_in_background, name='search-rebuild', daemon=True).start()
+
+    def _expand(self, word: str, prefix: bool) -> Dict[str, float]:
+        """Index terms a query word matches, with their weights"""
+        matches = {}
+        if word in self._postings:
+            matches[word] = 1.0
+
+        if prefix and len(word) >= MIN_PREFIX_LENGTH:
+            index = bisect_left(self._vocab, word)
+            while index < len(self._vocab) and len(matches) < MAX_EXPANSIONS:
+                term = self._vocab[index]
+                if not term.startswith(word):
+                    break
+                matches.setdefault(term, PREFIX_WEIGHT)
+                index += 1
+
+        if len(word) >= MIN_FUZZY_LENGTH:
+            candidates = set(self._delete_map.get(word, ()))
+            for deleted in _deletes(word):
+                if deleted in self._postings:
+                    candidates.add(deleted)
+                candidates.update(self._delete_map.get(deleted, ()))
+            for term in candidates:
+                if term not in matches and len(matches) < MAX_EXPANSIONS and _within_one_edit(word, term):
+                    matches[term] = FUZZY_WEIGHT
+        return matches
+
+    def _score_word(self, matches: Dict[str, float], doc_type: Optional[str]) -> Dict[str, float]:
+        documents = len(self._docs)
+        average_length = self._total_length / documents if documents else 1.0
+        scores: Dict[str, float] = {}
+        for term, weight in matches.items():
+            posting = self._postings[term]
+            idf = math.log(1 + (documents - len(posting) + 0.5) / (len(posting) + 0.5))
+            for key, frequency in posting.items():
+                if doc_type and self._docs[key]['type'] != doc_type:
+                    continue
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self._doc_length[key] / average_length)
+                score = weight * idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+                # A document scores once per query word, by its best-matching term
+                if score > scores.get(key, 0.0):
+                    scores[key] = score
+        return scores
+
+    def search(self, query: str, doc_type: str = None, limit: int = 20, offset: int = 0) -> Dict[str, Any]:
+        """Ranked matches for query; every word must match unless that leaves nothing"""
+        if doc_type and doc_type not in DOC_TYPES:
+            raise Exception(f"type must be one of {', '.join(DOC_TYPES)}")
+        self.ensure_fresh()
+        words = list(dict.fromkeys(tokenize(query)))
+        self.stats['queries'] += 1
+        if not words:
+            return {'query': query, 'total': 0, 'results': []}
+
+        with self._lock:
+            per_word = [self._score_word(self._expand(word, prefix=i == len(words) - 1), doc_type)
+                        for i, word in enumerate(words)]
+
+            matched = set(per_word[0])
+            for scores in per_word[1:]:
+                matched &= scores.keys()
+            if not matched:
+                matched = set().union(*per_word)
+
+            ranked: List[Tuple[float, str]] = sorted(
+                ((sum(scores.get(key, 0.0) for scores in per_word), key) for key in matched),
+                key=lambda item: (-item[0], item[1])
+            )
+            page = ranked[offset:offset + limit]
+            results = [{**self._docs[key], 'score': round(score, 4)} for score, key in page]
+
+        return {'query': query, 'total': len(ranked), 'results': results}
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self.stats, 'built': self._built, 'documents': len(self._docs), 'terms': len(self._vocab)}
+
+_index: Optional[SearchIndex] = None
+_index_lock = threading.Lock()
+
+def get_search_index(supabase) -> SearchIndex:
+    """Process-wide search index"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = SearchIndex(supabase)
+        return _index
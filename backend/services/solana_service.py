@@ -1,7 +1,11 @@
 import os
 import json
 import uuid
-from typing import Dict, Any, Optional
+import threading
+from typing import Dict, Any, Optional, List
+from utils.validators import is_valid_transaction_signature
+from services.rpc_router import SolanaRpcRouter, get_solana_router, parse_endpoints
+from utils.resilience import guarded_call
 
 print("🔄 Initializing SolanaService...")
 
@@ -34,6 +38,14 @@ try:
             from solana._layouts.public_key import PublicKey
             print("✅ PublicKey imported from solana._layouts.public_key")
     
+    # Signatures must be typed objects on newer solana-py versions
+    try:
+        from solders.signature import Signature
+        print("✅ Signature imported from solders")
+    except ImportError:
+        Signature = None
+        print("⚠️ solders Signature unavailable, passing raw strings")
+    
     # Try commitment import
     try:
         from solana.rpc.commitment import Confirmed
@@ -52,22 +64,70 @@ except ImportError as e:
     print(f"❌ Solana imports failed: {e}")
     raise ImportError(f"Solana packages not properly configured: {e}")
 
+DEFAULT_SOLANA_RPC_URL = "https://api.devnet.solana.com"
+SOLANA_RPC_TIMEOUT = float(os.getenv('SOLANA_RPC_TIMEOUT', 10))
+SOLANA_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', 20))
+
+_clients: Dict[str, Any] = {}
+_clients_lock = threading.Lock()
+
+def get_solana_client(rpc_url: str):
+    """Process-wide RPC client per endpoint, so its keep-alive pool is reused"""
+    with _clients_lock:
+        if rpc_url not in _clients:
+            client = Client(rpc_url, timeout=SOLANA_RPC_TIMEOUT)
+            
+            # solana-py builds a default httpx pool; size it like our other upstreams
+            try:
+                import httpx
+                provider = getattr(client, '_provider', None)
+                if provider is not None and hasattr(provider, 'session'):
+                    provider.session = httpx.Client(
+                        timeout=SOLANA_RPC_TIMEOUT,
+                        limits=httpx.Limits(
+                            max_connections=SOLANA_POOL_SIZE,
+                            max_keepalive_connections=SOLANA_POOL_SIZE
+                        )
+                    )
+            except Exception as e:
+                print(f"⚠️ Using default Solana HTTP pool: {e}")
+            
+            _clients[rpc_url] = client
+            print(f"🔌 Created pooled Solana client for {rpc_url}")
+        return _clients[rpc_url]
+
 class SolanaService:
-    def __init__(self, rpc_url: str = "https://api.devnet.solana.com"):
+    def __init__(self, rpc_url: str = None, client=None, router: SolanaRpcRouter = None):
         if not SOLANA_AVAILABLE:
             raise Exception("Solana packages not available")
         
-        print(f"🔗 Connecting to Solana RPC: {rpc_url}")
-        self.client = Client(rpc_url)
+        if router is not None:
+            self.rpc = router
+        elif client is not None:
+            self.rpc = SolanaRpcRouter([rpc_url or DEFAULT_SOLANA_RPC_URL], lambda url: client)
+        else:
+            # SOLANA_RPC_URLS="https://a,https://b" spreads reads across providers
+            endpoints = [rpc_url] if rpc_url else (parse_endpoints(os.getenv('SOLANA_RPC_URLS')) or [DEFAULT_SOLANA_RPC_URL])
+            self.rpc = get_solana_router(endpoints, get_solana_client)
+        
+        print(f"🔗 Connecting to Solana RPC: {', '.join(self.rpc.endpoints)}")
+        self.client = self.rpc.primary_client
         self.network = "devnet"
         
         # Test connection
         try:
-            slot = self.client.get_slot()
+            slot = self._read('get_slot')
             print(f"✅ Connected to Solana devnet - Current slot: {slot.value}")
         except Exception as e:
             print(f"⚠️ RPC connection test failed (continuing anyway): {e}")
     
+    def _read(self, method: str, *args, **kwargs):
+        """Hedged read through the solana_rpc breaker; fails fast while it is open"""
+        return guarded_call('solana_rpc', self.rpc.call, method, *args, **kwargs)
+    
+    def _write(self, method: str, *args, **kwargs):
+        return guarded_call('solana_rpc', self.rpc.call_primary, method, *args, **kwargs)
+    
     def get_balance(self, public_key: str) -> float:
         """Get SOL balance for a wallet"""
         try:
@@ -80,7 +140,7 @@ class SolanaService:
             else:
                 pubkey = public_key
                 
-            balance = self.client.get_balance(pubkey)
+            balance = self._read('get_balance', pubkey)
             return balance.value / 1e9  # Convert lamports to SOL
         except Exception as e:
             print(f"❌ Get balance error: {e}")
@@ -100,7 +160,7 @@ class SolanaService:
             lamports = int(amount * 1e9)  # Convert SOL to lamports
             
             print(f"💰 Requesting {amount} SOL airdrop to {public_key}")
-            response = self.client.request_airdrop(pubkey, lamports)
+            response = self._write('request_airdrop', pubkey, lamports)
             
             if hasattr(response, 'value') and response.value:
                 print(f"✅ Airdrop successful - TX: {response.value}")
@@ -214,13 +274,76 @@ class SolanaService:
             print(f"⚠️ Wallet validation error: {e}")
             return len(address) >= 32  # Fallback to length check
     
+    # getSignatureStatuses accepts at most 256 signatures per call
+    MAX_SIGNATURE_BATCH = 256
+    
+    def get_signature_statuses(self, signatures: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """Get confirmation status for up to 256 signatures in one RPC call"""
+        if len(signatures) > self.MAX_SIGNATURE_BATCH:
+            raise Exception(f"At most {self.MAX_SIGNATURE_BATCH} signatures per request")
+        
+        if not signatures:
+            return []
+        
+        try:
+            if Signature is not None:
+                request_signatures = [Signature.from_string(sig) for sig in signatures]
+            else:
+                request_signatures = signatures
+            
+            response = self._read('get_signature_statuses', request_signatures, search_transaction_history=True)
+            
+            statuses = []
+            for status in response.value:
+                if status is None:
+                    statuses.append(None)
+                    continue
+                
+                confirmation_status = getattr(status, 'confirmation_status', None)
+                if confirmation_status is not None and not isinstance(confirmation_status, str):
+                    # solders enum, e.g. TransactionConfirmationStatus.Finalized
+                    confirmation_status = str(confirmation_status).split('.')[-1].lower()
+                
+                statuses.append({
+                    "slot": status.slot,
+                    "confirmations": status.confirmations,
+                    "confirmation_status": confirmation_status,
+                    "err": str(status.err) if status.err else None
+                })
+            
+            return statuses
+        except Exception as e:
+            raise Exception(f"Get signature statuses error: {str(e)}")
+    
+    def get_rpc_status(self) -> List[Dict[str, Any]]:
+        """Latency, error rate and ejection state per RPC endpoint"""
+        return self.rpc.get_status()
+    
     def get_transaction_status(self, signature: str) -> Dict[str, Any]:
-        """Get transaction confirmation status (mock implementation)"""
+        """Get transaction confirmation status"""
+        if not is_valid_transaction_signature(signature):
+            # Mock signatures from development mode never reach the chain
+            return {
+                "confirmed": True,
+                "confirmation_status": "mock",
+                "slot": None,
+                "err": None
+            }
+        
+        status = self.get_signature_statuses([signature])[0]
+        if status is None:
+            return {
+                "confirmed": False,
+                "confirmation_status": "not_found",
+                "slot": None,
+                "err": None
+            }
+        
         return {
-            "confirmed": True,
-            "slot": 123456789,
-            "block_time": 1699468800,
-            "fee": 5000
+            "confirmed": status["confirmation_status"] in ("confirmed", "finalized") and not status["err"],
+            "confirmation_status": status["confirmation_status"],
+            "slot": status["slot"],
+            "err": status["err"]
         }
 
 # Test the service when imported
@@ -4,6 +4,14 @@ import uuid
 from datetime import datetime
 import os
 import json
+from services.job_service import JobService, JOB_MINT_FRACTIONAL, JOB_MINT_VAULT_REWARD, JOB_MINT_NFT
+from services.vault_ledger_service import (
+    VaultLedgerService, ENTRY_ASSET_TOKENIZATION, ENTRY_ASSET_LISTING, ENTRY_ASSET_PURCHASE
+)
+from services.inventory_service import InventoryService
+from services.search_index import get_search_index, DOC_TOKEN
+from services.marketplace_index import get_marketplace_index
+from utils.lifecycle import track_in_flight
 
 print("🔄 Loading TokenService...")
 
@@ -52,6 +60,9 @@ class TokenService:
     def __init__(self, supabase: Client):
         print("🔄 Initializing TokenService...")
         self.supabase = supabase
+        self.jobs = JobService(supabase)
+        self.ledger = VaultLedgerService(supabase)
+        self.inventory = InventoryService(supabase)
         
         self.monad_rpc_url = "https://testnet-rpc.monad.xyz/"
         self.monad_chain_id = 10143
@@ -124,6 +135,7 @@ class TokenService:
                 balance = self.solana.get_balance(str(self.platform_keypair.public_key))
                 status['platform_wallet_balance'] = f"{balance:.4f} SOL"
                 status['ready_for_operations'] = balance > 0.01
+                status['rpc_endpoints'] = self.solana.get_rpc_status()
             except Exception as e:
                 status['error'] = str(e)
                 status['ready_for_operations'] = True  # Allow operations anyway
@@ -176,6 +188,7 @@ class TokenService:
         except Exception as e:
             raise Exception(f"Create platform token error: {str(e)}")
 
+    @track_in_flight('mint')
     def mint_platform_tokens(self, recipient_wallet: str, amount: float) -> str:
         """Mint VAULT tokens to a user"""
         try:
@@ -210,8 +223,12 @@ class TokenService:
         except Exception as e:
             raise Exception(f"Mint platform tokens error: {str(e)}")
     
-    def create_token(self, data: Dict[str, Any]) -> Dict[str, Any]:
-        """Create token with blockchain integration"""
+    def create_token(self, data: Dict[str, Any], defer_mint: bool = False) -> Dict[str, Any]:
+        """Create token with blockchain integration.
+
+        With defer_mint the initial NFT mint is queued as a background job
+        and the token is returned with ``mint_job_id`` instead of ``mint_tx``.
+        """
         try:
             token_type = data.get('token_type', 'nft')
             decimals = 0 if token_type == 'nft' else 6
@@ -266,21 +283,25 @@ class TokenService:
             
             if result.data:
                 token = result.data[0]
+                get_search_index(self.supabase).index_document(DOC_TOKEN, token)
+                get_marketplace_index(self.supabase).refresh(token_id=token['id'])
                 
                 # If NFT with owner wallet, mint 1 token
                 if (token_type == 'nft' and 
                     'initial_owner_wallet' in data and 
                     token.get('is_blockchain_token')):
                     
-                    try:
-                        print(f"🎨 Minting NFT to {data['initial_owner_wallet']}...")
-                        
-                        mint_tx = self.solana.mint_tokens_to_wallet(
-                            self.platform_keypair,
-                            mint_address,
-                            data['initial_owner_wallet'],
-                            1
+                    if defer_mint:
+                        job = self.jobs.enqueue(
+                            JOB_MINT_NFT,
+                            {'mint_address': mint_address, 'recipient_wallet': data['initial_owner_wallet']},
+                            targets=[{'table': 'tokens', 'id': token['id'], 'column': 'mint_tx'}]
                         )
+                        token['mint_job_id'] = job['id']
+                        return token
+                    
+                    try:
+                        mint_tx = self.mint_nft(mint_address, data['initial_owner_wallet'])
                         
                         # Update with mint transaction
                         self.supabase.table('tokens').update({
@@ -327,6 +348,10 @@ class TokenService:
                     }
                     
                     self.supabase.table('vault_rewards').insert(reward_data).execute()
+                    self.ledger.credit_wallet(
+                        data['owner_wallet'], 100, ENTRY_ASSET_LISTING,
+                        reference_id=reward_data['id'], idempotency_key=f"{ENTRY_ASSET_LISTING}:{token['id']}"
+                    )
                     
                     token['vault_reward_tx'] = vault_reward_tx
                     print(f"🎁 Rewarded asset owner with 100 VAULT tokens: {vault_reward_tx}")
@@ -339,6 +364,7 @@ class TokenService:
         except Exception as e:
             raise Exception(f"Create token with VAULT reward error: {str(e)}")
 
+    @track_in_flight('mint')
     def mint_vault_reward(self, recipient_wallet: str, amount: float, reason: str, asset_id: str = None) -> str:
         """Mint VAULT tokens as rewards"""
         try:
@@ -371,21 +397,77 @@ class TokenService:
         except Exception as e:
             raise Exception(f"Mint VAULT reward error: {str(e)}")
 
+    @track_in_flight('mint')
+    def mint_nft(self, mint_address: str, recipient_wallet: str) -> str:
+        """Mint a single NFT token to its initial owner"""
+        print(f"🎨 Minting NFT to {recipient_wallet}...")
+        
+        return self.solana.mint_tokens_to_wallet(
+            self.platform_keypair,
+            mint_address,
+            recipient_wallet,
+            1
+        )
+
+    def validate_fractional_mint(self, token_id: str, recipient_wallet: str) -> Dict[str, Any]:
+        """Validate a fractional mint request and return the token"""
+        if not BLOCKCHAIN_ENABLED:
+            raise Exception("Blockchain features not enabled")
+        
+        token = self.get_token_by_id(token_id)
+        if not token:
+            raise Exception("Token not found")
+        
+        if not token.get('is_blockchain_token'):
+            raise Exception("Token is not a blockchain token")
+        
+        if not self.solana.validate_wallet_address(recipient_wallet):
+            raise Exception("Invalid recipient wallet address")
+        
+        return token
+
+    def queue_fractional_mint(self, token_id: str, recipient_wallet: str, amount: float,
+                              targets: List[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Validate a fractional mint and queue it for the mint worker"""
+        try:
+            self.validate_fractional_mint(token_id, recipient_wallet)
+            
+            return self.jobs.enqueue_many([self.fractional_mint_job(token_id, recipient_wallet, amount, targets)])[0]
+        except Exception as e:
+            raise Exception(f"Queue fractional mint error: {str(e)}")
+
+    def fractional_mint_job(self, token_id: str, recipient_wallet: str, amount: float,
+                            targets: List[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """A fractional mint job row, to store with JobService.enqueue_many"""
+        return self.jobs.new_job(JOB_MINT_FRACTIONAL, {
+            'token_id': token_id,
+            'recipient_wallet': recipient_wallet,
+            'amount': amount
+        }, targets=targets)
+
+    def queue_vault_reward(self, recipient_wallet: str, amount: float, reason: str, asset_id: str = None,
+                           targets: List[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Queue a VAULT reward mint for the mint worker"""
+        try:
+            return self.jobs.enqueue_many([self.vault_reward_job(recipient_wallet, amount, reason, asset_id, targets)])[0]
+        except Exception as e:
+            raise Exception(f"Queue VAULT reward error: {str(e)}")
+
+    def vault_reward_job(self, recipient_wallet: str, amount: float, reason: str, asset_id: str = None,
+                         targets: List[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """A VAULT reward mint job row, to store with JobService.enqueue_many"""
+        return self.jobs.new_job(JOB_MINT_VAULT_REWARD, {
+            'recipient_wallet': recipient_wallet,
+            'amount': amount,
+            'reason': reason,
+            'asset_id': asset_id
+        }, targets=targets)
+
+    @track_in_flight('mint')
     def mint_fractional_tokens(self, token_id: str, recipient_wallet: str, amount: float) -> str:
         """Mint fractional tokens to recipient"""
         try:
-            if not BLOCKCHAIN_ENABLED:
-                raise Exception("Blockchain features not enabled")
-            
-            token = self.get_token_by_id(token_id)
-            if not token:
-                raise Exception("Token not found")
-            
-            if not token.get('is_blockchain_token'):
-                raise Exception("Token is not a blockchain token")
-            
-            if not self.solana.validate_wallet_address(recipient_wallet):
-                raise Exception("Invalid recipient wallet address")
+            token = self.validate_fractional_mint(token_id, recipient_wallet)
             
             # Convert to token units
             token_amount = int(amount * (10 ** token['decimals']))
@@ -414,36 +496,41 @@ class TokenService:
             
             token_accounts = self.solana.get_token_accounts(wallet_address)
             
-            wallet_tokens = []
+            holdings = []
             for account in token_accounts:
                 try:
                     account_data = account['account']['data']['parsed']['info']
-                    mint_address = account_data['mint']
                     balance = float(account_data['tokenAmount']['uiAmount'] or 0)
-                    
                     if balance > 0:
-                        # Get token metadata from database
-                        token_result = self.supabase.table('tokens').select(
-                            '*, assets(*)'
-                        ).eq('mint_address', mint_address).execute()
-                        
-                        if token_result.data:
-                            token_info = token_result.data[0]
-                            token_info['balance'] = balance
-                            token_info['token_account'] = account['pubkey']
-                            wallet_tokens.append(token_info)
-                        else:
-                            # Unknown token
-                            wallet_tokens.append({
-                                'mint_address': mint_address,
-                                'balance': balance,
-                                'token_account': account['pubkey'],
-                                'unknown_token': True,
-                                'name': f"Unknown Token ({mint_address[:8]}...)"
-                            })
+                        holdings.append((account, account_data['mint'], balance))
                 except Exception as e:
                     print(f"Error processing token: {e}")
-                    continue
+            
+            # Token metadata for every held mint in one query, not one per account
+            known_tokens = {}
+            mint_addresses = list({mint_address for _, mint_address, _ in holdings})
+            if mint_addresses:
+                token_result = self.supabase.table('tokens').select(
+                    '*, assets(*)'
+                ).in_('mint_address', mint_addresses).execute()
+                known_tokens = {token['mint_address']: token for token in token_result.data}
+            
+            wallet_tokens = []
+            for account, mint_address, balance in holdings:
+                if mint_address in known_tokens:
+                    token_info = dict(known_tokens[mint_address])
+                    token_info['balance'] = balance
+                    token_info['token_account'] = account['pubkey']
+                    wallet_tokens.append(token_info)
+                else:
+                    # Unknown token
+                    wallet_tokens.append({
+                        'mint_address': mint_address,
+                        'balance': balance,
+                        'token_account': account['pubkey'],
+                        'unknown_token': True,
+                        'name': f"Unknown Token ({mint_address[:8]}...)"
+                    })
             
             return wallet_tokens
         except Exception as e:
@@ -521,32 +608,9 @@ class TokenService:
         except Exception as e:
             raise Exception(f"Get user tokens error: {str(e)}")
     
-    def award_vault_coins(self, user_id: str, amount: int) -> Dict[str, Any]:
-        """Award VAULT coins to a user for tokenizing an asset"""
+    def award_vault_coins(self, user_id: str, amount: int, reference_id: str = None) -> Dict[str, Any]:
+        """Award VAULT coins to a user for tokenizing an asset (reference_id: the asset, one award each)"""
         try:
-            # Check if user has a vault_balance record
-            balance_result = self.supabase.table('vault_balances').select('*').eq('user_id', user_id).execute()
-            
-            if balance_result.data:
-                # Update existing balance
-                current_balance = balance_result.data[0]['balance']
-                new_balance = current_balance + amount
-                
-                self.supabase.table('vault_balances').update({
-                    'balance': new_balance,
-                    'updated_at': datetime.now().isoformat()
-                }).eq('user_id', user_id).execute()
-            else:
-                # Create new balance record
-                balance_data = {
-                    'id': str(uuid.uuid4()),
-                    'user_id': user_id,
-                    'balance': amount,
-                    'created_at': datetime.now().isoformat(),
-                    'updated_at': datetime.now().isoformat()
-                }
-                self.supabase.table('vault_balances').insert(balance_data).execute()
-            
             # Record the reward transaction
             reward_data = {
                 'id': str(uuid.uuid4()),
@@ -558,9 +622,15 @@ class TokenService:
             
             reward_result = self.supabase.table('vault_rewards').insert(reward_data).execute()
             
+            # Atomic balance increment; keyed to the tokenized asset, so awarding it again is a no-op
+            entry = self.ledger.credit(
+                user_id, amount, ENTRY_ASSET_TOKENIZATION, reference_id=reward_data['id'],
+                idempotency_key=f"{ENTRY_ASSET_TOKENIZATION}:{reference_id}" if reference_id else None
+            )
+            
             return {
                 'amount': amount,
-                'new_balance': balance_result.data[0]['balance'] + amount if balance_result.data else amount,
+                'new_balance': entry['balance'],
                 'reward_id': reward_result.data[0]['id'] if reward_result.data else None
             }
         except Exception as e:
@@ -576,7 +646,10 @@ class TokenService:
     def update_token_metadata(self, token_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
         try:
             result = self.supabase.table('tokens').update(data).eq('id', token_id).execute()
-            return result.data[0] if result.data else None
+            token = result.data[0] if result.data else None
+            get_search_index(self.supabase).index_document(DOC_TOKEN, token)
+            get_marketplace_index(self.supabase).refresh(token_id=token_id)
+            return token
         except Exception as e:
             raise Exception(f"Update token metadata error: {str(e)}")
 
@@ -622,7 +695,10 @@ class TokenService:
             }
             
             result = self.supabase.table('property_tokens').insert(token_data).execute()
-            return result.data[0] if result.data else None
+            self.inventory.ensure_inventory(token_data['id'], total_shares)
+            token = result.data[0] if result.data else None
+            get_search_index(self.supabase).index_document(DOC_TOKEN, token)
+            return token
             
         except Exception as e:
             raise Exception(f"Create property token error: {str(e)}")
@@ -635,9 +711,6 @@ class TokenService:
             if not token:
                 raise Exception("Property token not found")
             
-            if shares_to_buy > token['available_shares']:
-                raise Exception(f"Only {token['available_shares']} shares available")
-            
             # Calculate required SOL (you'd get real SOL/USD price from an API)
             usd_cost = shares_to_buy * token['price_per_share_usd']
             sol_price_usd = 100  # Example: 1 SOL = $100 (get from API)
@@ -648,36 +721,33 @@ class TokenService:
             
             print(f"💰 User buying {shares_to_buy} shares for {sol_amount:.4f} SOL")
             
-            if token.get('is_blockchain_token'):
-                # Mint property tokens to user's wallet on Solana
-                mint_tx = self.solana.mint_tokens_to_wallet(
-                    self.platform_keypair,
-                    token['mint_address'],
-                    user_wallet,
-                    shares_to_buy  # No decimals, so 1 token = 1 share
-                )
-            else:
-                mint_tx = f"mock_mint_{str(uuid.uuid4())[:8]}"
-            
-            # Update available shares
-            new_available = token['available_shares'] - shares_to_buy
-            self.supabase.table('property_tokens').update({
-                'available_shares': new_available
-            }).eq('id', token_id).execute()
-            
-            # Record the purchase
-            purchase_data = {
-                'id': str(uuid.uuid4()),
-                'user_wallet': user_wallet,
-                'token_id': token_id,
-                'shares_purchased': shares_to_buy,
-                'sol_paid': sol_amount,
-                'usd_value': usd_cost,
-                'mint_tx': mint_tx,
-                'purchase_date': datetime.now().isoformat()
-            }
-            
-            self.supabase.table('property_purchases').insert(purchase_data).execute()
+            # Reserved shares are confirmed when the block completes and
+            # released if the mint or the purchase record fails
+            with self.inventory.hold(token_id, shares_to_buy, user_wallet):
+                if token.get('is_blockchain_token'):
+                    # Mint property tokens to user's wallet on Solana
+                    mint_tx = self.solana.mint_tokens_to_wallet(
+                        self.platform_keypair,
+                        token['mint_address'],
+                        user_wallet,
+                        shares_to_buy  # No decimals, so 1 token = 1 share
+                    )
+                else:
+                    mint_tx = f"mock_mint_{str(uuid.uuid4())[:8]}"
+                
+                # Record the purchase
+                purchase_data = {
+                    'id': str(uuid.uuid4()),
+                    'user_wallet': user_wallet,
+                    'token_id': token_id,
+                    'shares_purchased': shares_to_buy,
+                    'sol_paid': sol_amount,
+                    'usd_value': usd_cost,
+                    'mint_tx': mint_tx,
+                    'purchase_date': datetime.now().isoformat()
+                }
+                
+                self.supabase.table('property_purchases').insert(purchase_data).execute()
             
             return mint_tx
             
@@ -754,6 +824,11 @@ class TokenService:
             }
             
             self.supabase.table('vault_rewards').insert(reward_data).execute()
+            if vault_reward_amount > 0:
+                self.ledger.credit_wallet(
+                    user_wallet, vault_reward_amount, ENTRY_ASSET_PURCHASE,
+                    reference_id=reward_data['id'], idempotency_key=f"{ENTRY_ASSET_PURCHASE}:{purchase_data['id']}"
+                )
             
             print(f"✅ Purchase complete! Asset TX: {asset_mint_tx}, VAULT Reward TX: {vault_reward_tx}")
             
@@ -781,9 +856,8 @@ class TokenService:
                 balance = self.solana.get_token_balance(wallet_address, vault_mint)
                 return balance
             else:
-                # Mock mode - sum from rewards table
-                rewards_result = self.supabase.table('vault_rewards').select('vault_amount').eq('user_wallet', wallet_address).execute()
-                return sum(reward['vault_amount'] for reward in rewards_result.data)
+                # Mock mode - the ledger's materialized balance
+                return self.ledger.get_wallet_balance(wallet_address)['balance']
                 
         except Exception as e:
             print(f"Error getting VAULT balance: {e}")
@@ -0,0 +1,242 @@
+import json
+from supabase import Client
+from typing import List, Dict, Any, Optional
+from datetime import datetime, timedelta
+
+try:
+    import numpy as np
+    import pandas as pd
+except ImportError:
+    np = None
+    pd = None
+
+# Bucket resolution -> pandas frequency
+RESOLUTIONS = {'1m': '1min', '1h': '1h', '1d': '1D'}
+
+# asset_transactions rows that sell shares at a price, and the statuses that count
+PRICED_EVENT_TYPES = ('purchase', 'trade')
+COUNTED_STATUSES = ('pending', 'completed')
+
+BUCKET_FIELDS = ('asset_id', 'resolution', 'bucket_start', 'volume_usd', 'shares', 'trades', 'vwap_usd',
+                 'open_price', 'high_price', 'low_price', 'close_price', 'open_at', 'close_at')
+
+def compute_buckets(frame: 'pd.DataFrame', resolutions=tuple(RESOLUTIONS)) -> 'pd.DataFrame':
+    """Aggregate trades (asset_id, at, price, shares, volume_usd) into buckets, vectorized.
+
+    Rows are sorted by time once; open/close are then the first/last price
+    of each group, matching what trade_rollup_apply keeps.
+    """
+    if frame.empty:
+        return pd.DataFrame(columns=[field for field in BUCKET_FIELDS if field != 'vwap_usd'])
+
+    frame = frame.sort_values(['at', 'id'] if 'id' in frame else ['at'], kind='stable')
+    results = []
+    for resolution in resolutions:
+        grouped = frame.assign(bucket_start=frame['at'].dt.floor(RESOLUTIONS[resolution])).groupby(
+            ['asset_id', 'bucket_start'], sort=False
+        )
+        buckets = grouped.agg(
+            volume_usd=('volume_usd', 'sum'),
+            shares=('shares', 'sum'),
+            trades=('price', 'size'),
+            open_price=('price', 'first'),
+            high_price=('price', 'max'),
+            low_price=('price', 'min'),
+            close_price=('price', 'last'),
+            open_at=('at', 'first'),
+            close_at=('at', 'last')
+        ).reset_index()
+        buckets.insert(1, 'resolution', resolution)
+        results.append(buckets)
+    return pd.concat(results, ignore_index=True)
+
+def transactions_frame(rows: List[Dict[str, Any]]) -> 'pd.DataFrame':
+    """Counted, priced asset_transactions rows as a typed frame"""
+    frame = pd.DataFrame.from_records(rows, columns=[
+        'id', 'asset_id', 'transaction_type', 'status', 'shares_amount', 'share_price_usd', 'total_cost_usd',
+        'transaction_date'
+    ])
+    shares = pd.to_numeric(frame['shares_amount'], errors='coerce').fillna(0).astype(np.int64)
+    total = pd.to_numeric(frame['total_cost_usd'], errors='coerce')
+    price = pd.to_numeric(frame['share_price_usd'], errors='coerce')
+    price = price.fillna(total / shares.where(shares > 0))
+
+    keep = (frame['transaction_type'].isin(PRICED_EVENT_TYPES).to_numpy()
+            & frame['status'].isin(COUNTED_STATUSES).to_numpy()
+            & frame['asset_id'].notna().to_numpy()
+            & frame['transaction_date'].notna().to_numpy()
+            & (shares > 0).to_numpy()
+            & price.notna().to_numpy())
+
+    return pd.DataFrame({
+        'id': frame['id'],
+        'asset_id': frame['asset_id'],
+        'at': pd.to_datetime(frame['transaction_date'], format='ISO8601', errors='coerce'),
+        'price': price,
+        'shares': shares,
+        'volume_usd': total.fillna(price * shares)
+    })[keep].dropna(subset=['at'])
+
+class TradeRollupService:
+    """Per-asset trading buckets (volume, shares, trades, VWAP, OHLC) at 1m/1h/1d.
+
+    asset_trade_buckets is kept current by a trigger on asset_transactions
+    (trade_rollup_apply), so charts and range queries read at most one row
+    per bucket instead of scanning the asset's transactions. History is
+    backfilled here in vectorized batches.
+    """
+
+    PAGE_SIZE = 1000
+    WRITE_BATCH_SIZE = 1000
+    # Upper bound on rows returned by one range query
+    MAX_BUCKETS = 1500
+
+    def __init__(self, supabase: Client):
+        self.supabase = supabase
+
+    @staticmethod
+    def _format_bucket(row: Dict[str, Any]) -> Dict[str, Any]:
+        bucket = dict(row)
+        for field in ('volume_usd', 'vwap_usd', 'open_price', 'high_price', 'low_price', 'close_price'):
+            if bucket.get(field) is not None:
+                bucket[field] = float(bucket[field])
+        return bucket
+
+    def get_buckets(self, asset_id: str, resolution: str = '1h', start: str = None, end: str = None,
+                    limit: int = 500) -> List[Dict[str, Any]]:
+        """Buckets in [start, end), oldest first; without start, the latest `limit` buckets"""
+        try:
+            if resolution not in RESOLUTIONS:
+                raise Exception(f"resolution must be one of {', '.join(RESOLUTIONS)}")
+            limit = min(limit, self.MAX_BUCKETS)
+
+            query = self.supabase.table('asset_trade_buckets').select(', '.join(BUCKET_FIELDS)).eq(
+                'asset_id', asset_id
+            ).eq('resolution', resolution)
+            if start:
+                query = query.gte('bucket_start', start)
+            if end:
+                query = query.lt('bucket_start', end)
+
+            if start:
+                result = query.order('bucket_start').limit(limit).execute()
+                rows = result.data
+            else:
+                result = query.order('bucket_start', desc=True).limit(limit).execute()
+                rows = list(reversed(result.data))
+            return [self._format_bucket(row) for row in rows]
+        except Exception as e:
+            raise Exception(f"Get trade buckets error: {str(e)}")
+
+    @staticmethod
+    def summarize(buckets: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Fold consecutive buckets into one (e.g. hourly buckets into the last 24h)"""
+        traded = [bucket for bucket in buckets if bucket.get('trades')]
+        if not traded:
+            return {'volume_usd': 0.0, 'shares': 0, 'trades': 0, 'vwap_usd': None, 'open_price': None,
+                    'high_price': None, 'low_price': None, 'close_price': None}
+        volume = sum(bucket['volume_usd'] for bucket in traded)
+        shares = sum(int(bucket['shares']) for bucket in traded)
+        return {
+            'volume_usd': round(volume, 6),
+            'shares': shares,
+            'trades': sum(int(bucket['trades']) for bucket in traded),
+            'vwap_usd': round(volume / shares, 6) if shares else None,
+            'open_price': traded[0]['open_price'],
+            'high_price': max(bucket['high_price'] for bucket in traded),
+            'low_price': min(bucket['low_price'] for bucket in traded),
+            'close_price': traded[-1]['close_price']
+        }
+
+    def get_activity(self, asset_id: str) -> Dict[str, Any]:
+        """Last 24 hours from hourly buckets plus all-time totals from daily ones"""
+        try:
+            since = (datetime.now() - timedelta(hours=24)).replace(minute=0, second=0, microsecond=0)
+            hourly = self.get_buckets(asset_id, '1h', start=since.isoformat(), limit=25)
+            daily = []
+            start = None
+            while True:
+                page = self.get_buckets(asset_id, '1d', start=start or '1970-01-01', limit=self.MAX_BUCKETS)
+                daily.extend(page)
+                if len(page) < self.MAX_BUCKETS:
+                    break
+                start = (datetime.fromisoformat(page[-1]['bucket_start']) + timedelta(days=1)).isoformat()
+
+            return {
+                'asset_id': asset_id,
+                'last_24h': self.summarize(hourly),
+                'all_time': self.summarize(daily),
+                'first_trade_at': daily[0]['open_at'] if daily else None,
+                'last_trade_at': daily[-1]['close_at'] if daily else None
+            }
+        except Exception as e:
+            raise Exception(f"Get asset activity error: {str(e)}")
+
+    def _history(self, before: str, asset_id: str = None):
+        """Priced transactions before `before`, a page at a time"""
+        offset = 0
+        while True:
+            query = self.supabase.table('asset_transactions').select(
+                'id, asset_id, transaction_type, status, shares_amount, share_price_usd, total_cost_usd, transaction_date'
+            ).in_('transaction_type', list(PRICED_EVENT_TYPES)).lt('transaction_date', before)
+            if asset_id:
+                query = query.eq('asset_id', asset_id)
+            result = query.order('transaction_date').order('id').range(
+                offset, offset + self.PAGE_SIZE - 1
+            ).execute()
+
+            yield result.data
+            if len(result.data) < self.PAGE_SIZE:
+                return
+            offset += self.PAGE_SIZE
+
+    def _write_buckets(self, buckets: 'pd.DataFrame') -> int:
+        if buckets.empty:
+            return 0
+        buckets = buckets.copy()
+        for column in ('bucket_start', 'open_at', 'close_at'):
+            buckets[column] = buckets[column].dt.strftime('%Y-%m-%dT%H:%M:%S.%f')
+        buckets['volume_usd'] = buckets['volume_usd'].round(6)
+        # to_json turns numpy scalars into plain JSON numbers
+        records = json.loads(buckets.to_json(orient='records'))
+        for i in range(0, len(records), self.WRITE_BATCH_SIZE):
+            self.supabase.table('asset_trade_buckets').upsert(
+                records[i:i + self.WRITE_BATCH_SIZE], on_conflict='asset_id,resolution,bucket_start'
+            ).execute()
+        return len(records)
+
+    def backfill(self, asset_id: str = None, until: datetime = None) -> Dict[str, Any]:
+        """Rebuild buckets from history.
+
+        Days before `until` (default: today) are aggregated here from the
+        raw transactions and overwritten; no new trades land in them, so the
+        overwrite can't race the trigger. The open day is then recomputed
+        by trade_rollup_rebuild_since, which locks the table against
+        concurrent trades.
+        """
+        try:
+            if pd is None:
+                raise Exception("pandas and numpy are required for backfills")
+            cutoff = (until or datetime.now()).replace(hour=0, minute=0, second=0, microsecond=0)
+
+            frames = []
+            rows_read = 0
+            for page in self._history(cutoff.isoformat(), asset_id):
+                rows_read += len(page)
+                if page:
+                    frames.append(transactions_frame(page))
+            trades = pd.concat(frames, ignore_index=True) if frames else transactions_frame([])
+            written = self._write_buckets(compute_buckets(trades))
+
+            result = self.supabase.rpc('trade_rollup_rebuild_since', {
+                'p_since': cutoff.isoformat(),
+                'p_asset_id': asset_id
+            }).execute()
+            recent = result.data if isinstance(result.data, int) else 0
+
+            print(f"📊 Backfilled {written} trade buckets from {len(trades)} trades "
+                  f"({rows_read} rows read), {recent} since {cutoff.date()}")
+            return {'rows_read': rows_read, 'trades': len(trades), 'buckets_written': written,
+                    'recent_buckets': recent, 'cutoff': cutoff.isoformat()}
+        except Exception as e:
+            raise Exception(f"Trade rollup backfill error: {str(e)}")
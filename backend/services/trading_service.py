@@ -0,0 +1,318 @@
+import os
+import threading
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+from supabase import Client
+
+from services.cap_table import get_cap_table_index
+from services.order_book import (OrderBook, Order, OrderRejected, SIDE_BUY, SIDE_SELL, ORDER_LIMIT,
+                                 ORDER_MARKET)
+
+# Secondary trades are matched in one process; run a single gunicorn worker
+# (the "matching" service) and route /api/trading there. Off unless that
+# process turns it on.
+TRADING_ENGINE_ENABLED = os.getenv('TRADING_ENGINE_ENABLED', 'false').lower() == 'true'
+# Trades move shares on match; the buyer's payment is settled outside this
+# service, so trade rows stay pending until it is confirmed
+TRADE_SETTLEMENT_STATUS = 'pending'
+# Prices are held as integer ticks of this many USD
+PRICE_TICK_USD = float(os.getenv('TRADING_PRICE_TICK_USD', 0.01))
+ORDER_BOOK_SNAPSHOT_INTERVAL = float(os.getenv('ORDER_BOOK_SNAPSHOT_INTERVAL', 5.0))
+
+TRANSACTION_TYPE_TRADE = 'trade'
+
+def to_ticks(price_usd: float) -> int:
+    return int(round(float(price_usd) / PRICE_TICK_USD))
+
+def to_usd(ticks: Optional[int]) -> Optional[float]:
+    return None if ticks is None else round(ticks * PRICE_TICK_USD, 6)
+
+class TradingBook:
+    """An order book plus what settlement needs to know about its token"""
+
+    def __init__(self, book: OrderBook, token: Dict[str, Any]):
+        self.book = book
+        self.token = token
+        self.pending_settlement: List[Dict[str, Any]] = []
+        self.settle_lock = threading.Lock()
+        self.saved_version = book.version
+
+_books: Dict[str, TradingBook] = {}
+_books_lock = threading.Lock()
+_snapshotter: Optional[threading.Thread] = None
+_snapshotter_stop = threading.Event()
+
+class TradingService:
+    """Peer-to-peer trading of fractional shares.
+
+    Orders are matched in memory with price-time priority. Each fill is
+    applied to the cap table straight away and settled as an
+    asset_transactions row (transaction_type 'trade', seller populated);
+    rows that fail to insert are retried by the snapshot thread.
+    """
+
+    def __init__(self, supabase: Client):
+        self.supabase = supabase
+        self.cap_tables = get_cap_table_index(supabase)
+
+    def _load_token(self, token_id: str) -> Dict[str, Any]:
+        result = self.supabase.table('tokens').select(
+            'id, total_supply, asset_id, assets(id, name, category)'
+        ).eq('id', token_id).execute()
+        if not result.data:
+            raise Exception("Asset token not found")
+        return result.data[0]
+
+    def _load_snapshot(self, token_id: str) -> Optional[Dict[str, Any]]:
+        result = self.supabase.table('order_book_snapshots').select('*').eq('token_id', token_id).execute()
+        return result.data[0] if result.data else None
+
+    def get_book(self, token_id: str) -> TradingBook:
+        """The token's book, restored from its last snapshot on first use"""
+        with _books_lock:
+            trading_book = _books.get(token_id)
+        if trading_book is not None:
+            return trading_book
+
+        token = self._load_token(token_id)
+        row = self._load_snapshot(token_id)
+        book = OrderBook.restore(row['snapshot']) if row else OrderBook(token_id)
+
+        with _books_lock:
+            if token_id not in _books:
+                trading_book = TradingBook(book, token)
+                if row:
+                    trading_book.pending_settlement = list(row.get('pending_settlement') or [])
+                    print(f"📖 Restored order book for {token_id}: {len(book.open_orders())} open orders")
+                _books[token_id] = trading_book
+            _start_snapshotter(self.supabase)
+            return _books[token_id]
+
+    def _resolve_wallet(self, wallet_address: str) -> Dict[str, Any]:
+        result = self.supabase.table('user_wallets').select('id, user_id').eq('wallet_address', wallet_address).execute()
+        if not result.data:
+            raise Exception("Wallet not found. Please register first.")
+        return result.data[0]
+
+    def _held_shares(self, token_id: str, wallet_address: str) -> int:
+        holder = self.cap_tables.get(token_id).holder(wallet_address)
+        return holder['shares'] if holder else 0
+
+    def _settlement_row(self, trading_book: TradingBook, fill: Dict[str, Any]) -> Dict[str, Any]:
+        """The share leg of a fill. No funds are reserved or moved: payment_amount
+        is what the buyer owes and the row stays pending with no payment_tx."""
+        token = trading_book.token
+        asset = token.get('assets') or {}
+        price_usd = to_usd(fill['price'])
+        total_supply = token.get('total_supply')
+        return {
+            'id': fill['trade_id'],
+            'transaction_type': TRANSACTION_TYPE_TRADE,
+            'asset_id': asset.get('id') or token.get('asset_id'),
+            'token_id': fill['token_id'],
+            'asset_name': asset.get('name'),
+            'asset_category': asset.get('category'),
+            'buyer_user_id': fill['buyer_user_id'],
+            'buyer_wallet_id': fill['buyer_wallet_id'],
+            'buyer_wallet_address': fill['buyer_wallet_address'],
+            'seller_user_id': fill['seller_user_id'],
+            'seller_wallet_id': fill['seller_wallet_id'],
+            'seller_wallet_address': fill['seller_wallet_address'],
+            'shares_amount': fill['quantity'],
+            'share_price_usd': price_usd,
+            'total_cost_usd': round(price_usd * fill['quantity'], 6),
+            'purchase_percentage': (fill['quantity'] / total_supply) * 100 if total_supply else None,
+            'payment_method': 'secondary_market',
+            'payment_amount': round(price_usd * fill['quantity'], 6),
+            'payment_tx': None,
+            'vault_reward_amount': 0,
+            'transaction_date': fill['executed_at'],
+            'status': TRADE_SETTLEMENT_STATUS
+        }
+
+    def _apply_fills(self, trading_book: TradingBook, fills: List[Dict[str, Any]]):
+        """Called under the book lock so the next sell check sees the new holdings"""
+        rows = [self._settlement_row(trading_book, fill) for fill in fills]
+        for row in rows:
+            self.cap_tables.record(row)
+        with trading_book.settle_lock:
+            trading_book.pending_settlement.extend(rows)
+
+    def settle(self, trading_book: TradingBook) -> int:
+        """Insert pending trades into asset_transactions; failed ones stay queued"""
+        with trading_book.settle_lock:
+            rows = trading_book.pending_settlement
+            trading_book.pending_settlement = []
+        if not rows:
+            return 0
+        try:
+            self.supabase.table('asset_transactions').upsert(rows, on_conflict='id', ignore_duplicates=True).execute()
+            return len(rows)
+        except Exception as e:
+            print(f"⚠️ Trade settlement failed, {len(rows)} trades queued for retry: {e}")
+            with trading_book.settle_lock:
+                trading_book.pending_settlement = rows + trading_book.pending_settlement
+            return 0
+
+    def _format_order(self, order: Order) -> Dict[str, Any]:
+        data = order.to_dict()
+        data['price_usd'] = to_usd(order.price)
+        return data
+
+    def _format_fills(self, fills: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return [{**fill, 'price_usd': to_usd(fill['price'])} for fill in fills]
+
+    def place_order(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Submit a limit or market order; returns the order and any fills"""
+        try:
+            side = data.get('side')
+            order_type = data.get('order_type', ORDER_LIMIT)
+            if side not in (SIDE_BUY, SIDE_SELL):
+                raise Exception("side must be 'buy' or 'sell'")
+            if order_type not in (ORDER_LIMIT, ORDER_MARKET):
+                raise Exception("order_type must be 'limit' or 'market'")
+
+            quantity = int(data['quantity'])
+            price = to_ticks(data['price_usd']) if order_type == ORDER_LIMIT and data.get('price_usd') is not None else None
+            wallet = self._resolve_wallet(data['wallet_address'])
+            trading_book = self.get_book(data['token_id'])
+            self.cap_tables.ensure_fresh()
+
+            order = Order(side, order_type, quantity, data['wallet_address'], price,
+                          user_id=wallet['user_id'], wallet_id=wallet['id'])
+
+            book = trading_book.book
+            with book.lock:
+                sell_limit = self._held_shares(book.token_id, order.wallet_address) if side == SIDE_SELL else None
+                fills = book.submit(order, sell_limit=sell_limit)
+                self._apply_fills(trading_book, fills)
+                result = {'order': self._format_order(order), 'fills': self._format_fills(fills)}
+
+            if fills:
+                print(f"🤝 {len(fills)} fills on {book.token_id} for order {order.id}")
+                self.settle(trading_book)
+            return result
+        except OrderRejected as e:
+            raise Exception(f"Order rejected: {str(e)}")
+        except Exception as e:
+            raise Exception(f"Place order error: {str(e)}")
+
+    def _owned_order(self, book: OrderBook, order_id: str, wallet_address: str) -> Order:
+        order = book.get_order(order_id)
+        if order is None:
+            raise Exception("Order is not open")
+        if order.wallet_address != wallet_address:
+            raise Exception("Order belongs to another wallet")
+        return order
+
+    def cancel_order(self, token_id: str, order_id: str, wallet_address: str) -> Dict[str, Any]:
+        try:
+            book = self.get_book(token_id).book
+            with book.lock:
+                self._owned_order(book, order_id, wallet_address)
+                return self._format_order(book.cancel(order_id))
+        except Exception as e:
+            raise Exception(f"Cancel order error: {str(e)}")
+
+    def replace_order(self, token_id: str, order_id: str, wallet_address: str, price_usd: float = None,
+                      quantity: int = None) -> Dict[str, Any]:
+        """Change a resting order's price and/or remaining quantity"""
+        try:
+            trading_book = self.get_book(token_id)
+            book = trading_book.book
+            with book.lock:
+                order = self._owned_order(book, order_id, wallet_address)
+                sell_limit = self._held_shares(token_id, wallet_address) if order.side == SIDE_SELL else None
+                result = book.replace(order_id, price=to_ticks(price_usd) if price_usd is not None else None,
+                                      quantity=int(quantity) if quantity is not None else None, sell_limit=sell_limit)
+                self._apply_fills(trading_book, result['fills'])
+                response = {
+                    'order': self._format_order(result['order']),
+                    'cancelled': self._format_order(result['cancelled']) if result['cancelled'] else None,
+                    'fills': self._format_fills(result['fills'])
+                }
+
+            if result['fills']:
+                self.settle(trading_book)
+            return response
+        except OrderRejected as e:
+            raise Exception(f"Order rejected: {str(e)}")
+        except Exception as e:
+            raise Exception(f"Replace order error: {str(e)}")
+
+    def get_depth(self, token_id: str, levels: int = 10) -> Dict[str, Any]:
+        book = self.get_book(token_id).book
+        with book.lock:
+            depth = book.depth(levels)
+            best_bid, best_ask = book.best_bid(), book.best_ask()
+        return {
+            'token_id': token_id,
+            'bids': [[to_usd(price), shares] for price, shares in depth['bids']],
+            'asks': [[to_usd(price), shares] for price, shares in depth['asks']],
+            'best_bid': to_usd(best_bid),
+            'best_ask': to_usd(best_ask),
+            'spread': to_usd(best_ask - best_bid) if best_bid is not None and best_ask is not None else None
+        }
+
+    def get_open_orders(self, token_id: str, wallet_address: str = None) -> List[Dict[str, Any]]:
+        book = self.get_book(token_id).book
+        with book.lock:
+            return [self._format_order(order) for order in book.open_orders(wallet_address)]
+
+    def get_trades(self, token_id: str, limit: int = 50) -> List[Dict[str, Any]]:
+        try:
+            result = self.supabase.table('asset_transactions').select(
+                'id, shares_amount, share_price_usd, buyer_wallet_address, seller_wallet_address, transaction_date'
+            ).eq('token_id', token_id).eq('transaction_type', TRANSACTION_TYPE_TRADE).order(
+                'transaction_date', desc=True
+            ).limit(limit).execute()
+            return result.data
+        except Exception as e:
+            raise Exception(f"Get trades error: {str(e)}")
+
+    def save_snapshot(self, trading_book: TradingBook) -> bool:
+        """Persist resting orders and unsettled trades if the book changed"""
+        self.settle(trading_book)
+        book = trading_book.book
+        with book.lock:
+            if book.version == trading_book.saved_version and not trading_book.pending_settlement:
+                return False
+            snapshot = book.snapshot()
+        with trading_book.settle_lock:
+            pending = list(trading_book.pending_settlement)
+
+        self.supabase.table('order_book_snapshots').upsert({
+            'token_id': book.token_id,
+            'version': snapshot['version'],
+            'snapshot': snapshot,
+            'pending_settlement': pending,
+            'updated_at': datetime.now().isoformat()
+        }, on_conflict='token_id').execute()
+        trading_book.saved_version = snapshot['version']
+        return True
+
+def save_all_snapshots(supabase: Client) -> int:
+    """Settle and snapshot every book in this process"""
+    service = TradingService(supabase)
+    with _books_lock:
+        books = list(_books.values())
+    saved = 0
+    for trading_book in books:
+        try:
+            saved += service.save_snapshot(trading_book)
+        except Exception as e:
+            print(f"⚠️ Order book snapshot failed for {trading_book.book.token_id}: {e}")
+    return saved
+
+def _start_snapshotter(supabase: Client):
+    """Background snapshots for this process's books; call with _books_lock held"""
+    global _snapshotter
+    if _snapshotter is not None or ORDER_BOOK_SNAPSHOT_INTERVAL <= 0:
+        return
+
+    def run():
+        while not _snapshotter_stop.wait(ORDER_BOOK_SNAPSHOT_INTERVAL):
+            save_all_snapshots(supabase)
+
+    _snapshotter = threading.Thread(target=run, name='order-book-snapshots', daemon=True)
+    _snapshotter.start()
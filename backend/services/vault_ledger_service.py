@@ -0,0 +1,218 @@
+from supabase import Client
+from typing import List, Dict, Any, Optional
+
+from services.leaderboard import get_leaderboard_index
+
+# Entry types written by the reward paths
+ENTRY_ASSET_TOKENIZATION = 'asset_tokenization'
+ENTRY_ASSET_LISTING = 'asset_listing'
+ENTRY_ASSET_PURCHASE = 'asset_purchase'
+ENTRY_WELCOME_BONUS = 'welcome_bonus'
+
+class VaultLedgerService:
+    """Append-only VAULT ledger with balances materialized in vault_balances.
+
+    Every change goes through the vault_ledger_append SQL function, which
+    locks the user's balance row, appends the entry and moves the balance
+    in one transaction. Balance reads are a single-row lookup.
+    """
+
+    PAGE_SIZE = 1000
+
+    def __init__(self, supabase: Client):
+        self.supabase = supabase
+
+    def _append(self, user_id: str, amount: float, entry_type: str, reference_id: str = None,
+                idempotency_key: str = None) -> Dict[str, Any]:
+        result = self.supabase.rpc('vault_ledger_append', {
+            'p_user_id': user_id,
+            'p_amount': amount,
+            'p_entry_type': entry_type,
+            'p_reference_id': reference_id,
+            'p_idempotency_key': idempotency_key
+        }).execute()
+
+        if not result.data:
+            raise Exception("Ledger append returned no entry")
+
+        entry = result.data[0]
+        return {
+            'entry_id': entry['entry_id'],
+            'balance': float(entry['balance']),
+            'total_earned': float(entry['total_earned']),
+            'duplicate': entry['duplicate']
+        }
+
+    def credit(self, user_id: str, amount: float, entry_type: str, reference_id: str = None,
+               idempotency_key: str = None) -> Dict[str, Any]:
+        """Add VAULT to a user's balance; safe to retry with the same idempotency_key"""
+        try:
+            if amount <= 0:
+                raise Exception("Credit amount must be positive")
+            entry = self._append(user_id, amount, entry_type, reference_id, idempotency_key)
+            if not entry['duplicate']:
+                get_leaderboard_index(self.supabase).record(entry['entry_id'], user_id, amount)
+            return entry
+        except Exception as e:
+            raise Exception(f"Ledger credit error: {str(e)}")
+
+    def debit(self, user_id: str, amount: float, entry_type: str, reference_id: str = None,
+              idempotency_key: str = None) -> Dict[str, Any]:
+        """Take VAULT from a user's balance; fails if it would go negative"""
+        try:
+            if amount <= 0:
+                raise Exception("Debit amount must be positive")
+            return self._append(user_id, -amount, entry_type, reference_id, idempotency_key)
+        except Exception as e:
+            raise Exception(f"Ledger debit error: {str(e)}")
+
+    def resolve_user_id(self, wallet_address: str) -> Optional[str]:
+        result = self.supabase.table('user_wallets').select('user_id').eq('wallet_address', wallet_address).execute()
+        return result.data[0]['user_id'] if result.data else None
+
+    def credit_wallet(self, wallet_address: str, amount: float, entry_type: str, reference_id: str = None,
+                      idempotency_key: str = None) -> Optional[Dict[str, Any]]:
+        """Credit the user owning wallet_address; None if the wallet isn't registered"""
+        user_id = self.resolve_user_id(wallet_address)
+        if not user_id:
+            print(f"⚠️ No user for wallet {wallet_address}, VAULT reward not added to ledger")
+            return None
+        return self.credit(user_id, amount, entry_type, reference_id, idempotency_key)
+
+    def get_balance(self, user_id: str) -> Dict[str, Any]:
+        """Current balance and lifetime earnings, read from the materialized row"""
+        try:
+            result = self.supabase.table('vault_balances').select(
+                'balance, total_earned, last_entry_id, updated_at'
+            ).eq('user_id', user_id).execute()
+
+            if not result.data:
+                return {'user_id': user_id, 'balance': 0.0, 'total_earned': 0.0, 'last_entry_id': None}
+
+            row = result.data[0]
+            return {
+                'user_id': user_id,
+                'balance': float(row['balance'] or 0),
+                'total_earned': float(row.get('total_earned') or 0),
+                'last_entry_id': row.get('last_entry_id'),
+                'updated_at': row.get('updated_at')
+            }
+        except Exception as e:
+            raise Exception(f"Get ledger balance error: {str(e)}")
+
+    def get_wallet_balance(self, wallet_address: str) -> Dict[str, Any]:
+        user_id = self.resolve_user_id(wallet_address)
+        if not user_id:
+            return {'user_id': None, 'balance': 0.0, 'total_earned': 0.0, 'last_entry_id': None}
+        return self.get_balance(user_id)
+
+    def get_entries(self, user_id: str, limit: int = 50, before_id: int = None) -> List[Dict[str, Any]]:
+        """Newest-first page of a user's entries; pass the last id seen as before_id"""
+        try:
+            query = self.supabase.table('vault_ledger_entries').select('*').eq('user_id', user_id)
+            if before_id is not None:
+                query = query.lt('id', before_id)
+            result = query.order('id', desc=True).limit(limit).execute()
+            return result.data
+        except Exception as e:
+            raise Exception(f"Get ledger entries error: {str(e)}")
+
+    def create_checkpoint(self) -> int:
+        """Snapshot every balance that moved since its last checkpoint"""
+        try:
+            result = self.supabase.rpc('vault_ledger_checkpoint', {}).execute()
+            count = result.data if isinstance(result.data, int) else 0
+            print(f"📌 Checkpointed {count} VAULT balances")
+            return count
+        except Exception as e:
+            raise Exception(f"Ledger checkpoint error: {str(e)}")
+
+    def _latest_checkpoint(self, user_id: str) -> Optional[Dict[str, Any]]:
+        result = self.supabase.table('vault_ledger_checkpoints').select('*').eq(
+            'user_id', user_id
+        ).order('last_entry_id', desc=True).limit(1).execute()
+        return result.data[0] if result.data else None
+
+    def _entries_after(self, user_id: str, after_id: int):
+        """All of a user's entries with id > after_id, oldest first, a page at a time"""
+        while True:
+            result = self.supabase.table('vault_ledger_entries').select(
+                'id, amount, balance_after'
+            ).eq('user_id', user_id).gt('id', after_id).order('id').limit(self.PAGE_SIZE).execute()
+
+            for entry in result.data:
+                yield entry
+            if len(result.data) < self.PAGE_SIZE:
+                return
+            after_id = result.data[-1]['id']
+
+    def replay(self, user_id: str, from_checkpoint: bool = True) -> Dict[str, Any]:
+        """Recompute a balance from the entries (after the latest checkpoint by default).
+
+        Also checks that each entry's balance_after follows from the one before
+        it, which catches entries written outside vault_ledger_append.
+        """
+        try:
+            checkpoint = self._latest_checkpoint(user_id) if from_checkpoint else None
+            balance = float(checkpoint['balance']) if checkpoint else 0.0
+            total_earned = float(checkpoint['total_earned']) if checkpoint else 0.0
+            last_entry_id = checkpoint['last_entry_id'] if checkpoint else 0
+
+            broken_entries = []
+            replayed = 0
+            for entry in self._entries_after(user_id, last_entry_id):
+                amount = float(entry['amount'])
+                balance += amount
+                total_earned += max(amount, 0)
+                if abs(balance - float(entry['balance_after'])) > 1e-6:
+                    broken_entries.append(entry['id'])
+                last_entry_id = entry['id']
+                replayed += 1
+
+            return {
+                'user_id': user_id,
+                'balance': round(balance, 6),
+                'total_earned': round(total_earned, 6),
+                'last_entry_id': last_entry_id or None,
+                'entries_replayed': replayed,
+                'from_checkpoint': checkpoint['id'] if checkpoint else None,
+                'broken_entries': broken_entries
+            }
+        except Exception as e:
+            raise Exception(f"Ledger replay error: {str(e)}")
+
+    def verify(self, user_id: str, from_checkpoint: bool = True) -> Dict[str, Any]:
+        """Compare the materialized balance row with a replay of the ledger"""
+        stored = self.get_balance(user_id)
+        replayed = self.replay(user_id, from_checkpoint)
+
+        ok = (abs(stored['balance'] - replayed['balance']) <= 1e-6 and
+              abs(stored['total_earned'] - replayed['total_earned']) <= 1e-6 and
+              stored['last_entry_id'] == replayed['last_entry_id'] and
+              not replayed['broken_entries'])
+
+        return {'ok': ok, 'stored': stored, 'replayed': replayed}
+
+    def rebuild_balance(self, user_id: str) -> Dict[str, Any]:
+        """Overwrite the materialized balance with the sum of all entries"""
+        try:
+            result = self.supabase.rpc('vault_ledger_rebuild_balance', {'p_user_id': user_id}).execute()
+            row = result.data[0] if result.data else {}
+            print(f"🔧 Rebuilt VAULT balance for {user_id}: {row.get('balance')}")
+            return row
+        except Exception as e:
+            raise Exception(f"Ledger rebuild error: {str(e)}")
+
+    def list_accounts(self):
+        """Every user id with a balance row, a page at a time"""
+        offset = 0
+        while True:
+            result = self.supabase.table('vault_balances').select('user_id').order(
+                'user_id'
+            ).range(offset, offset + self.PAGE_SIZE - 1).execute()
+
+            for row in result.data:
+                yield row['user_id']
+            if len(result.data) < self.PAGE_SIZE:
+                return
+            offset += self.PAGE_SIZE
@@ -1,13 +1,35 @@
 from supabase import Client
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
+import os
+import time
 import uuid
 from datetime import datetime
-import requests
+from utils.http_client import get_session
+from utils.resilience import guarded_call
+from utils.instrumentation import record_cache
+from services.vault_ledger_service import VaultLedgerService, ENTRY_WELCOME_BONUS, ENTRY_ASSET_PURCHASE
+from services.inventory_service import InventoryService
+from services.cap_table import get_cap_table_index
+from services.portfolio_service import PortfolioService
+from services.marketplace_index import LISTING_COLUMNS, build_listing, get_marketplace_index
+
+COINGECKO_PRICE_URL = os.getenv('COINGECKO_PRICE_URL', 'https://api.coingecko.com/api/v3/simple/price?ids=solana&vs_currencies=usd')
+SOL_PRICE_TTL = int(os.getenv('SOL_PRICE_TTL', 30))
+FALLBACK_SOL_PRICE = 100.0
+
+# Last good SOL/USD quote, shared by every WalletService in the process
+_sol_price_cache = {'price': None, 'fetched_at': 0.0}
 
 class WalletService:
+    # Pages up to this many listings look up the wallet's ownership of just those assets
+    OWNERSHIP_LOOKUP_LIMIT = 200
+    
     def __init__(self, supabase: Client, token_service=None):
         self.supabase = supabase
         self.token_service = token_service
+        self.ledger = VaultLedgerService(supabase)
+        self.inventory = InventoryService(supabase)
+        self.portfolio = PortfolioService(supabase)
     
     def register_user_with_wallet(self, user_data: Dict[str, Any]) -> Dict[str, Any]:
         """Register new user with their first wallet"""
@@ -161,6 +183,10 @@ class WalletService:
             }
             
             self.supabase.table('vault_rewards').insert(reward_data).execute()
+            self.ledger.credit(
+                user_id, 50, ENTRY_WELCOME_BONUS,
+                reference_id=reward_data['id'], idempotency_key=f"{ENTRY_WELCOME_BONUS}:{user_id}"
+            )
             
             return {'amount': 50, 'tx': bonus_tx, 'message': 'Welcome bonus sent!'}
             
@@ -168,8 +194,13 @@ class WalletService:
             print(f"Welcome bonus failed: {e}")
             return {'amount': 0, 'tx': None}
     
-    def buy_asset_with_complete_tracking(self, purchase_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Buy asset with complete user and transaction tracking"""
+    def buy_asset_with_complete_tracking(self, purchase_data: Dict[str, Any], defer_mints: bool = False) -> Dict[str, Any]:
+        """Buy asset with complete user and transaction tracking.
+
+        With defer_mints the asset and VAULT mints are queued as background
+        jobs; the transaction stays 'pending' until the asset mint lands.
+        """
+        reservation = None
         try:
             wallet_address = purchase_data['wallet_address']
             token_id = purchase_data['token_id']
@@ -209,23 +240,33 @@ class WalletService:
             print(f"📦 Asset: {asset['name']} | Shares: {shares_to_buy}")
             print(f"💰 Cost: ${total_cost_usd:.2f} | VAULT Reward: {vault_reward_amount:.2f}")
             
+            # Hold the shares before taking payment so concurrent buyers can't oversell
+            reservation = self.inventory.reserve(token_id, shares_to_buy, wallet_address)
+            
             # Process payment (simplified for now)
             payment_tx = f"{payment_method}_payment_{str(uuid.uuid4())[:8]}"
             
-            # Mint asset tokens to buyer
-            asset_mint_tx = self.token_service.mint_fractional_tokens(
-                token_id=token_id,
-                recipient_wallet=wallet_address,
-                amount=shares_to_buy
-            )
-            
-            # Mint VAULT reward
-            vault_reward_tx = self.token_service.mint_vault_reward(
-                recipient_wallet=wallet_address,
-                amount=vault_reward_amount,
-                reason="asset_purchase",
-                asset_id=asset['id']
-            )
+            if defer_mints:
+                # Fail fast on bad input before anything is recorded; the
+                # worker writes the signatures back once the mints land
+                self.token_service.validate_fractional_mint(token_id, wallet_address)
+                asset_mint_tx = None
+                vault_reward_tx = None
+            else:
+                # Mint asset tokens to buyer
+                asset_mint_tx = self.token_service.mint_fractional_tokens(
+                    token_id=token_id,
+                    recipient_wallet=wallet_address,
+                    amount=shares_to_buy
+                )
+                
+                # Mint VAULT reward
+                vault_reward_tx = self.token_service.mint_vault_reward(
+                    recipient_wallet=wallet_address,
+                    amount=vault_reward_amount,
+                    reason="asset_purchase",
+                    asset_id=asset['id']
+                )
             
             # Create complete transaction record using new asset_transactions table
             transaction_data = {
@@ -267,14 +308,10 @@ class WalletService:
                 'asset_mint_tx': asset_mint_tx,
                 
                 'transaction_date': datetime.now().isoformat(),
-                'status': 'completed'
+                'status': 'pending' if defer_mints else 'completed'
             }
             
-            # Store transaction
-            transaction_result = self.supabase.table('asset_transactions').insert(transaction_data).execute()
-            transaction_record = transaction_result.data[0]
-            
-            # Store VAULT reward record
+            # VAULT reward record
             reward_data = {
                 'id': str(uuid.uuid4()),
                 'user_id': buyer_user['id'],
@@ -285,12 +322,71 @@ class WalletService:
                 'reason': f'Purchase reward for {asset["name"]}',
                 'asset_id': asset['id'],
                 'token_id': token_id,
-                'transaction_id': transaction_record['id'],
+                'transaction_id': transaction_data['id'],
                 'blockchain_tx': vault_reward_tx,
                 'created_at': datetime.now().isoformat()
             }
             
-            self.supabase.table('vault_rewards').insert(reward_data).execute()
+            # Everything that can still fail and be undone comes first: the
+            # records, then both mint jobs in one insert. Past that the
+            # purchase stands, and the shares are confirmed sold.
+            recorded = []
+            jobs = {}
+            try:
+                transaction_result = self.supabase.table('asset_transactions').insert(transaction_data).execute()
+                transaction_record = transaction_result.data[0]
+                recorded.append(('asset_transactions', transaction_record['id']))
+                
+                self.supabase.table('vault_rewards').insert(reward_data).execute()
+                recorded.append(('vault_rewards', reward_data['id']))
+                
+                if defer_mints:
+                    asset_job, reward_job = self.token_service.jobs.enqueue_many([
+                        self.token_service.fractional_mint_job(
+                            token_id, wallet_address, shares_to_buy,
+                            targets=[{
+                                'table': 'asset_transactions', 'id': transaction_record['id'],
+                                'column': 'asset_mint_tx', 'values': {'status': 'completed'}
+                            }]
+                        ),
+                        self.token_service.vault_reward_job(
+                            wallet_address, vault_reward_amount, "asset_purchase", asset['id'],
+                            targets=[
+                                {'table': 'asset_transactions', 'id': transaction_record['id'], 'column': 'vault_reward_tx'},
+                                {'table': 'vault_rewards', 'id': reward_data['id'], 'column': 'blockchain_tx'}
+                            ]
+                        )
+                    ])
+                    jobs = {
+                        'asset_mint_job_id': asset_job['id'],
+                        'vault_reward_job_id': reward_job['id']
+                    }
+            except Exception:
+                if defer_mints:
+                    # Nothing was minted; don't leave a pending purchase no job will finish
+                    self._discard_records(recorded)
+                elif recorded:
+                    # The mints already landed and the purchase is on record
+                    self.inventory.confirm(reservation)
+                    reservation = None
+                raise
+            
+            # Shares are sold once the transaction is on record
+            self.inventory.confirm(reservation)
+            reservation = None
+            get_cap_table_index(self.supabase).record(transaction_record)
+            
+            if vault_reward_amount > 0:
+                idempotency_key = f"{ENTRY_ASSET_PURCHASE}:{transaction_record['id']}"
+                try:
+                    self.ledger.credit(
+                        buyer_user['id'], vault_reward_amount, ENTRY_ASSET_PURCHASE,
+                        reference_id=reward_data['id'], idempotency_key=idempotency_key
+                    )
+                except Exception as ledger_error:
+                    # The purchase is recorded; failing it now would invite a duplicate retry.
+                    # Crediting again with the same key is safe.
+                    print(f"🚨 VAULT ledger credit {idempotency_key} failed after purchase: {ledger_error}")
             
             # Asset ownership is automatically updated by database trigger
             
@@ -314,12 +410,26 @@ class WalletService:
                 'blockchain': {
                     'asset_mint_tx': asset_mint_tx,
                     'vault_reward_tx': vault_reward_tx
-                }
+                },
+                'jobs': jobs
             }
             
         except Exception as e:
+            if reservation:
+                try:
+                    self.inventory.release(reservation)
+                except Exception as release_error:
+                    print(f"⚠️ Could not release share reservation (it will expire): {release_error}")
             raise Exception(f"Buy asset with tracking error: {str(e)}")
     
+    def _discard_records(self, recorded: List[Tuple[str, str]]):
+        """Delete rows written by a purchase that didn't go through, newest first"""
+        for table, row_id in reversed(recorded):
+            try:
+                self.supabase.table(table).delete().eq('id', row_id).execute()
+            except Exception as e:
+                print(f"⚠️ Could not remove {table} row {row_id} of a failed purchase: {e}")
+    
     def get_user_complete_profile(self, user_id: str = None, wallet_address: str = None) -> Dict[str, Any]:
         """Get complete user profile with all transactions and ownership"""
         try:
@@ -348,35 +458,36 @@ class WalletService:
             wallets = wallets_result['data']
             primary_wallet = next((w for w in wallets if w['is_primary']), wallets[0] if wallets else None)
             
-            # Get all transactions
+            # Get recent transactions (totals come from the portfolio summary;
+            # full history is paged by /users/<id>/transactions)
             transactions_result = self.supabase.table('asset_transactions').select(
                 '*, assets(name, category), tokens(mint_address)'
-            ).eq('buyer_user_id', user_id).order('transaction_date', desc=True).execute()
+            ).eq('buyer_user_id', user_id).order('transaction_date', desc=True).limit(50).execute()
             
-            # Get all VAULT rewards
+            # Get recent VAULT rewards (lifetime total comes from the ledger)
             vault_rewards_result = self.supabase.table('vault_rewards').select(
                 '*, assets(name)'
-            ).eq('user_id', user_id).order('created_at', desc=True).execute()
+            ).eq('user_id', user_id).order('created_at', desc=True).limit(50).execute()
             
             # Get asset ownership
             ownership_result = self.supabase.table('asset_ownership').select(
                 '*, assets(name, category, valuation), tokens(mint_address)'
             ).eq('user_id', user_id).execute()
             
-            # Calculate totals
-            total_invested = sum(t['total_cost_usd'] for t in transactions_result.data)
-            total_vault_earned = sum(r['vault_amount'] for r in vault_rewards_result.data)
-            total_assets_owned = len(ownership_result.data)
+            # Totals are maintained per user as transactions are written
+            portfolio = self.portfolio.get_summary(user_id)
             
             return {
                 'user': user,
                 'wallets': wallets,
                 'primary_wallet': primary_wallet,
                 'stats': {
-                    'total_transactions': len(transactions_result.data),
-                    'total_invested_usd': total_invested,
-                    'total_vault_earned': total_vault_earned,
-                    'total_assets_owned': total_assets_owned
+                    'total_transactions': portfolio['purchases_count'],
+                    'total_invested_usd': portfolio['total_invested_usd'],
+                    'total_vault_earned': portfolio['total_vault_earned'],
+                    'total_assets_owned': portfolio['assets_owned'],
+                    'cost_basis_usd': portfolio['cost_basis_usd'],
+                    'realized_pnl_usd': portfolio['realized_pnl_usd']
                 },
                 'transactions': transactions_result.data,
                 'vault_rewards': vault_rewards_result.data,
@@ -390,65 +501,76 @@ class WalletService:
         """Get marketplace with wallet-specific info"""
         try:
             # Get all available tokens
-            tokens_result = self.supabase.table('tokens').select(
-                '*, assets(name, description, category, valuation, image_url)'
-            ).neq('asset_id', None).execute()  # Exclude platform tokens
-            
-            marketplace_items = []
-            user_ownership = {}
-            
-            # If wallet provided, get user's ownership data
-            if wallet_address:
-                wallet_result = self.supabase.table('user_wallets').select('user_id').eq('wallet_address', wallet_address).execute()
-                if wallet_result.data:
-                    user_id = wallet_result.data[0]['user_id']
-                    ownership_result = self.supabase.table('asset_ownership').select('*').eq('user_id', user_id).execute()
-                    user_ownership = {o['asset_id']: o for o in ownership_result.data}
-            
-            for token in tokens_result.data:
-                asset = token['assets']
-                
-                # Calculate pricing
-                share_price_usd = asset['valuation'] / token['total_supply'] if token['total_supply'] > 0 else 0
-                sol_price = self._get_sol_price()
-                share_price_sol = share_price_usd / sol_price
-                
-                # Check user ownership
-                ownership = user_ownership.get(asset['id'], {})
-                user_shares = ownership.get('shares_owned', 0)
-                user_percentage = ownership.get('ownership_percentage', 0)
-                
-                marketplace_item = {
-                    'token_id': token['id'],
-                    'asset_id': asset['id'],
-                    'asset_name': asset['name'],
-                    'asset_description': asset['description'],
-                    'asset_category': asset['category'],
-                    'asset_image': asset.get('image_url'),
-                    'asset_valuation': asset['valuation'],
-                    'token_symbol': token.get('symbol', 'AST'),
-                    'total_shares': token['total_supply'],
-                    'share_price_usd': round(share_price_usd, 2),
-                    'share_price_sol': round(share_price_sol, 4),
-                    'min_investment_usd': round(share_price_usd, 2),
-                    'min_investment_sol': round(share_price_sol, 4),
-                    'user_ownership': user_shares,
-                    'ownership_percentage': round(user_percentage, 4),
-                    'can_afford_sol': True,  # You could check user's SOL balance here
-                    'vault_reward_estimate': round((1 / token['total_supply']) * 100, 4)  # VAULT reward for buying 1 share
-                }
-                
-                marketplace_items.append(marketplace_item)
+            tokens_result = self.supabase.table('tokens').select(LISTING_COLUMNS).neq(
+                'asset_id', None
+            ).execute()  # Exclude platform tokens
             
-            return marketplace_items
+            listings = [build_listing(token) for token in tokens_result.data]
+            return self._personalize_listings([listing for listing in listings if listing], wallet_address)
             
         except Exception as e:
             raise Exception(f"Get marketplace error: {str(e)}")
     
-    def _get_sol_price(self) -> float:
-        """Get current SOL/USD price"""
+    def search_marketplace(self, wallet_address: str = None, **filters) -> Dict[str, Any]:
+        """Filtered, sorted page of the marketplace with facet counts (see MarketplaceIndex.query)"""
         try:
-            response = requests.get('https://api.coingecko.com/api/v3/simple/price?ids=solana&vs_currencies=usd', timeout=5)
-            return response.json()['solana']['usd']
-        except:
-            return 100.0  # Fallback price
\ No newline at end of file
+            result = get_marketplace_index(self.supabase).query(**filters)
+            result['listings'] = self._personalize_listings(result['listings'], wallet_address)
+            return result
+        except Exception as e:
+            raise Exception(f"Search marketplace error: {str(e)}")
+    
+    def _personalize_listings(self, listings: List[Dict[str, Any]], wallet_address: str = None) -> List[Dict[str, Any]]:
+        """Add SOL pricing and the wallet's ownership to marketplace listings"""
+        user_ownership = {}
+        
+        # If wallet provided, get user's ownership data
+        if wallet_address:
+            wallet_result = self.supabase.table('user_wallets').select('user_id').eq('wallet_address', wallet_address).execute()
+            if wallet_result.data:
+                user_id = wallet_result.data[0]['user_id']
+                query = self.supabase.table('asset_ownership').select('*').eq('user_id', user_id)
+                if len(listings) <= self.OWNERSHIP_LOOKUP_LIMIT:
+                    query = query.in_('asset_id', list({listing['asset_id'] for listing in listings}))
+                ownership_result = query.execute()
+                user_ownership = {o['asset_id']: o for o in ownership_result.data}
+        
+        sol_price = self._get_sol_price()
+        marketplace_items = []
+        for listing in listings:
+            share_price_usd = listing['asset_valuation'] / listing['total_shares'] if listing['total_shares'] > 0 else 0
+            share_price_sol = share_price_usd / sol_price
+            
+            # Check user ownership
+            ownership = user_ownership.get(listing['asset_id'], {})
+            user_shares = ownership.get('shares_owned', 0)
+            user_percentage = ownership.get('ownership_percentage', 0)
+            
+            marketplace_items.append({
+                **listing,
+                'share_price_sol': round(share_price_sol, 4),
+                'min_investment_sol': round(share_price_sol, 4),
+                'user_ownership': user_shares,
+                'ownership_percentage': round(user_percentage, 4),
+                'can_afford_sol': True  # You could check user's SOL balance here
+            })
+        
+        return marketplace_items
+    
+    def _get_sol_price(self) -> float:
+        """Get current SOL/USD price, served from cache for SOL_PRICE_TTL seconds"""
+        cached = _sol_price_cache['price']
+        fresh = cached is not None and time.time() - _sol_price_cache['fetched_at'] < SOL_PRICE_TTL
+        record_cache('sol_price', fresh)
+        if fresh:
+            return cached
+        
+        def fetch():
+            response = get_session(COINGECKO_PRICE_URL, 'coingecko').get(COINGECKO_PRICE_URL, timeout=5)
+            response.raise_for_status()
+            price = float(response.json()['solana']['usd'])
+            _sol_price_cache.update(price=price, fetched_at=time.time())
+            return price
+        
+        # While CoinGecko's circuit is open, the stale quote (or fallback) comes back at once
+        return guarded_call('coingecko', fetch, fallback=lambda: _sol_price_cache['price'] or FALLBACK_SOL_PRICE)
\ No newline at end of file
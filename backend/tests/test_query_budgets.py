@@ -0,0 +1,56 @@
+"""Query budgets for hot read paths, run against the benchmark stand-ins.
+
+A budget failing means the route now makes more Supabase calls than it
+did, or repeats one call shape per row (an N+1).
+"""
+import pytest
+
+from benchmarks.fake_supabase import FakeDatabase, FakeSupabaseServer
+from benchmarks.run import build_app
+from benchmarks.scenarios import seed_database, seeded_mints
+from benchmarks.stub_rpc import StubRpcServer
+from utils.request_tracer import assert_max_queries
+
+SEED = 7
+ASSETS = 30
+
+MARKETPLACE_QUERY_BUDGET = 3
+WALLET_TOKENS_QUERY_BUDGET = 1
+
+@pytest.fixture(scope='module')
+def stand_ins():
+    db = FakeDatabase()
+    data = seed_database(db, users=20, assets=ASSETS, purchases_per_user=5, seed=SEED)
+    supabase = FakeSupabaseServer(db).start()
+    rpc = StubRpcServer(token_mints=seeded_mints(SEED, ASSETS), seed=SEED).start()
+    yield data, build_app(supabase.url, rpc.url)
+    rpc.stop()
+    supabase.stop()
+
+def test_marketplace_query_budget(stand_ins):
+    data, app = stand_ins
+    client = app.test_client()
+    for user in data.users[:3]:
+        response = assert_max_queries(client, f"/api/marketplace?wallet_address={user['wallet_address']}",
+                                      MARKETPLACE_QUERY_BUDGET)
+        assert response.status_code == 200
+
+def test_wallet_tokens_query_budget(stand_ins, monkeypatch):
+    data, app = stand_ins
+    from services.solana_service import SolanaService
+
+    # get_token_accounts doesn't query the chain yet; hold several seeded
+    # mints so the metadata lookup has to cover more than one token
+    mints = seeded_mints(SEED, ASSETS)[:5]
+    accounts = [{
+        'pubkey': f'account-{index}',
+        'account': {'data': {'parsed': {'info': {'mint': mint, 'tokenAmount': {'uiAmount': index + 1}}}}}
+    } for index, mint in enumerate(mints)]
+    monkeypatch.setattr(SolanaService, 'get_token_accounts', lambda self, owner_address: accounts)
+
+    response = assert_max_queries(app.test_client(), f"/api/wallets/{data.users[0]['wallet_address']}/tokens",
+                                  WALLET_TOKENS_QUERY_BUDGET)
+    assert response.status_code == 200
+    tokens = response.get_json()['data']
+    assert len(tokens) == len(mints)
+    assert not any(token.get('unknown_token') for token in tokens)
@@ -0,0 +1,86 @@
+import os
+import threading
+from typing import Dict
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from utils.resilience import budget_timeout
+from utils.rate_limit import get_limiter
+from utils.request_tracer import traced
+
+HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', 20))
+HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', 3.05))
+HTTP_READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', 10))
+HTTP_MAX_RETRIES = int(os.getenv('HTTP_MAX_RETRIES', 2))
+HTTP_BACKOFF_FACTOR = float(os.getenv('HTTP_BACKOFF_FACTOR', 0.3))
+
+class PooledSession(requests.Session):
+    """requests.Session that applies a default timeout to every call.
+
+    Inside a request with a deadline, both the connect and read timeouts are
+    capped by the remaining budget. With a limiter attached, every call waits
+    for a rate and concurrency slot for its upstream.
+    """
+
+    def __init__(self, timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT), limiter=None):
+        super().__init__()
+        self.timeout = timeout
+        self.limiter = limiter
+
+    def request(self, method, url, **kwargs):
+        timeout = kwargs.get('timeout') or self.timeout
+        if isinstance(timeout, tuple):
+            kwargs['timeout'] = tuple(budget_timeout(part) for part in timeout)
+        else:
+            kwargs['timeout'] = budget_timeout(timeout)
+        parsed = urlparse(url)
+        with traced('http', f"{method} {parsed.netloc}{parsed.path}"):
+            if self.limiter is not None:
+                return self.limiter.call(super().request, method, url, **kwargs)
+            return super().request(method, url, **kwargs)
+
+_sessions: Dict[str, PooledSession] = {}
+_sessions_lock = threading.Lock()
+
+def _host_key(url: str) -> str:
+    parsed = urlparse(url)
+    return f"{parsed.scheme}://{parsed.netloc}"
+
+def create_session(pool_size: int = HTTP_POOL_SIZE, max_retries: int = HTTP_MAX_RETRIES,
+                   limiter=None) -> PooledSession:
+    """Keep-alive session with a bounded connection pool and retry policy"""
+    session = PooledSession(limiter=limiter)
+
+    # Only connection failures and gateway errors are retried; signed
+    # transaction submissions are idempotent, so POST is safe to repeat
+    retry = Retry(
+        total=max_retries,
+        connect=max_retries,
+        read=0,
+        status=max_retries,
+        backoff_factor=HTTP_BACKOFF_FACTOR,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset(['GET', 'POST']),
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry, pool_block=False)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+def get_session(url: str, upstream: str = None) -> PooledSession:
+    """Process-wide pooled session for the upstream host of url.
+
+    upstream names the rate limit profile (see utils.rate_limit) the host's
+    calls are held to; the first caller for a host decides it.
+    """
+    key = _host_key(url)
+    with _sessions_lock:
+        if key not in _sessions:
+            limiter = get_limiter(key, upstream) if upstream else None
+            _sessions[key] = create_session(limiter=limiter)
+            print(f"🔌 Created pooled HTTP session for {key}")
+        return _sessions[key]
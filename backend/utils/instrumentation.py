@@ -0,0 +1,254 @@
+import os
+import time
+from datetime import datetime
+from typing import Any, Optional
+from urllib.parse import urlparse
+from flask import Response, g, jsonify, request
+from utils.request_tracer import REQUEST_TRACING, traced
+from utils.slow_log import SLOW_LOG_ENABLED, record_operation, strip_filter_values
+
+try:
+    import prometheus_client
+    from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, multiprocess
+    from prometheus_client.core import GaugeMetricFamily
+except ImportError:
+    prometheus_client = None
+
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() == 'true' and prometheus_client is not None
+# Set (by gunicorn.conf.py) when several worker processes write metrics to shared files
+MULTIPROCESS = bool(os.getenv('PROMETHEUS_MULTIPROC_DIR'))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Query builder methods that decide what a Supabase request does
+SUPABASE_OPERATIONS = ('select', 'insert', 'update', 'upsert', 'delete')
+# Builder methods that don't change a request's shape for N+1 detection
+SUPABASE_UNSHAPED = ('order', 'range', 'limit', 'offset', 'single', 'maybe_single')
+
+if METRICS_ENABLED:
+    HTTP_REQUESTS = Counter(
+        'vaulthive_http_requests_total', 'HTTP requests served',
+        ['blueprint', 'route', 'method', 'status']
+    )
+    HTTP_LATENCY = Histogram(
+        'vaulthive_http_request_seconds', 'Time to build a response',
+        ['blueprint', 'route', 'method', 'status'], buckets=LATENCY_BUCKETS
+    )
+    HTTP_IN_FLIGHT = Gauge(
+        'vaulthive_http_requests_in_flight', 'Requests being handled', ['blueprint'],
+        multiprocess_mode='livesum'
+    )
+    SUPABASE_REQUESTS = Counter(
+        'vaulthive_supabase_requests_total', 'Supabase (PostgREST) requests',
+        ['table', 'operation', 'outcome']
+    )
+    SUPABASE_LATENCY = Histogram(
+        'vaulthive_supabase_request_seconds', 'Supabase request latency',
+        ['table', 'operation'], buckets=LATENCY_BUCKETS
+    )
+    RPC_REQUESTS = Counter(
+        'vaulthive_rpc_requests_total', 'Blockchain JSON-RPC requests',
+        ['chain', 'endpoint', 'method', 'outcome']
+    )
+    RPC_LATENCY = Histogram(
+        'vaulthive_rpc_request_seconds', 'Blockchain JSON-RPC latency',
+        ['chain', 'endpoint', 'method'], buckets=LATENCY_BUCKETS
+    )
+    CACHE_LOOKUPS = Counter(
+        'vaulthive_cache_lookups_total', 'In-process cache lookups', ['cache', 'result']
+    )
+
+def record_cache(cache: str, hit: bool):
+    """Count one lookup in a named in-process cache"""
+    if METRICS_ENABLED:
+        CACHE_LOOKUPS.labels(cache, 'hit' if hit else 'miss').inc()
+
+def observe_rpc(chain: str, endpoint: str, method: str, seconds: float, ok: bool):
+    host = urlparse(endpoint).netloc or endpoint
+    if METRICS_ENABLED:
+        RPC_REQUESTS.labels(chain, host, method, 'ok' if ok else 'error').inc()
+        RPC_LATENCY.labels(chain, host, method).observe(seconds)
+    record_operation(chain, method, seconds, ok, detail=host)
+
+def web3_metrics_middleware(make_request, w3):
+    """web3 middleware timing (and tracing) every JSON-RPC method sent to the Monad node"""
+    endpoint = getattr(w3.provider, 'endpoint_uri', '') or ''
+
+    def middleware(method, params):
+        started = time.perf_counter()
+        ok = False
+        try:
+            with traced('monad', method):
+                response = make_request(method, params)
+            ok = 'error' not in response
+            return response
+        finally:
+            observe_rpc('monad', str(endpoint), method, time.perf_counter() - started, ok)
+
+    return middleware
+
+class _InstrumentedQuery:
+    """Wraps a PostgREST request builder; execute() is timed per table and operation.
+
+    The filters applied along the way (method and column, not value) make
+    up the request's shape for the request tracer; with the selected
+    columns they are its fingerprint in the slow operation log.
+    """
+
+    __slots__ = ('_query', '_table', '_operation', '_filters', '_columns', '_arguments')
+
+    def __init__(self, query, table: str, operation: str, filters: tuple = (), columns: str = None,
+                 arguments: tuple = ()):
+        self._query = query
+        self._table = table
+        self._operation = operation
+        self._filters = filters
+        self._columns = columns
+        # The filters with their values, for slow query examples
+        self._arguments = arguments
+
+    def _wrap(self, value, name: str, args: tuple = ()):
+        if hasattr(value, 'execute'):
+            operation = name if name in SUPABASE_OPERATIONS else self._operation
+            filters, columns, arguments = self._filters, self._columns, self._arguments
+            if name == 'select' and args:
+                columns = ' '.join(', '.join(map(str, args)).split())
+            elif name not in SUPABASE_OPERATIONS and name not in SUPABASE_UNSHAPED:
+                if args and isinstance(args[0], str):
+                    column = strip_filter_values(args[0]) if name == 'or_' else args[0]
+                    filters += (f"{name}({column})",)
+                else:
+                    filters += (name,)
+                arguments += ((name, args),)
+            return _InstrumentedQuery(value, self._table, operation, filters, columns, arguments)
+        return value
+
+    def _fingerprint(self) -> str:
+        columns = (f"[{self._columns}]",) if self._columns else ()
+        return ' '.join((self._operation, self._table, *columns, *self._filters))
+
+    def _detail(self) -> str:
+        return ' '.join(f"{name}({', '.join(map(repr, args))})" for name, args in self._arguments)
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._query, name)
+        if not callable(attr):
+            return self._wrap(attr, name)  # e.g. the .not_ modifier
+
+        def chained(*args, **kwargs):
+            return self._wrap(attr(*args, **kwargs), name, args)
+        return chained
+
+    def execute(self):
+        started = time.perf_counter()
+        outcome = 'error'
+        try:
+            with traced('supabase', ' '.join((self._operation, self._table, *self._filters))):
+                result = self._query.execute()
+            outcome = 'ok'
+            return result
+        finally:
+            seconds = time.perf_counter() - started
+            if METRICS_ENABLED:
+                SUPABASE_REQUESTS.labels(self._table, self._operation, outcome).inc()
+                SUPABASE_LATENCY.labels(self._table, self._operation).observe(seconds)
+            if SLOW_LOG_ENABLED:
+                record_operation('supabase', self._fingerprint(), seconds, outcome == 'ok', detail=self._detail)
+
+class InstrumentedSupabase:
+    """Supabase client whose table and RPC requests are counted, timed, traced and fingerprinted"""
+
+    def __init__(self, client):
+        self._client = client
+
+    def table(self, name: str):
+        return _InstrumentedQuery(self._client.table(name), name, 'select')
+
+    from_ = table
+
+    def rpc(self, fn: str, *args, **kwargs):
+        return _InstrumentedQuery(self._client.rpc(fn, *args, **kwargs), fn, 'rpc')
+
+    def __getattr__(self, name: str):
+        return getattr(self._client, name)
+
+def instrument_supabase(client):
+    return InstrumentedSupabase(client) if METRICS_ENABLED or REQUEST_TRACING or SLOW_LOG_ENABLED else client
+
+class MintJobCollector:
+    """Mint job queue depth by status, read from the table at scrape time"""
+
+    STATUSES = ('queued', 'running', 'minted', 'dead_letter')
+
+    def __init__(self, supabase):
+        self.supabase = supabase
+
+    def collect(self):
+        depth = GaugeMetricFamily('vaulthive_mint_jobs', 'Mint jobs by status', labels=['status'])
+        ready = GaugeMetricFamily('vaulthive_mint_jobs_ready', 'Queued mint jobs due to run now')
+        try:
+            for status in self.STATUSES:
+                result = self.supabase.table('mint_jobs').select('id', count='exact').eq('status', status).limit(1).execute()
+                depth.add_metric([status], result.count or 0)
+            result = self.supabase.table('mint_jobs').select('id', count='exact').eq('status', 'queued').lte(
+                'run_after', datetime.now().isoformat()
+            ).limit(1).execute()
+            ready.add_metric([], result.count or 0)
+        except Exception as e:
+            print(f"⚠️ Mint job metrics unavailable: {e}")
+            return
+        yield depth
+        yield ready
+
+class _ProcessMetrics:
+    """This process's metrics, for single-process (dev server) scrapes"""
+
+    def collect(self):
+        return prometheus_client.REGISTRY.collect()
+
+def _route_labels():
+    rule = request.url_rule.rule if request.url_rule else 'unmatched'
+    return request.blueprint or 'app', rule
+
+def init_instrumentation(app):
+    """Per-route request metrics and the /metrics endpoint"""
+
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        if not METRICS_ENABLED:
+            return jsonify({"success": False, "error": "Metrics are disabled (prometheus_client not installed?)"}), 503
+
+        registry = CollectorRegistry()
+        if MULTIPROCESS:
+            # Sum every worker's files, including workers that have exited
+            multiprocess.MultiProcessCollector(registry)
+        else:
+            registry.register(_ProcessMetrics())
+        registry.register(MintJobCollector(app.config['SUPABASE']))
+        return Response(prometheus_client.generate_latest(registry), content_type=prometheus_client.CONTENT_TYPE_LATEST)
+
+    if not METRICS_ENABLED:
+        return
+
+    @app.before_request
+    def start_request_metrics():
+        blueprint, _ = _route_labels()
+        g._metrics_started = time.perf_counter()
+        g._metrics_blueprint = blueprint
+        HTTP_IN_FLIGHT.labels(blueprint).inc()
+
+    @app.after_request
+    def record_request_metrics(response):
+        started: Optional[float] = g.pop('_metrics_started', None)
+        if started is not None:
+            blueprint, route = _route_labels()
+            labels = (blueprint, route, request.method, str(response.status_code))
+            HTTP_REQUESTS.labels(*labels).inc()
+            HTTP_LATENCY.labels(*labels).observe(time.perf_counter() - started)
+        return response
+
+    @app.teardown_request
+    def finish_request_metrics(error: Any = None):
+        blueprint = g.pop('_metrics_blueprint', None)
+        if blueprint is not None:
+            HTTP_IN_FLIGHT.labels(blueprint).dec()
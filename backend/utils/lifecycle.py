@@ -0,0 +1,81 @@
+import functools
+import os
+import threading
+import time
+from typing import Dict
+
+# Per-process serving state: in-flight work by kind, and whether we are draining
+_in_flight: Dict[str, int] = {}
+_in_flight_cond = threading.Condition()
+_draining = threading.Event()
+
+def track_in_flight(kind: str):
+    """Decorator counting calls in progress so shutdown can wait for them"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with _in_flight_cond:
+                _in_flight[kind] = _in_flight.get(kind, 0) + 1
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with _in_flight_cond:
+                    _in_flight[kind] -= 1
+                    _in_flight_cond.notify_all()
+        return wrapper
+    return decorator
+
+def in_flight_counts() -> Dict[str, int]:
+    with _in_flight_cond:
+        return {kind: count for kind, count in _in_flight.items() if count}
+
+def begin_drain():
+    """Mark the process as shutting down so readiness checks fail"""
+    _draining.set()
+
+def is_draining() -> bool:
+    return _draining.is_set()
+
+def wait_for_drain(timeout: float) -> bool:
+    """Block until no tracked work is running; False if the timeout hit first"""
+    deadline = time.monotonic() + timeout
+    with _in_flight_cond:
+        while any(_in_flight.values()):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            _in_flight_cond.wait(remaining)
+    return True
+
+def reset_after_fork():
+    """Drop connection pools and clients inherited from a preloading parent.
+
+    Sockets, executor threads and Redis connections don't survive fork
+    safely, so each worker builds its own on first use.
+    """
+    from utils import http_client, rate_limit, slow_log
+    from services import (solana_service, monad_service, rpc_router, nonce_manager, confirmation_tracker,
+                          inventory_service, cap_table, trading_service, leaderboard, search_index,
+                          marketplace_index)
+
+    http_client._sessions.clear()
+    rate_limit.reset_limiters()
+    slow_log.reset_slow_operations()
+    solana_service._clients.clear()
+    monad_service._web3_instances.clear()
+    monad_service._connection_checks.clear()
+    monad_service._maintainers.clear()
+    rpc_router._routers.clear()
+    nonce_manager._managers.clear()
+    confirmation_tracker._tracker = None
+    inventory_service._queues.clear()
+    cap_table._index = None
+    leaderboard._index = None
+    search_index._index = None
+    marketplace_index._index = None
+    trading_service._books.clear()
+    trading_service._snapshotter = None
+
+    _in_flight.clear()
+    _draining.clear()
+    print(f"🍴 Worker {os.getpid()} reset inherited connections")
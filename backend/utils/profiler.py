@@ -0,0 +1,201 @@
+import cProfile
+import json
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from flask import g, request
+
+try:
+    from pyinstrument import Profiler
+    from pyinstrument.renderers import HTMLRenderer, SpeedscopeRenderer
+except ImportError:
+    Profiler = None
+
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'true').lower() == 'true'
+# Fraction of all requests profiled without being asked (0 = only on demand)
+PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', 0))
+PROFILE_DIR = os.getenv('PROFILE_DIR', '/tmp/vaulthive-profiles')
+# Oldest profiles are deleted past this many
+PROFILE_KEEP = int(os.getenv('PROFILE_KEEP', 200))
+# pyinstrument sampling interval
+PROFILE_INTERVAL = float(os.getenv('PROFILE_INTERVAL', 0.001))
+# speedscope (open in https://www.speedscope.app) or html; cProfile always writes .prof
+PROFILE_FORMAT = os.getenv('PROFILE_FORMAT', 'speedscope')
+
+PROFILE_HEADER = 'X-Profile'
+PROFILE_QUERY_FLAG = '_profile'
+PROFILE_ID = re.compile(r'^[0-9a-f]{32}$')
+
+# One request profiled at a time per worker: profilers hook the interpreter,
+# and stacking them skews every profile taken at the same time
+_active = threading.Lock()
+
+class RequestProfile:
+    """A profiler running for the current request"""
+
+    def __init__(self, trigger: str):
+        self.id = uuid.uuid4().hex
+        self.trigger = trigger
+        self.started = time.perf_counter()
+        if Profiler is not None:
+            self.engine = 'pyinstrument'
+            self._profiler = Profiler(interval=PROFILE_INTERVAL, async_mode='disabled')
+        else:
+            self.engine = 'cprofile'
+            self._profiler = cProfile.Profile()
+
+    def start(self):
+        if self.engine == 'pyinstrument':
+            self._profiler.start()
+        else:
+            self._profiler.enable()
+
+    def stop(self) -> float:
+        if self.engine == 'pyinstrument':
+            self._profiler.stop()
+        else:
+            self._profiler.disable()
+        return time.perf_counter() - self.started
+
+    def save(self, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """Write the artifact and its metadata to PROFILE_DIR"""
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        if self.engine == 'pyinstrument':
+            if PROFILE_FORMAT == 'html':
+                artifact, body = f"{self.id}.html", self._profiler.output(HTMLRenderer())
+            else:
+                artifact, body = f"{self.id}.speedscope.json", self._profiler.output(SpeedscopeRenderer())
+            with open(os.path.join(PROFILE_DIR, artifact), 'w') as f:
+                f.write(body)
+        else:
+            artifact = f"{self.id}.prof"
+            self._profiler.dump_stats(os.path.join(PROFILE_DIR, artifact))
+
+        metadata = {'id': self.id, 'trigger': self.trigger, 'engine': self.engine, 'artifact': artifact,
+                    'pid': os.getpid(), 'created_at': datetime.now().isoformat(), **metadata}
+        with open(os.path.join(PROFILE_DIR, f"{self.id}.meta.json"), 'w') as f:
+            json.dump(metadata, f)
+        _prune()
+        return metadata
+
+def _prune():
+    try:
+        entries = [entry for entry in os.scandir(PROFILE_DIR) if entry.name.endswith('.meta.json')]
+    except FileNotFoundError:
+        return
+    if len(entries) <= PROFILE_KEEP:
+        return
+    entries.sort(key=lambda entry: entry.stat().st_mtime)
+    for entry in entries[:len(entries) - PROFILE_KEEP]:
+        profile_id = entry.name.split('.', 1)[0]
+        for name in os.listdir(PROFILE_DIR):
+            if name.startswith(profile_id):
+                try:
+                    os.remove(os.path.join(PROFILE_DIR, name))
+                except FileNotFoundError:
+                    pass  # another worker pruned it first
+
+def list_profiles(limit: int = 50) -> List[Dict[str, Any]]:
+    """Saved profiles from every worker, newest first"""
+    profiles = []
+    try:
+        names = [name for name in os.listdir(PROFILE_DIR) if name.endswith('.meta.json')]
+    except FileNotFoundError:
+        return []
+    for name in names:
+        try:
+            with open(os.path.join(PROFILE_DIR, name)) as f:
+                profiles.append(json.load(f))
+        except (OSError, ValueError):
+            continue  # pruned or still being written
+    profiles.sort(key=lambda profile: profile.get('created_at', ''), reverse=True)
+    return profiles[:limit]
+
+def get_profile(profile_id: str) -> Optional[Dict[str, Any]]:
+    """Metadata plus the artifact's path, or None"""
+    if not PROFILE_ID.match(profile_id or ''):
+        return None
+    try:
+        with open(os.path.join(PROFILE_DIR, f"{profile_id}.meta.json")) as f:
+            metadata = json.load(f)
+    except (OSError, ValueError):
+        return None
+    metadata['path'] = os.path.join(PROFILE_DIR, metadata['artifact'])
+    return metadata if os.path.exists(metadata['path']) else None
+
+def _requested() -> bool:
+    flag = request.headers.get(PROFILE_HEADER) or request.args.get(PROFILE_QUERY_FLAG)
+    return bool(flag) and flag.lower() not in ('0', 'false', 'no')
+
+def init_request_profiling(app):
+    """Profile single requests on demand (X-Profile: 1 or ?_profile=1 with the admin token), or a sample of all"""
+    if not PROFILING_ENABLED:
+        return
+
+    from middleware.auth_middleware import is_admin_request
+
+    @app.before_request
+    def start_request_profile():
+        if _requested():
+            if not is_admin_request():
+                g.profile_skipped = 'admin token required'
+                return
+            trigger = 'on_demand'
+        elif PROFILE_SAMPLE_RATE and random.random() < PROFILE_SAMPLE_RATE:
+            trigger = 'sampled'
+        else:
+            return
+
+        if not _active.acquire(blocking=False):
+            g.profile_skipped = 'another request is being profiled'
+            return
+        try:
+            profile = RequestProfile(trigger)
+            profile.start()
+        except Exception as e:
+            _active.release()
+            print(f"⚠️ Could not start profiler: {e}")
+            return
+        g.request_profile = profile
+
+    @app.after_request
+    def save_request_profile(response):
+        profile: Optional[RequestProfile] = g.pop('request_profile', None)
+        if profile is None:
+            skipped = g.pop('profile_skipped', None)
+            if skipped:
+                response.headers['X-Profile-Skipped'] = skipped
+            return response
+
+        try:
+            duration = profile.stop()
+            metadata = profile.save({
+                'method': request.method,
+                'path': request.path,
+                'route': request.url_rule.rule if request.url_rule else None,
+                'status': response.status_code,
+                'duration_ms': round(duration * 1000, 2)
+            })
+            response.headers['X-Profile-Id'] = profile.id
+            print(f"🔬 Profiled {request.method} {request.path} ({profile.trigger}, {metadata['duration_ms']}ms): "
+                  f"{metadata['artifact']}")
+        except Exception as e:
+            print(f"⚠️ Could not save profile: {e}")
+        finally:
+            _active.release()
+        return response
+
+    @app.teardown_request
+    def stop_request_profile(error=None):
+        # after_request didn't run (the request raised)
+        profile: Optional[RequestProfile] = g.pop('request_profile', None)
+        if profile is not None:
+            try:
+                profile.stop()
+            finally:
+                _active.release()
@@ -0,0 +1,293 @@
+import os
+import threading
+import time
+from typing import Dict, Any, Optional, Callable
+
+from utils.resilience import RateLimited, budget_timeout
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+# Steady requests per second, burst size and concurrency ceiling per upstream.
+# Override with e.g. SOLANA_RPC_RATE_LIMIT="10/40" (rate/burst).
+RATE_LIMIT_CONFIG = {
+    'coingecko': {'rate': 0.5, 'burst': 5, 'max_concurrency': 4},
+    'solana_rpc': {'rate': 10, 'burst': 40, 'max_concurrency': 40},
+    'monad_rpc': {'rate': 25, 'burst': 50, 'max_concurrency': 32}
+}
+DEFAULT_RATE_LIMIT = {'rate': 20, 'burst': 40, 'max_concurrency': 32}
+
+# Longest a caller will queue for a slot before giving up with RateLimited
+RATE_LIMIT_MAX_WAIT = float(os.getenv('RATE_LIMIT_MAX_WAIT', 5))
+
+OVERLOAD_STATUS_CODES = (429, 502, 503, 504)
+
+class TokenBucket:
+    """In-process token bucket; callers reserve a token and sleep until it is due"""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def reserve(self, max_wait: float) -> Optional[float]:
+        """Take a token; returns seconds to wait for it, or None if that exceeds max_wait"""
+        with self._lock:
+            self._refill(time.monotonic())
+            wait = max(0.0, (1 - self.tokens) / self.rate)
+            if wait > max_wait:
+                return None
+            # Tokens may go negative: that is the queue of reservations ahead of us
+            self.tokens -= 1
+            return wait
+
+    def penalize(self, seconds: float):
+        """Stop handing out tokens for seconds (the upstream told us to back off)"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.tokens, -seconds * self.rate)
+
+class RedisTokenBucket:
+    """Token bucket kept in Redis so every worker process shares one budget"""
+
+    # Refill and reserve atomically, on the Redis server's clock
+    RESERVE_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local max_wait = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local wait = math.max(0, (1 - tokens) / rate)
+if wait > max_wait then
+    return '-1'
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens - 1, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 60)
+return tostring(wait)
+"""
+
+    PENALIZE_SCRIPT = """
+local floor = -tonumber(ARGV[1]) * tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local tokens = tonumber(redis.call('HGET', KEYS[1], 'tokens')) or floor
+redis.call('HSET', KEYS[1], 'tokens', math.min(tokens, floor), 'ts', now)
+return 1
+"""
+
+    def __init__(self, client, key: str, rate: float, burst: float):
+        self.client = client
+        self.key = key
+        self.rate = rate
+        self.burst = burst
+        self._reserve = client.register_script(self.RESERVE_SCRIPT)
+        self._penalize = client.register_script(self.PENALIZE_SCRIPT)
+        # Used while Redis is unreachable, so an outage there doesn't stop upstream calls
+        self._local = TokenBucket(rate, burst)
+
+    def reserve(self, max_wait: float) -> Optional[float]:
+        try:
+            wait = float(self._reserve(keys=[self.key], args=[self.rate, self.burst, max_wait]))
+        except Exception as e:
+            print(f"⚠️ Redis rate limiter unavailable, limiting locally: {e}")
+            return self._local.reserve(max_wait)
+        return None if wait < 0 else wait
+
+    def penalize(self, seconds: float):
+        try:
+            self._penalize(keys=[self.key], args=[seconds, self.rate])
+        except Exception:
+            self._local.penalize(seconds)
+
+class AdaptiveConcurrencyLimiter:
+    """AIMD limit on concurrent calls to one upstream.
+
+    Each healthy response raises the limit by 1/limit (about +1 per round of
+    calls); a 429 or 5xx halves it, at most once per cooldown so a burst of
+    errors from the same overload counts once.
+    """
+
+    def __init__(self, initial: float = 8, min_limit: float = 1, max_limit: float = 64,
+                 backoff: float = 0.5, cooldown: float = 1.0):
+        self.limit = float(min(max(initial, min_limit), max_limit))
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self.last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            self.in_flight += 1
+            return True
+
+    def release(self, overloaded: bool = False):
+        with self._cond:
+            self.in_flight -= 1
+            now = time.monotonic()
+            if overloaded:
+                if now - self.last_decrease >= self.cooldown:
+                    self.limit = max(self.min_limit, self.limit * self.backoff)
+                    self.last_decrease = now
+            else:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+def _status_code(value) -> Optional[int]:
+    status = getattr(value, 'status_code', None)
+    if status is None:
+        status = getattr(getattr(value, 'response', None), 'status_code', None)
+    return status if isinstance(status, int) else None
+
+def is_overload(value) -> bool:
+    """Whether a response or exception means the upstream wants less traffic"""
+    seen = set()
+    while value is not None and id(value) not in seen:
+        seen.add(id(value))
+        if _status_code(value) in OVERLOAD_STATUS_CODES:
+            return True
+        if isinstance(value, Exception) and ('429' in str(value) or 'too many requests' in str(value).lower()):
+            return True
+        value = getattr(value, '__cause__', None) or getattr(value, '__context__', None)
+    return False
+
+def retry_after(value) -> Optional[float]:
+    """Retry-After seconds from a response, or from the response behind an exception"""
+    response = value if hasattr(value, 'headers') else getattr(value, 'response', None)
+    header = getattr(response, 'headers', {}).get('Retry-After') if response is not None else None
+    try:
+        return float(header) if header is not None else None
+    except (TypeError, ValueError):
+        return None
+
+class UpstreamLimiter:
+    """Token bucket plus adaptive concurrency for one upstream"""
+
+    def __init__(self, name: str, bucket, concurrency: AdaptiveConcurrencyLimiter):
+        self.name = name
+        self.bucket = bucket
+        self.concurrency = concurrency
+        self.throttled = 0
+        self.overloads = 0
+
+    def call(self, fn: Callable, *args, acquire_timeout: Optional[float] = None, **kwargs):
+        """Run fn once a rate and concurrency slot is free.
+
+        Raises RateLimited if no slot frees up within acquire_timeout
+        (default RATE_LIMIT_MAX_WAIT, capped by the request deadline).
+        """
+        max_wait = budget_timeout(RATE_LIMIT_MAX_WAIT) if acquire_timeout is None else acquire_timeout
+        started = time.monotonic()
+
+        wait = self.bucket.reserve(max_wait)
+        if wait is None:
+            self.throttled += 1
+            raise RateLimited(f"Rate limit for {self.name} would delay this call past {max_wait:.1f}s")
+        if wait > 0:
+            time.sleep(wait)
+
+        if not self.concurrency.acquire(max(max_wait - (time.monotonic() - started), 0)):
+            self.throttled += 1
+            raise RateLimited(f"Too many concurrent calls to {self.name}")
+
+        overloaded = False
+        outcome = None
+        try:
+            outcome = fn(*args, **kwargs)
+            overloaded = is_overload(outcome)
+            return outcome
+        except Exception as e:
+            outcome = e
+            overloaded = is_overload(e)
+            raise
+        finally:
+            self.concurrency.release(overloaded)
+            if overloaded:
+                self.overloads += 1
+                pause = retry_after(outcome)
+                if pause:
+                    self.bucket.penalize(pause)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'rate_per_second': self.bucket.rate,
+            'burst': self.bucket.burst,
+            'concurrency_limit': round(self.concurrency.limit, 2),
+            'in_flight': self.concurrency.in_flight,
+            'throttled': self.throttled,
+            'overloads': self.overloads,
+            'shared': isinstance(self.bucket, RedisTokenBucket)
+        }
+
+def _limit_config(profile: str) -> Dict[str, float]:
+    config = dict(RATE_LIMIT_CONFIG.get(profile, DEFAULT_RATE_LIMIT))
+    override = os.getenv(f"{profile.upper()}_RATE_LIMIT")
+    if override:
+        rate, _, burst = override.partition('/')
+        config['rate'] = float(rate)
+        config['burst'] = float(burst) if burst else max(config['rate'], 1.0)
+    return config
+
+_limiters: Dict[str, UpstreamLimiter] = {}
+_limiters_lock = threading.Lock()
+_redis_client = None
+
+def _get_redis():
+    global _redis_client
+    redis_url = os.getenv('REDIS_URL')
+    if _redis_client is None and redis_url and redis is not None:
+        _redis_client = redis.Redis.from_url(redis_url)
+    return _redis_client
+
+def get_limiter(name: str, profile: str = None) -> UpstreamLimiter:
+    """Process-wide limiter for name (an upstream or one of its endpoints).
+
+    profile picks the limits from RATE_LIMIT_CONFIG and defaults to name.
+    With REDIS_URL set the request rate is shared by all worker processes;
+    the concurrency limit is always per process.
+    """
+    with _limiters_lock:
+        if name not in _limiters:
+            config = _limit_config(profile or name)
+            client = _get_redis()
+            if client is not None:
+                bucket = RedisTokenBucket(client, f"ratelimit:{name}", config['rate'], config['burst'])
+            else:
+                bucket = TokenBucket(config['rate'], config['burst'])
+            concurrency = AdaptiveConcurrencyLimiter(
+                initial=max(config['max_concurrency'] // 4, 1),
+                max_limit=config['max_concurrency']
+            )
+            _limiters[name] = UpstreamLimiter(name, bucket, concurrency)
+        return _limiters[name]
+
+def get_limiter_states() -> Dict[str, Dict[str, Any]]:
+    with _limiters_lock:
+        return {name: limiter.to_dict() for name, limiter in _limiters.items()}
+
+def reset_limiters():
+    """Forget limiters (and the Redis connection) inherited across fork"""
+    global _redis_client
+    with _limiters_lock:
+        _limiters.clear()
+        _redis_client = None
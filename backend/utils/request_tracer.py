@@ -0,0 +1,158 @@
+import os
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import List, Dict, Any, Optional
+from flask import g, request
+
+REQUEST_TRACING = os.getenv('REQUEST_TRACING', 'true').lower() == 'true'
+# Send the per-dependency totals to clients in a Server-Timing header
+SERVER_TIMING = os.getenv('SERVER_TIMING', 'true').lower() == 'true'
+# A call shape made this many times in one request is reported as a likely N+1
+REPEATED_CALL_THRESHOLD = int(os.getenv('REPEATED_CALL_THRESHOLD', 3))
+
+class TracedCall:
+    __slots__ = ('kind', 'shape', 'duration', 'ok')
+
+    def __init__(self, kind: str, shape: str, duration: float, ok: bool):
+        self.kind = kind
+        self.shape = shape
+        self.duration = duration
+        self.ok = ok
+
+class RequestTrace:
+    """Outbound calls made while handling one request (or inside capture_calls).
+
+    A call's shape is what it does without its arguments (table, operation
+    and filtered columns; RPC method; HTTP host and path), so the same
+    shape showing up again and again is a query issued in a loop.
+    """
+
+    def __init__(self):
+        self.calls: List[TracedCall] = []
+        self.started = time.perf_counter()
+        # Calls made by a traced call (web3 -> requests) count as part of it
+        self._depth = 0
+
+    def record(self, kind: str, shape: str, duration: float, ok: bool = True):
+        self.calls.append(TracedCall(kind, shape, duration, ok))
+
+    def count(self, kind: str = None) -> int:
+        return sum(1 for call in self.calls if kind is None or call.kind == kind)
+
+    def repeated(self, threshold: int = REPEATED_CALL_THRESHOLD) -> List[Dict[str, Any]]:
+        """Shapes called at least threshold times, most repeated first"""
+        counts = Counter((call.kind, call.shape) for call in self.calls)
+        return [{'kind': kind, 'shape': shape, 'count': count}
+                for (kind, shape), count in counts.most_common() if count >= threshold]
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        totals: Dict[str, Dict[str, Any]] = {}
+        for call in self.calls:
+            total = totals.setdefault(call.kind, {'calls': 0, 'ms': 0.0, 'errors': 0})
+            total['calls'] += 1
+            total['ms'] += call.duration * 1000
+            total['errors'] += 0 if call.ok else 1
+        for total in totals.values():
+            total['ms'] = round(total['ms'], 2)
+        return totals
+
+    def server_timing(self) -> str:
+        entries = [f'{kind};dur={total["ms"]};desc="{total["calls"]} calls"'
+                   for kind, total in self.summary().items()]
+        entries.append(f'app;dur={round((time.perf_counter() - self.started) * 1000, 2)}')
+        return ', '.join(entries)
+
+    def assert_max(self, max_calls: int, kind: str = 'supabase'):
+        made = self.count(kind)
+        if made > max_calls:
+            shapes = '\n'.join(f"  {call.shape}" for call in self.calls if call.kind == kind)
+            raise AssertionError(f"Expected at most {max_calls} {kind} calls, made {made}:\n{shapes}")
+
+    def assert_no_repeats(self, threshold: int = REPEATED_CALL_THRESHOLD):
+        repeated = self.repeated(threshold)
+        if repeated:
+            details = '\n'.join(f"  {r['count']}x {r['kind']} {r['shape']}" for r in repeated)
+            raise AssertionError(f"Calls repeated {threshold}+ times (N+1?):\n{details}")
+
+_trace: ContextVar[Optional[RequestTrace]] = ContextVar('request_trace', default=None)
+
+def current_trace() -> Optional[RequestTrace]:
+    return _trace.get()
+
+@contextmanager
+def traced(kind: str, shape: str):
+    """Record the wrapped outbound call on the current request's trace, if any"""
+    trace = _trace.get()
+    if trace is None or trace._depth:
+        yield
+        return
+
+    trace._depth += 1
+    started = time.perf_counter()
+    ok = False
+    try:
+        yield
+        ok = True
+    finally:
+        trace._depth -= 1
+        trace.record(kind, shape, time.perf_counter() - started, ok)
+
+@contextmanager
+def capture_calls():
+    """Trace every outbound call made inside the block, requests included"""
+    trace = RequestTrace()
+    token = _trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _trace.reset(token)
+
+def assert_max_queries(client, path: str, max_queries: int, method: str = 'GET', kind: str = 'supabase',
+                       repeat_threshold: Optional[int] = REPEATED_CALL_THRESHOLD, **kwargs):
+    """Request path with a Flask test client; fail if it made more than max_queries calls or repeated one.
+
+    For CI, e.g. ``assert_max_queries(app.test_client(), '/api/marketplace', 3)``.
+    Pass repeat_threshold=None to only check the count.
+    """
+    with capture_calls() as trace:
+        response = client.open(path, method=method, **kwargs)
+    trace.assert_max(max_queries, kind)
+    if repeat_threshold is not None:
+        trace.assert_no_repeats(repeat_threshold)
+    return response
+
+def init_request_tracing(app):
+    """Trace each request's outbound calls, report them in Server-Timing and log likely N+1s"""
+    if not REQUEST_TRACING:
+        return
+
+    @app.before_request
+    def start_request_trace():
+        # Under capture_calls() (tests) the request adds to the captured trace
+        if _trace.get() is None:
+            g.trace_token = _trace.set(RequestTrace())
+
+    @app.after_request
+    def report_request_trace(response):
+        trace = _trace.get()
+        if trace is None:
+            return response
+        if SERVER_TIMING:
+            response.headers['Server-Timing'] = trace.server_timing()
+        repeated = trace.repeated()
+        if repeated:
+            worst = ', '.join(f"{r['count']}x {r['kind']} {r['shape']}" for r in repeated[:3])
+            print(f"🔁 {request.method} {request.path} repeated calls (N+1?): {worst}")
+        return response
+
+    @app.teardown_request
+    def end_request_trace(error=None):
+        token = g.pop('trace_token', None)
+        if token is not None:
+            try:
+                _trace.reset(token)
+            except ValueError:
+                # Token created in a different context
+                pass
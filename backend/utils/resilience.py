@@ -0,0 +1,168 @@
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, Any, Optional, Callable
+
+class CircuitOpenError(Exception):
+    """Raised when a call is short-circuited by an open breaker"""
+
+class DeadlineExceeded(Exception):
+    """Raised when the request's time budget is used up"""
+
+class RateLimited(Exception):
+    """Raised when our own rate limiter holds a call back"""
+
+class CircuitBreaker:
+    """Per-dependency breaker: closed -> open after repeated failures -> half-open probe"""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 half_open_max_calls: int = 1):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.half_open_calls = 0
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+
+            if self.state == self.OPEN:
+                if time.time() - self.opened_at < self.reset_timeout:
+                    return False
+                # Cooldown elapsed: let a limited number of probes through
+                self.state = self.HALF_OPEN
+                self.half_open_calls = 0
+
+            if self.half_open_calls < self.half_open_max_calls:
+                self.half_open_calls += 1
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self.state != self.CLOSED:
+                print(f"✅ Circuit '{self.name}' closed")
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    print(f"🔌 Circuit '{self.name}' opened after {self.failures} failures")
+                self.state = self.OPEN
+                self.opened_at = time.time()
+
+    def record_skipped(self):
+        """A permitted call never reached the dependency; give back its probe slot"""
+        with self._lock:
+            if self.state == self.HALF_OPEN and self.half_open_calls > 0:
+                self.half_open_calls -= 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'state': self.state,
+            'failures': self.failures,
+            'retry_in_seconds': max(round(self.reset_timeout - (time.time() - self.opened_at), 1), 0)
+            if self.state == self.OPEN else None
+        }
+
+# Breaker settings per upstream; anything else gets the defaults
+BREAKER_CONFIG = {
+    'coingecko': {'failure_threshold': 3, 'reset_timeout': 60.0},
+    'solana_rpc': {'failure_threshold': 5, 'reset_timeout': 15.0},
+    'monad_rpc': {'failure_threshold': 5, 'reset_timeout': 15.0}
+}
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+def get_breaker(name: str) -> CircuitBreaker:
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name, **BREAKER_CONFIG.get(name, {}))
+        return _breakers[name]
+
+def get_breaker_states() -> Dict[str, Dict[str, Any]]:
+    with _breakers_lock:
+        return {name: breaker.to_dict() for name, breaker in _breakers.items()}
+
+# Request-scoped deadline, as an absolute time.monotonic() value
+_deadline: ContextVar[Optional[float]] = ContextVar('request_deadline', default=None)
+
+DEFAULT_REQUEST_DEADLINE_MS = int(os.getenv('REQUEST_DEADLINE_MS', 15000))
+
+def start_deadline(budget_seconds: float):
+    """Start a time budget for the current request; returns a token for end_deadline"""
+    return _deadline.set(time.monotonic() + budget_seconds)
+
+def end_deadline(token):
+    _deadline.reset(token)
+
+def remaining_budget() -> Optional[float]:
+    """Seconds left in the current request's budget, or None outside a request"""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+def budget_timeout(default: float) -> float:
+    """Timeout for an upstream call: the configured value, capped by the budget"""
+    remaining = remaining_budget()
+    if remaining is None:
+        return default
+    if remaining <= 0:
+        raise DeadlineExceeded("Request deadline exceeded")
+    return min(default, remaining)
+
+_NO_FALLBACK = object()
+
+def guarded_call(dependency: str, fn: Callable, *args, fallback: Any = _NO_FALLBACK, **kwargs):
+    """Call an upstream through its circuit breaker and the request deadline.
+
+    While the breaker is open or the budget is spent, returns fallback()
+    immediately (or raises if no fallback was given) instead of waiting on
+    a dependency that is known to be down.
+    """
+    breaker = get_breaker(dependency)
+
+    def short_circuit(error: Exception):
+        if fallback is _NO_FALLBACK:
+            raise error
+        return fallback() if callable(fallback) else fallback
+
+    remaining = remaining_budget()
+    if remaining is not None and remaining <= 0:
+        return short_circuit(DeadlineExceeded(f"No time left to call {dependency}"))
+
+    if not breaker.allow_request():
+        return short_circuit(CircuitOpenError(f"Circuit '{dependency}' is open"))
+
+    try:
+        result = fn(*args, **kwargs)
+    except (DeadlineExceeded, RateLimited) as e:
+        # We held the call back ourselves; that says nothing about the dependency's health
+        breaker.record_skipped()
+        return short_circuit(e)
+    except Exception as e:
+        breaker.record_failure()
+        if fallback is _NO_FALLBACK:
+            raise
+        print(f"⚠️ {dependency} call failed, using fallback: {e}")
+        return fallback() if callable(fallback) else fallback
+
+    breaker.record_success()
+    return result
@@ -0,0 +1,93 @@
+import dataclasses
+import decimal
+import uuid
+from datetime import date
+from flask import request, has_request_context
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+MSGPACK_MIMETYPE = 'application/msgpack'
+
+def _default(value):
+    """Types orjson/msgpack don't handle natively, encoded the way Flask would"""
+    if isinstance(value, (decimal.Decimal, uuid.UUID)):
+        return str(value)
+    if dataclasses.is_dataclass(value):
+        to_dict = getattr(value, 'to_dict', None)
+        return to_dict() if to_dict else dataclasses.asdict(value)
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    if hasattr(value, '__html__'):
+        return str(value.__html__())
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def _msgpack_default(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    return _default(value)
+
+def wants_msgpack() -> bool:
+    if msgpack is None or not has_request_context():
+        return False
+    accept = request.accept_mimetypes
+    return accept[MSGPACK_MIMETYPE] > accept['application/json']
+
+class FastJSONProvider(DefaultJSONProvider):
+    """JSON via orjson, falling back to the stdlib encoder when it isn't installed.
+
+    Responses are written as bytes without a str round trip, and clients
+    sending ``Accept: application/msgpack`` get MessagePack instead. Keys are
+    not sorted, and datetimes (rare here; rows carry ISO strings) are
+    encoded as ISO 8601 rather than HTTP dates.
+    """
+
+    sort_keys = False
+
+    def _orjson_options(self, pretty: bool = False) -> int:
+        options = orjson.OPT_NON_STR_KEYS
+        if pretty:
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def dumps(self, obj, **kwargs) -> str:
+        if orjson is None:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=_default, option=self._orjson_options(bool(kwargs.get('indent')))).decode()
+
+    def loads(self, s, **kwargs):
+        if orjson is None:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+
+        if wants_msgpack():
+            response = self._app.response_class(
+                msgpack.packb(obj, default=_msgpack_default, use_bin_type=True), mimetype=MSGPACK_MIMETYPE
+            )
+        elif orjson is None:
+            response = super().response(obj)
+        else:
+            pretty = (self.compact is None and self._app.debug) or self.compact is False
+            body = orjson.dumps(obj, default=_default, option=self._orjson_options(pretty) | orjson.OPT_APPEND_NEWLINE)
+            response = self._app.response_class(body, mimetype=self.mimetype)
+
+        if msgpack is not None:
+            response.vary.add('Accept')
+        return response
+
+def init_serialization(app):
+    """Use the fast provider for jsonify and request.get_json"""
+    app.json_provider_class = FastJSONProvider
+    app.json = FastJSONProvider(app)
+    print(f"📦 JSON: {'orjson' if orjson else 'stdlib'}, msgpack {'enabled' if msgpack else 'unavailable'}")
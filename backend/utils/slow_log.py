@@ -0,0 +1,135 @@
+import os
+import random
+import re
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from flask import has_request_context, request
+
+SLOW_LOG_ENABLED = os.getenv('SLOW_LOG_ENABLED', 'true').lower() == 'true'
+# Calls at or over these are logged and kept as examples
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', 200))
+SLOW_RPC_MS = float(os.getenv('SLOW_RPC_MS', 500))
+# Recent durations kept per fingerprint for percentiles
+SLOW_LOG_WINDOW = int(os.getenv('SLOW_LOG_WINDOW', 1000))
+# Example slow calls kept per fingerprint (reservoir sampled)
+SLOW_LOG_EXAMPLES = int(os.getenv('SLOW_LOG_EXAMPLES', 5))
+# New fingerprints are ignored past this many
+SLOW_LOG_MAX_FINGERPRINTS = int(os.getenv('SLOW_LOG_MAX_FINGERPRINTS', 1000))
+
+# col.op.value inside an or_()/and() filter string
+_FILTER_VALUE = re.compile(r'([\w>-]+)\.((?:not\.)?\w+)\.(\([^)]*\)|[^,()]*)')
+
+def strip_filter_values(filters: str) -> str:
+    """or_('buyer_user_id.eq.1,seller_user_id.eq.1') -> 'buyer_user_id.eq,seller_user_id.eq'"""
+    return _FILTER_VALUE.sub(r'\1.\2', filters)
+
+def _threshold_ms(kind: str) -> float:
+    return SLOW_QUERY_MS if kind == 'supabase' else SLOW_RPC_MS
+
+class OperationStats:
+    """Durations of one query shape or RPC method in this process"""
+
+    __slots__ = ('kind', 'fingerprint', 'count', 'errors', 'total', 'max', 'slow', 'recent', 'examples')
+
+    def __init__(self, kind: str, fingerprint: str):
+        self.kind = kind
+        self.fingerprint = fingerprint
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.slow = 0
+        self.recent = deque(maxlen=SLOW_LOG_WINDOW)
+        self.examples: List[Dict[str, Any]] = []
+
+    def add(self, seconds: float, ok: bool, example: Optional[Dict[str, Any]]):
+        self.count += 1
+        self.errors += 0 if ok else 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.recent.append(seconds)
+        if example is None:
+            return
+        self.slow += 1
+        if len(self.examples) < SLOW_LOG_EXAMPLES:
+            self.examples.append(example)
+        else:
+            slot = random.randrange(self.slow)
+            if slot < SLOW_LOG_EXAMPLES:
+                self.examples[slot] = example
+
+    def to_dict(self) -> Dict[str, Any]:
+        recent = sorted(self.recent)
+
+        def percentile(p: float) -> float:
+            return round(recent[min(int(len(recent) * p), len(recent) - 1)] * 1000, 2) if recent else 0.0
+
+        return {
+            'kind': self.kind,
+            'fingerprint': self.fingerprint,
+            'count': self.count,
+            'errors': self.errors,
+            'slow': self.slow,
+            'total_ms': round(self.total * 1000, 2),
+            'avg_ms': round(self.total / self.count * 1000, 2) if self.count else 0.0,
+            'p50_ms': percentile(0.5),
+            'p95_ms': percentile(0.95),
+            'max_ms': round(self.max * 1000, 2),
+            'examples': sorted(self.examples, key=lambda example: example['duration_ms'], reverse=True)
+        }
+
+_operations: Dict[tuple, OperationStats] = {}
+_operations_lock = threading.Lock()
+
+def record_operation(kind: str, fingerprint: str, seconds: float, ok: bool = True, detail: Any = None):
+    """Count one Supabase query or RPC call; slow ones are logged with an example.
+
+    fingerprint must not carry values (ids, addresses); detail may, and is
+    only kept (and only built, if it's a callable) when the call was slow.
+    """
+    if not SLOW_LOG_ENABLED:
+        return
+
+    duration_ms = seconds * 1000
+    example = None
+    if duration_ms >= _threshold_ms(kind):
+        if callable(detail):
+            detail = detail()
+        example = {'duration_ms': round(duration_ms, 2), 'ok': ok, 'at': datetime.now().isoformat(),
+                   'detail': str(detail)[:500] if detail is not None else None, 'route': None}
+        if has_request_context():
+            example['route'] = f"{request.method} {request.url_rule.rule if request.url_rule else request.path}"
+        print(f"🐢 Slow {kind} ({duration_ms:.0f}ms): {fingerprint}"
+              f"{' during ' + example['route'] if example['route'] else ''}")
+
+    key = (kind, fingerprint)
+    with _operations_lock:
+        stats = _operations.get(key)
+        if stats is None:
+            if len(_operations) >= SLOW_LOG_MAX_FINGERPRINTS:
+                return
+            stats = _operations[key] = OperationStats(kind, fingerprint)
+        stats.add(seconds, ok, example)
+
+def get_slow_operations(sort: str = 'total', limit: int = 50, kind: str = None,
+                        include_fast: bool = False) -> List[Dict[str, Any]]:
+    """Fingerprints with slow calls (or all of them), worst first by total, p95, max, count or slow"""
+    with _operations_lock:
+        operations = [stats.to_dict() for stats in _operations.values()
+                      if (kind is None or stats.kind == kind) and (include_fast or stats.slow)]
+    key = f'{sort}_ms' if sort in ('total', 'p95', 'p50', 'avg', 'max') else sort
+    if key not in ('total_ms', 'p95_ms', 'p50_ms', 'avg_ms', 'max_ms', 'count', 'slow', 'errors'):
+        raise ValueError(f"Unknown sort: {sort}")
+    operations.sort(key=lambda operation: operation[key], reverse=True)
+    return operations[:limit]
+
+def reset_slow_operations():
+    """Forget everything recorded (also called after fork)"""
+    with _operations_lock:
+        _operations.clear()
+
+def slow_log_settings() -> Dict[str, Any]:
+    return {'enabled': SLOW_LOG_ENABLED, 'slow_query_ms': SLOW_QUERY_MS, 'slow_rpc_ms': SLOW_RPC_MS,
+            'window': SLOW_LOG_WINDOW, 'pid': os.getpid(), 'fingerprints': len(_operations)}
@@ -18,4 +18,12 @@ def is_valid_wallet_address(address: str) -> bool:
 def validate_token_type(token_type: str) -> bool:
     """Validate token type"""
     valid_types = ["physical_item", "event_ticket", "swag"]
-    return token_type in valid_types
\ No newline at end of file
+    return token_type in valid_types
+
+def is_valid_transaction_signature(signature: str) -> bool:
+    """Validate Solana transaction signature format (base58, 64 bytes)"""
+    if not signature or len(signature) < 64 or len(signature) > 88:
+        return False
+    
+    valid_chars = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+    return all(c in valid_chars for c in signature)
\ No newline at end of file
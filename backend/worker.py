@@ -0,0 +1,82 @@
+import argparse
+import os
+import signal
+import threading
+from supabase import create_client
+from dotenv import load_dotenv
+
+from services.token_service import TokenService
+from services.mint_worker import MintWorker
+from services.confirmation_tracker import get_confirmation_tracker
+from services.vault_ledger_service import VaultLedgerService
+from services.inventory_service import InventoryService
+
+load_dotenv()
+
+def main():
+    parser = argparse.ArgumentParser(description="VaultHive background mint worker")
+    parser.add_argument('--threads', type=int, default=int(os.getenv('MINT_WORKER_THREADS', 4)))
+    parser.add_argument('--poll-interval', type=float, default=float(os.getenv('MINT_WORKER_POLL_INTERVAL', 1.0)))
+    parser.add_argument('--confirmation-interval', type=float, default=float(os.getenv('CONFIRMATION_POLL_INTERVAL', 10.0)),
+                        help="Seconds between signature status sweeps (0 disables tracking)")
+    parser.add_argument('--checkpoint-interval', type=float, default=float(os.getenv('LEDGER_CHECKPOINT_INTERVAL', 3600)),
+                        help="Seconds between VAULT ledger checkpoints (0 disables)")
+    parser.add_argument('--reservation-sweep-interval', type=float, default=float(os.getenv('RESERVATION_SWEEP_INTERVAL', 30)),
+                        help="Seconds between releases of expired share reservations (0 disables)")
+    args = parser.parse_args()
+
+    supabase = create_client(os.environ.get("SUPABASE_URL"), os.environ.get("SUPABASE_ANON_KEY"))
+
+    # One TokenService (and Solana client) shared by every worker thread
+    token_service = TokenService(supabase)
+    worker = MintWorker(supabase, token_service, threads=args.threads, poll_interval=args.poll_interval)
+
+    # Follow up on stored signatures alongside the mint pool
+    tracker_stop = threading.Event()
+    if args.confirmation_interval > 0 and token_service.solana:
+        tracker = get_confirmation_tracker(supabase, token_service.solana)
+        threading.Thread(
+            target=tracker.run_forever,
+            args=(tracker_stop, args.confirmation_interval),
+            name='confirmation-tracker',
+            daemon=True
+        ).start()
+
+    # Snapshot ledger balances so verification only replays recent entries
+    if args.checkpoint_interval > 0:
+        ledger = VaultLedgerService(supabase)
+
+        def run_checkpoints():
+            while not tracker_stop.wait(args.checkpoint_interval):
+                try:
+                    ledger.create_checkpoint()
+                except Exception as e:
+                    print(f"⚠️ Ledger checkpoint failed: {e}")
+
+        threading.Thread(target=run_checkpoints, name='ledger-checkpoints', daemon=True).start()
+
+    # Put shares held by abandoned purchases back on sale
+    if args.reservation_sweep_interval > 0:
+        inventory = InventoryService(supabase)
+
+        def run_reservation_sweeps():
+            while not tracker_stop.wait(args.reservation_sweep_interval):
+                try:
+                    inventory.expire_reservations()
+                except Exception as e:
+                    print(f"⚠️ Reservation sweep failed: {e}")
+
+        threading.Thread(target=run_reservation_sweeps, name='reservation-sweeper', daemon=True).start()
+
+    def handle_shutdown(signum, frame):
+        print(f"📴 Received signal {signum}, shutting down...")
+        tracker_stop.set()
+        worker.stop()
+
+    signal.signal(signal.SIGTERM, handle_shutdown)
+    signal.signal(signal.SIGINT, handle_shutdown)
+
+    worker.run_forever()
+
+if __name__ == '__main__':
+    main()
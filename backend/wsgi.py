@@ -0,0 +1,8 @@
+from app import create_app
+from services.monad_service import get_contract_abis
+
+# Imported once in the gunicorn master when preload_app is on, so the
+# Solana/web3 imports and contract ABIs are shared copy-on-write by workers
+get_contract_abis()
+
+app = create_app()